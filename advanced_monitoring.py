@@ -5,17 +5,24 @@ Umfasst System-Health, Performance-Metriken und Smart Alerts
 """
 
 import logging
+import math
 import time
 import json
-import smtplib
 import psutil
+import threading
 import configparser
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+import numpy as np
+
+from alert_dispatcher import AlertDispatcher
+from heating_circuits import HeatPumpCycleDetector
+from sensor_rules import (RuleEvaluation, SensorRulesEngine, expected_sensors, sensor_kind,
+                          KIND_HUMIDITY, KIND_TEMPERATURE, STATE_OFFLINE, STATE_STALE)
+
 # Prometheus Metrics (optional)
 try:
     from prometheus_client import Gauge, Counter, Histogram, start_http_server
@@ -34,7 +41,8 @@ class AlertManager:
     """Smart Alert Management mit Cooldown und Priorisierung"""
     
     def __init__(self, config_path: str = "config.ini"):
-        self.config = configparser.ConfigParser()
+        # config.ini nutzt Kommentare hinter Werten ("300  # seconds")
+        self.config = configparser.ConfigParser(inline_comment_prefixes=('#',))
         self.config.read(config_path)
         
         self.alert_history = {}
@@ -48,6 +56,7 @@ class AlertManager:
             self.smtp_user = self.config.get('alerts', 'smtp_user', fallback='')
             self.smtp_password = self.config.get('alerts', 'smtp_password', fallback='')
             self.alert_recipients = self.config.get('alerts', 'recipients', fallback='').split(',')
+        self.dispatcher = AlertDispatcher.from_config(self.config) if self.smtp_enabled else None
     
     def check_alert_cooldown(self, alert_type: str) -> bool:
         """Prüft ob Alert-Cooldown abgelaufen ist"""
@@ -76,52 +85,125 @@ class AlertManager:
             self._send_email_alert(alert_type, message, priority)
     
     def _send_email_alert(self, alert_type: str, message: str, priority: str):
-        """Sendet E-Mail Alert"""
+        """Reiht E-Mail Alert ein - Zustellung im Dispatcher-Thread, blockiert den Zyklus nicht"""
+        self.dispatcher.submit(alert_type, message, priority)
+    
+    def close(self):
+        """Offene E-Mail Alerts zustellen und SMTP-Sitzung schließen"""
+        if self.dispatcher is not None:
+            self.dispatcher.stop(flush=True)
+
+class SystemMetricsSampler:
+    """Hintergrund-Sampler für CPU, RAM, Disk und SoC-Temperatur mit Ringpuffer"""
+    
+    METRICS = ('cpu_usage', 'memory_usage', 'disk_usage', 'cpu_temperature')
+    WINDOWS = {'1m': 60, '5m': 300, '15m': 900}
+    
+    def __init__(self, interval: float = 5.0, history: float = 900.0, disk_path: str = '/',
+                 temp_path: str = '/sys/class/thermal/thermal_zone0/temp',
+                 clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.temp_path = temp_path
+        self.clock = clock
+        self._samples = deque(maxlen=int(history / interval) + 1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        # Erster cpu_percent(None)-Aufruf liefert 0.0 - Referenzpunkt setzen
+        psutil.cpu_percent(interval=None)
+    
+    def _read_cpu_temperature(self) -> Optional[float]:
         try:
-            subject = f"🚨 Pi5 Sensor Alert [{priority.upper()}] - {alert_type}"
-            
-            msg = MIMEMultipart()
-            msg['From'] = self.smtp_user
-            msg['Subject'] = subject
-            
-            body = f"""
-            Pi 5 Sensor Monitor Alert
-            ========================
-            
-            Alert Type: {alert_type}
-            Priority: {priority.upper()}
-            Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            
-            Message:
-            {message}
-            
-            System: Raspberry Pi 5 Sensor Monitor
-            """
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_user, self.smtp_password)
-            
-            for recipient in self.alert_recipients:
-                if recipient.strip():
-                    msg['To'] = recipient.strip()
-                    server.send_message(msg)
-            
-            server.quit()
-            logger.info(f"E-Mail Alert gesendet: {alert_type}")
-            
-        except Exception as e:
-            logger.error(f"E-Mail Alert Fehler: {e}")
+            with open(self.temp_path, 'r') as f:
+                return int(f.read()) / 1000.0
+        except (OSError, ValueError):
+            return None
+    
+    def sample(self) -> Dict[str, Any]:
+        """Einen Messpunkt aufnehmen (nicht blockierend)"""
+        disk = psutil.disk_usage(self.disk_path)
+        sample = {
+            'time': self.clock(),
+            'cpu_usage': psutil.cpu_percent(interval=None),
+            'memory_usage': psutil.virtual_memory().percent,
+            'disk_usage': (disk.used / disk.total) * 100,
+            'cpu_temperature': self._read_cpu_temperature()
+        }
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+    
+    def start(self):
+        """Sampler-Thread starten (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='system-sampler', daemon=True)
+        self._thread.start()
+        logger.info(f"📈 System-Sampler gestartet (alle {self.interval}s)")
+    
+    def stop(self):
+        """Sampler-Thread stoppen"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"System-Sampler Fehler: {e}")
+    
+    def latest(self) -> Dict[str, Any]:
+        """Letzter Messpunkt - startet den Sampler bei Bedarf"""
+        self.start()
+        with self._lock:
+            if self._samples:
+                return self._samples[-1]
+        return self.sample()
+    
+    def window(self, seconds: float) -> List[Dict[str, Any]]:
+        """Messpunkte der letzten seconds Sekunden"""
+        cutoff = self.clock() - seconds
+        with self._lock:
+            return [s for s in self._samples if s['time'] >= cutoff]
+    
+    @staticmethod
+    def _percentile(sorted_values: List[float], q: float) -> float:
+        """Nearest-Rank Perzentil"""
+        rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+        return sorted_values[min(rank, len(sorted_values)) - 1]
+    
+    def percentiles(self, seconds: float, quantiles=(50, 95, 99)) -> Dict[str, Dict[str, float]]:
+        """Perzentile je Metrik über das Zeitfenster"""
+        samples = self.window(seconds)
+        result = {}
+        for metric in self.METRICS:
+            values = sorted(s[metric] for s in samples if s[metric] is not None)
+            if values:
+                result[metric] = {f'p{q}': round(self._percentile(values, q), 2) for q in quantiles}
+                result[metric]['max'] = round(values[-1], 2)
+        return result
+    
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Perzentile über 1/5/15 Minuten"""
+        return {name: self.percentiles(seconds) for name, seconds in self.WINDOWS.items()}
 
 class SystemHealthMonitor:
     """System Health Monitoring für Raspberry Pi 5"""
     
-    def __init__(self, alert_manager: AlertManager):
+    def __init__(self, alert_manager: AlertManager, sampler: Optional[SystemMetricsSampler] = None):
         self.alert_manager = alert_manager
         self.config = alert_manager.config
         
+        # Werte kommen vom Hintergrund-Sampler - kein blockierendes cpu_percent(interval=1)
+        self.sampler = sampler or SystemMetricsSampler(
+            interval=self.config.getfloat('health', 'sample_interval', fallback=5.0)
+        )
+        
         # Prometheus Metrics (optional)
         if PROMETHEUS_AVAILABLE:
             self.cpu_usage = Gauge('pi5_cpu_usage_percent', 'CPU Usage Percentage')
@@ -134,9 +216,10 @@ class SystemHealthMonitor:
     def check_system_health(self) -> Dict[str, Any]:
         """Überwacht System-Gesundheit"""
         health_data = {}
+        sample = self.sampler.latest()
         
         # CPU Usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = sample['cpu_usage']
         health_data['cpu_usage'] = cpu_percent
         
         cpu_threshold = self.config.getfloat('health', 'system_alert_cpu', fallback=80.0)
@@ -148,8 +231,7 @@ class SystemHealthMonitor:
             )
         
         # Memory Usage
-        memory = psutil.virtual_memory()
-        memory_percent = memory.percent
+        memory_percent = sample['memory_usage']
         health_data['memory_usage'] = memory_percent
         
         memory_threshold = self.config.getfloat('health', 'system_alert_memory', fallback=80.0)
@@ -161,8 +243,7 @@ class SystemHealthMonitor:
             )
         
         # Disk Usage
-        disk = psutil.disk_usage('/')
-        disk_percent = (disk.used / disk.total) * 100
+        disk_percent = sample['disk_usage']
         health_data['disk_usage'] = disk_percent
         
         disk_threshold = self.config.getfloat('health', 'system_alert_disk', fallback=90.0)
@@ -174,19 +255,14 @@ class SystemHealthMonitor:
             )
         
         # CPU Temperature (Pi 5 spezifisch)
-        try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                cpu_temp = int(f.read()) / 1000.0
-                health_data['cpu_temperature'] = cpu_temp
-                
-                if cpu_temp > 70.0:  # Pi 5 Throttling bei ~80°C
-                    self.alert_manager.send_alert(
-                        'high_cpu_temperature',
-                        f'CPU-Temperatur bei {cpu_temp:.1f}°C - Throttling-Gefahr!',
-                        'high'
-                    )
-        except:
-            health_data['cpu_temperature'] = None
+        cpu_temp = sample['cpu_temperature']
+        health_data['cpu_temperature'] = cpu_temp
+        if cpu_temp is not None and cpu_temp > 70.0:  # Pi 5 Throttling bei ~80°C
+            self.alert_manager.send_alert(
+                'high_cpu_temperature',
+                f'CPU-Temperatur bei {cpu_temp:.1f}°C - Throttling-Gefahr!',
+                'high'
+            )
         
         # Prometheus Metrics aktualisieren
         if PROMETHEUS_AVAILABLE:
@@ -198,122 +274,375 @@ class SystemHealthMonitor:
         
         return health_data
 
+def ewma_filter(u: np.ndarray, y0: float, alpha: float, chunk: Optional[int] = None) -> np.ndarray:
+    """y[t] = (1-alpha)*y[t-1] + alpha*u[t] für eine ganze Reihe - blockweise mit NumPy statt Python-Schleife"""
+    u = np.asarray(u, dtype=np.float64)
+    if alpha >= 1.0:
+        return u.copy()
+    decay = 1.0 - alpha
+    # Blocklänge so wählen, dass decay**-n numerisch harmlos bleibt (<= 1e8)
+    if chunk is None:
+        chunk = int(min(4096, max(1, np.log(1e-8) / np.log(decay))))
+    out = np.empty_like(u)
+    powers = decay ** np.arange(min(chunk, len(u)))
+    for start in range(0, len(u), chunk):
+        block = u[start:start + chunk]
+        pw = powers[:len(block)]
+        out[start:start + len(block)] = decay * pw * y0 + alpha * pw * np.cumsum(block / pw)
+        y0 = out[start + len(block) - 1]
+    return out
+
+class StreamingAnomalyDetector:
+    """Inkrementelle Anomalie-Erkennung pro Sensor: EWMA Mittelwert/Varianz, Median-of-N, Flatline
+    
+    Zustand liegt in Arrays (ein Eintrag pro Sensor), jeder Messwert kostet O(1).
+    - spike:    Rohwert weicht stark vom gleitenden Median der letzten N Werte ab
+    - shift:    Median-gefilterter Wert liegt mehr als z_threshold Standardabweichungen vom EWMA entfernt
+    - flatline: Wert hat sich seit flatline_minutes nicht verändert (hängender Sensor)
+    
+    Jede Messung zählt genau einmal: Werte mit einem Zeitstempel, der nicht neuer als der zuletzt
+    verarbeitete des Sensors ist (erneut gelieferter Snapshot), ändern den Zustand nicht.
+    """
+    
+    ANOMALIES = ('spike', 'shift', 'flatline')
+    
+    def __init__(self, config: Optional[configparser.ConfigParser] = None, sensors: List[str] = ()):
+        config = config or configparser.ConfigParser()
+        option = lambda key, fallback: float(str(config.get('anomaly', key, fallback=fallback)).strip())
+        self.alpha = option('alpha', 0.01)
+        self.z_threshold = option('z_threshold', 6.0)
+        self.spike_threshold = option('spike_threshold', 4.0)
+        self.spike_min = option('spike_min', 2.0)
+        self.median_window = max(1, int(option('median_window', 5)))
+        self.flatline_seconds = option('flatline_minutes', 60.0) * 60.0 or np.inf
+        self.flatline_epsilon = option('flatline_epsilon', 0.0)
+        self.warmup = int(option('warmup_samples', 60))
+        self.min_var = option('min_std', 0.1) ** 2
+        
+        self.sensors: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.window = np.empty((0, self.median_window))
+        self.pos = np.zeros(0, dtype=np.int64)
+        self.mean = np.empty(0)
+        self.var = np.empty(0)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.last_raw = np.empty(0)
+        self.flat_since = np.empty(0)
+        self.last_time = np.empty(0)
+        self.active = np.zeros((0, len(self.ANOMALIES)), dtype=bool)
+        self.add_sensors(sensors)
+    
+    def add_sensors(self, sensors) -> int:
+        """Neue Sensoren mit leerem Zustand aufnehmen"""
+        new = [s for s in dict.fromkeys(sensors) if s not in self.index]
+        for sensor in new:
+            self.index[sensor] = len(self.sensors)
+            self.sensors.append(sensor)
+        if new:
+            n = len(new)
+            self.window = np.vstack((self.window, np.full((n, self.median_window), np.nan)))
+            self.pos = np.concatenate((self.pos, np.zeros(n, dtype=np.int64)))
+            self.mean = np.concatenate((self.mean, np.full(n, np.nan)))
+            self.var = np.concatenate((self.var, np.zeros(n)))
+            self.count = np.concatenate((self.count, np.zeros(n, dtype=np.int64)))
+            self.last_raw = np.concatenate((self.last_raw, np.full(n, np.nan)))
+            self.flat_since = np.concatenate((self.flat_since, np.full(n, np.nan)))
+            self.last_time = np.concatenate((self.last_time, np.full(n, np.nan)))
+            self.active = np.vstack((self.active, np.zeros((n, len(self.ANOMALIES)), dtype=bool)))
+        return len(new)
+    
+    def std(self, sensor: str) -> float:
+        """Aktuelle EWMA-Standardabweichung eines Sensors"""
+        return float(np.sqrt(self.var[self.index[sensor]]))
+    
+    def _flags(self, raw, median, prev_mean, prev_var, count, now, flat_since):
+        """Anomalie-Matrix (spike, shift, flatline) - gemeinsam für Stream und Batch"""
+        std = np.sqrt(np.maximum(prev_var, self.min_var))
+        warm = count >= self.warmup
+        spike = warm & (np.abs(raw - median) > np.maximum(self.spike_threshold * std, self.spike_min))
+        shift = warm & (np.abs(median - prev_mean) > self.z_threshold * std)
+        flat = (now - flat_since) >= self.flatline_seconds
+        return np.stack((spike, shift, flat), axis=-1)
+    
+    def update(self, values: np.ndarray, now: Optional[float] = None) -> RuleEvaluation:
+        """Ein Zyklus für alle Sensoren (values in Sensor-Reihenfolge, NaN = kein Messwert)"""
+        now = time.monotonic() if now is None else now
+        values = np.asarray(values, dtype=np.float64)
+        # Nur neue Messungen - derselbe Snapshot ein zweites Mal würde Warm-up und Varianz verfälschen
+        with np.errstate(invalid='ignore'):
+            valid = ~np.isnan(values) & ~(now <= self.last_time)
+        previous = self.active.copy()
+        rows = np.nonzero(valid)[0]
+        x = values[rows]
+        self.last_time[rows] = now
+        
+        # Erster Wert: Fenster, Mittelwert und Flatline-Zeitpunkt initialisieren
+        first = self.count[rows] == 0
+        if first.any():
+            init = rows[first]
+            self.window[init] = x[first, None]
+            self.last_raw[init] = x[first]
+            self.flat_since[init] = now
+        
+        self.window[rows, self.pos[rows]] = x
+        self.pos[rows] = (self.pos[rows] + 1) % self.median_window
+        median = np.median(self.window[rows], axis=1)
+        if first.any():
+            self.mean[rows[first]] = median[first]
+            self.var[rows[first]] = 0.0
+        
+        prev_mean = self.mean[rows]
+        prev_var = self.var[rows]
+        changed = np.abs(x - self.last_raw[rows]) > self.flatline_epsilon
+        self.flat_since[rows] = np.where(changed, now, self.flat_since[rows])
+        self.last_raw[rows] = x
+        
+        self.active[rows] = self._flags(x, median, prev_mean, prev_var, self.count[rows], now,
+                                        self.flat_since[rows])
+        
+        # EWMA: mean += a*d, var = (1-a)*(var + a*d²)
+        delta = median - prev_mean
+        self.mean[rows] = prev_mean + self.alpha * delta
+        self.var[rows] = (1.0 - self.alpha) * (prev_var + self.alpha * delta * delta)
+        self.count[rows] += 1
+        
+        return RuleEvaluation(self.sensors, values, np.full(len(values), np.nan), self.active.copy(),
+                              self.active & ~previous, previous & ~self.active, self.ANOMALIES)
+    
+    def update_data(self, sensor_data: Dict[str, Optional[float]], now: Optional[float] = None) -> RuleEvaluation:
+        """Ein Zyklus aus einem Sensor-Dict"""
+        self.add_sensors(sensor_data)
+        values = np.full(len(self.sensors), np.nan)
+        for sensor, value in sensor_data.items():
+            if value is not None:
+                values[self.index[sensor]] = value
+        return self.update(values, now)
+    
+    def detect_batch(self, sensor: str, times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Aufgezeichnete Reihe eines Sensors auswerten (Replay) - gleiche Ergebnisse wie update()
+        
+        Gibt die Anomalie-Matrix (T x 3) zurück und übernimmt den Endzustand, sodass lange
+        Aufzeichnungen blockweise (z.B. tageweise) verarbeitet werden können.
+        """
+        self.add_sensors([sensor])
+        i = self.index[sensor]
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        flags = np.zeros((len(values), len(self.ANOMALIES)), dtype=bool)
+        valid = ~np.isnan(values)
+        t, x = times[valid], values[valid]
+        if not len(x):
+            return flags
+        
+        n = self.median_window
+        if self.count[i] == 0:
+            self.window[i] = x[0]
+            self.last_raw[i] = x[0]
+            self.flat_since[i] = t[0]
+        # Fenster in zeitlicher Reihenfolge (ältester Wert zuerst) vor die Reihe setzen
+        history = np.roll(self.window[i], -self.pos[i])[1:]
+        padded = np.concatenate((history, x))
+        median = np.median(np.lib.stride_tricks.sliding_window_view(padded, n), axis=1)
+        if self.count[i] == 0:
+            self.mean[i] = median[0]
+            self.var[i] = 0.0
+        
+        mean = ewma_filter(median, self.mean[i], self.alpha)
+        prev_mean = np.concatenate(([self.mean[i]], mean[:-1]))
+        delta = median - prev_mean
+        var = ewma_filter((1.0 - self.alpha) * delta * delta, self.var[i], self.alpha)
+        prev_var = np.concatenate(([self.var[i]], var[:-1]))
+        
+        # Flatline: Zeitpunkt der letzten Änderung per laufendem Maximum
+        previous_raw = np.concatenate(([self.last_raw[i]], x[:-1]))
+        changed = np.abs(x - previous_raw) > self.flatline_epsilon
+        last_change = np.maximum.accumulate(np.where(changed, np.arange(len(x)), -1))
+        flat_since = np.where(last_change >= 0, t[np.maximum(last_change, 0)], self.flat_since[i])
+        
+        count = self.count[i] + np.arange(len(x))
+        flags[valid] = self._flags(x, median, prev_mean, prev_var, count, t, flat_since)
+        
+        # Endzustand übernehmen
+        self.window[i] = padded[-n:]
+        self.pos[i] = 0
+        self.mean[i] = mean[-1]
+        self.var[i] = var[-1]
+        self.count[i] += len(x)
+        self.last_raw[i] = x[-1]
+        self.flat_since[i] = flat_since[-1]
+        self.last_time[i] = t[-1]
+        self.active[i] = flags[valid][-1]
+        return flags
+
 class SensorHealthMonitor:
-    """Spezielles Health Monitoring für Sensoren"""
+    """Spezielles Health Monitoring für Sensoren (Regel-Engine mit Grenzen pro Sensor)"""
     
-    def __init__(self, alert_manager: AlertManager):
+    UNITS = {KIND_TEMPERATURE: '°C', KIND_HUMIDITY: '%'}
+    
+    def __init__(self, alert_manager: AlertManager, kinds: Optional[Dict[str, str]] = None):
         self.alert_manager = alert_manager
         self.config = alert_manager.config
-        self.sensor_history = {}
-        self.last_readings = {}
+        # Grenzen werden einmalig kompiliert - pro Zyklus keine Config-Zugriffe
+        self.rules = SensorRulesEngine(self.config, kinds=kinds)
+        # Erwartete Sensoren vorab anmelden - auch ein nie gemeldeter Sensor geht offline
+        self.rules.add_sensors(expected_sensors(self.config))
+        self.staleness = self.rules.staleness
+        self.labels = ({key: value.strip('"') for key, value in self.config.items('labels')}
+                       if self.config.has_section('labels') else {})
+        self.anomalies = (StreamingAnomalyDetector(self.config)
+                          if self.config.getboolean('anomaly', 'enabled', fallback=True) else None)
+        # Verdichter-Takte der Wärmepumpe (None ohne Vorlauf/Rücklauf-Paar)
+        self.heat_pump = HeatPumpCycleDetector.from_config(self.config)
+    
+    def _name(self, sensor: str) -> str:
+        label = self.labels.get(sensor.lower())
+        return f'{label} ({sensor})' if label else sensor
     
-    def check_sensor_health(self, sensor_data: Dict[str, float]) -> Dict[str, Any]:
-        """Überwacht Sensor-Gesundheit"""
+    def _describe(self, sensor: str, rule: str, evaluation, i: int) -> Tuple[str, str, str]:
+        """Alert-Typ, Nachricht und Priorität für einen Regelverstoß"""
+        kind = self.rules.kinds.get(sensor) or sensor_kind(sensor)
+        unit = self.UNITS[kind]
+        name = self._name(sensor)
+        # Letzter gültiger Wert - auch wenn der Sensor in diesem Zyklus fehlt
+        value = self.rules.last_value[i]
+        
+        if rule == 'rate':
+            limit = self.rules.rate_limit[i]
+            return (f'{kind}_rate_{sensor}',
+                    f'{name}: {evaluation.rates[i]:+.1f}{unit}/min (max ±{limit:g}{unit}/min)', 'medium')
+        
+        limit = self.rules.high[i] if rule == 'high' else self.rules.low[i]
+        bound = 'max' if rule == 'high' else 'min'
+        priority = 'low' if kind == KIND_HUMIDITY and rule == 'low' else 'medium'
+        return f'{kind}_{rule}_{sensor}', f'{name}: {value:.1f}{unit} ({bound} {limit:g}{unit})', priority
+    
+    def _describe_anomaly(self, sensor: str, anomaly: str) -> Tuple[str, str, str]:
+        """Alert-Typ, Nachricht und Priorität für eine erkannte Anomalie"""
+        unit = self.UNITS[self.rules.kinds.get(sensor) or sensor_kind(sensor)]
+        name = self._name(sensor)
+        detector = self.anomalies
+        i = detector.index[sensor]
+        value, mean = detector.last_raw[i], detector.mean[i]
+        
+        if anomaly == 'flatline':
+            minutes = detector.flatline_seconds / 60
+            return (f'anomaly_flatline_{sensor}',
+                    f'{name}: Wert {value:.1f}{unit} seit {minutes:.0f} min unverändert (Sensor hängt?)', 'medium')
+        if anomaly == 'spike':
+            return (f'anomaly_spike_{sensor}',
+                    f'{name}: Ausreißer {value:.1f}{unit} (Mittel {mean:.1f}{unit})', 'low')
+        return (f'anomaly_shift_{sensor}',
+                f'{name}: Sprung auf {value:.1f}{unit} (Mittel {mean:.1f} ± {np.sqrt(detector.var[i]):.1f}{unit})',
+                'medium')
+    
+    def _handle_staleness_event(self, sensor: str, event: str, seconds: float):
+        """Zustandswechsel online → stale → offline → recovered - je Wechsel genau eine Meldung"""
+        name = self._name(sensor)
+        if event == 'stale':
+            logger.warning(f"⏳ Sensor {name} liefert seit {seconds:.0f}s keine Werte")
+        elif event == 'offline':
+            self.alert_manager.send_alert(f'sensor_offline_{sensor}',
+                                          f'Sensor {name} ist seit {seconds:.0f}s offline', 'high')
+        elif seconds > self.staleness.offline_after[self.staleness.index[sensor]]:
+            self.alert_manager.send_alert(f'sensor_recovered_{sensor}',
+                                          f'Sensor {name} ist wieder online (nach {seconds:.0f}s)', 'low')
+        else:
+            logger.info(f"✅ Sensor {name} liefert wieder Werte (nach {seconds:.0f}s)")
+    
+    def _handle_heat_pump_event(self, event: str, now: float):
+        """Verdichter-Start/-Stopp protokollieren, Takten (Short-Cycling) als Alert melden"""
+        detector = self.heat_pump
+        counters = detector.counters(now)
+        if event == 'start':
+            logger.info(f"♨️ Wärmepumpe gestartet ({counters['starts_last_hour']} Starts in der letzten Stunde)")
+        elif event == 'stop':
+            logger.info(f"♨️ Wärmepumpe aus nach {counters['last_runtime_s'] / 60:.1f} min")
+        elif event == 'short_cycling':
+            self.alert_manager.send_alert(
+                'heat_pump_short_cycling',
+                f"Wärmepumpe taktet: {counters['starts_last_hour']} Starts in der letzten Stunde "
+                f"(max {detector.max_starts_per_hour}), {counters['short_runs_last_hour']} Läufe kürzer als "
+                f"{detector.min_runtime / 60:.0f} min, letzte Laufzeit {counters['last_runtime_s'] / 60:.1f} min",
+                'medium')
+        else:
+            logger.info("✅ Wärmepumpe taktet nicht mehr")
+    
+    def check_sensor_health(self, sensor_data: Dict[str, float], now: Optional[float] = None) -> Dict[str, Any]:
+        """Überwacht Sensor-Gesundheit - ein vektorisierter Durchlauf pro Zyklus"""
+        now = time.monotonic() if now is None else now
+        evaluation = self.rules.evaluate_data(sensor_data, now)
+        
         health_info = {
             'total_sensors': len(sensor_data),
-            'active_sensors': 0,
-            'failed_sensors': [],
+            'active_sensors': sum(1 for value in sensor_data.values() if value is not None),
+            'failed_sensors': [sensor for sensor, value in sensor_data.items() if value is None],
             'temperature_alerts': [],
-            'humidity_alerts': []
+            'humidity_alerts': [],
+            'stale_sensors': self.staleness.sensors_in(STATE_STALE),
+            'offline_sensors': self.staleness.sensors_in(STATE_OFFLINE),
+            'anomalies': [],
+            'heat_pump': None
         }
         
-        current_time = datetime.now()
+        for sensor, event, seconds in evaluation.events:
+            self._handle_staleness_event(sensor, event, seconds)
         
-        for sensor_name, value in sensor_data.items():
-            if value is not None:
-                health_info['active_sensors'] += 1
-                self.last_readings[sensor_name] = current_time
-                
-                # Temperatur-Alerts
-                if 'DS18B20' in sensor_name or 'DHT22' in sensor_name:
-                    self._check_temperature_alerts(sensor_name, value, health_info)
-                
-                # Luftfeuchtigkeit-Alerts
-                if 'humidity' in sensor_name.lower():
-                    self._check_humidity_alerts(sensor_name, value, health_info)
-            else:
-                health_info['failed_sensors'].append(sensor_name)
-        
-        # Offline Sensoren prüfen
-        timeout = self.config.getint('alerts', 'sensor_offline_timeout', fallback=120)
-        for sensor_name, last_time in self.last_readings.items():
-            if (current_time - last_time).total_seconds() > timeout:
-                self.alert_manager.send_alert(
-                    f'sensor_offline_{sensor_name}',
-                    f'Sensor {sensor_name} ist seit {timeout}s offline',
-                    'high'
-                )
+        for sensor, rule in evaluation.active_alarms():
+            if rule == 'offline':
+                continue
+            _, message, _ = self._describe(sensor, rule, evaluation, self.rules.index[sensor])
+            kind = self.rules.kinds.get(sensor) or sensor_kind(sensor)
+            health_info['humidity_alerts' if kind == KIND_HUMIDITY else 'temperature_alerts'].append(message)
         
-        return health_info
-    
-    def _check_temperature_alerts(self, sensor_name: str, value: float, health_info: Dict):
-        """Prüft Temperatur-Schwellwerte"""
-        temp_high = self.config.getfloat('alerts', 'temperature_high', fallback=30.0)
-        temp_low = self.config.getfloat('alerts', 'temperature_low', fallback=10.0)
+        # Alerts nur beim Zustandswechsel - die Hysterese verhindert Flattern an der Grenze
+        for sensor, rule in evaluation.raised_alarms():
+            if rule == 'offline':
+                continue
+            alert_type, message, priority = self._describe(sensor, rule, evaluation, self.rules.index[sensor])
+            self.alert_manager.send_alert(alert_type, message, priority)
         
-        if value > temp_high:
-            alert_msg = f'{sensor_name}: {value:.1f}°C > {temp_high}°C'
-            health_info['temperature_alerts'].append(alert_msg)
-            self.alert_manager.send_alert(
-                f'temperature_high_{sensor_name}',
-                alert_msg,
-                'medium'
-            )
+        for sensor, rule in evaluation.cleared_alarms():
+            if rule == 'offline':
+                continue
+            alert_type, _, _ = self._describe(sensor, rule, evaluation, self.rules.index[sensor])
+            logger.info(f"✅ Alert aufgehoben: {alert_type}")
         
-        if value < temp_low:
-            alert_msg = f'{sensor_name}: {value:.1f}°C < {temp_low}°C'
-            health_info['temperature_alerts'].append(alert_msg)
-            self.alert_manager.send_alert(
-                f'temperature_low_{sensor_name}',
-                alert_msg,
-                'medium'
-            )
-    
-    def _check_humidity_alerts(self, sensor_name: str, value: float, health_info: Dict):
-        """Prüft Luftfeuchtigkeit-Schwellwerte"""
-        humidity_high = self.config.getfloat('alerts', 'humidity_high', fallback=80.0)
-        humidity_low = self.config.getfloat('alerts', 'humidity_low', fallback=30.0)
+        if self.anomalies is not None:
+            anomalies = self.anomalies.update_data(sensor_data, now)
+            for sensor, anomaly in anomalies.active_alarms():
+                health_info['anomalies'].append(self._describe_anomaly(sensor, anomaly)[1])
+            for sensor, anomaly in anomalies.raised_alarms():
+                self.alert_manager.send_alert(*self._describe_anomaly(sensor, anomaly))
         
-        if value > humidity_high:
-            alert_msg = f'{sensor_name}: {value:.1f}% > {humidity_high}%'
-            health_info['humidity_alerts'].append(alert_msg)
-            self.alert_manager.send_alert(
-                f'humidity_high_{sensor_name}',
-                alert_msg,
-                'medium'
-            )
+        if self.heat_pump is not None:
+            for event in self.heat_pump.update_data(sensor_data, now):
+                self._handle_heat_pump_event(event, now)
+            health_info['heat_pump'] = self.heat_pump.counters(now)
         
-        if value < humidity_low:
-            alert_msg = f'{sensor_name}: {value:.1f}% < {humidity_low}%'
-            health_info['humidity_alerts'].append(alert_msg)
-            self.alert_manager.send_alert(
-                f'humidity_low_{sensor_name}',
-                alert_msg,
-                'low'
-            )
+        return health_info
 
 class AdvancedMonitoringService:
     """Haupt-Monitoring-Service"""
     
-    def __init__(self, config_path: str = "config.ini"):
+    def __init__(self, config_path: str = "config.ini", start_exporter: bool = True):
         self.alert_manager = AlertManager(config_path)
         self.system_monitor = SystemHealthMonitor(self.alert_manager)
         self.sensor_monitor = SensorHealthMonitor(self.alert_manager)
         
-        # Prometheus Server starten (optional)
-        if PROMETHEUS_AVAILABLE:
+        # Prometheus Server starten (optional) - das Web Dashboard liefert /metrics selbst
+        if PROMETHEUS_AVAILABLE and start_exporter:
             try:
                 start_http_server(8000)
                 logger.info("🔍 Prometheus Metrics Server gestartet auf Port 8000")
             except Exception as e:
                 logger.warning(f"Prometheus Server Start fehlgeschlagen: {e}")
     
-    def run_monitoring_cycle(self, sensor_data: Dict[str, float]) -> Dict[str, Any]:
-        """Führt kompletten Monitoring-Zyklus aus"""
+    def run_monitoring_cycle(self, sensor_data: Dict[str, float], now: Optional[float] = None) -> Dict[str, Any]:
+        """Führt kompletten Monitoring-Zyklus aus - einmal pro Messung, now = deren Messzeit (monotonic)"""
         monitoring_results = {
             'timestamp': datetime.now().isoformat(),
             'system_health': self.system_monitor.check_system_health(),
-            'sensor_health': self.sensor_monitor.check_sensor_health(sensor_data)
+            'sensor_health': self.sensor_monitor.check_sensor_health(sensor_data, now)
         }
         
         # Summary Log
@@ -331,12 +660,24 @@ class AdvancedMonitoringService:
         if sensors['failed_sensors']:
             logger.warning(f"   ❌ Fehlerhafte Sensoren: {', '.join(sensors['failed_sensors'])}")
         
+        if sensors['offline_sensors']:
+            logger.warning(f"   📴 Offline: {', '.join(sensors['offline_sensors'])}")
+        
         if sensors['temperature_alerts']:
             logger.warning(f"   🌡️ Temperatur-Alerts: {len(sensors['temperature_alerts'])}")
         
         if sensors['humidity_alerts']:
             logger.warning(f"   💧 Luftfeuchtigkeit-Alerts: {len(sensors['humidity_alerts'])}")
         
+        if sensors['anomalies']:
+            logger.warning(f"   🔎 Anomalien: {len(sensors['anomalies'])}")
+        
+        heat_pump = sensors.get('heat_pump')
+        if heat_pump:
+            logger.info(f"   ♨️ Wärmepumpe: {'an' if heat_pump['running'] else 'aus'}, "
+                       f"{heat_pump['starts_last_hour']} Starts/h, "
+                       f"Ø Laufzeit {heat_pump['mean_runtime_s'] / 60:.1f} min")
+        
         return monitoring_results
 
 def main():
@@ -363,6 +704,7 @@ def main():
     
     print("\n📊 Monitoring-Ergebnisse:")
     print(json.dumps(results, indent=2, default=str))
+    monitoring.alert_manager.close()
 
 if __name__ == "__main__":
     main()
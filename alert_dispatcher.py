@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Asynchroner E-Mail Versand für Alerts
+Alerts landen in einer Queue und werden von einem eigenen Thread zugestellt:
+eine SMTP-Sitzung wird wiederverwendet, Alerts innerhalb eines Zeitfensters
+werden zu einer Sammel-Mail (Digest) zusammengefasst. Der Monitoring-Zyklus
+blockiert dadurch nie auf SMTP.
+"""
+
+import configparser
+import logging
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from email.mime.text import MIMEText
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ORDER = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+
+class AlertDispatcher:
+    """Zustell-Thread mit Queue, wiederverwendeter SMTP-Sitzung und Digest-Fenster"""
+
+    def __init__(self, smtp_server: str, smtp_port: int = 587, smtp_user: str = '',
+                 smtp_password: str = '', recipients: Optional[List[str]] = None,
+                 use_tls: bool = True, digest_window: float = 30.0, idle_timeout: float = 120.0,
+                 max_queue: int = 1000, timeout: float = 30.0, sender: Optional[str] = None,
+                 smtp_factory: Callable[..., smtplib.SMTP] = smtplib.SMTP):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.smtp_user = smtp_user
+        self.smtp_password = smtp_password
+        self.recipients = [r.strip() for r in (recipients or []) if r.strip()]
+        self.use_tls = use_tls
+        self.digest_window = digest_window
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.sender = sender or smtp_user or 'pi5-sensor-monitor@localhost'
+        self.smtp_factory = smtp_factory
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._flush_now = threading.Event()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = object()
+
+        self.stats = {'queued': 0, 'dropped': 0, 'mails': 0, 'delivered': 0, 'failed': 0, 'connections': 0}
+        self.latencies = deque(maxlen=1000)
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser, **kwargs) -> 'AlertDispatcher':
+        """Dispatcher aus [alerts] in config.ini"""
+        return cls(
+            smtp_server=config.get('alerts', 'smtp_server', fallback='smtp.gmail.com'),
+            smtp_port=config.getint('alerts', 'smtp_port', fallback=587),
+            smtp_user=config.get('alerts', 'smtp_user', fallback=''),
+            smtp_password=config.get('alerts', 'smtp_password', fallback=''),
+            recipients=config.get('alerts', 'recipients', fallback='').split(','),
+            use_tls=config.getboolean('alerts', 'smtp_tls', fallback=True),
+            digest_window=config.getfloat('alerts', 'digest_window', fallback=30.0),
+            idle_timeout=config.getfloat('alerts', 'smtp_idle_timeout', fallback=120.0),
+            **kwargs)
+
+    # ------------------------------------------------------------------
+    # Öffentliche API (aus dem Monitoring-Zyklus)
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+            self._thread.start()
+
+    def submit(self, alert_type: str, message: str, priority: str = 'medium') -> bool:
+        """Alert einreihen - kehrt sofort zurück, bei voller Queue wird verworfen"""
+        alert = {'type': alert_type, 'message': message, 'priority': priority,
+                 'time': datetime.now(), 'queued': time.monotonic()}
+        with self._idle:
+            self._pending += 1
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self._done(1)
+            self.stats['dropped'] += 1
+            logger.warning(f"⚠️ Alert-Queue voll - {alert_type} verworfen")
+            return False
+        self.stats['queued'] += 1
+        self.start()
+        # Kritische Alerts warten nicht auf das Digest-Fenster
+        if priority == 'critical':
+            self._flush_now.set()
+        return True
+
+    def flush(self, timeout: Optional[float] = None, force: bool = True) -> bool:
+        """Warten, bis alle offenen Alerts zugestellt sind (force: Digest-Fenster nicht abwarten)"""
+        with self._idle:
+            if self._pending and force:
+                self._flush_now.set()
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, flush: bool = True, timeout: float = 30.0):
+        """Thread beenden (optional nach Zustellung aller offenen Alerts)"""
+        if flush:
+            self.flush(timeout)
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(self._stop)
+            self._flush_now.set()
+            self._thread.join(timeout)
+        self._thread = None
+        self._disconnect()
+
+    # ------------------------------------------------------------------
+    # Zustell-Thread
+    # ------------------------------------------------------------------
+    def _done(self, count: int):
+        with self._idle:
+            self._pending -= count
+            if not self._pending:
+                self._flush_now.clear()
+            self._idle.notify_all()
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=min(self.idle_timeout, 5.0))
+            except queue.Empty:
+                if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                    self._disconnect()
+                continue
+            if first is self._stop:
+                return
+
+            # Digest-Fenster: weitere Alerts sammeln, bis das Fenster abläuft oder geflusht wird
+            batch = [first]
+            deadline = time.monotonic() + self.digest_window
+            stop = False
+            while not self._flush_now.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    alert = self.queue.get(timeout=min(remaining, 0.05))
+                except queue.Empty:
+                    continue
+                if alert is self._stop:
+                    stop = True
+                    break
+                batch.append(alert)
+            # Was bis jetzt in der Queue liegt, kommt mit in diese Mail
+            while True:
+                try:
+                    alert = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if alert is self._stop:
+                    stop = True
+                    break
+                batch.append(alert)
+
+            try:
+                self._deliver(batch)
+            finally:
+                self._done(len(batch))
+            if stop:
+                return
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = self.smtp_factory(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.smtp_user:
+            smtp.login(self.smtp_user, self.smtp_password)
+        self.stats['connections'] += 1
+        logger.debug(f"📧 SMTP-Sitzung zu {self.smtp_server}:{self.smtp_port} geöffnet")
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _send(self, msg: MIMEText):
+        """Über die bestehende Sitzung senden - bei abgebrochener Verbindung einmal neu verbinden"""
+        for attempt in range(2):
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.send_message(msg, from_addr=self.sender, to_addrs=self.recipients)
+                self._last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError):
+                self._smtp.close()
+                self._smtp = None
+                if attempt:
+                    raise
+
+    def _deliver(self, batch: List[Dict[str, Any]]):
+        if not self.recipients:
+            logger.warning(f"⚠️ Keine Empfänger konfiguriert - {len(batch)} Alert(s) nicht versendet")
+            self.stats['failed'] += len(batch)
+            return
+        msg = self.build_message(batch)
+        try:
+            self._send(msg)
+        except Exception as e:
+            self.stats['failed'] += len(batch)
+            logger.error(f"E-Mail Alert Fehler: {e}")
+            return
+
+        now = time.monotonic()
+        self.latencies.extend(now - alert['queued'] for alert in batch)
+        self.stats['mails'] += 1
+        self.stats['delivered'] += len(batch)
+        logger.info(f"E-Mail Alert gesendet: {msg['Subject']}")
+
+    def build_message(self, batch: List[Dict[str, Any]]) -> MIMEText:
+        """Einzel-Mail oder Digest (nach Priorität sortiert)"""
+        batch = sorted(batch, key=lambda a: (PRIORITY_ORDER.get(a['priority'], 9), a['time']))
+        top = batch[0]
+        if len(batch) == 1:
+            subject = f"🚨 Pi5 Sensor Alert [{top['priority'].upper()}] - {top['type']}"
+            body = (f"Pi 5 Sensor Monitor Alert\n"
+                    f"========================\n\n"
+                    f"Alert Type: {top['type']}\n"
+                    f"Priority: {top['priority'].upper()}\n"
+                    f"Time: {top['time'].strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                    f"Message:\n{top['message']}\n\n"
+                    f"System: Raspberry Pi 5 Sensor Monitor\n")
+        else:
+            subject = f"🚨 Pi5 Sensor Alerts [{top['priority'].upper()}] - {len(batch)} Alerts"
+            lines = [f"[{a['time'].strftime('%H:%M:%S')}] {a['priority'].upper():<8} {a['type']}: {a['message']}"
+                     for a in batch]
+            body = (f"Pi 5 Sensor Monitor Alert-Zusammenfassung\n"
+                    f"=========================================\n\n"
+                    f"{len(batch)} Alerts zwischen {min(a['time'] for a in batch).strftime('%H:%M:%S')} "
+                    f"und {max(a['time'] for a in batch).strftime('%H:%M:%S')}:\n\n"
+                    + '\n'.join(lines) +
+                    "\n\nSystem: Raspberry Pi 5 Sensor Monitor\n")
+
+        msg = MIMEText(body, 'plain', 'utf-8')
+        msg['From'] = self.sender
+        msg['To'] = ', '.join(self.recipients)
+        msg['Subject'] = subject
+        return msg
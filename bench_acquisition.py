@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Erfassungs-Benchmark für Pi 5 Sensor Monitor
+Misst echte Erfassungszyklen über den simulierten 1-Wire Bus (SimulatedW1Backend)
+und einen simulierten DHT22 - ohne Hardware, ohne gepatchte Lesefunktionen:
+- DS18B20 sequenziell vs. parallel vs. Bulk-Konvertierung, 1 bis 64 Sensoren
+- DHT22 blockierend (Retry-Pausen) vs. gecacht
+Pro Variante: Zyklus-Latenz p50/p90/p99, CPU-Zeit und Allokationen pro Zyklus.
+Baselines werden als JSON gespeichert; --baseline vergleicht und meldet Regressionen.
+
+Die Konvertierungszeit ist standardmäßig auf 10ms verkürzt (echter DS18B20: 750ms),
+die Verhältnisse zwischen den Varianten bleiben gleich.
+
+Beispiele:
+    python bench_acquisition.py
+    python bench_acquisition.py --sensors 1,8,64 --cycles 10 --save-baseline bench_acquisition.json
+    python bench_acquisition.py --baseline bench_acquisition.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from sensor_monitor import Pi5DHT22Sensor, Pi5DS18B20Manager
+from w1_backend import SimulatedW1Backend
+
+DS18B20_MODES = ('sequential', 'parallel', 'bulk')
+DHT22_MODES = ('blocking', 'cached')
+
+# Unterhalb dieser Differenz ist eine p99-Abweichung Rauschen
+NOISE_FLOOR_MS = 1.0
+
+
+class SimulatedDHT22:
+    """Stand-in für adafruit_dht.DHT22: ~5ms Bit-Banging, gelegentliche Prüfsummenfehler"""
+
+    def __init__(self, failure_rate: float = 0.2, read_time: float = 0.005, seed: Optional[int] = None):
+        self.failure_rate = failure_rate
+        self.read_time = read_time
+        self.random = random.Random(seed)
+        self._humidity = None
+
+    @property
+    def temperature(self) -> float:
+        time.sleep(self.read_time)
+        if self.random.random() < self.failure_rate:
+            raise RuntimeError('Checksum did not validate. Try again.')
+        self._humidity = round(self.random.uniform(45, 60), 1)
+        return round(self.random.uniform(20, 23), 1)
+
+    @property
+    def humidity(self) -> float:
+        return self._humidity
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def measure(cycle: Callable[[], object], cycles: int, warmup: int = 1) -> Dict[str, float]:
+    """Latenz-Perzentile, CPU-Zeit und Allokationen pro Zyklus"""
+    for _ in range(warmup):
+        cycle()
+
+    latencies = []
+    cpu_start = time.process_time()
+    for _ in range(cycles):
+        start = time.perf_counter()
+        cycle()
+        latencies.append(time.perf_counter() - start)
+    cpu = time.process_time() - cpu_start
+
+    # Allokationen getrennt messen - tracemalloc verfälscht die Latenz
+    tracemalloc.start()
+    peaks = []
+    baseline = tracemalloc.get_traced_memory()[0]
+    for _ in range(max(1, cycles // 2)):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        cycle()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    return {
+        'cycles': cycles,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+        'cpu_ms_per_cycle': round(cpu * 1000 / cycles, 3),
+        'alloc_peak_kib_per_cycle': round(sum(peaks) / len(peaks) / 1024, 2),
+        'retained_bytes_per_cycle': int(retained / len(peaks)),
+    }
+
+
+def ds18b20_cycle(mode: str, sensors: int, conversion_time: float, seed: int) -> Callable[[], object]:
+    backend = SimulatedW1Backend(sensors=sensors, conversion_time=conversion_time, seed=seed)
+    manager = Pi5DS18B20Manager(high_performance=True, backend=backend, bulk_conversion=mode == 'bulk')
+    if mode == 'sequential':
+        return manager._sequential_temperature_reading
+    if mode == 'parallel':
+        return manager._parallel_temperature_reading
+    return manager.get_all_temperatures
+
+
+def dht22_cycle(mode: str, failure_rate: float, interval: float, seed: int) -> Callable[[], object]:
+    sensor = Pi5DHT22Sensor(pin=18)
+    sensor.available = True
+    sensor.sensor = SimulatedDHT22(failure_rate=failure_rate, seed=seed)
+    def cycle():
+        # Zyklus-Intervall simulieren, ohne zu schlafen: der letzte Wert altert um interval
+        if sensor._last_good is not None:
+            stamp, temperature, humidity = sensor._last_good
+            sensor._last_good = (stamp - interval, temperature, humidity)
+        if mode == 'cached':
+            return sensor.read_cached(max_age=30.0)
+        return sensor.read_data()
+
+    return cycle
+
+
+def run(sensor_counts: List[int], modes: List[str], cycles: int, conversion_time: float,
+        dht_failure_rate: float, dht_cycles: int, seed: int) -> Dict[str, Dict]:
+    results = {}
+    for sensors in sensor_counts:
+        for mode in modes:
+            results[f'ds18b20:{mode}:{sensors}'] = dict(
+                measure(ds18b20_cycle(mode, sensors, conversion_time, seed), cycles),
+                sensors=sensors, mode=mode)
+    for mode in DHT22_MODES:
+        results[f'dht22:{mode}'] = dict(
+            measure(dht22_cycle(mode, dht_failure_rate, 5.0, seed), dht_cycles), mode=mode)
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Regressionen: p99 oder CPU-Zeit mehr als tolerance über der Baseline"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric in ('p99_ms', 'cpu_ms_per_cycle'):
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > NOISE_FLOOR_MS:
+                regressions.append(f"{key} {metric}: {old:.2f} → {new:.2f} (+{(new / old - 1) * 100 if old else 0:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Erfassungs-Benchmark (simulierter Bus)')
+    parser.add_argument('--sensors', default='1,8,16,32,64', help='Sensor-Anzahlen, kommagetrennt')
+    parser.add_argument('--modes', default=','.join(DS18B20_MODES), help='DS18B20 Varianten')
+    parser.add_argument('--cycles', type=int, default=20, help='Zyklen pro Variante')
+    parser.add_argument('--conversion-time', type=float, default=0.01,
+                        help='Simulierte DS18B20 Konvertierungszeit (s, echt: 0.75)')
+    parser.add_argument('--dht-failure-rate', type=float, default=0.2, help='Anteil fehlerhafter DHT22 Lesungen')
+    parser.add_argument('--dht-cycles', type=int, default=20, help='Zyklen für den DHT22')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    parser.add_argument('--save-baseline', metavar='DATEI', help='Ergebnis als Baseline speichern')
+    parser.add_argument('--baseline', metavar='DATEI', help='Mit Baseline vergleichen (Exit-Code 1 bei Regression)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Erlaubte Verschlechterung (Anteil)')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    sensor_counts = [int(n) for n in args.sensors.split(',') if n.strip()]
+    modes = [m.strip() for m in args.modes.split(',') if m.strip() in DS18B20_MODES]
+    results = run(sensor_counts, modes, args.cycles, args.conversion_time,
+                  args.dht_failure_rate, args.dht_cycles, args.seed)
+    report = {
+        'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                 'conversion_time': args.conversion_time, 'cycles': args.cycles,
+                 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        report['regressions'] = regressions
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 1 if regressions else 0
+
+    print(f"⏱️ Erfassungs-Benchmark: Konvertierung {args.conversion_time * 1000:g}ms, {args.cycles} Zyklen pro Variante")
+    print(f"   {'Variante':<24} {'p50':>9} {'p90':>9} {'p99':>9} {'CPU/Zyklus':>11} {'Alloc/Zyklus':>13}")
+    for key, row in results.items():
+        print(f"   {key:<24} {row['p50_ms']:>7.1f}ms {row['p90_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms "
+              f"{row['cpu_ms_per_cycle']:>9.2f}ms {row['alloc_peak_kib_per_cycle']:>9.1f} KiB")
+    if args.save_baseline:
+        print(f"💾 Baseline gespeichert: {args.save_baseline}")
+    if args.baseline:
+        if regressions:
+            print(f"❌ {len(regressions)} Regression(en) gegenüber {args.baseline}:")
+            for line in regressions:
+                print(f"   {line}")
+        else:
+            print(f"✅ Keine Regression gegenüber {args.baseline} (Toleranz {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
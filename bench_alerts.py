@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Alert-Sturm Benchmark für den E-Mail Versand
+Startet einen lokalen SMTP-Stand-in (eingebauter Minimal-Server statt aiosmtpd,
+mit simulierter Dauer für Verbindungsaufbau und Login) und vergleicht:
+- bisher: pro Alert neue Verbindung + Login, synchron im Monitoring-Zyklus
+- AlertDispatcher: Queue, eine SMTP-Sitzung, Digest-Fenster
+
+Beispiele:
+    python bench_alerts.py
+    python bench_alerts.py --alerts 100 --handshake-delay 0.3 --digest-window 2 --json
+"""
+
+import argparse
+import base64
+import json
+import logging
+import smtplib
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from email.mime.text import MIMEText
+from typing import List
+
+from alert_dispatcher import AlertDispatcher
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimaler SMTP-Dialog: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        # Verbindungsaufbau (TCP + TLS bei echten Servern) kostet Zeit
+        time.sleep(server.handshake_delay)
+        self.reply('220 localhost SMTP stand-in')
+        recipients: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 AUTH PLAIN')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'AUTH':
+                time.sleep(server.handshake_delay)
+                parts = command.split()
+                credentials = base64.b64decode(parts[2]).split(b'\0') if len(parts) > 2 else []
+                server.logins.append(credentials[1].decode() if len(credentials) > 1 else '')
+                self.reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(chunk)
+                with server.lock:
+                    server.messages.append({'to': recipients, 'data': b''.join(data), 'time': time.monotonic()})
+                self.reply('250 OK queued')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Lokaler SMTP-Stand-in für Tests und Benchmarks (sammelt empfangene Mails)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay: float = 0.0):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.handshake_delay = handshake_delay
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins: List[str] = []
+        self.messages: List[dict] = []
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def legacy_send(port: int, alert_type: str, message: str):
+    """Bisheriges Verhalten: neue Verbindung und Login pro Alert"""
+    msg = MIMEText(message, 'plain', 'utf-8')
+    msg['From'] = 'pi5@localhost'
+    msg['Subject'] = f"🚨 Pi5 Sensor Alert [HIGH] - {alert_type}"
+    msg['To'] = 'admin@localhost'
+    server = smtplib.SMTP('127.0.0.1', port, timeout=30)
+    server.login('pi5', 'secret')
+    server.send_message(msg)
+    server.quit()
+
+
+def storm(count: int) -> List[tuple]:
+    """Pumpe ausgefallen: alle Heizkreise melden gleichzeitig"""
+    return [(f'temperature_low_DS18B20_{i % 8 + 1}_{i}', f'Alert {i}: Vorlauf fällt', 'high')
+            for i in range(count)]
+
+
+def bench_legacy(alerts: int, handshake_delay: float) -> dict:
+    with LocalSMTPServer(handshake_delay) as server:
+        start = time.perf_counter()
+        for alert_type, message, _ in storm(alerts):
+            legacy_send(server.port, alert_type, message)
+        blocked = time.perf_counter() - start
+        return {'blocked_s': round(blocked, 3), 'delivery_s': round(blocked, 3),
+                'mails': len(server.messages), 'connections': server.connections}
+
+
+def bench_dispatcher(alerts: int, handshake_delay: float, digest_window: float) -> dict:
+    with LocalSMTPServer(handshake_delay) as server:
+        dispatcher = AlertDispatcher('127.0.0.1', server.port, 'pi5', 'secret', ['admin@localhost'],
+                                     use_tls=False, digest_window=digest_window)
+        start = time.perf_counter()
+        submit_times = []
+        for alert_type, message, priority in storm(alerts):
+            t0 = time.perf_counter()
+            dispatcher.submit(alert_type, message, priority)
+            submit_times.append(time.perf_counter() - t0)
+        blocked = time.perf_counter() - start
+        dispatcher.flush(timeout=60, force=False)
+        delivery = time.perf_counter() - start
+        dispatcher.stop()
+        latencies = sorted(dispatcher.latencies)
+        return {'blocked_s': round(blocked, 4), 'delivery_s': round(delivery, 3),
+                'submit_max_ms': round(max(submit_times) * 1000, 3),
+                'latency_p50_s': round(statistics.median(latencies), 3) if latencies else None,
+                'latency_max_s': round(latencies[-1], 3) if latencies else None,
+                'mails': len(server.messages), 'connections': server.connections,
+                'alerts_delivered': dispatcher.stats['delivered']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alert-Sturm Benchmark (SMTP)')
+    parser.add_argument('--alerts', type=int, default=100, help='Anzahl gleichzeitiger Alerts')
+    parser.add_argument('--handshake-delay', type=float, default=0.1,
+                        help='Simulierte Dauer von Verbindungsaufbau und Login je Schritt (s)')
+    parser.add_argument('--digest-window', type=float, default=1.0, help='Digest-Fenster (s)')
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    results = {'legacy': bench_legacy(args.alerts, args.handshake_delay),
+               'dispatcher': bench_dispatcher(args.alerts, args.handshake_delay, args.digest_window)}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    legacy, dispatcher = results['legacy'], results['dispatcher']
+    print(f"📧 Alert-Sturm: {args.alerts} Alerts, Handshake {args.handshake_delay * 1000:.0f}ms, "
+          f"Digest-Fenster {args.digest_window:g}s")
+    print(f"   Bisher:     Zyklus blockiert {legacy['blocked_s']:.2f}s, "
+          f"{legacy['mails']} Mails über {legacy['connections']} Verbindungen")
+    print(f"   Dispatcher: Zyklus blockiert {dispatcher['blocked_s'] * 1000:.2f}ms "
+          f"(max {dispatcher['submit_max_ms']:.3f}ms pro Alert), zugestellt nach {dispatcher['delivery_s']:.2f}s")
+    print(f"               {dispatcher['alerts_delivered']} Alerts in {dispatcher['mails']} Mail(s) über "
+          f"{dispatcher['connections']} Verbindung(en), Latenz p50 {dispatcher['latency_p50_s']:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark für die Anomalie-Erkennung (StreamingAnomalyDetector)
+Spielt synthetische Heizungsdaten im 5s-Raster ab (Standard: 8 Sensoren, ein Jahr)
+mit eingestreuten Ausreißern und hängenden Sensoren - tageweise im Batch-Modus -
+und misst zusätzlich die Kosten eines Live-Zyklus.
+
+Beispiele:
+    python bench_anomaly.py
+    python bench_anomaly.py --days 30 --sensors 4 --json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+import numpy as np
+
+from advanced_monitoring import StreamingAnomalyDetector
+
+INTERVAL = 5.0
+SAMPLES_PER_DAY = int(86400 / INTERVAL)
+
+
+def synthetic_day(rng: np.random.Generator, day: int, base: float):
+    """Ein Tag Vorlauf-/Rücklauftemperatur mit Takten der Wärmepumpe und Störungen"""
+    t = (day * SAMPLES_PER_DAY + np.arange(SAMPLES_PER_DAY)) * INTERVAL
+    season = 6.0 * np.cos(2 * np.pi * t / (365 * 86400))
+    cycles = 4.0 * np.clip(np.sin(2 * np.pi * t / 5400), 0, None)  # WP-Takt ~90 min
+    values = base + season + cycles + rng.normal(0, 0.1, SAMPLES_PER_DAY)
+    values = np.round(values / 0.0625) * 0.0625  # DS18B20 Auflösung
+
+    spikes = rng.choice(SAMPLES_PER_DAY, size=rng.poisson(2), replace=False)
+    values[spikes] += rng.choice([-1, 1], len(spikes)) * rng.uniform(6, 15, len(spikes))
+    stuck = []
+    if rng.random() < 0.05:  # hängt gelegentlich für 2h
+        start = int(rng.integers(0, SAMPLES_PER_DAY - 1440))
+        values[start:start + 1440] = values[start]
+        stuck.append(start)
+    return t, values, spikes, stuck
+
+
+def bench_replay(days: int, sensors: int, seed: int) -> dict:
+    detector = StreamingAnomalyDetector()
+    rng = np.random.default_rng(seed)
+    samples = injected_spikes = detected_spikes = injected_stuck = detected_stuck = 0
+    counts = dict.fromkeys(detector.ANOMALIES, 0)
+    generate = compute = 0.0
+
+    for s in range(sensors):
+        sensor = f'DS18B20_{s + 1}'
+        base = 30.0 + 5 * s
+        for day in range(days):
+            start = time.perf_counter()
+            t, values, spikes, stuck = synthetic_day(rng, day, base)
+            generate += time.perf_counter() - start
+
+            start = time.perf_counter()
+            flags = detector.detect_batch(sensor, t, values)
+            compute += time.perf_counter() - start
+
+            samples += len(values)
+            for j, anomaly in enumerate(detector.ANOMALIES):
+                counts[anomaly] += int(np.count_nonzero(flags[1:, j] & ~flags[:-1, j]) + flags[0, j])
+            injected_spikes += len(spikes)
+            detected_spikes += int(flags[spikes, 0].sum())
+            for begin in stuck:
+                injected_stuck += 1
+                detected_stuck += int(flags[begin:begin + 1440, 2].any())
+
+    return {
+        'samples': samples,
+        'seconds': round(compute, 2),
+        'generate_seconds': round(generate, 2),
+        'samples_per_s': int(samples / compute) if compute else None,
+        'events': counts,
+        'spike_recall': round(detected_spikes / injected_spikes, 3) if injected_spikes else None,
+        'flatline_recall': round(detected_stuck / injected_stuck, 3) if injected_stuck else None,
+    }
+
+
+def bench_stream(sensors: int, cycles: int, seed: int) -> dict:
+    detector = StreamingAnomalyDetector(sensors=[f'DS18B20_{i}' for i in range(sensors)])
+    values = 40 + np.random.default_rng(seed).normal(0, 0.5, (cycles, sensors))
+    start = time.perf_counter()
+    for cycle, row in enumerate(values):
+        detector.update(row, now=cycle * INTERVAL)
+    elapsed = time.perf_counter() - start
+    return {'sensors': sensors, 'cycles': cycles, 'ms_per_cycle': round(elapsed * 1000 / cycles, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark der Anomalie-Erkennung')
+    parser.add_argument('--days', type=int, default=365, help='Abgespielte Tage pro Sensor')
+    parser.add_argument('--sensors', type=int, default=8, help='Anzahl Sensoren')
+    parser.add_argument('--cycles', type=int, default=2000, help='Live-Zyklen für den Stream-Benchmark')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    replay = bench_replay(args.days, args.sensors, args.seed)
+    stream = bench_stream(args.sensors, args.cycles, args.seed)
+
+    if args.json:
+        print(json.dumps({'replay': replay, 'stream': stream}, indent=2))
+        return 0
+
+    print(f"🔎 Replay: {args.sensors} Sensoren x {args.days} Tage ({replay['samples']:,} Werte im 5s-Raster)")
+    print(f"   ⏱️ Auswertung: {replay['seconds']:.2f}s ({replay['samples_per_s']:,} Werte/s), "
+          f"Datenerzeugung: {replay['generate_seconds']:.2f}s")
+    print(f"   📈 Ereignisse: {', '.join(f'{k} {v}' for k, v in replay['events'].items())}")
+    print(f"   🎯 Erkannt: Ausreißer {replay['spike_recall']:.1%}, hängende Sensoren "
+          f"{replay['flatline_recall'] if replay['flatline_recall'] is None else format(replay['flatline_recall'], '.1%')}")
+    print(f"⚡ Live: {stream['ms_per_cycle']:.3f}ms pro Zyklus für {stream['sensors']} Sensoren")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Startzeit-Benchmark für Pi 5 Sensor Monitor
+Misst in frischen Interpretern die Import-Zeit der Module, welche schweren
+Bibliotheken dabei geladen werden und ob der Import Dateien anlegt.
+
+Beispiele:
+    python bench_startup.py
+    python bench_startup.py --runs 20 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TARGETS = ('sensor_monitor', 'sensor_influxdb', 'mqtt_bridge', 'web_dashboard')
+
+# Bibliotheken, die ein 'single'-Lauf oder ein Import nicht laden sollte
+HEAVY_MODULES = ('flask', 'flask_socketio', 'influxdb_client', 'adafruit_dht', 'board',
+                 'gpiozero', 'lgpio', 'paho', 'prometheus_client', 'numpy')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    import {module}
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy, 'modules': len(sys.modules), 'error': error}}))
+"""
+
+
+def probe_import(module: str, repo: str) -> dict:
+    """Ein Import in einem frischen Interpreter, in leerem Arbeitsverzeichnis"""
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, PYTHONPATH=repo, PYTHONDONTWRITEBYTECODE='1')
+        wall_start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=workdir, env=env, capture_output=True, text=True, timeout=120)
+        wall = time.perf_counter() - wall_start
+        created = sorted(os.listdir(workdir))
+    lines = [line for line in result.stdout.splitlines() if line.startswith('{')]
+    if not lines:
+        return {'seconds': None, 'wall': wall, 'heavy': [], 'modules': 0, 'created': created,
+                'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'keine Ausgabe'}
+    data = json.loads(lines[-1])
+    data['wall'] = wall
+    data['created'] = created
+    return data
+
+
+def probe_interpreter() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startzeit-Benchmark (Import ohne Seiteneffekte)')
+    parser.add_argument('--runs', type=int, default=5, help='Wiederholungen je Modul')
+    parser.add_argument('--modules', nargs='*', default=list(TARGETS), help='Zu messende Module')
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    args = parser.parse_args()
+
+    repo = os.path.dirname(os.path.abspath(__file__))
+    baseline = statistics.median(probe_interpreter() for _ in range(args.runs))
+    results = {}
+    for module in args.modules:
+        runs = [probe_import(module, repo) for _ in range(args.runs)]
+        last = runs[-1]
+        times = [r['seconds'] for r in runs if r['seconds'] is not None]
+        results[module] = {
+            'import_ms': round(statistics.median(times) * 1000, 1) if times else None,
+            'import_min_ms': round(min(times) * 1000, 1) if times else None,
+            'process_ms': round(statistics.median(r['wall'] for r in runs) * 1000, 1),
+            'modules': last['modules'],
+            'heavy': last['heavy'],
+            'created_files': last['created'],
+            'error': last['error'],
+        }
+
+    if args.json:
+        print(json.dumps({'interpreter_ms': round(baseline * 1000, 1), 'imports': results}, indent=2))
+        return 0
+
+    print(f"⏱️ Interpreter-Start: {baseline * 1000:.1f}ms (Median aus {args.runs})")
+    print(f"{'Modul':<18} {'Import':>9} {'Prozess':>9} {'Module':>7}  Schwere Imports / Seiteneffekte")
+    for module, r in results.items():
+        if r['error'] and r['import_ms'] is None:
+            print(f"{module:<18} {'-':>9} {r['process_ms']:>7.1f}ms {'-':>7}  ❌ {r['error']}")
+            continue
+        notes = ', '.join(r['heavy']) or '-'
+        if r['created_files']:
+            notes += f" | legt an: {', '.join(r['created_files'])}"
+        if r['error']:
+            notes += f" | ❌ {r['error']}"
+        print(f"{module:<18} {r['import_ms']:>7.1f}ms {r['process_ms']:>7.1f}ms {r['modules']:>7}  {notes}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
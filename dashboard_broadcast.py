@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+WebSocket-Broadcaster für das Pi 5 Web Dashboard
+Ein einziger Sender hängt am Sensor-Snapshot und verschickt nur geänderte Sensoren
+als kompakte Delta-Frames an den Raum der Live-Abonnenten
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pipeline_tracing import stage
+
+logger = logging.getLogger(__name__)
+
+LIVE_ROOM = 'live'
+
+# Felder, deren Änderung einen vollständigen Sensor-Eintrag im Delta erfordert
+STATIC_FIELDS = ('label', 'unit', 'type')
+# Felder, die sich bei jeder Messung ändern können
+DYNAMIC_FIELDS = ('value', 'status')
+
+
+def compute_sensor_delta(previous: Dict[str, Dict], current: Dict[str, Dict]) -> Tuple[Dict[str, Dict], List[str]]:
+    """Geänderte und entfernte Sensoren zwischen zwei Ständen"""
+    changed = {}
+    for key, entry in current.items():
+        old = previous.get(key)
+        if old == entry:
+            continue
+        if old is None or not entry or any(old.get(f) != entry.get(f) for f in STATIC_FIELDS):
+            changed[key] = entry
+        else:
+            changed[key] = {f: entry.get(f) for f in DYNAMIC_FIELDS if old.get(f) != entry.get(f)}
+    removed = [key for key in previous if key not in current]
+    return changed, removed
+
+
+class SnapshotBroadcaster:
+    """Einzelner Sender für alle Dashboard-Clients"""
+
+    def __init__(self, emit: Callable[..., Any],
+                 system_status: Optional[Callable[[], Dict[str, Any]]] = None,
+                 room: str = LIVE_ROOM, system_interval: float = 15.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.emit = emit
+        self.system_status = system_status
+        self.room = room
+        self.system_interval = system_interval
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict] = {}
+        self._timestamp = None
+        self._seq = 0
+        self._subscribers = set()
+        self._last_system = float('-inf')
+
+        self.stats = {'delta_frames': 0, 'unchanged_cycles': 0, 'system_frames': 0}
+
+    def subscribe(self, sid: str) -> int:
+        """Client abonniert Live-Updates"""
+        with self._lock:
+            self._subscribers.add(sid)
+            return len(self._subscribers)
+
+    def unsubscribe(self, sid: str) -> int:
+        """Client beendet Live-Updates (oder hat die Verbindung getrennt)"""
+        with self._lock:
+            self._subscribers.discard(sid)
+            return len(self._subscribers)
+
+    def is_subscribed(self, sid: str) -> bool:
+        with self._lock:
+            return sid in self._subscribers
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def full_frame(self) -> Dict[str, Any]:
+        """Vollständiger Stand für neue Clients bzw. Resync"""
+        with self._lock:
+            return {'seq': self._seq, 'timestamp': self._timestamp, 'sensors': dict(self._state)}
+
+    def on_snapshot(self, snapshot):
+        """Snapshot-Listener: Delta berechnen und an den Live-Raum senden"""
+        with self._lock:
+            changed, removed = compute_sensor_delta(self._state, snapshot.data)
+            frame = None
+            if changed or removed:
+                self._seq += 1
+                self._state = dict(snapshot.data)
+                self._timestamp = snapshot.timestamp
+                frame = {'seq': self._seq, 'timestamp': snapshot.timestamp, 'changed': changed}
+                if removed:
+                    frame['removed'] = removed
+            has_subscribers = bool(self._subscribers)
+
+        if not has_subscribers:
+            return
+
+        if frame is not None:
+            with stage('ws_push'):
+                self.emit('sensor_delta', frame, to=self.room)
+            self.stats['delta_frames'] += 1
+        else:
+            self.stats['unchanged_cycles'] += 1
+
+        now = self.clock()
+        if self.system_status is not None and now - self._last_system >= self.system_interval:
+            self._last_system = now
+            try:
+                self.emit('system_update', self.system_status(), to=self.room)
+                self.stats['system_frames'] += 1
+            except Exception as e:
+                logger.error(f"System-Update Fehler: {e}")
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Lasttest für das Pi 5 Web Dashboard
+Startet das Dashboard mit Mock-Sensoren und simuliert N Clients, die die JSON-Endpunkte
+pollen (Keep-Alive, gzip) - optional zusätzlich Socket.IO Live-Clients.
+Ausgabe: Anfragen/s, Fehler und p50/p90/p99 Latenz je Endpunkt.
+
+Beispiele:
+    python dashboard_loadtest.py --clients 50 --duration 30
+    python dashboard_loadtest.py --async-mode eventlet --clients 200 --ws-clients 50
+    python dashboard_loadtest.py --url http://pi5.local:5000 --clients 20
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import numpy as np
+
+# Endpunkte mit Gewichtung (Browser pollt Sensoren häufiger als System-Status)
+ENDPOINTS = [('/api/sensors', 0.7), ('/api/system', 0.2), ('/api/history?sensor=DS18B20_1&from=-1h', 0.1)]
+
+
+def serve(port: int, async_mode: str, sensor_delay: float, refresh_interval: float):
+    """Dashboard-Server mit Mock-Sensor-Backend (läuft im Subprozess)"""
+    os.environ['DASHBOARD_ASYNC_MODE'] = async_mode
+    from dashboard_server import resolve_async_mode, monkey_patch, offload_blocking
+    mode = resolve_async_mode(async_mode)
+    monkey_patch(mode)
+
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    import web_dashboard
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    dashboard = web_dashboard.get_dashboard()
+
+    def mock_acquire():
+        # Simuliert die blockierende 1-Wire Erfassung
+        time.sleep(sensor_delay)
+        return dashboard._get_mock_data()
+
+    dashboard.snapshot.acquire = offload_blocking(mock_acquire, mode)
+    dashboard.snapshot.refresh_interval = refresh_interval
+    dashboard.snapshot.start()
+    web_dashboard.SERVER_CONFIG.update({'host': '127.0.0.1', 'port': port, 'workers': 1})
+    web_dashboard.run_server(web_dashboard.app, web_dashboard.socketio, web_dashboard.SERVER_CONFIG, mode)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(host: str, port: int, timeout: float = 30.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                # Erste Erfassung abwarten, damit /api/history Daten hat
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                conn.request('GET', '/api/sensors')
+                conn.getresponse().read()
+                conn.close()
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+class PollingClient(threading.Thread):
+    """Simulierter Browser: pollt die JSON-Endpunkte über eine Keep-Alive Verbindung"""
+
+    def __init__(self, host: str, port: int, interval: float, stop: threading.Event, results: Dict):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.stop = stop
+        self.results = results
+        self.lock = threading.Lock()
+        self.connections = 0
+
+    def _connect(self):
+        self.connections += 1
+        return http.client.HTTPConnection(self.host, self.port, timeout=10)
+
+    def run(self):
+        paths, weights = zip(*ENDPOINTS)
+        conn = self._connect()
+        # Zufälliger Start, damit nicht alle Clients synchron pollen
+        self.stop.wait(random.uniform(0, self.interval))
+        while not self.stop.is_set():
+            path = random.choices(paths, weights)[0]
+            endpoint = path.split('?')[0]
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Accept-Encoding': 'gzip', 'Connection': 'keep-alive'})
+                response = conn.getresponse()
+                body = response.read()
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    entry = self.results[endpoint]
+                    entry['latencies'].append(elapsed)
+                    entry['bytes'] += len(body)
+                    if response.getheader('Content-Encoding') == 'gzip':
+                        entry['gzip'] += 1
+                    if response.status != 200:
+                        entry['errors'] += 1
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    conn = self._connect()
+            except (OSError, http.client.HTTPException):
+                with self.lock:
+                    self.results[endpoint]['errors'] += 1
+                conn.close()
+                conn = self._connect()
+            self.stop.wait(self.interval)
+        conn.close()
+
+
+def start_ws_clients(url: str, count: int, results: Dict) -> List:
+    """Socket.IO Live-Clients - misst die Verzögerung der Delta-Frames"""
+    try:
+        import socketio
+    except ImportError:
+        print("ℹ️ python-socketio Client nicht verfügbar - WebSocket-Clients übersprungen")
+        return []
+
+    clients = []
+    lock = threading.Lock()
+    for _ in range(count):
+        client = socketio.Client(reconnection=False)
+
+        @client.on('sensor_delta')
+        def on_delta(frame):
+            sent = datetime.fromisoformat(frame['timestamp']).timestamp()
+            with lock:
+                results['ws:sensor_delta']['latencies'].append(max(0.0, time.time() - sent))
+
+        try:
+            client.connect(url, transports=['websocket'])
+            client.emit('start_monitoring')
+            clients.append(client)
+        except Exception as e:
+            print(f"ℹ️ WebSocket-Client konnte nicht verbinden ({e}) - übersprungen")
+            break
+    return clients
+
+
+def report(results: Dict, duration: float, clients: int, as_json: bool = False) -> Dict:
+    """p50/p90/p99 je Endpunkt ausgeben"""
+    summary = {}
+    for endpoint, entry in sorted(results.items()):
+        latencies = np.asarray(entry['latencies']) * 1000
+        count = len(latencies)
+        summary[endpoint] = {
+            'requests': count,
+            'errors': entry['errors'],
+            'rps': round(count / duration, 1),
+            'gzip_ratio': round(entry['gzip'] / count, 2) if count else 0.0,
+            'avg_bytes': int(entry['bytes'] / count) if count else 0,
+            **({f'p{p}_ms': round(float(np.percentile(latencies, p)), 2) for p in (50, 90, 99)}
+               if count else {}),
+            'max_ms': round(float(latencies.max()), 2) if count else None,
+        }
+
+    if as_json:
+        print(json.dumps({'clients': clients, 'duration': duration, 'endpoints': summary}, indent=2))
+        return summary
+
+    print(f"\n📊 Lasttest: {clients} Clients, {duration:.0f}s")
+    print(f"{'Endpunkt':<22} {'Anfr.':>7} {'Fehler':>7} {'req/s':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for endpoint, s in summary.items():
+        if not s['requests']:
+            print(f"{endpoint:<22} {0:>7} {s['errors']:>7}")
+            continue
+        print(f"{endpoint:<22} {s['requests']:>7} {s['errors']:>7} {s['rps']:>7} "
+              f"{s['p50_ms']:>6.1f}ms {s['p90_ms']:>6.1f}ms {s['p99_ms']:>6.1f}ms {s['max_ms']:>6.1f}ms")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lasttest für das Pi 5 Web Dashboard')
+    parser.add_argument('--url', help='Laufendes Dashboard testen statt eines lokalen Mock-Servers')
+    parser.add_argument('--clients', type=int, default=50, help='Anzahl pollender Clients')
+    parser.add_argument('--ws-clients', type=int, default=0, help='Anzahl Socket.IO Live-Clients')
+    parser.add_argument('--duration', type=float, default=30.0, help='Testdauer in Sekunden')
+    parser.add_argument('--interval', type=float, default=1.0, help='Poll-Intervall pro Client (s)')
+    parser.add_argument('--async-mode', default='auto', help='auto, eventlet, gevent oder threading')
+    parser.add_argument('--sensor-delay', type=float, default=0.75,
+                        help='Dauer der simulierten Sensor-Erfassung (s)')
+    parser.add_argument('--refresh-interval', type=float, default=2.0, help='Erfassungsintervall (s)')
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.async_mode, args.sensor_delay, args.refresh_interval)
+        return
+
+    server = None
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', str(port),
+             '--async-mode', args.async_mode, '--sensor-delay', str(args.sensor_delay),
+             '--refresh-interval', str(args.refresh_interval)],
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    try:
+        if not wait_for_server(host, port):
+            print(f"❌ Dashboard unter {url} nicht erreichbar")
+            sys.exit(1)
+        if not args.json:
+            print(f"🚀 Dashboard erreichbar: {url} - starte {args.clients} Clients")
+
+        results = defaultdict(lambda: {'latencies': [], 'errors': 0, 'bytes': 0, 'gzip': 0})
+        stop = threading.Event()
+        ws_clients = start_ws_clients(url, args.ws_clients, results) if args.ws_clients else []
+        clients = [PollingClient(host, port, args.interval, stop, results) for _ in range(args.clients)]
+        for client in clients:
+            client.start()
+
+        time.sleep(args.duration)
+        stop.set()
+        for client in clients:
+            client.join(timeout=15)
+        for client in ws_clients:
+            client.disconnect()
+
+        report(results, args.duration, args.clients, args.json)
+        if not args.json:
+            reconnects = sum(c.connections - 1 for c in clients)
+            print(f"🔁 Neue TCP-Verbindungen nach dem Start: {reconnects} (0 = Keep-Alive funktioniert)")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Server-Betrieb für das Pi 5 Web Dashboard
+Async-Modus (eventlet/gevent/threading), Worker-Anzahl, Keep-Alive und gzip für JSON
+"""
+
+import configparser
+import gzip
+import importlib.util
+import logging
+import os
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MODES = ('auto', 'eventlet', 'gevent', 'threading')
+
+# Überschreibt [dashboard] async_mode - z.B. für Lasttests oder systemd-Units
+ASYNC_MODE_ENV = 'DASHBOARD_ASYNC_MODE'
+
+
+def read_server_config(path: str = 'config.ini') -> Dict[str, Any]:
+    """Server-Optionen aus [dashboard] lesen"""
+    config = configparser.ConfigParser(inline_comment_prefixes=('#',))
+    config.read(path)
+    section = 'dashboard'
+    return {
+        'async_mode': os.environ.get(ASYNC_MODE_ENV) or config.get(section, 'async_mode', fallback='auto'),
+        'host': config.get(section, 'host', fallback='0.0.0.0'),
+        'port': config.getint(section, 'port', fallback=5000),
+        'workers': config.getint(section, 'workers', fallback=1),
+        'message_queue': config.get(section, 'message_queue', fallback='') or None,
+        'keepalive': config.getint(section, 'keepalive', fallback=5),
+        'gzip_min_size': config.getint(section, 'gzip_min_size', fallback=512),
+        'gzip_level': config.getint(section, 'gzip_level', fallback=6),
+    }
+
+
+def resolve_async_mode(requested: str = 'auto') -> str:
+    """Gewünschten Async-Modus auf einen installierten abbilden"""
+    requested = (requested or 'auto').strip().lower()
+    if requested not in ASYNC_MODES:
+        logger.warning(f"⚠️ Unbekannter async_mode '{requested}' - verwende auto")
+        requested = 'auto'
+    if requested == 'threading':
+        return 'threading'
+
+    candidates = ('eventlet', 'gevent') if requested == 'auto' else (requested,)
+    for mode in candidates:
+        if importlib.util.find_spec(mode) is not None:
+            return mode
+    if requested != 'auto':
+        logger.warning(f"⚠️ {requested} nicht installiert (pip install {requested}) - verwende threading")
+    return 'threading'
+
+
+def monkey_patch(async_mode: str):
+    """Standardbibliothek für eventlet/gevent patchen - vor allen anderen Imports aufrufen"""
+    if async_mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif async_mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+
+def offload_blocking(func: Callable[[], Any], async_mode: str) -> Callable[[], Any]:
+    """Blockierende Hardware-Lesung in einen echten OS-Thread auslagern
+
+    Die 1-Wire Dateien blockieren pro Sensor bis zu 750ms - unter eventlet/gevent
+    würde das die komplette Event-Loop und damit alle WebSocket-Clients anhalten.
+    """
+    if async_mode == 'eventlet':
+        from eventlet import tpool
+        return lambda: tpool.execute(func)
+    if async_mode == 'gevent':
+        import gevent
+        return lambda: gevent.get_hub().threadpool.apply(func)
+    return func
+
+
+def install_json_compression(app, min_size: int = 512, level: int = 6):
+    """gzip für JSON-Antworten ab min_size Bytes, wenn der Client es unterstützt"""
+    from flask import request
+
+    @app.after_request
+    def compress_json(response):
+        if (response.mimetype != 'application/json'
+                or response.status_code != 200
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        if 'gzip' not in request.headers.get('Accept-Encoding', '').lower():
+            return response
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        response.set_data(gzip.compress(body, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    return compress_json
+
+
+def run_server(app, socketio, server_config: Dict[str, Any], async_mode: str):
+    """Dashboard mit dem passenden Server starten"""
+    host, port = server_config['host'], server_config['port']
+
+    if server_config['workers'] > 1:
+        logger.warning("⚠️ workers > 1 wird nicht unterstützt (jeder Worker würde die Sensoren "
+                       "selbst erfassen) - starte 1 Worker")
+
+    if async_mode == 'threading':
+        # Werkzeug schließt jede Verbindung (kein Keep-Alive) - nur für wenige Clients geeignet
+        logger.warning("⚠️ Werkzeug threading-Server aktiv (ohne Keep-Alive) - für viele Clients "
+                       "eventlet installieren (pip install eventlet)")
+        socketio.run(app, host=host, port=port, debug=False, allow_unsafe_werkzeug=True)
+        return
+
+    logger.info(f"🚀 Dashboard-Server: {async_mode} auf {host}:{port}")
+    # eventlet.wsgi und gevent.pywsgi sprechen HTTP/1.1 mit Keep-Alive
+    socketio.run(app, host=host, port=port, debug=False)
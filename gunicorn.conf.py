@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+gunicorn Konfiguration für das Pi 5 Web Dashboard
+Start: gunicorn -c gunicorn.conf.py web_dashboard:app
+Alle Werte kommen aus [dashboard] in config.ini
+"""
+
+import importlib.util
+import logging
+
+from dashboard_server import read_server_config, resolve_async_mode
+
+logger = logging.getLogger(__name__)
+
+_server = read_server_config('config.ini')
+_async_mode = resolve_async_mode(_server['async_mode'])
+
+# Worker-Klassen laut Flask-SocketIO Deployment-Doku
+WORKER_CLASSES = {
+    'eventlet': 'eventlet',
+    'gevent': 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker',
+    'threading': 'gthread',
+}
+
+bind = f"{_server['host']}:{_server['port']}"
+worker_class = WORKER_CLASSES[_async_mode]
+if _async_mode == 'gevent' and importlib.util.find_spec('geventwebsocket') is None:
+    # Ohne gevent-websocket nur Long-Polling (pip install gevent-websocket)
+    logger.warning("⚠️ gevent-websocket nicht installiert - gevent Worker ohne WebSocket-Transport")
+    worker_class = 'gevent'
+keepalive = _server['keepalive']
+# gthread: Threads pro Worker für lange WebSocket-Verbindungen
+threads = 100 if _async_mode == 'threading' else 1
+# WebSocket-Verbindungen sind langlebig - kein Worker-Timeout durch offene Sockets
+timeout = 0 if _async_mode != 'threading' else 120
+
+# Genau ein Worker: post_worker_init startet die Sensor-Erfassung pro Worker - mit N Workern
+# würden die Busse N-mal pro Intervall gelesen (und jeder Worker hätte eigene Snapshots/Verläufe).
+# Viele Clients trägt ein einzelner eventlet/gevent Worker.
+workers = 1
+if _server['workers'] > 1:
+    logger.warning(f"⚠️ [dashboard] workers = {_server['workers']} ignoriert - Dashboard läuft mit 1 Worker")
+
+
+def post_worker_init(worker):
+    """Sensor-Erfassung im Worker starten (socketio.run wird unter gunicorn nicht aufgerufen)"""
+    from web_dashboard import get_dashboard
+    dashboard = get_dashboard()
+    dashboard.snapshot.start()
+
+
+def worker_exit(server, worker):
+    """Beim Beenden des Workers Verlauf sichern und offene E-Mail Alerts zustellen"""
+    from web_dashboard import get_dashboard
+    get_dashboard().close()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Heizkreis-Modell für Pi 5 Sensor Monitor
+Paart Vorlauf- und Rücklauf-Sensoren zu Heizkreisen und berechnet pro Zyklus
+Spreizung (ΔT), gleitende Mittelwerte und Änderungsraten - als eigene Felder für
+InfluxDB, damit Grafana keine Flux-joins über Rohreihen mehr braucht.
+
+Config (config.ini):
+    [circuits]
+    # <kreis> = <vorlauf-sensor>, <rücklauf-sensor>[, <anzeigename>]
+    wp = ds18b20_3, ds18b20_1, Wärmepumpe
+    rolling_window = 300
+
+Ohne [circuits] werden die Kreise aus [labels] abgeleitet (VL/RL bzw. Vorlauf/Rücklauf).
+
+Der HeatPumpCycleDetector erkennt Verdichter-Takte am Kreis aus [heat_pump] circuit
+und zählt Starts, Laufzeiten und Takten (Short-Cycling).
+"""
+
+import configparser
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reservierte Schlüssel in [circuits]
+OPTIONS = ('rolling_window',)
+
+_FLOW = re.compile(r'\b(vl|vorlauf)\b', re.IGNORECASE)
+_RETURN = re.compile(r'\b(rl|rücklauf|ruecklauf)\b', re.IGNORECASE)
+
+
+class HeatingCircuit:
+    """Ein Heizkreis aus Vorlauf- und Rücklauf-Sensor"""
+
+    __slots__ = ('name', 'flow', 'ret', 'label')
+
+    def __init__(self, name: str, flow: str, ret: str, label: Optional[str] = None):
+        self.name = name
+        self.flow = flow.lower()
+        self.ret = ret.lower()
+        self.label = label or name
+
+    def __repr__(self):
+        return f"HeatingCircuit({self.name!r}, flow={self.flow!r}, return={self.ret!r})"
+
+
+def circuits_from_labels(labels: Dict[str, str]) -> List[HeatingCircuit]:
+    """Kreise aus Sensor-Labels ableiten: 'VL WP'/'RL WP', 'HK1 Vorlauf'/'HK1 Rücklauf'"""
+    flows, returns = {}, {}
+    for sensor, label in labels.items():
+        label = label.strip().strip('"')
+        for pattern, target in ((_FLOW, flows), (_RETURN, returns)):
+            if pattern.search(label):
+                circuit = ' '.join(pattern.sub(' ', label).split())
+                target[circuit] = sensor
+    return [HeatingCircuit(re.sub(r'\W+', '_', name.lower()).strip('_'), flows[name], returns[name], name)
+            for name in flows if name in returns]
+
+
+def load_circuits(config: configparser.ConfigParser) -> List[HeatingCircuit]:
+    """Kreise aus [circuits] - sonst aus [labels] abgeleitet"""
+    if config.has_section('circuits'):
+        circuits = []
+        for name, value in config.items('circuits'):
+            if name in OPTIONS:
+                continue
+            parts = [part.strip().strip('"') for part in value.split(',')]
+            if len(parts) < 2:
+                logger.warning(f"⚠️ Heizkreis {name}: erwartet '<vorlauf>, <rücklauf>[, <name>]' - übersprungen")
+                continue
+            circuits.append(HeatingCircuit(name, parts[0], parts[1], parts[2] if len(parts) > 2 else None))
+        return circuits
+    if config.has_section('labels'):
+        return circuits_from_labels(dict(config.items('labels')))
+    return []
+
+
+class _RollingMean:
+    """Zeitbasiertes gleitendes Mittel mit laufender Summe - O(1) pro Wert"""
+
+    __slots__ = ('window', 'samples', 'total')
+
+    def __init__(self, window: float):
+        self.window = window
+        self.samples = deque()
+        self.total = 0.0
+
+    def add(self, now: float, value: float) -> float:
+        self.samples.append((now, value))
+        self.total += value
+        while self.samples and self.samples[0][0] <= now - self.window:
+            self.total -= self.samples.popleft()[1]
+        return self.total / len(self.samples)
+
+
+class HeatingCircuitMetrics:
+    """Abgeleitete Kennwerte pro Heizkreis, einmal pro Erfassungszyklus berechnet"""
+
+    FIELDS = ('flow_temp', 'return_temp', 'delta_t', 'delta_t_mean', 'flow_mean', 'return_mean',
+              'flow_rate', 'return_rate', 'delta_t_rate')
+
+    def __init__(self, circuits: List[HeatingCircuit], rolling_window: float = 300.0):
+        self.circuits = circuits
+        self.rolling_window = rolling_window
+        self._means = {c.name: {key: _RollingMean(rolling_window) for key in ('delta_t', 'flow', 'return')}
+                       for c in circuits}
+        self._previous: Dict[str, Tuple[float, float, float, float]] = {}
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser) -> 'HeatingCircuitMetrics':
+        window = config.getfloat('circuits', 'rolling_window', fallback=300.0)
+        circuits = load_circuits(config)
+        if circuits:
+            logger.info(f"🔥 {len(circuits)} Heizkreise: {', '.join(c.label for c in circuits)}")
+        return cls(circuits, window)
+
+    def update(self, sensor_data: Dict[str, Optional[float]],
+               now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Kennwerte aller Kreise mit gültigem Vorlauf und Rücklauf (Sensor-Namen beliebig groß/klein)"""
+        now = time.monotonic() if now is None else now
+        values = {sensor.lower(): value for sensor, value in sensor_data.items() if value is not None}
+        results = {}
+        for circuit in self.circuits:
+            flow, ret = values.get(circuit.flow), values.get(circuit.ret)
+            if flow is None or ret is None:
+                continue
+            spread = flow - ret
+            means = self._means[circuit.name]
+            fields = {
+                'flow_temp': float(flow),
+                'return_temp': float(ret),
+                'delta_t': round(spread, 3),
+                'delta_t_mean': round(means['delta_t'].add(now, spread), 3),
+                'flow_mean': round(means['flow'].add(now, flow), 3),
+                'return_mean': round(means['return'].add(now, ret), 3),
+            }
+            # Änderungsrate in K/min gegenüber dem letzten Zyklus
+            previous = self._previous.get(circuit.name)
+            if previous is not None and now > previous[0]:
+                minutes = (now - previous[0]) / 60.0
+                fields['flow_rate'] = round((flow - previous[1]) / minutes, 3)
+                fields['return_rate'] = round((ret - previous[2]) / minutes, 3)
+                fields['delta_t_rate'] = round((spread - previous[3]) / minutes, 3)
+            self._previous[circuit.name] = (now, flow, ret, spread)
+            results[circuit.name] = fields
+        return results
+
+
+class _WindowCounter:
+    """Ereignisse im gleitenden Zeitfenster - feste Anzahl Buckets, konstanter Speicher"""
+
+    __slots__ = ('width', 'counts', 'epochs')
+
+    def __init__(self, window: float = 3600.0, buckets: int = 60):
+        self.width = window / buckets
+        self.counts = [0] * buckets
+        self.epochs = [-1] * buckets
+
+    def add(self, now: float, count: int = 1):
+        epoch = int(now // self.width)
+        slot = epoch % len(self.counts)
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.counts[slot] = 0
+        self.counts[slot] += count
+
+    def total(self, now: float) -> int:
+        oldest = int(now // self.width) - len(self.counts)
+        return sum(c for c, e in zip(self.counts, self.epochs) if e > oldest)
+
+
+class HeatPumpCycleDetector:
+    """Zustandsautomat für Verdichter-Takte aus Vorlauf-Steigung und Spreizung (ΔT)
+    
+    Start: ΔT >= on_delta oder Vorlauf steigt mit >= start_rate K/min (bei ΔT > off_delta)
+    Stopp: ΔT <= off_delta oder Vorlauf fällt mit >= stop_rate K/min
+    Ein Zustand gilt mindestens min_dwell Sekunden. Zähler (Starts/h, Laufzeiten) und
+    Takt-Erkennung laufen mit konstantem Speicher - ohne historische Abfragen.
+    now ist die Erfassungszeit: ein Wertepaar, das nicht neuer als das letzte ist (derselbe
+    Snapshot erneut), wird ignoriert und zählt weder für Steigung noch für Starts.
+    update() und counters() laufen unter einem Lock - /metrics liest aus einem anderen Thread.
+    """
+
+    def __init__(self, flow_sensor: str, return_sensor: str, name: str = 'wp',
+                 on_delta: float = 3.0, off_delta: float = 1.5, start_rate: float = 1.0,
+                 stop_rate: float = 1.0, slope_window: float = 60.0, min_dwell: float = 60.0,
+                 max_starts_per_hour: int = 3, min_runtime: float = 600.0):
+        self.name = name
+        self.flow_sensor = flow_sensor.lower()
+        self.return_sensor = return_sensor.lower()
+        self.on_delta = on_delta
+        self.off_delta = off_delta
+        self.start_rate = start_rate
+        self.stop_rate = stop_rate
+        self.slope_window = slope_window
+        self.min_dwell = min_dwell
+        self.max_starts_per_hour = max_starts_per_hour
+        self.min_runtime = min_runtime
+
+        self.running = False
+        self.since: Optional[float] = None
+        self.slope: Optional[float] = None
+        self._last: Optional[Tuple[float, float]] = None
+        self.short_cycling = False
+
+        self.starts_total = 0
+        self.runs_completed = 0
+        self.runtime_completed = 0.0
+        self.last_runtime: Optional[float] = None
+        self._starts = _WindowCounter()
+        self._short_runs = _WindowCounter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser) -> Optional['HeatPumpCycleDetector']:
+        """Detektor für den Kreis aus [heat_pump] circuit (Standard: wp) - None ohne passenden Kreis"""
+        name = config.get('heat_pump', 'circuit', fallback='wp').strip()
+        circuit = next((c for c in load_circuits(config) if c.name == name), None)
+        if circuit is None:
+            return None
+        option = lambda key, fallback: config.getfloat('heat_pump', key, fallback=fallback)
+        return cls(circuit.flow, circuit.ret, name=name,
+                   on_delta=option('on_delta', 3.0), off_delta=option('off_delta', 1.5),
+                   start_rate=option('start_rate', 1.0), stop_rate=option('stop_rate', 1.0),
+                   slope_window=option('slope_window', 60.0), min_dwell=option('min_dwell', 60.0),
+                   max_starts_per_hour=int(option('max_starts_per_hour', 3)),
+                   min_runtime=option('min_runtime', 600.0))
+
+    def _update_slope(self, flow: float, now: float):
+        """Geglättete Vorlauf-Steigung in K/min (EWMA mit Zeitkonstante slope_window)"""
+        if self._last is not None:
+            dt = now - self._last[0]
+            rate = (flow - self._last[1]) / dt * 60.0
+            alpha = dt / (self.slope_window + dt)
+            self.slope = rate if self.slope is None else self.slope + alpha * (rate - self.slope)
+        self._last = (now, flow)
+
+    def update(self, flow: float, ret: float, now: Optional[float] = None) -> List[str]:
+        """Ein Messwert-Paar - liefert Ereignisse ('start', 'stop', 'short_cycling', 'short_cycling_cleared')"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._update(flow, ret, now)
+
+    def _update(self, flow: float, ret: float, now: float) -> List[str]:
+        if self._last is not None and now <= self._last[0]:
+            return []
+        self._update_slope(flow, now)
+        delta = flow - ret
+        slope = self.slope if self.slope is not None else 0.0
+        events = []
+
+        settled = self.since is None or now - self.since >= self.min_dwell
+        if not self.running and settled and (
+                delta >= self.on_delta or (slope >= self.start_rate and delta > self.off_delta)):
+            self.running = True
+            self.since = now
+            self.starts_total += 1
+            self._starts.add(now)
+            events.append('start')
+        elif self.running and settled and (delta <= self.off_delta or slope <= -self.stop_rate):
+            runtime = now - self.since
+            self.running = False
+            self.since = now
+            self.runs_completed += 1
+            self.runtime_completed += runtime
+            self.last_runtime = runtime
+            if runtime < self.min_runtime:
+                self._short_runs.add(now)
+            events.append('stop')
+        elif self.since is None:
+            # Erster Wert: Verdichter aus, Zählung beginnt jetzt
+            self.since = now
+
+        short_cycling = (self._starts.total(now) > self.max_starts_per_hour
+                         or self._short_runs.total(now) >= 2)
+        if short_cycling != self.short_cycling:
+            self.short_cycling = short_cycling
+            events.append('short_cycling' if short_cycling else 'short_cycling_cleared')
+        return events
+
+    def update_data(self, sensor_data: Dict[str, Optional[float]], now: Optional[float] = None) -> List[str]:
+        """Zyklus aus einem Sensor-Dict - fehlt Vorlauf oder Rücklauf, passiert nichts"""
+        values = {sensor.lower(): value for sensor, value in sensor_data.items() if value is not None}
+        flow, ret = values.get(self.flow_sensor), values.get(self.return_sensor)
+        if flow is None or ret is None:
+            return []
+        return self.update(flow, ret, now)
+
+    def counters(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Zähler für InfluxDB, MQTT und /metrics (feste Feldtypen) - ein konsistenter Stand"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._counters(now)
+
+    def _counters(self, now: float) -> Dict[str, float]:
+        current = now - self.since if self.running and self.since is not None else 0.0
+        return {
+            'running': self.running,
+            'short_cycling': self.short_cycling,
+            'starts_total': self.starts_total,
+            'starts_last_hour': self._starts.total(now),
+            'short_runs_last_hour': self._short_runs.total(now),
+            'runtime_total_s': round(float(self.runtime_completed + current), 1),
+            'current_runtime_s': round(float(current), 1),
+            'last_runtime_s': round(float(self.last_runtime or 0.0), 1),
+            'mean_runtime_s': round(float(self.runtime_completed / self.runs_completed), 1) if self.runs_completed else 0.0,
+        }
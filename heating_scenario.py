@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Szenario-Generator für synthetische Heizungsdaten
+Ein einfaches thermisches Modell statt random.uniform():
+- Wärmepumpe mit Hysterese-Regelung, Mindestlauf-/Sperrzeiten und Anlauframpe (Takte)
+- Pufferspeicher, aus dem die Heizkreise versorgt werden (Vorlauf/Rücklauf gekoppelt)
+- Gebäude mit Wärmeverlust an die Außentemperatur (Tagesgang + Wetter-Zufallsprozess)
+- Heizraum (DHT22) mit Temperatur und Luftfeuchtigkeit
+- Sensor-Rauschen (DS18B20: 1/16 °C Auflösung) und injizierte Fehler
+
+Die Kreise kommen aus [circuits] (Sensor-Zuordnung wie im echten Betrieb), übrige
+Sensoren werden zu weiteren Kreisen gepaart - beliebige Sensor-Anzahl. Das Modell
+rechnet in festen Schritten (step); gleicher Seed + gleiche Aufrufe = gleiche Daten,
+unabhängig von der Geschwindigkeit.
+
+Beispiele:
+    python heating_scenario.py --hours 24 --interval 30 > winter.csv
+    python heating_scenario.py --sensors 64 --hours 6 --fault-rate 2 --summary
+"""
+
+import argparse
+import configparser
+import csv
+import logging
+import math
+import random
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from heating_circuits import HeatingCircuit, load_circuits
+
+logger = logging.getLogger(__name__)
+
+WATER_CP = 4186.0  # J/(kg·K)
+
+# Sensor-Fehler: Ausfall, eingefrorener Wert, Drift, starkes Rauschen, Ausreißer, 85 °C Reset
+SENSOR_FAULTS = ('dropout', 'stuck', 'drift', 'noise', 'spike', 'power_on_reset')
+# Anlagen-Fehler: Wärmepumpe taktet (zu kleine Hysterese), Umwälzpumpe eines Kreises steht
+SYSTEM_FAULTS = ('short_cycling', 'pump_failure')
+FAULT_MAGNITUDE = {'drift': 5.0, 'noise': 20.0, 'spike': 15.0}
+
+
+class ScenarioFault:
+    """Injizierter Fehler: Art, betroffener Sensor/Kreis, Beginn und Dauer (Szenario-Sekunden)"""
+
+    __slots__ = ('kind', 'target', 'start', 'duration', 'magnitude', 'frozen')
+
+    def __init__(self, kind: str, target: Optional[str], start: float, duration: float,
+                 magnitude: Optional[float] = None):
+        if kind not in SENSOR_FAULTS + SYSTEM_FAULTS:
+            raise ValueError(f"Unbekannter Fehler: {kind}")
+        self.kind = kind
+        self.target = target.lower() if target else None
+        self.start = start
+        self.duration = duration
+        self.magnitude = FAULT_MAGNITUDE.get(kind, 0.0) if magnitude is None else magnitude
+        self.frozen = None
+
+    def active(self, t: float) -> bool:
+        return self.start <= t < self.start + self.duration
+
+    def __repr__(self):
+        return f"ScenarioFault({self.kind!r}, {self.target!r}, start={self.start:g}, duration={self.duration:g})"
+
+
+class _Circuit:
+    """Zustand eines Heizkreises (gemessene Vorlauf-/Rücklauf-Temperaturen mit Trägheit)"""
+
+    __slots__ = ('circuit', 'flow', 'ret', 'mass_flow', 'ua')
+
+    def __init__(self, circuit: HeatingCircuit, flow: float, ret: float, mass_flow: float, ua: float):
+        self.circuit = circuit
+        self.flow = flow
+        self.ret = ret
+        self.mass_flow = mass_flow
+        self.ua = ua
+
+
+def _lag(value: float, target: float, dt: float, tau: float) -> float:
+    """Verzögerung 1. Ordnung (Rohrleitung, Tauchhülse)"""
+    return target + (value - target) * math.exp(-dt / tau)
+
+
+class HeatingScenario:
+    """Wärmepumpe → Pufferspeicher → Heizkreise → Gebäude, seeded und deterministisch"""
+
+    def __init__(self, circuits: Optional[List[HeatingCircuit]] = None, sensors: int = 8, seed: int = 1,
+                 heat_pump_circuit: str = 'wp', step: float = 10.0, start_time: float = 0.0,
+                 outdoor_mean: float = 2.0, outdoor_swing: float = 5.0, weather_std: float = 3.0,
+                 heat_pump_power: float = 8000.0, hysteresis: float = 5.0, min_runtime: float = 300.0,
+                 min_pause: float = 600.0, buffer_liters: float = 300.0, building_ua: float = 250.0,
+                 noise: float = 0.05, fault_rate: float = 0.0, dht22: bool = True):
+        self.seed = seed
+        self.step = step
+        self.start_time = start_time
+        self.outdoor_mean = outdoor_mean
+        self.outdoor_swing = outdoor_swing
+        self.weather_std = weather_std
+        self.heat_pump_power = heat_pump_power
+        self.hysteresis = hysteresis
+        self.min_runtime = min_runtime
+        self.min_pause = min_pause
+        self.buffer_capacity = buffer_liters * WATER_CP
+        self.building_ua = building_ua
+        self.noise = noise
+        self.fault_rate = fault_rate
+        self.dht22 = dht22
+
+        # Getrennte Zufallsströme: Modell/Fehler unabhängig von der Anzahl der Lesungen
+        self._weather_random = random.Random(seed)
+        self._fault_random = random.Random(seed + 1)
+        self._noise_random = random.Random(seed + 2)
+
+        self.sensor_keys = [f'ds18b20_{i}' for i in range(1, sensors + 1)]
+        self.heat_pump, heating, self.outdoor_sensor = self._assign(circuits or [], heat_pump_circuit)
+        self.faults: List[ScenarioFault] = []
+
+        # Startzustand: eingeschwungener Winterbetrieb, Wärmepumpe aus und startbereit
+        self.t = 0.0
+        self.weather = 0.0
+        self.outdoor = self._outdoor_temperature()
+        self.buffer = 38.0
+        self.room = 20.5
+        self.running = False
+        self.switched = -min_pause
+        self.starts = 0
+        self.runtime_total = 0.0
+        self.hp_flow = self.hp_return = self.buffer
+        count = max(1, len(heating))
+        self.circuits = [_Circuit(c, self.buffer - 1.0, self.buffer - 3.0, 0.45 / count, 250.0 / count)
+                         for c in heating]
+        self._wall_start = None
+
+    def _assign(self, circuits: List[HeatingCircuit], heat_pump_circuit: str):
+        """Config-Kreise übernehmen, übrige Sensoren paarweise zu Kreisen, Rest = Außenfühler"""
+        keys = set(self.sensor_keys)
+        circuits = [c for c in circuits if c.flow in keys and c.ret in keys]
+        heat_pump = next((c for c in circuits if c.name == heat_pump_circuit), None)
+        heating = [c for c in circuits if c is not heat_pump]
+        used = {sensor for c in circuits for sensor in (c.flow, c.ret)}
+        free = [key for key in self.sensor_keys if key not in used]
+        while len(free) >= 2:
+            flow, ret = free.pop(0), free.pop(0)
+            if heat_pump is None:
+                heat_pump = HeatingCircuit(heat_pump_circuit, flow, ret, 'Wärmepumpe')
+            else:
+                name = f'hk{len(heating) + 1}'
+                heating.append(HeatingCircuit(name, flow, ret, f'Heizkreis {len(heating) + 1}'))
+        return heat_pump, heating, (free[0] if free else None)
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser, sensors: Optional[int] = None,
+                    **overrides) -> 'HeatingScenario':
+        """Kreise aus [circuits], Sensor-Anzahl aus [hardware], Modell-Parameter aus [scenario]"""
+        if sensors is None:
+            sensors = config.getint('hardware', 'ds18b20_count', fallback=8)
+        option = lambda key, fallback: config.getfloat('scenario', key, fallback=fallback)
+        options = {
+            'seed': config.getint('scenario', 'seed', fallback=1),
+            'outdoor_mean': option('outdoor_mean', 2.0),
+            'outdoor_swing': option('outdoor_swing', 5.0),
+            'heat_pump_power': option('heat_pump_power', 8000.0),
+            'hysteresis': option('hysteresis', 5.0),
+            'noise': option('noise', 0.05),
+            'fault_rate': option('fault_rate', 0.0),
+        }
+        options.update(overrides)
+        return cls(load_circuits(config), sensors=sensors,
+                   heat_pump_circuit=config.get('heat_pump', 'circuit', fallback='wp').strip(), **options)
+
+    # ------------------------------------------------------------------ Fehler
+    def add_fault(self, kind: str, target: Optional[str] = None, start: Optional[float] = None,
+                  duration: float = 600.0, magnitude: Optional[float] = None) -> ScenarioFault:
+        """Fehler injizieren - target: Sensor ('ds18b20_3', 'dht22_temp') oder Kreis (pump_failure)"""
+        fault = ScenarioFault(kind, target, self.t if start is None else start, duration, magnitude)
+        self.faults.append(fault)
+        return fault
+
+    def active_faults(self, kind: Optional[str] = None) -> List[ScenarioFault]:
+        return [f for f in self.faults if f.active(self.t) and (kind is None or f.kind == kind)]
+
+    def _random_faults(self):
+        if self.fault_rate <= 0 or self._fault_random.random() >= self.fault_rate * self.step / 3600.0:
+            return
+        kind = self._fault_random.choice(SENSOR_FAULTS)
+        targets = self.sensor_keys + (['dht22_temp', 'dht22_humidity'] if self.dht22 else [])
+        duration = self.step if kind == 'spike' else self._fault_random.uniform(60.0, 1800.0)
+        fault = self.add_fault(kind, self._fault_random.choice(targets), self.t, duration)
+        logger.debug(f"🧪 Szenario: {fault}")
+
+    # ------------------------------------------------------------------ Physik
+    def _outdoor_temperature(self) -> float:
+        hour = ((self.start_time + self.t) % 86400) / 3600.0
+        # Tagesgang: Minimum gegen 3 Uhr, Maximum gegen 15 Uhr
+        return self.outdoor_mean + self.outdoor_swing * math.sin(2 * math.pi * (hour - 9) / 24) + self.weather
+
+    def setpoint(self) -> float:
+        """Heizkurve: Puffer-Solltemperatur aus der Außentemperatur"""
+        return min(55.0, max(25.0, 28.0 + 0.8 * (20.0 - self.outdoor)))
+
+    @property
+    def plant_room(self) -> float:
+        """Heizraum: Abwärme des Puffers, Kopplung an Gebäude und Außen"""
+        return 14.0 + 0.08 * (self.buffer - 15.0) + 0.3 * (self.room - 15.0) + 0.05 * self.outdoor
+
+    def _control(self):
+        short_cycling = bool(self.active_faults('short_cycling'))
+        hysteresis = 0.6 if short_cycling else self.hysteresis
+        min_runtime = 120.0 if short_cycling else self.min_runtime
+        min_pause = 120.0 if short_cycling else self.min_pause
+        dwell = self.t - self.switched
+        setpoint = self.setpoint()
+        if not self.running and dwell >= min_pause and self.buffer < setpoint - hysteresis / 2:
+            self.running, self.switched = True, self.t
+            self.starts += 1
+        elif self.running and dwell >= min_runtime and self.buffer > setpoint + hysteresis / 2:
+            self.running, self.switched = False, self.t
+
+    def _integrate(self, dt: float):
+        self._random_faults()
+        self._control()
+
+        # Außentemperatur: Tagesgang + Wetter (Ornstein-Uhlenbeck, Zeitkonstante 2 Tage)
+        tau = 2 * 86400.0
+        self.weather += (-self.weather * dt / tau
+                         + self.weather_std * math.sqrt(2 * dt / tau) * self._weather_random.gauss(0, 1))
+        self.outdoor = self._outdoor_temperature()
+
+        # Wärmepumpe: Anlauframpe ~2 min, Spreizung aus Leistung und Massenstrom
+        heat_pump_power = 0.0
+        if self.running:
+            heat_pump_power = self.heat_pump_power * min(1.0, (self.t - self.switched + dt) / 120.0)
+            self.runtime_total += dt
+            self.hp_flow = _lag(self.hp_flow, self.buffer + heat_pump_power / (0.4 * WATER_CP), dt, 90.0)
+            self.hp_return = _lag(self.hp_return, self.buffer, dt, 60.0)
+        else:
+            self.hp_flow = _lag(self.hp_flow, self.buffer, dt, 120.0)
+            self.hp_return = _lag(self.hp_return, self.buffer, dt, 120.0)
+
+        # Heizkreise: Vorlauf aus dem Puffer, Rücklauf nach Wärmeabgabe an den Raum
+        stopped = {f.target for f in self.active_faults('pump_failure')}
+        plant_room = self.plant_room
+        heat_to_rooms = 0.0
+        for state in self.circuits:
+            if state.circuit.name in stopped:
+                state.flow = _lag(state.flow, plant_room, dt, 900.0)
+                state.ret = _lag(state.ret, plant_room, dt, 900.0)
+                continue
+            flow_target = self.buffer - 1.0
+            ret_target = self.room + (flow_target - self.room) * math.exp(-state.ua / (state.mass_flow * WATER_CP))
+            state.flow = _lag(state.flow, flow_target, dt, 60.0)
+            state.ret = _lag(state.ret, ret_target, dt, 120.0)
+            heat_to_rooms += state.mass_flow * WATER_CP * max(0.0, state.flow - state.ret)
+
+        self.buffer += (heat_pump_power - heat_to_rooms - 3.0 * (self.buffer - plant_room)) * dt / self.buffer_capacity
+        self.room += (heat_to_rooms + 300.0 - self.building_ua * (self.room - self.outdoor)) * dt / 2.0e7
+        self.t += dt
+
+    def advance(self, seconds: float):
+        """Modell um seconds weiterrechnen (in festen Schritten - Rest wird beim nächsten Aufruf nachgeholt)"""
+        target = self.t + seconds
+        while self.t + self.step <= target + 1e-9:
+            self._integrate(self.step)
+
+    # ------------------------------------------------------------------ Messwerte
+    def true_values(self) -> Dict[str, float]:
+        """Physikalische Werte pro Sensor (ohne Rauschen und Fehler)"""
+        values = {}
+        if self.heat_pump is not None:
+            values[self.heat_pump.flow] = self.hp_flow
+            values[self.heat_pump.ret] = self.hp_return
+        for state in self.circuits:
+            values[state.circuit.flow] = state.flow
+            values[state.circuit.ret] = state.ret
+        if self.outdoor_sensor is not None:
+            values[self.outdoor_sensor] = self.outdoor
+        if self.dht22:
+            plant_room = self.plant_room
+            humidity = 60.0 - 2.0 * (plant_room - 17.0) + 5.0 * math.sin(
+                2 * math.pi * ((self.start_time + self.t) % 86400) / 86400 + 1.0)
+            values['dht22_temp'] = plant_room
+            values['dht22_humidity'] = min(85.0, max(25.0, humidity))
+        return values
+
+    def _measure(self, key: str, value: float) -> Optional[float]:
+        sigma = self.noise
+        for fault in self.faults:
+            if fault.target != key or not fault.active(self.t):
+                continue
+            if fault.kind == 'dropout':
+                return None
+            if fault.kind == 'power_on_reset':
+                return 85.0
+            if fault.kind == 'stuck':
+                if fault.frozen is None:
+                    fault.frozen = value
+                value = fault.frozen
+                sigma = 0.0
+            elif fault.kind == 'drift':
+                value += fault.magnitude * (self.t - fault.start) / fault.duration
+            elif fault.kind == 'noise':
+                sigma *= fault.magnitude
+            elif fault.kind == 'spike':
+                value += fault.magnitude
+        if sigma:
+            value += self._noise_random.gauss(0, sigma)
+        if key.startswith('dht22'):
+            return round(value, 1)
+        return round(round(value * 16) / 16, 4)
+
+    def read(self) -> Dict[str, Optional[float]]:
+        """Messwerte wie aus der Erfassung: 'DS18B20_1'..'DS18B20_N', 'DHT22_temp', 'DHT22_humidity'"""
+        values = self.true_values()
+        data = {}
+        for key in self.sensor_keys:
+            data[key.upper()] = self._measure(key, values[key]) if key in values else None
+        if self.dht22:
+            data['DHT22_temp'] = self._measure('dht22_temp', values['dht22_temp'])
+            data['DHT22_humidity'] = self._measure('dht22_humidity', values['dht22_humidity'])
+        return data
+
+    def run(self, duration: float, interval: float = 30.0) -> Iterator[Tuple[float, Dict[str, Optional[float]]]]:
+        """(Zeitstempel, Messwerte) alle interval Sekunden für duration Sekunden - so schnell wie möglich"""
+        end = self.t + duration
+        while self.t + interval <= end + 1e-9:
+            self.advance(interval)
+            yield self.timestamp, self.read()
+
+    def sample(self, speed: float = 1.0, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """Demo-Betrieb: Modellzeit läuft speed-mal so schnell wie die Uhr"""
+        now = time.monotonic() if now is None else now
+        if self._wall_start is None:
+            self._wall_start = now - self.t / max(speed, 1e-9)
+        self.advance((now - self._wall_start) * speed - self.t)
+        return self.read()
+
+    @property
+    def timestamp(self) -> float:
+        return self.start_time + self.t
+
+    def summary(self) -> Dict[str, float]:
+        return {'t': self.t, 'starts': self.starts, 'running': self.running,
+                'runtime_total_s': round(self.runtime_total, 1), 'buffer': round(self.buffer, 2),
+                'room': round(self.room, 2), 'outdoor': round(self.outdoor, 2),
+                'setpoint': round(self.setpoint(), 2), 'faults': len(self.faults)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetische Heizungsdaten (thermisches Modell)')
+    parser.add_argument('--config', default='config.ini', help='Kreise aus [circuits], Parameter aus [scenario]')
+    parser.add_argument('--sensors', type=int, help='Anzahl DS18B20 (Standard: [hardware] ds18b20_count)')
+    parser.add_argument('--hours', type=float, default=24.0, help='Szenario-Dauer (h)')
+    parser.add_argument('--interval', type=float, default=30.0, help='Messintervall (s)')
+    parser.add_argument('--seed', type=int, help='Zufalls-Seed')
+    parser.add_argument('--fault-rate', type=float, help='Zufällige Sensor-Fehler pro Stunde')
+    parser.add_argument('--start', type=float, default=0.0, help='Startzeitpunkt (Epoch, bestimmt die Tageszeit)')
+    parser.add_argument('--summary', action='store_true', help='Nur Zusammenfassung statt CSV')
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser(inline_comment_prefixes=('#',))
+    config.read(args.config)
+    overrides = {'start_time': args.start}
+    if args.seed is not None:
+        overrides['seed'] = args.seed
+    if args.fault_rate is not None:
+        overrides['fault_rate'] = args.fault_rate
+    scenario = HeatingScenario.from_config(config, sensors=args.sensors, **overrides)
+
+    writer = None
+    for timestamp, values in scenario.run(args.hours * 3600, args.interval):
+        if args.summary:
+            continue
+        if writer is None:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(['timestamp', *values])
+        writer.writerow([f'{timestamp:.0f}', *('' if v is None else v for v in values.values())])
+
+    summary = scenario.summary()
+    print(f"♨️ {args.hours:g}h: {summary['starts']} Starts, Laufzeit {summary['runtime_total_s'] / 3600:.1f}h, "
+          f"Puffer {summary['buffer']}°C (Soll {summary['setpoint']}°C), Raum {summary['room']}°C, "
+          f"außen {summary['outdoor']}°C, {summary['faults']} Fehler", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,8 @@ import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from heating_scenario import HeatingScenario
+
 # Sensor Monitor Import
 try:
     from sensor_monitor import Pi5SensorMonitor, Pi5DS18B20Manager, Pi5DHT22Sensor
@@ -33,6 +35,7 @@ class IndividualizedSensorManager:
         
         # Hardware-Konfiguration
         self.ds18b20_count = self.config.getint('hardware', 'ds18b20_count', fallback=8)
+        self.scenario = None
         
         if SENSOR_MONITOR_AVAILABLE:
             self.ds18b20_manager = Pi5DS18B20Manager(high_performance=True)
@@ -110,8 +113,10 @@ class IndividualizedSensorManager:
             return {}
     
     def _get_mock_data(self) -> Dict[str, Any]:
-        """Mock-Daten für Tests"""
-        import random
+        """Mock-Daten für Tests - aus dem thermischen Heizungs-Szenario"""
+        if self.scenario is None:
+            self.scenario = HeatingScenario.from_config(self.config, sensors=self.ds18b20_count)
+        values = self.scenario.sample(speed=self.config.getfloat('scenario', 'speed', fallback=60.0))
         mock_data = {}
         
         # Mock DS18B20 Daten
@@ -123,10 +128,10 @@ class IndividualizedSensorManager:
                 'sensor_id': f"DS18B20_{i}",
                 'sensor_type': 'DS18B20',
                 'measurement': 'temperature',
-                'value': round(random.uniform(15, 35), 1),
+                'value': values[f"DS18B20_{i}"],
                 'unit': '°C',
                 'timestamp': datetime.now().isoformat(),
-                'status': 'ok'
+                'status': 'ok' if values[f"DS18B20_{i}"] is not None else 'error'
             }
         
         # Mock DHT22 Daten
@@ -136,7 +141,7 @@ class IndividualizedSensorManager:
             'sensor_id': 'DHT22_temp',
             'sensor_type': 'DHT22',
             'measurement': 'temperature',
-            'value': round(random.uniform(18, 25), 1),
+            'value': values['DHT22_temp'],
             'unit': '°C',
             'timestamp': datetime.now().isoformat(),
             'status': 'ok'
@@ -146,7 +151,7 @@ class IndividualizedSensorManager:
             'sensor_id': 'DHT22_humidity',
             'sensor_type': 'DHT22',
             'measurement': 'humidity',
-            'value': round(random.uniform(40, 60), 1),
+            'value': values['DHT22_humidity'],
             'unit': '%',
             'timestamp': datetime.now().isoformat(),
             'status': 'ok'
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Gebündeltes Logging für den Dauerbetrieb (SD-Karte schonen)
+Statt jede Zeile sofort zu formatieren und synchron in die Logdatei zu schreiben:
+- summary:  eine Zusammenfassung pro Zyklus; Detail-Zeilen (< WARNING) landen unformatiert in
+            einem Ringpuffer und werden nur bei einem Fehler oder auf Anforderung (SIGUSR2) geschrieben
+- batched:  alle Zeilen, aber gesammelt geschrieben
+- detailed: bisheriges Verhalten (jede Zeile sofort)
+
+Geschrieben wird von einem Hintergrund-Thread alle log_flush_interval Sekunden mit einem
+write() pro Ziel - Fehler werden sofort geschrieben (inkl. der Details davor).
+
+Config (config.ini):
+    [monitoring]
+    log_mode = summary
+    log_buffer_size = 500
+    log_flush_interval = 60
+"""
+
+import configparser
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+LOG_MODES = ('detailed', 'batched', 'summary')
+
+# logger.info(..., extra=CYCLE_SUMMARY) - Zusammenfassung, wird im summary-Modus immer geschrieben
+CYCLE_SUMMARY = {'cycle_summary': True}
+
+
+class BatchingLogSink(logging.Handler):
+    """Sammelt Log-Records und schreibt sie gebündelt über einen Hintergrund-Thread in die Ziel-Handler"""
+
+    def __init__(self, targets: List[logging.Handler], summary: bool = True, buffer_size: int = 500,
+                 flush_interval: float = 60.0, batch_size: int = 1000, flush_level: int = logging.ERROR):
+        super().__init__()
+        self.targets = targets
+        self.summary = summary
+        self.details: deque = deque(maxlen=buffer_size)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.flush_level = flush_level
+        self.stats = {'records': 0, 'buffered': 0, 'written': 0, 'batches': 0, 'detail_flushes': 0}
+        self._pending: List[logging.LogRecord] = []
+        self._urgent = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='log-sink', daemon=True)
+        self._thread.start()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        for target in self.targets:
+            if target.formatter is None:
+                target.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord):
+        self.stats['records'] += 1
+        if self.summary and record.levelno < logging.WARNING and not getattr(record, 'cycle_summary', False):
+            # Unformatiert puffern - formatiert wird nur, falls die Details je geschrieben werden
+            self.details.append(record)
+            self.stats['buffered'] += 1
+            return
+        if self.summary and record.levelno >= self.flush_level and self.details:
+            self._queue(self._take_details() + [record], urgent=True)
+        else:
+            self._queue([record], urgent=record.levelno >= self.flush_level)
+
+    def _take_details(self) -> List[logging.LogRecord]:
+        details = []
+        while self.details:
+            try:
+                details.append(self.details.popleft())
+            except IndexError:
+                break
+        if details:
+            self.stats['detail_flushes'] += 1
+        return details
+
+    def _queue(self, records: List[logging.LogRecord], urgent: bool = False):
+        with self._cond:
+            self._pending.extend(records)
+            if urgent or len(self._pending) >= self.batch_size:
+                self._urgent = True
+                self._cond.notify()
+
+    def flush_details(self):
+        """Ringpuffer auf Anforderung schreiben"""
+        self._queue(self._take_details(), urgent=True)
+
+    def _on_signal(self, *_):
+        # Im Signal-Handler keine Locks nehmen, die der unterbrochene Code gerade halten könnte
+        threading.Thread(target=self.flush_details, name='log-sink-dump', daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._urgent or self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._urgent = False
+                closed = self._closed
+            self._write_pending()
+            if closed:
+                return
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            lines = []
+            for record in batch:
+                try:
+                    lines.append(self.format(record) + '\n')
+                except Exception:
+                    self.handleError(record)
+            text = ''.join(lines)
+            for target in self.targets:
+                try:
+                    if isinstance(target, logging.StreamHandler):
+                        # Ein write() pro Bündel statt einem write() + flush() pro Zeile
+                        target.acquire()
+                        try:
+                            if target.stream is None:
+                                target.stream = target._open()
+                            target.stream.write(text)
+                            target.flush()
+                        finally:
+                            target.release()
+                    else:
+                        for record in batch:
+                            target.handle(record)
+                except Exception:
+                    self.handleError(batch[-1])
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+
+    def flush(self):
+        """Ausstehende Zeilen sofort schreiben (logging.shutdown ruft das beim Beenden)"""
+        self._write_pending()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5.0)
+        self._write_pending()
+        for target in self.targets:
+            target.close()
+        super().close()
+
+
+def wrap_handlers(handlers: List[logging.Handler], config: configparser.ConfigParser) -> List[logging.Handler]:
+    """Handler je nach [monitoring] log_mode in einen BatchingLogSink packen"""
+    mode = config.get('monitoring', 'log_mode', fallback='detailed').strip()
+    if mode not in LOG_MODES:
+        print(f"⚠️  Unbekannter log_mode {mode} - nutze detailed")
+        mode = 'detailed'
+    if mode == 'detailed':
+        return handlers
+
+    sink = BatchingLogSink(
+        handlers,
+        summary=mode == 'summary',
+        buffer_size=config.getint('monitoring', 'log_buffer_size', fallback=500),
+        flush_interval=config.getfloat('monitoring', 'log_flush_interval', fallback=60.0)
+    )
+    if mode == 'summary' and hasattr(signal, 'SIGUSR2') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR2, sink._on_signal)
+    return [sink]
+
+
+def find_sink(logger: Optional[logging.Logger] = None) -> Optional[BatchingLogSink]:
+    """Installierten BatchingLogSink am Root-Logger finden"""
+    for handler in (logger or logging.getLogger()).handlers:
+        if isinstance(handler, BatchingLogSink):
+            return handler
+    return None
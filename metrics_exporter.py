@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Prometheus /metrics für das Pi 5 Web Dashboard
+Wird ausschließlich aus dem Sensor-Snapshot und den Statistik-Zählern gerendert -
+ein Scrape löst nie eine Hardware-Lesung aus
+"""
+
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+from pipeline_tracing import BUCKETS as TRACE_BUCKETS
+from sensor_rules import STATES
+
+# Prometheus Client (optional)
+try:
+    from prometheus_client import CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotMetricsCollector:
+    """Custom Collector: Sensorwerte, Lese-Latenzen, CRC-Fehler, Zyklus- und Queue-Zähler"""
+
+    def __init__(self, snapshot_cache, sensor_monitor=None, system_sampler=None,
+                 queue_depths: Optional[Dict[str, Callable[[], Optional[int]]]] = None, staleness=None,
+                 heat_pump=None, tracer=None):
+        self.snapshot_cache = snapshot_cache
+        self.sensor_monitor = sensor_monitor
+        self.system_sampler = system_sampler
+        self.queue_depths = queue_depths or {}
+        self.staleness = staleness
+        self.heat_pump = heat_pump
+        self.tracer = tracer
+
+    def collect(self):
+        snapshot = self.snapshot_cache.peek()
+
+        # Sensorwerte - Labels aus [labels]
+        temperature = GaugeMetricFamily(
+            'pi5_sensor_temperature_celsius', 'Letzte Sensor-Temperatur', labels=['sensor', 'label'])
+        humidity = GaugeMetricFamily(
+            'pi5_sensor_humidity_percent', 'Letzte Luftfeuchtigkeit', labels=['sensor', 'label'])
+        for sensor, reading in snapshot.data.items():
+            if not reading or reading.get('value') is None:
+                continue
+            family = humidity if reading.get('type') == 'humidity' else temperature
+            family.add_metric([sensor, str(reading.get('label', sensor))], float(reading['value']))
+        yield temperature
+        yield humidity
+
+        yield GaugeMetricFamily('pi5_snapshot_age_seconds', 'Alter des Sensor-Snapshots',
+                                value=max(0.0, snapshot.age()) if snapshot.sequence else 0.0)
+        yield GaugeMetricFamily('pi5_acquisition_cycle_seconds', 'Dauer der letzten Sensor-Erfassung',
+                                value=snapshot.duration_ms / 1000.0)
+
+        stats = self.snapshot_cache.stats
+        overruns = CounterMetricFamily('pi5_acquisition_overruns', 'Erfassungen länger als das Intervall')
+        overruns.add_metric([], stats['overruns'])
+        yield overruns
+        errors = CounterMetricFamily('pi5_acquisition_errors', 'Fehlgeschlagene Sensor-Erfassungen')
+        errors.add_metric([], stats['errors'])
+        yield errors
+
+        if self.staleness is not None:
+            yield from self._collect_staleness()
+
+        if self.heat_pump is not None and self.heat_pump.since is not None:
+            yield from self._collect_heat_pump()
+
+        if self.sensor_monitor is not None:
+            yield from self._collect_sensor_stats()
+
+        if self.tracer is not None:
+            yield from self._collect_traces()
+
+        queue_depth = GaugeMetricFamily('pi5_writer_queue_depth', 'Wartende Nachrichten im Writer',
+                                        labels=['queue'])
+        for name, depth in self.queue_depths.items():
+            try:
+                value = depth()
+            except Exception as e:
+                logger.debug(f"Queue-Tiefe {name} nicht verfügbar: {e}")
+                value = None
+            if value is not None:
+                queue_depth.add_metric([name], value)
+        yield queue_depth
+
+        if self.system_sampler is not None:
+            yield from self._collect_system()
+
+    def _collect_staleness(self):
+        states = self.staleness.snapshot()
+        state = GaugeMetricFamily('pi5_sensor_state', 'Sensor-Zustand (1 = aktueller Zustand)',
+                                  labels=['sensor', 'state'])
+        age = GaugeMetricFamily('pi5_sensor_last_seen_age_seconds', 'Sekunden seit dem letzten gültigen Messwert',
+                                labels=['sensor'])
+        for sensor, entry in sorted(states.items()):
+            for name in STATES:
+                state.add_metric([sensor, name], 1.0 if entry['state'] == name else 0.0)
+            if entry['age'] is not None:
+                age.add_metric([sensor], entry['age'])
+        yield state
+        yield age
+
+    def _collect_heat_pump(self):
+        counters = self.heat_pump.counters()
+        labels = ['circuit']
+        circuit = [self.heat_pump.name]
+
+        def gauge(name, doc, value):
+            family = GaugeMetricFamily(name, doc, labels=labels)
+            family.add_metric(circuit, float(value))
+            return family
+
+        def counter(name, doc, value):
+            family = CounterMetricFamily(name, doc, labels=labels)
+            family.add_metric(circuit, float(value))
+            return family
+
+        yield gauge('pi5_heat_pump_running', 'Verdichter läuft (1) oder steht (0)', counters['running'])
+        yield gauge('pi5_heat_pump_short_cycling', 'Wärmepumpe taktet (1)', counters['short_cycling'])
+        yield counter('pi5_heat_pump_starts', 'Verdichter-Starts seit Dienststart', counters['starts_total'])
+        yield counter('pi5_heat_pump_runtime_seconds', 'Verdichter-Laufzeit seit Dienststart',
+                      counters['runtime_total_s'])
+        yield gauge('pi5_heat_pump_starts_last_hour', 'Verdichter-Starts in der letzten Stunde',
+                    counters['starts_last_hour'])
+        yield gauge('pi5_heat_pump_mean_runtime_seconds', 'Mittlere Laufzeit abgeschlossener Läufe',
+                    counters['mean_runtime_s'])
+        yield gauge('pi5_heat_pump_last_runtime_seconds', 'Laufzeit des letzten Laufs',
+                    counters['last_runtime_s'])
+
+    def _collect_sensor_stats(self):
+        manager = self.sensor_monitor.ds18b20_manager
+        names = {sensor_id: f"DS18B20_{i}" for i, sensor_id in enumerate(manager.sensor_ids, 1)}
+        bounds = manager.sensor_stats.BUCKETS
+
+        latency = HistogramMetricFamily('pi5_sensor_read_latency_seconds', 'DS18B20 Lesedauer',
+                                        labels=['sensor', 'sensor_id'])
+        crc = CounterMetricFamily('pi5_sensor_crc_failures', 'DS18B20 CRC-Fehler',
+                                  labels=['sensor', 'sensor_id'])
+        reads = CounterMetricFamily('pi5_sensor_reads', 'DS18B20 Lesungen nach Ergebnis',
+                                    labels=['sensor', 'sensor_id', 'outcome'])
+        for sensor_id, entry in sorted(manager.sensor_stats.snapshot().items()):
+            labels = [names.get(sensor_id, sensor_id), sensor_id]
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(bounds, entry['buckets']):
+                cumulative += count
+                buckets.append((str(bound), cumulative))
+            buckets.append(('+Inf', entry['count']))
+            latency.add_metric(labels, buckets, entry['sum'])
+            crc.add_metric(labels, entry['crc_failures'])
+            for outcome, counter in manager.sensor_stats.OUTCOMES.items():
+                reads.add_metric(labels + [outcome], entry[counter])
+        yield latency
+        yield crc
+        yield reads
+
+        dht = self.sensor_monitor.dht22_sensor
+        yield GaugeMetricFamily('pi5_dht22_success_ratio', 'DHT22 Anteil erfolgreicher Lesungen',
+                                value=dht.get_success_rate() / 100.0)
+
+    def _collect_traces(self):
+        histograms = self.tracer.histograms()
+        bounds = [str(bound) for bound in TRACE_BUCKETS] + ['+Inf']
+
+        def family(name, doc, label, entries):
+            metric = HistogramMetricFamily(name, doc, labels=[label])
+            for key, entry in sorted(entries.items()):
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(bounds, entry['buckets']):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                metric.add_metric([key], buckets, entry['sum'])
+            return metric
+
+        yield family('pi5_stage_duration_seconds', 'Dauer pro Verarbeitungsstufe und Zyklus', 'stage',
+                     histograms['stages'])
+        yield family('pi5_trace_cycle_duration_seconds', 'Dauer der gemessenen Zyklen', 'cycle',
+                     histograms['cycles'])
+
+    def _collect_system(self):
+        sample = self.system_sampler.latest()
+        for key, name, doc in (
+            ('cpu_usage', 'pi5_cpu_usage_percent', 'CPU Usage Percentage'),
+            ('memory_usage', 'pi5_memory_usage_percent', 'Memory Usage Percentage'),
+            ('disk_usage', 'pi5_disk_usage_percent', 'Disk Usage Percentage'),
+            ('cpu_temperature', 'pi5_cpu_temperature_celsius', 'CPU Temperature'),
+        ):
+            if sample.get(key) is not None:
+                yield GaugeMetricFamily(name, doc, value=sample[key])
+
+
+def create_registry(collector: SnapshotMetricsCollector):
+    """Eigene Registry, damit /metrics nur Snapshot-basierte Werte enthält"""
+    if not PROMETHEUS_AVAILABLE:
+        return None
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(collector)
+    return registry
+
+
+def render_metrics(registry) -> Tuple[bytes, str]:
+    """Prometheus Text-Format rendern"""
+    if registry is None:
+        return b'# prometheus_client nicht installiert: pip install prometheus-client\n', CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
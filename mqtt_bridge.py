@@ -17,12 +17,11 @@ import sys
 from datetime import datetime
 from typing import Dict, List, Optional
 import configparser
+import importlib.util
 
-try:
-    from influxdb_client import InfluxDBClient
-    INFLUXDB_AVAILABLE = True
-except ImportError:
-    INFLUXDB_AVAILABLE = False
+# InfluxDB Client wird erst in setup_influxdb() geladen
+INFLUXDB_AVAILABLE = importlib.util.find_spec('influxdb_client') is not None
+if not INFLUXDB_AVAILABLE:
     print("❌ InfluxDB Client nicht verfügbar - installiere: pip install influxdb-client")
 
 try:
@@ -32,19 +31,36 @@ except ImportError:
     MQTT_AVAILABLE = False
     print("❌ MQTT Client nicht verfügbar - installiere: pip install paho-mqtt")
 
+from log_sink import CYCLE_SUMMARY, wrap_handlers
+from mqtt_queue import MqttOfflineQueue, queue_path
+from mqtt_commands import BridgeScheduler, MqttCommandHandler, schedule_path
+from pipeline_tracing import TRACER, configure_tracer, dump_configured, stage
+from profiling import PROFILER, setup_profiling
+from resource_guard import guard_from_config
+
 # =============================================================================
 # LOGGING SETUP
 # =============================================================================
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('/home/pi/pi5-sensors/mqtt_bridge.log')
-    ]
-)
+LOG_FILE = '/home/pi/pi5-sensors/mqtt_bridge.log'
+
 logger = logging.getLogger(__name__)
 
+def setup_logging(log_file: str = LOG_FILE, config_path: str = 'config.ini'):
+    """Logging für den Kommandozeilen-Betrieb: Konsole + Logdatei ([monitoring] log_mode)"""
+    handlers = [logging.StreamHandler()]
+    try:
+        handlers.append(logging.FileHandler(log_file))
+    except OSError as e:
+        print(f"⚠️ Logdatei {log_file} nicht verfügbar: {e}")
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=wrap_handlers(handlers, config),
+        force=True
+    )
+
 class Pi5MqttBridge:
     """MQTT Bridge für Pi5 Heizungs Messer → Home Assistant"""
     
@@ -79,6 +95,19 @@ class Pi5MqttBridge:
         self.mqtt_username = self.config.get('mqtt', 'username', fallback='')
         self.mqtt_password = self.config.get('mqtt', 'password', fallback='')
         self.mqtt_prefix = self.config.get('mqtt', 'topic_prefix', fallback='pi5_heizung')
+        self.mqtt_qos = self.config.getint('mqtt', 'qos', fallback=1)
+        self.mqtt_keepalive = self.config.getint('mqtt', 'keepalive', fallback=60)
+        self.mqtt_max_inflight = self.config.getint('mqtt', 'max_inflight', fallback=20)
+        self.reconnect_min_delay = self.config.getint('mqtt', 'reconnect_min_delay', fallback=1)
+        self.reconnect_max_delay = self.config.getint('mqtt', 'reconnect_max_delay', fallback=60)
+        
+        # Offline-Queue: neuester Wert pro Topic überlebt Broker-Ausfälle und Neustarts
+        self.outbox = MqttOfflineQueue(
+            path=queue_path(self.config),
+            max_messages=self.config.getint('mqtt', 'queue_size', fallback=500),
+            max_inflight=self.mqtt_max_inflight,
+            qos=self.mqtt_qos
+        )
         
         # Home Assistant Konfiguration
         self.ha_ip = self.config.get('homeassistant', 'ip', fallback='192.168.1.100')
@@ -95,9 +124,25 @@ class Pi5MqttBridge:
         if self.config.has_section('labels'):
             self.sensor_labels = dict(self.config.items('labels'))
         
+        # Zeitplan + Command-Topic: Intervalle zur Laufzeit ändern ({prefix}/cmd) - der Zeitplan
+        # geht über [mqtt] schedule_file an sensor_influxdb.py, das danach misst
+        self.scheduler = BridgeScheduler(interval=self.config.getint('mqtt', 'interval', fallback=30),
+                                         state_file=schedule_path(self.config))
+        # read_now: Antwort, sobald die Messung des Loggers in InfluxDB liegt - spätestens nach read_timeout
+        self.read_timeout = self.config.getfloat('mqtt', 'read_now_timeout', fallback=15.0)
+        self.pending_reads: List[tuple] = []
+        self.command_handler = MqttCommandHandler(self.scheduler, self.sensor_labels.keys())
+        self.command_topic = f"{self.mqtt_prefix}/cmd"
+        self.reply_topic = f"{self.mqtt_prefix}/cmd/reply"
+        
+        # Stufen-Zeitmessung pro Übertragung ([performance] tracing)
+        configure_tracer(self.config)
+        
         # MQTT Client
         self.mqtt_client = None
         self.influx_client = None
+        # Zeitstempel der zuletzt aus InfluxDB gelesenen Werte (Alter in read_now Antworten)
+        self.reading_times: Dict[str, float] = {}
         
         # Home Assistant Device Info
         self.device_info = {
@@ -110,6 +155,7 @@ class Pi5MqttBridge:
         
         logger.info("🌡️ Pi5 MQTT Bridge initialisiert")
         logger.info(f"   📡 MQTT Broker: {self.mqtt_broker}:{self.mqtt_port}")
+        logger.info(f"   📦 QoS {self.mqtt_qos}, In-Flight max. {self.mqtt_max_inflight}, Queue: {self.outbox.path}")
         logger.info(f"   🏠 Home Assistant: {self.ha_ip}")
         logger.info(f"   🗄️ InfluxDB: {self.influx_url}")
         logger.info(f"   🏷️ Sensoren: {len(self.sensor_labels)}")
@@ -131,15 +177,23 @@ class Pi5MqttBridge:
             self.mqtt_client.on_connect = self.on_mqtt_connect
             self.mqtt_client.on_disconnect = self.on_mqtt_disconnect
             self.mqtt_client.on_publish = self.on_mqtt_publish
+            self.mqtt_client.on_message = self.on_mqtt_message
             
             # Authentication falls konfiguriert
             if self.mqtt_username and self.mqtt_password:
                 self.mqtt_client.username_pw_set(self.mqtt_username, self.mqtt_password)
                 logger.info("🔐 MQTT Authentifizierung aktiviert")
             
-            # Verbinden
+            # Reconnect-Verhalten von loop_start: exponentieller Backoff statt fester Pausen
+            self.mqtt_client.reconnect_delay_set(
+                min_delay=self.reconnect_min_delay,
+                max_delay=self.reconnect_max_delay
+            )
+            self.mqtt_client.max_inflight_messages_set(self.mqtt_max_inflight)
+            
+            # Verbinden - connect_async, damit ein nicht erreichbarer Broker den Start nicht blockiert
             logger.info(f"🔌 Verbinde zu MQTT Broker {self.mqtt_broker}:{self.mqtt_port}")
-            self.mqtt_client.connect(self.mqtt_broker, self.mqtt_port, 60)
+            self.mqtt_client.connect_async(self.mqtt_broker, self.mqtt_port, self.mqtt_keepalive)
             self.mqtt_client.loop_start()
             
             return True
@@ -155,6 +209,8 @@ class Pi5MqttBridge:
             return False
             
         try:
+            from influxdb_client import InfluxDBClient
+            
             self.influx_client = InfluxDBClient(
                 url=self.influx_url,
                 token=self.influx_token,
@@ -180,9 +236,17 @@ class Pi5MqttBridge:
             logger.info("✅ MQTT Broker verbunden")
             # Status senden
             self.mqtt_client.publish(f"{self.mqtt_prefix}/status", "online", retain=True)
+            # Command-Topic abonnieren (nach Reconnect erneut nötig)
+            self.mqtt_client.subscribe(self.command_topic, qos=1)
+            logger.info(f"📥 Befehle auf {self.command_topic}, Antworten auf {self.reply_topic}")
             # Home Assistant Auto-Discovery senden
             logger.info("🏠 Sende Home Assistant Auto-Discovery...")
             self.publish_discovery()
+            # Während des Ausfalls gepufferte Zustände nachliefern
+            pending = self.outbox.depth()
+            if pending:
+                logger.info(f"📦 Sende {pending} gepufferte Sensor-Updates nach")
+                self.outbox.flush(self.mqtt_client)
         else:
             logger.error(f"❌ MQTT Verbindung fehlgeschlagen: {rc}")
             if rc == 1:
@@ -198,14 +262,34 @@ class Pi5MqttBridge:
 
     def on_mqtt_disconnect(self, client, userdata, rc):
         """MQTT Disconnect Callback"""
+        self.outbox.reset_inflight()
         if rc != 0:
-            logger.warning(f"⚠️ MQTT Verbindung getrennt: {rc}")
+            logger.warning(f"⚠️ MQTT Verbindung getrennt: {rc} - Updates werden gepuffert")
         else:
             logger.info("👋 MQTT Verbindung sauber getrennt")
 
     def on_mqtt_publish(self, client, userdata, mid):
         """MQTT Publish Callback"""
         logger.debug(f"📤 MQTT Nachricht gesendet: {mid}")
+        if self.outbox.ack(mid):
+            # Fenster wieder frei - nächste gepufferte Nachrichten nachschieben
+            # (flush() hält während publish() keinen Queue-Lock, der Aufruf aus dem Netzwerk-Thread ist sicher)
+            self.outbox.flush(self.mqtt_client)
+
+    def on_mqtt_message(self, client, userdata, msg):
+        """MQTT Message Callback - Befehle auf {prefix}/cmd"""
+        if msg.topic != self.command_topic:
+            return
+        reply = self.command_handler.handle(msg.payload)
+        if reply is not None:
+            self.publish_reply(reply)
+
+    def publish_reply(self, reply: Dict):
+        """Antwort auf einen Befehl senden"""
+        try:
+            self.mqtt_client.publish(self.reply_topic, json.dumps(reply, default=str), qos=self.mqtt_qos)
+        except Exception as e:
+            logger.error(f"❌ Fehler beim Senden der Befehlsantwort: {e}")
 
     def publish_discovery(self):
         """Home Assistant Auto-Discovery konfigurieren"""
@@ -251,6 +335,7 @@ class Pi5MqttBridge:
                     if success:
                         discovery_count += 1
             
+            discovery_count += self.publish_heat_pump_discovery()
             logger.info(f"✅ {discovery_count} Discovery-Nachrichten gesendet")
             
             # Kurz warten und dann erste Daten senden
@@ -260,21 +345,42 @@ class Pi5MqttBridge:
         except Exception as e:
             logger.error(f"❌ Fehler bei Auto-Discovery: {e}")
 
+    def publish_heat_pump_discovery(self) -> int:
+        """Wärmepumpen-Zähler (aus dem Takt-Detektor) für Home Assistant"""
+        entities = [
+            ("starts_last_hour", "Wärmepumpe Starts pro Stunde", None, "Starts/h", "mdi:counter"),
+            ("mean_runtime", "Wärmepumpe mittlere Laufzeit", "duration", "s", "mdi:timer-outline"),
+            ("last_runtime", "Wärmepumpe letzte Laufzeit", "duration", "s", "mdi:timer-outline"),
+            ("running", "Wärmepumpe Verdichter", None, None, "mdi:heat-pump"),
+            ("short_cycling", "Wärmepumpe taktet", None, None, "mdi:alert-circle-outline"),
+        ]
+        count = 0
+        for key, name, device_class, unit, icon in entities:
+            field = f"{key}_s" if device_class == "duration" else key
+            count += bool(self.publish_sensor_discovery(
+                sensor_id=f"heat_pump_{key}",
+                sensor_name=name,
+                device_class=device_class,
+                unit_of_measurement=unit,
+                value_template=f"{{{{ value_json.{field} }}}}",
+                icon=icon,
+                state_topic=f"{self.mqtt_prefix}/heat_pump/state"
+            ))
+        return count
+
     def publish_sensor_discovery(self, sensor_id: str, sensor_name: str, 
                                 device_class: str, unit_of_measurement: str,
-                                value_template: str, icon: str = None):
+                                value_template: str, icon: str = None, state_topic: str = None):
         """Einzelnen Sensor für Home Assistant Discovery konfigurieren"""
         
         try:
             discovery_topic = f"homeassistant/sensor/{self.mqtt_prefix}_{sensor_id}/config"
-            state_topic = f"{self.mqtt_prefix}/{sensor_id}/state"
+            state_topic = state_topic or f"{self.mqtt_prefix}/{sensor_id}/state"
             
             discovery_payload = {
                 "name": sensor_name,
                 "unique_id": f"{self.mqtt_prefix}_{sensor_id}",
                 "state_topic": state_topic,
-                "device_class": device_class,
-                "unit_of_measurement": unit_of_measurement,
                 "value_template": value_template,
                 "device": self.device_info,
                 "availability": [
@@ -287,6 +393,10 @@ class Pi5MqttBridge:
                 "expire_after": 300  # Sensor als offline nach 5 Minuten ohne Update
             }
             
+            if device_class:
+                discovery_payload["device_class"] = device_class
+            if unit_of_measurement:
+                discovery_payload["unit_of_measurement"] = unit_of_measurement
             if icon:
                 discovery_payload["icon"] = icon
             
@@ -308,6 +418,25 @@ class Pi5MqttBridge:
             logger.error(f"❌ Discovery Fehler für {sensor_name}: {e}")
             return False
 
+    def _sensor_id(self, name: Optional[str]) -> Optional[str]:
+        """Sensor-ID zu einem InfluxDB-Namen: Label ("VL WP") oder Standard-Name ("DS18B20_3", "DHT22_1")"""
+        if not name:
+            return None
+        for sensor_id, label in self.sensor_labels.items():
+            if label.strip('"') == name:
+                return sensor_id
+        key = name.lower()
+        if key in self.sensor_labels:
+            return key
+        if key.startswith('dht22') and 'dht22' in self.sensor_labels:
+            return 'dht22'
+        return None
+
+    def _remember_time(self, sensor_id: str, record):
+        timestamp = record.values.get("_time")
+        if timestamp is not None:
+            self.reading_times[sensor_id] = timestamp.timestamp()
+
     def get_latest_sensor_data(self) -> Dict[str, float]:
         """Aktuelle Sensor-Daten aus InfluxDB lesen"""
         try:
@@ -318,7 +447,7 @@ class Pi5MqttBridge:
             from(bucket: "{self.influx_bucket}")
               |> range(start: -5m)
               |> filter(fn: (r) => r["_measurement"] == "temperature")
-              |> group(columns: ["name"])
+              |> group(columns: ["name", "sensor_name"])
               |> last()
             '''
             
@@ -327,7 +456,7 @@ class Pi5MqttBridge:
             from(bucket: "{self.influx_bucket}")
               |> range(start: -5m)
               |> filter(fn: (r) => r["_measurement"] == "humidity")
-              |> group(columns: ["name"])
+              |> group(columns: ["name", "sensor_name"])
               |> last()
             '''
             
@@ -337,32 +466,35 @@ class Pi5MqttBridge:
             temp_result = query_api.query(temp_query)
             for table in temp_result:
                 for record in table.records:
-                    sensor_name = record.values["name"]
-                    temperature = record.values["_value"]
-                    
                     # Sensor-ID aus Label-Mapping finden
-                    sensor_id = None
-                    for id, name in self.sensor_labels.items():
-                        if name == sensor_name:
-                            sensor_id = id
-                            break
-                    
+                    sensor_id = self._sensor_id(record.values.get("name") or record.values.get("sensor_name"))
                     if sensor_id:
-                        sensor_data[sensor_id] = {"temperature": temperature}
+                        sensor_data.setdefault(sensor_id, {})["temperature"] = record.values["_value"]
+                        self._remember_time(sensor_id, record)
             
             # Luftfeuchtigkeit lesen  
             humidity_result = query_api.query(humidity_query)
             for table in humidity_result:
                 for record in table.records:
-                    sensor_name = record.values["name"]
-                    humidity = record.values["_value"]
-                    
                     # DHT22 Sensor
-                    if sensor_name == self.sensor_labels.get('dht22', ''):
-                        if 'dht22' in sensor_data:
-                            sensor_data['dht22']['humidity'] = humidity
-                        else:
-                            sensor_data['dht22'] = {"humidity": humidity}
+                    sensor_id = self._sensor_id(record.values.get("name") or record.values.get("sensor_name"))
+                    if sensor_id == 'dht22':
+                        sensor_data.setdefault('dht22', {})["humidity"] = record.values["_value"]
+                        self._remember_time(sensor_id, record)
+            
+            # Wärmepumpen-Zähler: letzter vom Logger geschriebener Stand (keine Auswertung der Historie)
+            heat_pump_query = f'''
+            from(bucket: "{self.influx_bucket}")
+              |> range(start: -5m)
+              |> filter(fn: (r) => r["_measurement"] == "heat_pump")
+              |> last()
+            '''
+            heat_pump = {}
+            for table in query_api.query(heat_pump_query):
+                for record in table.records:
+                    heat_pump[record.values["_field"]] = record.values["_value"]
+            if heat_pump:
+                sensor_data['heat_pump'] = heat_pump
             
             logger.info(f"📊 {len(sensor_data)} Sensoren gelesen")
             return sensor_data
@@ -372,12 +504,13 @@ class Pi5MqttBridge:
             return {}
 
     def publish_sensor_data(self, sensor_data: Dict):
-        """Sensor-Daten via MQTT senden"""
+        """Sensor-Daten via MQTT senden (über die Offline-Queue)"""
         
         # Status als "online" senden
         self.mqtt_client.publish(f"{self.mqtt_prefix}/status", "online", retain=True)
         
-        published_count = 0
+        queued_count = 0
+        serialize_start = time.perf_counter()
         
         for sensor_id, data in sensor_data.items():
             try:
@@ -386,58 +519,117 @@ class Pi5MqttBridge:
                     if 'temperature' in data:
                         topic = f"{self.mqtt_prefix}/dht22_temperature/state"
                         payload = {"temperature": round(data['temperature'], 1)}
-                        result = self.mqtt_client.publish(topic, json.dumps(payload))
-                        if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                            logger.info(f"📤 DHT22 Temp: {payload['temperature']}°C → {topic}")
-                            published_count += 1
-                        else:
-                            logger.error(f"❌ MQTT Publish Fehler: {result.rc}")
+                        self.outbox.put(topic, json.dumps(payload))
+                        logger.info("📤 DHT22 Temp: %s°C → %s", payload['temperature'], topic)
+                        queued_count += 1
                         
                     if 'humidity' in data:
                         topic = f"{self.mqtt_prefix}/dht22_humidity/state"
                         payload = {"humidity": round(data['humidity'], 1)}
-                        result = self.mqtt_client.publish(topic, json.dumps(payload))
-                        if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                            logger.info(f"📤 DHT22 Hum: {payload['humidity']}% → {topic}")
-                            published_count += 1
-                        else:
-                            logger.error(f"❌ MQTT Publish Fehler: {result.rc}")
+                        self.outbox.put(topic, json.dumps(payload))
+                        logger.info("📤 DHT22 Hum: %s%% → %s", payload['humidity'], topic)
+                        queued_count += 1
+                elif sensor_id == 'heat_pump':
+                    # Wärmepumpen-Zähler als ein JSON-Objekt
+                    topic = f"{self.mqtt_prefix}/heat_pump/state"
+                    self.outbox.put(topic, json.dumps(data))
+                    logger.info("📤 Wärmepumpe: %s Starts/h → %s", data.get('starts_last_hour'), topic)
+                    queued_count += 1
                 else:
                     # DS18B20 Temperatursensoren
                     if 'temperature' in data:
                         sensor_name = self.sensor_labels.get(sensor_id, sensor_id)
                         topic = f"{self.mqtt_prefix}/{sensor_id}/state"
                         payload = {"temperature": round(data['temperature'], 1)}
-                        result = self.mqtt_client.publish(topic, json.dumps(payload))
-                        if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                            logger.info(f"📤 {sensor_name}: {payload['temperature']}°C → {topic}")
-                            published_count += 1
-                        else:
-                            logger.error(f"❌ MQTT Publish Fehler: {result.rc}")
+                        self.outbox.put(topic, json.dumps(payload))
+                        logger.info("📤 %s: %s°C → %s", sensor_name, payload['temperature'], topic)
+                        queued_count += 1
                             
             except Exception as e:
-                logger.error(f"❌ Fehler beim Senden von {sensor_id}: {e}")
+                logger.error("❌ Fehler beim Senden von %s: %s", sensor_id, e)
         
-        logger.info(f"✅ {published_count} MQTT Updates erfolgreich gesendet")
+        TRACER.add('serialize', time.perf_counter() - serialize_start)
+        with stage('mqtt_publish'):
+            sent_count = self.outbox.flush(self.mqtt_client)
+        pending = self.outbox.depth() - self.outbox.inflight()
+        if pending > 0:
+            logger.warning("⚠️ %d MQTT Updates eingereiht, %d gesendet, %d gepuffert", queued_count, sent_count, pending)
+        else:
+            logger.info("✅ %d MQTT Updates erfolgreich gesendet", sent_count)
 
-    def run_once(self):
-        """Einmalige Datenübertragung"""
+    def run_once(self, sensor_ids: Optional[List[str]] = None) -> Dict:
+        """Einmalige Datenübertragung - optional nur für ausgewählte Sensoren"""
         logger.info("🔄 Lese Sensor-Daten...")
-        sensor_data = self.get_latest_sensor_data()
-        if sensor_data:
-            self.publish_sensor_data(sensor_data)
-        else:
-            logger.warning("⚠️ Keine Sensor-Daten verfügbar")
-            # Status als offline senden wenn keine Daten
-            self.mqtt_client.publish(f"{self.mqtt_prefix}/status", "offline", retain=True)
+        with TRACER.cycle('mqtt'):
+            with stage('influx_query'):
+                sensor_data = self.get_latest_sensor_data()
+            if sensor_data:
+                if sensor_ids is not None:
+                    sensor_data = {k: v for k, v in sensor_data.items() if k in sensor_ids}
+                if sensor_data:
+                    self.publish_sensor_data(sensor_data)
+            else:
+                logger.warning("⚠️ Keine Sensor-Daten verfügbar")
+                # Status als offline senden wenn keine Daten
+                self.mqtt_client.publish(f"{self.mqtt_prefix}/status", "offline", retain=True)
+        return sensor_data
+
+    def _scheduled_sensors(self) -> List[str]:
+        """Sensor-IDs für den Zeitplan ('*' = alle, falls keine Labels konfiguriert)"""
+        return list(self.sensor_labels) or ['*']
+
+    def run_scheduled_cycle(self):
+        """Fällige Sensoren und angeforderte Sofort-Messungen übertragen"""
+        all_sensors = self._scheduled_sensors()
+        requests = self.pending_reads + self.scheduler.pop_read_requests()
+        self.pending_reads = []
+        targets = set(self.scheduler.due_sensors(all_sensors))
+        for sensors, _, _ in requests:
+            targets.update(sensors if sensors is not None else all_sensors)
+        
+        if not targets:
+            return
+        
+        full_cycle = targets >= set(all_sensors)
+        start_time = time.perf_counter()
+        with PROFILER.cycle():
+            sensor_data = self.run_once(None if full_cycle else sorted(targets))
+        self.scheduler.mark_published(targets)
+        
+        # Eine Zeile pro Zyklus - im summary-Logmodus die einzige geschriebene INFO-Zeile
+        logger.info("📡 Zyklus: %d/%d Sensoren veröffentlicht, Outbox %d, %.0fms",
+                    len(sensor_data), len(targets), self.outbox.depth(),
+                    (time.perf_counter() - start_time) * 1000, extra=CYCLE_SUMMARY)
+        
+        # read_now: der Logger misst sofort - antworten, sobald alle angefragten Werte neuer als die
+        # Anfrage sind, sonst nach read_timeout mit den letzten Werten (Alter in Sekunden)
+        now = time.time()
+        for sensors, reply_id, requested_at in requests:
+            wanted = [s for s in (sensors or sensor_data) if s != 'heat_pump']
+            fresh = all(self.reading_times.get(s, 0) >= requested_at for s in wanted)
+            if not fresh and now - requested_at < self.read_timeout:
+                self.pending_reads.append((sensors, reply_id, requested_at))
+                continue
+            if not fresh:
+                logger.warning("⚠️ read_now: keine neue Messung nach %.0fs - sende letzte Werte", self.read_timeout)
+            result = {}
+            for sensor_id in (sensors or sensor_data):
+                data = sensor_data.get(sensor_id)
+                if data is not None and sensor_id in self.reading_times:
+                    data = dict(data, age=round(now - self.reading_times[sensor_id], 1))
+                result[sensor_id] = data
+            self.publish_reply(MqttCommandHandler.reply('read_now', reply_id, bool(sensor_data), result))
 
-    def run_continuous(self, interval: int = 30):
-        """Kontinuierliche Datenübertragung"""
-        logger.info(f"🔄 Starte kontinuierliche MQTT Übertragung (alle {interval}s)")
+    def run_continuous(self, interval: Optional[int] = None):
+        """Kontinuierliche Datenübertragung nach Zeitplan (per {prefix}/cmd änderbar)"""
+        if interval is not None:
+            self.scheduler.set_interval(interval)
+        logger.info(f"🔄 Starte kontinuierliche MQTT Übertragung (alle {self.scheduler.interval}s)")
         
         # Discovery alle 10 Minuten erneut senden (für Robustheit)
         discovery_interval = 600  # 10 Minuten
         last_discovery = 0
+        resource_guard = guard_from_config(self.config)
         
         try:
             while True:
@@ -447,11 +639,23 @@ class Pi5MqttBridge:
                 if current_time - last_discovery > discovery_interval:
                     logger.info("🔄 Sende Auto-Discovery erneut...")
                     self.publish_discovery()
+                    self.scheduler.mark_published(self._scheduled_sensors())
                     last_discovery = current_time
                 
-                # Normale Datenübertragung
-                self.run_once()
-                time.sleep(interval)
+                # Fällige Sensoren übertragen
+                self.run_scheduled_cycle()
+                if resource_guard:
+                    resource_guard.check()
+                
+                # Schlafen bis zum nächsten fälligen Sensor - Befehle wecken sofort auf
+                timeout = min(
+                    self.scheduler.seconds_until_due(self._scheduled_sensors()),
+                    max(0.0, last_discovery + discovery_interval - time.time())
+                )
+                if self.pending_reads:
+                    # Auf die Messung des Loggers warten
+                    timeout = min(timeout, 1.0)
+                self.scheduler.wait(max(timeout, 0.1))
                 
         except KeyboardInterrupt:
             logger.info("👋 MQTT Bridge beendet durch Benutzer")
@@ -464,6 +668,8 @@ class Pi5MqttBridge:
                 self.mqtt_client.publish(f"{self.mqtt_prefix}/status", "offline", retain=True)
                 self.mqtt_client.loop_stop()
                 self.mqtt_client.disconnect()
+            self.outbox.close()
+            dump_configured(self.config)
             if self.influx_client:
                 logger.info("🧹 InfluxDB Cleanup...")
                 self.influx_client.close()
@@ -509,6 +715,11 @@ def main():
     """Hauptfunktion"""
     import sys
     
+    setup_logging()
+    
+    # --profile[=N] entfernen, SIGUSR1 für Profiling installieren
+    setup_profiling('mqtt_bridge')
+    
     if not INFLUXDB_AVAILABLE or not MQTT_AVAILABLE:
         print("❌ Erforderliche Dependencies fehlen!")
         print("   pip install influxdb-client paho-mqtt")
@@ -530,7 +741,8 @@ def main():
                 print("❌ MQTT Setup fehlgeschlagen!")
                 sys.exit(1)
             time.sleep(2)
-            bridge.run_once()
+            with PROFILER.cycle():
+                bridge.run_once()
             
         elif mode == "mqtt-test":
             print("🧪 MQTT Test-Modus: Verbindung und Discovery testen")
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+MQTT Command-Topic für Pi5 Heizungs Messer
+Zeitplan der MQTT Bridge mit Live-Änderungen ohne Neustart
+Befehle: read_now, set_interval, set_sensor_interval, status
+
+Die Bridge nimmt die Befehle an und schreibt ihren Zeitplan nach [mqtt] schedule_file.
+sensor_influxdb.py (liest den 1-Wire Bus) tastet nach dieser Datei ab: Intervalle gelten für
+die Messung selbst, read_now löst dort eine echte Sensor-Messung aus. Die Bridge antwortet,
+sobald die neue Messung in InfluxDB liegt ("age" in der Antwort zeigt, wie alt die Werte sind).
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 1
+MAX_INTERVAL = 86400
+# Temporäre Intervalle höchstens eine Woche
+MAX_DURATION = 7 * 86400
+
+
+def schedule_path(config) -> str:
+    """Pfad des gemeinsamen Zeitplans aus [mqtt] schedule_file - Bridge schreibt, Logger liest"""
+    return config.get('mqtt', 'schedule_file', fallback='mqtt_schedule.json').strip() or 'mqtt_schedule.json'
+
+
+class BridgeScheduler:
+    """Thread-sicherer Zeitplan: globales Intervall, Sensor-Overrides, Sofort-Messungen
+
+    Mit state_file wird jede Änderung für den Logger (SamplingSchedule) in die Datei geschrieben.
+    """
+
+    def __init__(self, interval: int = 30, clock: Callable[[], float] = time.monotonic,
+                 state_file: Optional[str] = None):
+        self.clock = clock
+        self.state_file = state_file
+        self.base_interval = interval
+        self._interval = interval
+        self._interval_expires = None
+        # Globales Intervall per Befehl gesetzt (sonst gilt für den Logger sein eigenes)
+        self._commanded = False
+        self._base_commanded = False
+        # sensor_id → (intervall, ablaufzeit oder None)
+        self._sensor_overrides: Dict[str, tuple] = {}
+        self._last_published: Dict[str, float] = {}
+        # Ausstehende read_now Anfragen: (sensor_ids oder None, reply_id, Anfragezeit time.time())
+        self._read_requests: List[tuple] = []
+        self._read_seq = 0
+        self._session = time.time()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.save()
+
+    @property
+    def interval(self) -> float:
+        with self._lock:
+            self._expire_overrides()
+            return self._interval
+
+    def _expire_overrides(self):
+        """Abgelaufene temporäre Intervalle zurücksetzen (Lock muss gehalten werden)"""
+        now = self.clock()
+        if self._interval_expires is not None and now >= self._interval_expires:
+            logger.info(f"⏱️ Temporäres Intervall {self._interval}s abgelaufen → {self.base_interval}s")
+            self._interval = self.base_interval
+            self._interval_expires = None
+            self._commanded = self._base_commanded
+        for sensor_id, (interval, expires) in list(self._sensor_overrides.items()):
+            if expires is not None and now >= expires:
+                logger.info(f"⏱️ Intervall {interval}s für {sensor_id} abgelaufen")
+                del self._sensor_overrides[sensor_id]
+
+    def set_interval(self, interval: float, duration: Optional[float] = None):
+        """Globales Intervall setzen - mit duration nur temporär"""
+        with self._lock:
+            self._interval = interval
+            self._commanded = True
+            if duration:
+                self._interval_expires = self.clock() + duration
+            else:
+                self.base_interval = interval
+                self._base_commanded = True
+                self._interval_expires = None
+        self.save()
+        self._wakeup.set()
+
+    def set_sensor_interval(self, sensor_id: str, interval: Optional[float],
+                            duration: Optional[float] = None):
+        """Intervall für einzelnen Sensor setzen - None entfernt den Override"""
+        with self._lock:
+            if interval is None:
+                self._sensor_overrides.pop(sensor_id, None)
+            else:
+                expires = self.clock() + duration if duration else None
+                self._sensor_overrides[sensor_id] = (interval, expires)
+        self.save()
+        self._wakeup.set()
+
+    def request_read(self, sensor_ids: Optional[List[str]] = None, reply_id: Optional[str] = None):
+        """Sofortige Messung anfordern (Logger über read_seq) und wartenden Zyklus aufwecken"""
+        with self._lock:
+            self._read_requests.append((sensor_ids, reply_id, time.time()))
+            self._read_seq += 1
+        self.save()
+        self._wakeup.set()
+
+    def pop_read_requests(self) -> List[tuple]:
+        """Ausstehende read_now Anfragen abholen"""
+        with self._lock:
+            requests, self._read_requests = self._read_requests, []
+            return requests
+
+    def interval_for(self, sensor_id: str) -> float:
+        """Effektives Intervall eines Sensors"""
+        with self._lock:
+            self._expire_overrides()
+            override = self._sensor_overrides.get(sensor_id)
+            return override[0] if override else self._interval
+
+    def due_sensors(self, sensor_ids: Iterable[str]) -> List[str]:
+        """Sensoren, deren Intervall abgelaufen ist"""
+        now = self.clock()
+        due = []
+        for sensor_id in sensor_ids:
+            last = self._last_published.get(sensor_id)
+            if last is None or now - last >= self.interval_for(sensor_id):
+                due.append(sensor_id)
+        return due
+
+    def mark_published(self, sensor_ids: Iterable[str]):
+        """Sendezeitpunkt der Sensoren merken"""
+        now = self.clock()
+        with self._lock:
+            for sensor_id in sensor_ids:
+                self._last_published[sensor_id] = now
+
+    def seconds_until_due(self, sensor_ids: Iterable[str]) -> float:
+        """Wartezeit bis zum nächsten fälligen Sensor"""
+        now = self.clock()
+        waits = []
+        for sensor_id in sensor_ids:
+            last = self._last_published.get(sensor_id)
+            if last is None:
+                return 0.0
+            waits.append(last + self.interval_for(sensor_id) - now)
+        with self._lock:
+            if self._interval_expires is not None:
+                waits.append(self._interval_expires - now)
+        return max(0.0, min(waits)) if waits else float(self.interval)
+
+    def wait(self, timeout: float) -> bool:
+        """Wartet bis timeout oder bis ein Befehl den Zeitplan ändert"""
+        woken = self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        return woken
+
+    def sampling_state(self) -> Dict[str, Any]:
+        """Zeitplan für den Logger - Ablaufzeiten als time.time(), da prozessübergreifend"""
+        with self._lock:
+            self._expire_overrides()
+            offset = time.time() - self.clock()
+            return {
+                'session': self._session,
+                'interval': self._interval if self._commanded else None,
+                'interval_expires': (self._interval_expires + offset
+                                     if self._interval_expires is not None else None),
+                'sensor_intervals': {
+                    sensor_id: [interval, expires + offset if expires is not None else None]
+                    for sensor_id, (interval, expires) in self._sensor_overrides.items()
+                },
+                'read_seq': self._read_seq
+            }
+
+    def save(self):
+        """Zeitplan atomar nach state_file schreiben (ohne state_file: nichts)"""
+        if not self.state_file:
+            return
+        tmp = f"{self.state_file}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(self.sampling_state(), f)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            logger.warning(f"⚠️ Zeitplan {self.state_file} nicht geschrieben: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aktueller Zeitplan für status-Antworten"""
+        with self._lock:
+            self._expire_overrides()
+            now = self.clock()
+            return {
+                'interval': self._interval,
+                'base_interval': self.base_interval,
+                'interval_expires_in': (round(self._interval_expires - now, 1)
+                                        if self._interval_expires is not None else None),
+                'sensor_intervals': {
+                    sensor_id: {
+                        'interval': interval,
+                        'expires_in': round(expires - now, 1) if expires is not None else None
+                    }
+                    for sensor_id, (interval, expires) in self._sensor_overrides.items()
+                }
+            }
+
+
+class SamplingSchedule:
+    """Abtast-Zeitplan des Loggers aus der Datei der Bridge (BridgeScheduler.save)
+
+    Ohne Datei oder Befehl gilt das eigene Intervall. Ein per set_interval gesetztes Intervall
+    ersetzt es; Sensor-Intervalle können den Zyklus nur beschleunigen, da der Logger immer alle
+    Sensoren liest. Die Datei wird nur bei Änderung neu gelesen.
+    """
+
+    def __init__(self, path: str, interval: float, poll: float = 1.0,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        self.path = path
+        self.base_interval = interval
+        self.poll = poll
+        self.clock = clock
+        self.sleep = sleep
+        self._mtime = None
+        self._state: Dict[str, Any] = {}
+        self._last_interval = float(interval)
+        self._load()
+        # Anfragen von vor dem Start nicht nachholen
+        self._seen = (self._state.get('session'), self._state.get('read_seq', 0))
+
+    def _load(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._mtime, self._state = None, {}
+            return
+        # os.replace legt jedes Mal eine neue Datei an - Inode erkennt auch Änderungen
+        # innerhalb derselben mtime-Auflösung
+        mtime = (stat.st_ino, stat.st_mtime_ns)
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Zeitplan {self.path} nicht lesbar: {e}")
+            return
+        if isinstance(state, dict):
+            self._mtime, self._state = mtime, state
+
+    def interval(self) -> float:
+        """Aktuelles Abtast-Intervall in Sekunden"""
+        self._load()
+        now = self.clock()
+        interval = float(self.base_interval)
+        try:
+            expires = self._state.get('interval_expires')
+            if self._state.get('interval') is not None and (expires is None or now < expires):
+                interval = float(self._state['interval'])
+            for value, expires in (self._state.get('sensor_intervals') or {}).values():
+                if expires is None or now < expires:
+                    interval = min(interval, float(value))
+        except (TypeError, ValueError, AttributeError):
+            interval = float(self.base_interval)
+        interval = max(float(MIN_INTERVAL), interval)
+        if interval != self._last_interval:
+            logger.info(f"⏱️ Abtast-Intervall {self._last_interval:g}s → {interval:g}s")
+            self._last_interval = interval
+        return interval
+
+    def read_requested(self) -> bool:
+        """True, wenn seit dem letzten Aufruf ein read_now angefordert wurde"""
+        self._load()
+        session, seq = self._state.get('session'), self._state.get('read_seq', 0)
+        if session != self._seen[0]:
+            # Bridge neu gestartet - ihr Zähler beginnt wieder bei 0
+            self._seen = (session, seq)
+            return False
+        if seq == self._seen[1]:
+            return False
+        self._seen = (session, seq)
+        return True
+
+    def wait(self, started: float) -> bool:
+        """Bis started + Intervall warten - True, sobald read_now eine sofortige Messung anfordert"""
+        while True:
+            if self.read_requested():
+                return True
+            remaining = started + self.interval() - self.clock()
+            if remaining <= 0:
+                return False
+            self.sleep(min(self.poll, remaining))
+
+
+class CommandError(ValueError):
+    """Ungültiger MQTT-Befehl"""
+
+
+class MqttCommandHandler:
+    """Übersetzt Nachrichten auf {prefix}/cmd in Scheduler-Aufrufe"""
+
+    def __init__(self, scheduler: BridgeScheduler, known_sensors: Iterable[str] = ()):
+        self.scheduler = scheduler
+        self.known_sensors = set(known_sensors)
+
+    def parse(self, payload: bytes) -> Dict[str, Any]:
+        """JSON-Befehl oder reiner Befehlsname ("read_now")"""
+        try:
+            text = payload.decode('utf-8').strip() if isinstance(payload, bytes) else str(payload).strip()
+        except UnicodeDecodeError:
+            raise CommandError('Befehl ist kein UTF-8 Text')
+        if not text:
+            raise CommandError('Leerer Befehl')
+        if not text.startswith('{'):
+            return {'command': text}
+        try:
+            command = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise CommandError(f'Ungültiges JSON: {e}')
+        if not isinstance(command, dict) or 'command' not in command:
+            raise CommandError('Feld "command" fehlt')
+        if not isinstance(command['command'], str):
+            raise CommandError('Feld "command" muss ein Text sein')
+        return command
+
+    def _interval(self, command: Dict[str, Any], required: bool = True) -> Optional[float]:
+        value = command.get('interval')
+        if value is None and not required:
+            return None
+        try:
+            interval = float(value)
+        except (TypeError, ValueError):
+            raise CommandError('Feld "interval" muss eine Zahl sein')
+        if not MIN_INTERVAL <= interval <= MAX_INTERVAL:
+            raise CommandError(f'Intervall muss zwischen {MIN_INTERVAL} und {MAX_INTERVAL}s liegen')
+        return interval
+
+    def _duration(self, command: Dict[str, Any]) -> Optional[float]:
+        value = command.get('duration')
+        if value is None:
+            return None
+        try:
+            duration = float(value)
+        except (TypeError, ValueError):
+            raise CommandError('Feld "duration" muss eine Zahl sein')
+        if not math.isfinite(duration) or not 0 < duration <= MAX_DURATION:
+            raise CommandError(f'Feld "duration" muss zwischen 0 und {MAX_DURATION}s liegen')
+        return duration
+
+    def _sensor(self, sensor_id: Any) -> str:
+        if not isinstance(sensor_id, str) or not sensor_id:
+            raise CommandError('Feld "sensor" muss eine Sensor-ID sein')
+        if self.known_sensors and sensor_id not in self.known_sensors:
+            raise CommandError(f'Unbekannter Sensor: {sensor_id}')
+        return sensor_id
+
+    def handle(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        """Befehl ausführen - liefert die Antwort oder None bei verzögerter Antwort (read_now)"""
+        reply_id = None
+        name = None
+        try:
+            command = self.parse(payload)
+            name = command['command']
+            reply_id = command.get('id')
+
+            if name == 'read_now':
+                sensors = command.get('sensors')
+                if sensors is not None:
+                    if isinstance(sensors, str):
+                        sensors = [sensors]
+                    if not isinstance(sensors, list):
+                        raise CommandError('Feld "sensors" muss eine Liste sein')
+                    sensors = [self._sensor(s) for s in sensors]
+                self.scheduler.request_read(sensors, reply_id)
+                logger.info(f"📥 Befehl read_now ({', '.join(sensors) if sensors else 'alle Sensoren'})")
+                return None
+
+            if name == 'set_interval':
+                interval = self._interval(command)
+                duration = self._duration(command)
+                self.scheduler.set_interval(interval, duration)
+                logger.info(f"📥 Befehl set_interval: {interval}s"
+                            + (f" für {duration}s" if duration else ""))
+                return self.reply(name, reply_id, True, self.scheduler.snapshot())
+
+            if name == 'set_sensor_interval':
+                sensor_id = self._sensor(command.get('sensor'))
+                interval = self._interval(command, required=False)
+                duration = self._duration(command)
+                self.scheduler.set_sensor_interval(sensor_id, interval, duration)
+                logger.info(f"📥 Befehl set_sensor_interval: {sensor_id} → "
+                            + (f"{interval}s" if interval else "Standard"))
+                return self.reply(name, reply_id, True, self.scheduler.snapshot())
+
+            if name == 'status':
+                return self.reply(name, reply_id, True, self.scheduler.snapshot())
+
+            raise CommandError(f'Unbekannter Befehl: {name}')
+
+        except CommandError as e:
+            logger.warning(f"⚠️ MQTT Befehl abgelehnt: {e}")
+            return self.reply(name, reply_id, False, error=str(e))
+        except Exception as e:
+            # Läuft im paho Netzwerk-Thread - nichts darf bis on_message durchschlagen
+            logger.error(f"❌ MQTT Befehl {name} fehlgeschlagen: {e}")
+            return self.reply(name, reply_id, False, error='Interner Fehler')
+
+    @staticmethod
+    def reply(command: Optional[str], reply_id: Optional[str], ok: bool,
+              result: Any = None, error: Optional[str] = None) -> Dict[str, Any]:
+        """Antwort-Payload für {prefix}/cmd/reply"""
+        reply = {'command': command, 'ok': ok, 'timestamp': time.time()}
+        if reply_id is not None:
+            reply['id'] = reply_id
+        if result is not None:
+            reply['result'] = result
+        if error is not None:
+            reply['error'] = error
+        return reply
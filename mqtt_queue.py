@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Persistente MQTT Outbound-Queue für Pi5 Heizungs Messer
+Puffert Sensor-Updates bei Broker-Ausfall auf Disk (SQLite)
+Pro Topic wird nur der neueste Zustand gehalten (Coalescing)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# paho-mqtt Rückgabewert für erfolgreiches publish() (MQTT_ERR_SUCCESS)
+MQTT_ERR_SUCCESS = 0
+
+
+class MqttOfflineQueue:
+    """Begrenzte, disk-basierte Outbound-Queue mit In-Flight-Fenster"""
+
+    def __init__(self, path: str = 'mqtt_queue.db', max_messages: int = 500,
+                 max_inflight: int = 20, qos: int = 1):
+        self.path = path
+        self.max_messages = max(1, max_messages)
+        self.max_inflight = max(1, max_inflight)
+        self.qos = qos
+
+        # Schützt Queue-Zustand und SQLite - wird nie während client.publish() gehalten
+        self._lock = threading.RLock()
+        # mid → (topic, seq) der gesendeten, noch nicht bestätigten Nachrichten
+        self._inflight: Dict[int, Tuple[str, int]] = {}
+        self._publishing = False
+        self._flush_again = False
+        self._early_acks = set()
+        # superseded: bestätigt, aber schon durch einen neueren Wert desselben Topics ersetzt
+        self.stats = {'enqueued': 0, 'coalesced': 0, 'dropped': 0, 'delivered': 0, 'superseded': 0}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            ' topic TEXT PRIMARY KEY,'
+            ' payload TEXT NOT NULL,'
+            ' qos INTEGER NOT NULL,'
+            ' retain INTEGER NOT NULL,'
+            ' enqueued REAL NOT NULL,'
+            ' seq INTEGER NOT NULL)'
+        )
+        row = self._db.execute('SELECT COALESCE(MAX(seq), 0) FROM outbox').fetchone()
+        self._seq = row[0]
+
+        pending = self.depth()
+        if pending:
+            logger.info(f"📦 MQTT Queue: {pending} Nachrichten aus {path} wiederhergestellt")
+
+    def put(self, topic: str, payload: str, qos: Optional[int] = None, retain: bool = False):
+        """Nachricht einreihen - ersetzt einen älteren Wert für dasselbe Topic"""
+        qos = self.qos if qos is None else qos
+        with self._lock:
+            self._seq += 1
+            exists = self._db.execute(
+                'SELECT 1 FROM outbox WHERE topic = ?', (topic,)
+            ).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO outbox (topic, payload, qos, retain, enqueued, seq) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (topic, payload, qos, int(retain), time.time(), self._seq)
+            )
+            self.stats['enqueued'] += 1
+            if exists:
+                self.stats['coalesced'] += 1
+            else:
+                self._enforce_limit()
+
+    def _enforce_limit(self):
+        """Älteste Topics verwerfen wenn die Queue voll ist"""
+        overflow = self._db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0] - self.max_messages
+        if overflow > 0:
+            self._db.execute(
+                'DELETE FROM outbox WHERE topic IN '
+                '(SELECT topic FROM outbox ORDER BY seq LIMIT ?)', (overflow,)
+            )
+            self.stats['dropped'] += overflow
+            logger.warning(f"⚠️ MQTT Queue voll - {overflow} älteste Nachrichten verworfen")
+
+    def flush(self, client) -> int:
+        """Sendet wartende Nachrichten bis das In-Flight-Fenster voll ist
+
+        publish() läuft ohne self._lock: paho hält beim Aufruf von on_publish (→ ack) seinen
+        _out_message_mutex, den auch publish() braucht - beide zugleich zu halten blockiert gegenseitig.
+        """
+        if client is None or not client.is_connected():
+            return 0
+
+        with self._lock:
+            if self._publishing:
+                # Ein anderer Thread sendet gerade und prüft danach das Fenster erneut
+                self._flush_again = True
+                return 0
+            self._publishing = True
+
+        sent = 0
+        try:
+            while True:
+                with self._lock:
+                    self._flush_again = False
+                    rows = self._sendable()
+                    if not rows:
+                        break
+                for topic, payload, qos, retain, seq in rows:
+                    result = client.publish(topic, payload, qos=qos, retain=bool(retain))
+                    if result.rc != MQTT_ERR_SUCCESS:
+                        logger.debug(f"📦 MQTT Queue: publish {topic} fehlgeschlagen ({result.rc})")
+                        return sent
+                    with self._lock:
+                        if result.mid in self._early_acks:
+                            # Bestätigung kam, bevor publish() zurückkehrte
+                            self._early_acks.discard(result.mid)
+                            self._delete(topic, seq)
+                        else:
+                            self._inflight[result.mid] = (topic, seq)
+                    sent += 1
+                with self._lock:
+                    # Während des Sendens bestätigte Nachrichten geben das Fenster wieder frei
+                    if not self._flush_again:
+                        break
+        finally:
+            with self._lock:
+                self._publishing = False
+                self._early_acks.clear()
+
+        return sent
+
+    def _sendable(self) -> List[Tuple[str, str, int, int, int]]:
+        """Noch nicht gesendete Nachrichten, höchstens so viele wie das Fenster frei hat"""
+        free = self.max_inflight - len(self._inflight)
+        if free <= 0:
+            return []
+        busy = set(self._inflight.values())
+        rows = self._db.execute(
+            'SELECT topic, payload, qos, retain, seq FROM outbox ORDER BY seq'
+        ).fetchall()
+        return [row for row in rows if (row[0], row[4]) not in busy][:free]
+
+    def _delete(self, topic: str, seq: int):
+        # Nur löschen, wenn inzwischen kein neuerer Wert eingereiht wurde
+        cursor = self._db.execute('DELETE FROM outbox WHERE topic = ? AND seq = ?', (topic, seq))
+        self.stats['delivered' if cursor.rowcount == 1 else 'superseded'] += 1
+
+    def ack(self, mid: int) -> bool:
+        """Bestätigung vom Broker (on_publish) - Nachricht aus der Queue entfernen"""
+        with self._lock:
+            if self._publishing:
+                self._flush_again = True
+            entry = self._inflight.pop(mid, None)
+            if entry is None:
+                if self._publishing:
+                    # Bestätigung kam noch innerhalb von publish() - in flush() zuordnen
+                    self._early_acks.add(mid)
+                return False
+            self._delete(*entry)
+            return True
+
+    def reset_inflight(self):
+        """Bei Verbindungsverlust: unbestätigte Nachrichten erneut senden"""
+        with self._lock:
+            if self._inflight:
+                logger.info(f"📦 MQTT Queue: {len(self._inflight)} unbestätigte Nachrichten werden erneut gesendet")
+            self._inflight.clear()
+
+    def depth(self) -> int:
+        """Anzahl wartender Nachrichten (inkl. In-Flight)"""
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+    def inflight(self) -> int:
+        """Anzahl gesendeter, noch nicht bestätigter Nachrichten"""
+        with self._lock:
+            return len(self._inflight)
+
+    def pending_topics(self) -> List[str]:
+        """Topics in Sende-Reihenfolge"""
+        with self._lock:
+            return [row[0] for row in self._db.execute('SELECT topic FROM outbox ORDER BY seq')]
+
+    def close(self):
+        """SQLite-Verbindung schließen"""
+        with self._lock:
+            self._db.close()
+
+
+def queue_path(config) -> str:
+    """Pfad der Offline-Queue aus [mqtt] queue_file - Bridge und Dashboard lesen dieselbe Datei"""
+    return config.get('mqtt', 'queue_file', fallback='mqtt_queue.db').strip() or 'mqtt_queue.db'
+
+
+def queue_depth(path: str) -> Optional[int]:
+    """Füllstand einer Queue-Datei aus einem anderen Prozess lesen (read-only)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        db = sqlite3.connect(f'file:{path}?mode=ro', uri=True, timeout=0.5)
+        try:
+            return db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+        finally:
+            db.close()
+    except sqlite3.Error as e:
+        logger.debug(f"📦 MQTT Queue {path} nicht lesbar: {e}")
+        return None
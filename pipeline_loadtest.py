@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""
+End-to-End Lasttest: Sensor → InfluxDB → MQTT → Dashboard
+Alles läuft lokal in einem Prozess:
+- synthetische Quelle mit einstellbarer Rate (bis 1000 Punkte/s)
+- LocalInfluxDB: HTTP-Stand-in für InfluxDB v2 (/health, /api/v2/write, minimale Flux-Abfrage)
+- LocalMQTTBroker: minimaler MQTT 3.1.1 Broker (QoS 0/1/2, Retain, Wildcards)
+Geschrieben wird mit der echten Pi5InfluxDBIntegration, veröffentlicht mit der echten
+Pi5MqttBridge; ein MQTT-Abonnent steht für das Dashboard.
+Ausgabe: Durchsatz, End-to-End Latenz pro Messwert, Queue-Wachstum und Speicher.
+
+Beispiele:
+    python pipeline_loadtest.py
+    python pipeline_loadtest.py --sensors 64 --rate 1000 --duration 30 --json
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+# Messwert kodiert die Zyklus-Nummer (modulo), damit der Abonnent die Latenz zuordnen kann
+VALUE_BASE = 20.0
+VALUE_STEPS = 800
+
+
+# =============================================================================
+# InfluxDB v2 Stand-in
+# =============================================================================
+def _split_unescaped(text: str, separator: str) -> List[str]:
+    """Trennen an separator - außer escaped (\\) oder in Anführungszeichen"""
+    parts, current, quoted, escaped = [], [], False, False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '\\':
+            current.append(char)
+            escaped = True
+        elif char == '"':
+            current.append(char)
+            quoted = not quoted
+        elif char == separator and not quoted:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def _unescape(text: str) -> str:
+    return re.sub(r'\\(.)', r'\1', text)
+
+
+def _field_value(raw: str):
+    if raw.startswith('"'):
+        return _unescape(raw[1:-1])
+    if raw.endswith('i') and raw[:-1].lstrip('-').isdigit():
+        return int(raw[:-1])
+    if raw in ('t', 'T', 'true', 'True', 'TRUE'):
+        return True
+    if raw in ('f', 'F', 'false', 'False', 'FALSE'):
+        return False
+    return float(raw)
+
+
+def parse_line_protocol(body: str) -> List[Tuple[str, Dict[str, str], Dict[str, object], Optional[int]]]:
+    """Line Protocol → (measurement, tags, fields, timestamp_ns)"""
+    points = []
+    for line in body.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        sections = _split_unescaped(line, ' ')
+        series, fields = sections[0], sections[1]
+        timestamp = int(sections[2]) if len(sections) > 2 and sections[2] else None
+        measurement, *tag_pairs = _split_unescaped(series, ',')
+        tags = dict(_unescape(pair).split('=', 1) for pair in tag_pairs)
+        values = {}
+        for pair in _split_unescaped(fields, ','):
+            key, raw = pair.split('=', 1)
+            values[_unescape(key)] = _field_value(raw)
+        points.append((_unescape(measurement), tags, values, timestamp))
+    return points
+
+
+_FLUX_TYPES = {bool: 'boolean', int: 'long', float: 'double', str: 'string'}
+
+
+class _InfluxHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes = b'', content_type: str = 'application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+    def do_GET(self):
+        if self.path.startswith('/health'):
+            self._reply(200, json.dumps({'name': 'influxdb', 'message': 'ready for queries and writes',
+                                         'status': 'pass', 'checks': [], 'version': '2.7-standin',
+                                         'commit': 'local'}).encode())
+        elif self.path.startswith('/ping'):
+            self._reply(204)
+        else:
+            self._reply(404, b'{"code":"not found"}')
+
+    def do_POST(self):
+        if self.path.startswith('/api/v2/write'):
+            body = self._body()
+            points = parse_line_protocol(body.decode('utf-8'))
+            self.server.store(points, len(body))
+            self._reply(204)
+        elif self.path.startswith('/api/v2/query'):
+            request = json.loads(self._body() or b'{}')
+            self._reply(200, self.server.query(request.get('query', '')).encode(), 'text/csv; charset=utf-8')
+        else:
+            self._reply(404, b'{"code":"not found"}')
+
+
+class LocalInfluxDB(ThreadingHTTPServer):
+    """InfluxDB v2 Stand-in: nimmt Line Protocol an und beantwortet last()-Abfragen"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _InfluxHandler)
+        self.lock = threading.Lock()
+        self.latest: Dict[Tuple, Tuple[int, object]] = {}
+        self.stats = {'writes': 0, 'points': 0, 'bytes': 0, 'queries': 0}
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    def store(self, points, size: int):
+        now = time.time_ns()
+        with self.lock:
+            self.stats['writes'] += 1
+            self.stats['bytes'] += size
+            for measurement, tags, fields, timestamp in points:
+                self.stats['points'] += 1
+                series = (measurement, tuple(sorted(tags.items())))
+                for field, value in fields.items():
+                    self.latest[series + (field,)] = (timestamp or now, value)
+
+    def query(self, flux: str) -> str:
+        """Minimal-Flux: Filter auf _measurement, Ergebnis = letzter Wert pro Serie und Feld"""
+        measurements = set(re.findall(r'r\["_measurement"\]\s*==\s*"([^"]+)"', flux))
+        with self.lock:
+            self.stats['queries'] += 1
+            rows = [(key, value) for key, value in self.latest.items()
+                    if not measurements or key[0] in measurements]
+
+        # Ein CSV-Block pro Spaltensatz und Werttyp (wie bei echten Flux-Tabellen)
+        blocks: Dict[Tuple, List] = {}
+        for (measurement, tags, field), (timestamp, value) in sorted(rows, key=lambda r: r[0]):
+            layout = (tuple(key for key, _ in tags), _FLUX_TYPES.get(type(value), 'string'))
+            blocks.setdefault(layout, []).append((measurement, dict(tags), field, timestamp, value))
+
+        stamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        out, table = [], 0
+        for (tag_keys, value_type), entries in blocks.items():
+            columns = ['result', 'table', '_start', '_stop', '_time', '_value', '_field', '_measurement', *tag_keys]
+            out.append('#datatype,string,long,dateTime:RFC3339,dateTime:RFC3339,dateTime:RFC3339,'
+                       f'{value_type},string,string' + ',string' * len(tag_keys))
+            out.append('#group,false,false,true,true,false,false,true,true' + ',true' * len(tag_keys))
+            out.append('#default,_result' + ',' * (len(columns) - 1))
+            out.append(',' + ','.join(columns))
+            for measurement, tags, field, timestamp, value in entries:
+                time_text = datetime.fromtimestamp(timestamp / 1e9, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                value_text = str(value).lower() if isinstance(value, bool) else str(value)
+                cells = ['', '', str(table), stamp, stamp, time_text, value_text, field, measurement,
+                         *(tags[key] for key in tag_keys)]
+                out.append(','.join(f'"{c}"' if (',' in c or '"' in c) else c for c in cells))
+                table += 1
+            out.append('')
+        return '\r\n'.join(out) + '\r\n'
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+# =============================================================================
+# MQTT Broker Stand-in
+# =============================================================================
+def topic_matches(pattern: str, topic: str) -> bool:
+    """MQTT Topic-Filter mit + (eine Ebene) und # (Rest)"""
+    pattern_levels, topic_levels = pattern.split('/'), topic.split('/')
+    for i, level in enumerate(pattern_levels):
+        if level == '#':
+            return True
+        if i >= len(topic_levels) or (level != '+' and level != topic_levels[i]):
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+def _encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        out.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(out)
+
+
+def _utf8(text: str) -> bytes:
+    data = text.encode()
+    return len(data).to_bytes(2, 'big') + data
+
+
+class _MQTTHandler(socketserver.BaseRequestHandler):
+    """Eine Client-Verbindung: CONNECT, PUBLISH, SUBSCRIBE, PING, DISCONNECT"""
+
+    def setup(self):
+        self.write_lock = threading.Lock()
+        self.subscriptions: List[str] = []
+        self.buffer = b''
+
+    def send(self, packet_type: int, body: bytes = b''):
+        with self.write_lock:
+            self.request.sendall(bytes([packet_type]) + _encode_length(len(body)) + body)
+
+    def _read(self, size: int) -> Optional[bytes]:
+        while len(self.buffer) < size:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                return None
+            self.buffer += chunk
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def _packet(self) -> Optional[Tuple[int, bytes]]:
+        header = self._read(1)
+        if header is None:
+            return None
+        length, shift = 0, 0
+        while True:
+            byte = self._read(1)
+            if byte is None:
+                return None
+            length |= (byte[0] & 0x7F) << shift
+            shift += 7
+            if not byte[0] & 0x80:
+                break
+        body = self._read(length) if length else b''
+        return (header[0], body) if body is not None else None
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.clients.add(self)
+        try:
+            while True:
+                packet = self._packet()
+                if packet is None:
+                    return
+                header, body = packet
+                kind = header >> 4
+                if kind == 1:  # CONNECT
+                    self.send(0x20, b'\x00\x00')
+                elif kind == 3:  # PUBLISH
+                    qos = (header >> 1) & 0x03
+                    topic_length = int.from_bytes(body[:2], 'big')
+                    topic = body[2:2 + topic_length].decode()
+                    offset = 2 + topic_length
+                    packet_id = body[offset:offset + 2] if qos else b''
+                    payload = body[offset + len(packet_id):]
+                    if qos == 1:
+                        self.send(0x40, packet_id)
+                    elif qos == 2:
+                        self.send(0x50, packet_id)
+                    server.route(topic, payload, retain=bool(header & 0x01))
+                elif kind == 6:  # PUBREL
+                    self.send(0x70, body[:2])
+                elif kind == 8:  # SUBSCRIBE
+                    packet_id, offset, granted = body[:2], 2, bytearray()
+                    new = []
+                    while offset < len(body):
+                        length = int.from_bytes(body[offset:offset + 2], 'big')
+                        new.append(body[offset + 2:offset + 2 + length].decode())
+                        offset += 3 + length
+                        granted.append(0)
+                    self.subscriptions.extend(new)
+                    self.send(0x90, packet_id + bytes(granted))
+                    server.send_retained(self, new)
+                elif kind == 10:  # UNSUBSCRIBE
+                    self.send(0xB0, body[:2])
+                elif kind == 12:  # PINGREQ
+                    self.send(0xD0)
+                elif kind == 14:  # DISCONNECT
+                    return
+        except OSError:
+            return
+        finally:
+            with server.lock:
+                server.clients.discard(self)
+
+    def deliver(self, topic: str, payload: bytes, retain: bool = False):
+        if any(topic_matches(pattern, topic) for pattern in self.subscriptions):
+            try:
+                self.send(0x30 | int(retain), _utf8(topic) + payload)
+            except OSError:
+                pass
+
+
+class LocalMQTTBroker(socketserver.ThreadingTCPServer):
+    """Minimaler MQTT 3.1.1 Broker im Prozess (Zustellung an Abonnenten mit QoS 0)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _MQTTHandler)
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.retained: Dict[str, bytes] = {}
+        self.stats = {'published': 0, 'bytes': 0}
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def route(self, topic: str, payload: bytes, retain: bool = False):
+        with self.lock:
+            self.stats['published'] += 1
+            self.stats['bytes'] += len(payload)
+            if retain:
+                self.retained[topic] = payload
+            clients = list(self.clients)
+        for client in clients:
+            client.deliver(topic, payload)
+
+    def send_retained(self, client: _MQTTHandler, patterns: List[str]):
+        with self.lock:
+            retained = list(self.retained.items())
+        for topic, payload in retained:
+            if any(topic_matches(pattern, topic) for pattern in patterns):
+                client.deliver(topic, payload, retain=True)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+# =============================================================================
+# Quelle, Pipeline und Auswertung
+# =============================================================================
+def encode_value(seq: int) -> float:
+    return VALUE_BASE + (seq % VALUE_STEPS) / 10
+
+
+def decode_seq(value: float, latest_seq: int) -> int:
+    """Jüngste Zyklus-Nummer <= latest_seq, die zum Messwert passt"""
+    residue = int(round((value - VALUE_BASE) * 10)) % VALUE_STEPS
+    return latest_seq - ((latest_seq - residue) % VALUE_STEPS)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {'p50_ms': None, 'p90_ms': None, 'p99_ms': None, 'max_ms': None}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {'p50_ms': round(pick(0.5) * 1000, 2), 'p90_ms': round(pick(0.9) * 1000, 2),
+            'p99_ms': round(pick(0.99) * 1000, 2), 'max_ms': round(ordered[-1] * 1000, 2)}
+
+
+def write_config(path: str, sensors: int, broker_port: int, queue_file: str, prefix: str):
+    labels = '\n'.join(f'ds18b20_{i} = "Lasttest {i}"' for i in range(1, sensors + 1))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"[mqtt]\nbroker = 127.0.0.1\nport = {broker_port}\ntopic_prefix = {prefix}\nqos = 1\n"
+                f"queue_file = {queue_file}\nqueue_size = {max(500, sensors * 4)}\n"
+                f"schedule_file = {os.path.join(os.path.dirname(queue_file), 'mqtt_schedule.json')}\n"
+                f"[database]\nbucket = sensor_data\norg = Pi5SensorOrg\ntoken = loadtest\n"
+                f"[homeassistant]\nmqtt_discovery = false\n"
+                f"[labels]\n{labels}\n")
+
+
+def run_pipeline(sensors: int = 8, rate: float = 100.0, duration: float = 10.0,
+                 bridge_interval: float = 1.0, prefix: str = 'loadtest') -> Dict:
+    """Lasttest ausführen - Rate in Punkten/s (Sensoren x Zyklen/s)"""
+    import paho.mqtt.client as mqtt
+    from mqtt_bridge import Pi5MqttBridge
+    from sensor_influxdb import Pi5InfluxDBIntegration
+
+    process = psutil.Process()
+    rss_start = process.memory_info().rss
+    cycle_period = sensors / rate
+
+    with LocalInfluxDB() as influx, LocalMQTTBroker() as broker, \
+            tempfile.TemporaryDirectory(prefix='pipeline-loadtest-') as workdir:
+        config_path = os.path.join(workdir, 'config.ini')
+        write_config(config_path, sensors, broker.port, os.path.join(workdir, 'mqtt_queue.db'), prefix)
+
+        integration = Pi5InfluxDBIntegration(host='127.0.0.1', port=influx.port, token='loadtest',
+                                             config_path=config_path)
+        integration.sensor_manager = None  # keine Hardware-Lesung im Schreibpfad
+        bridge = Pi5MqttBridge(config_path)
+        bridge.influx_url = influx.url
+        bridge.influx_bucket = integration.bucket
+        bridge.influx_org = integration.org
+        bridge.setup_influxdb()
+        bridge.setup_mqtt()
+
+        emitted: List[float] = []
+        latest_seq = [-1]
+        mqtt_latencies: List[float] = []
+        received = [0]
+        receive_lock = threading.Lock()
+
+        def on_message(client, userdata, msg):
+            now = time.monotonic()
+            try:
+                value = json.loads(msg.payload)['temperature']
+            except (ValueError, KeyError, TypeError):
+                return
+            with receive_lock:
+                received[0] += 1
+                if latest_seq[0] >= 0:
+                    seq = decode_seq(value, latest_seq[0])
+                    if 0 <= seq < len(emitted):
+                        mqtt_latencies.append(now - emitted[seq])
+
+        dashboard = mqtt.Client()
+        dashboard.on_message = on_message
+        dashboard.on_connect = lambda client, userdata, flags, rc: client.subscribe(f'{prefix}/+/state')
+        dashboard.connect('127.0.0.1', broker.port)
+        dashboard.loop_start()
+
+        deadline = time.monotonic() + 5
+        while not (bridge.mqtt_client.is_connected() and dashboard.is_connected()) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        samples: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        write_latencies: List[float] = []
+        write_busy = [0.0]
+        written = [0]
+        timeline = []
+
+        def source():
+            next_time = time.monotonic()
+            seq = 0
+            while not stop.is_set():
+                now = time.monotonic()
+                if now < next_time:
+                    time.sleep(min(next_time - now, 0.05))
+                    continue
+                value = encode_value(seq)
+                with receive_lock:
+                    emitted.append(now)
+                    latest_seq[0] = seq
+                samples.put((seq, now, {f'DS18B20_{i}': value for i in range(1, sensors + 1)}))
+                seq += 1
+                next_time += cycle_period
+
+        def writer():
+            while not stop.is_set() or not samples.empty():
+                try:
+                    seq, emit_time, temperatures = samples.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                start = time.monotonic()
+                if integration.write_sensor_data(temperatures, None, None):
+                    written[0] += len(temperatures)
+                done = time.monotonic()
+                write_busy[0] += done - start
+                write_latencies.append(done - emit_time)
+
+        def bridge_loop():
+            while not stop.wait(bridge_interval):
+                bridge.run_once()
+
+        threads = [threading.Thread(target=target, daemon=True, name=f'loadtest-{target.__name__}')
+                   for target in (source, writer, bridge_loop)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+
+        # Queue-Tiefen und Speicher einmal pro Sekunde
+        while time.monotonic() - start < duration:
+            time.sleep(min(1.0, duration))
+            timeline.append({'t': round(time.monotonic() - start, 1), 'writer_queue': samples.qsize(),
+                             'mqtt_outbox': bridge.outbox.depth(),
+                             'rss_mb': round(process.memory_info().rss / 1e6, 1)})
+        stop.set()
+        elapsed = time.monotonic() - start
+        for thread in threads:
+            thread.join(timeout=30)
+        time.sleep(0.2)
+
+        dashboard.loop_stop()
+        dashboard.disconnect()
+        bridge.mqtt_client.loop_stop()
+        bridge.mqtt_client.disconnect()
+        bridge.outbox.close()
+        if bridge.influx_client:
+            bridge.influx_client.close()
+        integration.close()
+
+    queue_depths = [entry['writer_queue'] for entry in timeline]
+    half = len(queue_depths) // 2
+    growth = ((statistics.mean(queue_depths[half:]) - statistics.mean(queue_depths[:half])) * sensors
+              / max(elapsed / 2, 1e-9)) if half else 0.0
+    capacity = written[0] / write_busy[0] if write_busy[0] else None
+    return {
+        'config': {'sensors': sensors, 'rate_points_per_s': rate, 'duration_s': duration,
+                   'bridge_interval_s': bridge_interval},
+        'source': {'cycles': len(emitted), 'points': len(emitted) * sensors,
+                   'points_per_s': round(len(emitted) * sensors / elapsed, 1)},
+        'influxdb': dict(percentiles(write_latencies), points_written=written[0],
+                         points_per_s=round(written[0] / elapsed, 1), writes=influx.stats['writes'],
+                         points_received=influx.stats['points'], bytes=influx.stats['bytes'],
+                         queries=influx.stats['queries'],
+                         writer_busy=round(write_busy[0] / elapsed, 3),
+                         capacity_points_per_s=round(capacity, 1) if capacity else None),
+        'mqtt': dict(percentiles(mqtt_latencies), messages=received[0],
+                     messages_per_s=round(received[0] / elapsed, 1), broker_published=broker.stats['published']),
+        'queues': {'writer_max': max(queue_depths, default=0), 'writer_final': queue_depths[-1] if queue_depths else 0,
+                   'writer_growth_points_per_s': round(growth, 1),
+                   'mqtt_outbox_max': max((e['mqtt_outbox'] for e in timeline), default=0)},
+        'memory': {'rss_start_mb': round(rss_start / 1e6, 1),
+                   'rss_max_mb': max((e['rss_mb'] for e in timeline), default=None),
+                   'rss_end_mb': timeline[-1]['rss_mb'] if timeline else None},
+        'timeline': timeline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-End Lasttest (lokale InfluxDB- und MQTT-Stand-ins)')
+    parser.add_argument('--sensors', type=int, default=8, help='Sensoren pro Zyklus')
+    parser.add_argument('--rate', type=float, default=100.0, help='Punkte pro Sekunde (max. sinnvoll: 1000)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Dauer (s)')
+    parser.add_argument('--bridge-interval', type=float, default=1.0, help='Abfrage-Intervall der MQTT Bridge (s)')
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    result = run_pipeline(args.sensors, args.rate, args.duration, args.bridge_interval)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    source, influx, mqtt_result = result['source'], result['influxdb'], result['mqtt']
+    queues, memory = result['queues'], result['memory']
+    fmt = lambda value: '-' if value is None else f'{value:.1f}ms'
+    print(f"🚚 Pipeline-Lasttest: {args.sensors} Sensoren, Ziel {args.rate:g} Punkte/s, {args.duration:g}s")
+    print(f"   📤 Quelle:   {source['points_per_s']:.0f} Punkte/s ({source['cycles']} Zyklen)")
+    print(f"   🗄️ InfluxDB: {influx['points_per_s']:.0f} Punkte/s, Latenz p50 {fmt(influx['p50_ms'])} "
+          f"p99 {fmt(influx['p99_ms'])}, Writer ausgelastet {influx['writer_busy']:.0%}, "
+          f"Kapazität ~{influx['capacity_points_per_s'] or 0:.0f} Punkte/s")
+    print(f"   📡 MQTT:     {mqtt_result['messages_per_s']:.0f} Nachrichten/s beim Dashboard, "
+          f"Ende-zu-Ende p50 {fmt(mqtt_result['p50_ms'])} p99 {fmt(mqtt_result['p99_ms'])}")
+    print(f"   📦 Queues:   Writer max {queues['writer_max']} Zyklen "
+          f"(Wachstum {queues['writer_growth_points_per_s']:+.0f} Punkte/s), MQTT Outbox max {queues['mqtt_outbox_max']}")
+    print(f"   💾 Speicher: RSS {memory['rss_start_mb']} → {memory['rss_end_mb']} MB (max {memory['rss_max_mb']} MB)")
+    if queues['writer_growth_points_per_s'] > 0.05 * args.rate:
+        print("   ⚠️ Writer kommt nicht hinterher - Rate liegt über der Kapazität")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Stufen-Zeitmessung pro Messzyklus (Tracing) für Pi 5 Sensor Monitor
+Jeder Zyklus bekommt eine Trace-ID; die Stufen einer Messung werden mit monotonen
+Zeitstempeln (perf_counter) darunter erfasst:
+    bus_read     DS18B20 Erfassung am 1-Wire Bus (Wandzeit, inkl. parse)
+    dht_read     DHT22 Lesung (eigene Stufe - langsam, nicht am 1-Wire Bus)
+    parse        w1_slave Zeilen → Temperatur (Summe über Sensoren)
+    label        Sensor-Namen/Labels zuordnen
+    serialize    InfluxDB Line Protocol bzw. MQTT/JSON Payloads bauen
+    influx_write InfluxDB Schreibzugriff
+    influx_query InfluxDB Abfrage (MQTT Bridge)
+    mqtt_publish MQTT Versand
+    ws_push      WebSocket-Push an Dashboard-Clients
+
+Aggregiert wird in feste Histogramm-Buckets pro Stufe (für /metrics), zusätzlich
+bleiben die langsamsten Zyklen mit Aufschlüsselung erhalten (Dump als JSON).
+Kosten: zwei perf_counter-Aufrufe und ein Lock pro Stufe - wenige µs pro Zyklus.
+
+Config (config.ini):
+    [performance]
+    tracing = true
+    trace_slowest = 100
+    trace_dump_file = /var/log/pi5-traces.json
+"""
+
+import configparser
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('bus_read', 'dht_read', 'parse', 'label', 'serialize', 'influx_write', 'influx_query', 'mqtt_publish', 'ws_push')
+
+# Obergrenzen der Histogramm-Buckets in Sekunden (µs-Stufen bis DS18B20-Konvertierung)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class CycleTrace:
+    """Stufen-Zeiten eines Zyklus - Stufen dürfen aus mehreren Threads gemeldet werden"""
+
+    __slots__ = ('trace_id', 'name', 'started', 'wall', 'stages', 'counts', 'total', '_lock')
+
+    def __init__(self, trace_id: int, name: str, started: float):
+        self.trace_id = trace_id
+        self.name = name
+        self.started = started
+        self.wall = time.time()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.total: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            stages = {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()}
+            counts = dict(self.counts)
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'timestamp': self.wall,
+            'total_ms': round((self.total or 0.0) * 1000, 3),
+            'stages_ms': stages,
+            'stage_counts': counts,
+        }
+
+
+class _StageTimer:
+    __slots__ = ('trace', 'stage', 'start')
+
+    def __init__(self, trace: CycleTrace, stage: str):
+        self.trace = trace
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    """Ohne aktiven Zyklus (oder Tracing aus): keine Messung"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        index = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class PipelineTracer:
+    """Prozessweiter Tracer: ein aktiver Zyklus, Histogramme pro Stufe, langsamste Zyklen"""
+
+    def __init__(self, enabled: bool = True, keep_slowest: int = 100):
+        self.enabled = enabled
+        self.keep_slowest = keep_slowest
+        self.current: Optional[CycleTrace] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _Histogram] = {}
+        self._cycles: Dict[str, _Histogram] = {}
+        self._slowest: List = []  # Min-Heap (total, trace_id, trace)
+
+    def begin(self, name: str = 'cycle') -> Optional[CycleTrace]:
+        """Neuen Zyklus starten - folgende stage()-Aufrufe werden ihm zugeordnet"""
+        if not self.enabled:
+            return None
+        trace = CycleTrace(next(self._ids), name, time.perf_counter())
+        self.current = trace
+        return trace
+
+    def finish(self, trace: Optional[CycleTrace] = None) -> Optional[CycleTrace]:
+        """Zyklus abschließen und in Histogramme/Langsamste übernehmen"""
+        trace = trace or self.current
+        if trace is None or trace.total is not None:
+            return trace
+        trace.total = time.perf_counter() - trace.started
+        if self.current is trace:
+            self.current = None
+        with trace._lock:
+            stages = list(trace.stages.items())
+        with self._lock:
+            for stage, seconds in stages:
+                self._stages.setdefault(stage, _Histogram()).observe(seconds)
+            self._cycles.setdefault(trace.name, _Histogram()).observe(trace.total)
+            entry = (trace.total, trace.trace_id, trace)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, entry)
+            elif self.keep_slowest and trace.total > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+        return trace
+
+    @contextmanager
+    def cycle(self, name: str = 'cycle'):
+        trace = self.begin(name)
+        try:
+            yield trace
+        finally:
+            if trace is not None:
+                self.finish(trace)
+
+    def stage(self, stage: str):
+        """Kontext-Manager für eine Stufe des aktiven Zyklus"""
+        trace = self.current
+        if trace is None:
+            return NULL_TIMER
+        return _StageTimer(trace, stage)
+
+    def add(self, stage: str, seconds: float):
+        """Bereits gemessene Dauer einer Stufe melden"""
+        trace = self.current
+        if trace is not None:
+            trace.add(stage, seconds)
+
+    # ------------------------------------------------------------------ Auswertung
+    def histograms(self) -> Dict[str, Dict[str, Dict]]:
+        """{'stages': {stufe: {...}}, 'cycles': {name: {...}}} mit buckets/count/sum"""
+        with self._lock:
+            copy = lambda group: {name: {'buckets': list(h.buckets), 'count': h.count, 'sum': h.sum}
+                                  for name, h in group.items()}
+            return {'stages': copy(self._stages), 'cycles': copy(self._cycles)}
+
+    def slowest(self, limit: Optional[int] = None) -> List[Dict]:
+        """Langsamste Zyklen mit Stufen-Aufschlüsselung, langsamster zuerst"""
+        with self._lock:
+            entries = sorted(self._slowest, key=lambda entry: entry[0], reverse=True)
+        return [trace.as_dict() for _, _, trace in entries[:limit]]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Mittelwert pro Stufe und Zyklus-Art (ms)"""
+        histograms = self.histograms()
+        return {group: {name: {'count': h['count'], 'mean_ms': round(h['sum'] / h['count'] * 1000, 3)}
+                        for name, h in entries.items() if h['count']}
+                for group, entries in histograms.items()}
+
+    def dump_slowest(self, path: str, limit: Optional[int] = None) -> int:
+        """Langsamste Zyklen als JSON schreiben"""
+        traces = self.slowest(limit)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'created': time.time(), 'summary': self.summary(), 'slowest': traces}, f, indent=2)
+        logger.info(f"🐢 {len(traces)} langsamste Zyklen gespeichert: {path}")
+        return len(traces)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._cycles.clear()
+            self._slowest.clear()
+        self.current = None
+
+
+# Prozessweiter Tracer - Sensor-Code meldet Stufen ohne Referenz durchzureichen
+TRACER = PipelineTracer()
+
+
+def stage(name: str):
+    """Stufe im aktiven Zyklus des prozessweiten Tracers messen"""
+    return TRACER.stage(name)
+
+
+def configure_tracer(config: configparser.ConfigParser) -> PipelineTracer:
+    """TRACER aus [performance] tracing / trace_slowest einstellen"""
+    TRACER.enabled = config.getboolean('performance', 'tracing', fallback=True)
+    TRACER.keep_slowest = config.getint('performance', 'trace_slowest', fallback=100)
+    return TRACER
+
+
+def dump_configured(config: configparser.ConfigParser) -> Optional[str]:
+    """Langsamste Zyklen nach [performance] trace_dump_file schreiben (falls gesetzt)"""
+    path = config.get('performance', 'trace_dump_file', fallback='').strip()
+    if not path or not TRACER.enabled:
+        return None
+    try:
+        TRACER.dump_slowest(path)
+        return path
+    except OSError as e:
+        logger.warning(f"⚠️ Trace-Dump nach {path} fehlgeschlagen: {e}")
+        return None
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Eingebauter Profiling-Modus für die Monitoring-Daemons
+Sampling-Profiler ohne Zusatzpakete: ein Hintergrund-Thread liest während der Messzyklen
+alle paar Millisekunden die Stacks aller Threads (sys._current_frames). Wartezeit zwischen
+den Zyklen wird nicht gezählt - das Profil zeigt, was ein Zyklus wirklich kostet
+(Logging, Point-Aufbau, JSON-Encoding, Bus-Zugriff).
+
+Zusätzlich pro Zyklus: tracemalloc Top-N der Allokationsorte (Netto-Zuwachs) und Spitze.
+
+Aktivierung:
+    python sensor_monitor.py continuous 30 --profile        # die ersten N Zyklen
+    python sensor_influxdb.py continuous 30 --profile=50
+    kill -USR1 <pid>                                         # die nächsten N Zyklen
+
+Ausgabe (in [performance] profile_dir):
+    <daemon>-<zeit>.speedscope.json   → https://www.speedscope.app
+    <daemon>-<zeit>.folded            → flamegraph.pl (profile_format = collapsed)
+    <daemon>-<zeit>.alloc.json        → tracemalloc Top-N pro Zyklus
+"""
+
+import atexit
+import configparser
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'speedscope': '.speedscope.json', 'collapsed': '.folded'}
+
+Frame = Tuple[str, str, int]  # (Funktion, Datei, Zeile)
+
+# Thread-Einstiegsrahmen tauchen in jedem Worker-Stack auf - für die Gesamt-Rangliste ohne Aussage
+_ENTRY_FILES = (os.sep + 'threading.py', os.path.join('concurrent', 'futures', 'thread.py'))
+
+
+def thread_group(name: str) -> str:
+    """Executor-Threads werden pro Zyklus neu angelegt - 'ThreadPoolExecutor-3_5' → 'ThreadPoolExecutor'"""
+    return re.sub(r'[-_]\d+', '', name)
+
+
+class StackSampler:
+    """Hintergrund-Thread, der Stacks aller Threads zählt - nur solange sampling gesetzt ist"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()  # (thread_name, (Frame, ...)) → Samples
+        self.samples = 0
+        self.sampling = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.sampling.set()  # wartenden Thread aufwecken
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.sampling.clear()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            self.sampling.wait()
+            if self._stop.is_set():
+                break
+            self.sample(skip=own)
+            time.sleep(self.interval)
+
+    def sample(self, skip: Optional[int] = None):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[(thread_group(names.get(ident, str(ident))), tuple(stack))] += 1
+        self.samples += 1
+
+
+def collapsed_stacks(stacks: Counter) -> List[str]:
+    """Zeilen im Brendan-Gregg Format: thread;datei:funktion;... anzahl"""
+    lines = []
+    for (thread_name, stack), count in stacks.most_common():
+        frames = [thread_name] + [f"{os.path.basename(file)}:{name}" for name, file, _ in stack]
+        lines.append(f"{';'.join(frame.replace(';', ':') for frame in frames)} {count}")
+    return lines
+
+
+def speedscope_document(stacks: Counter, interval: float, name: str) -> Dict:
+    """Sampled-Profil pro Thread im speedscope Dateiformat (Gewicht = Sekunden)"""
+    frames: List[Dict] = []
+    index: Dict[Frame, int] = {}
+    profiles: Dict[str, Dict] = {}
+    for (thread_name, stack), count in stacks.most_common():
+        profile = profiles.setdefault(thread_name, {
+            'type': 'sampled', 'name': thread_name, 'unit': 'seconds',
+            'startValue': 0, 'endValue': 0, 'samples': [], 'weights': []
+        })
+        sample = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            sample.append(index[frame])
+        weight = count * interval
+        profile['samples'].append(sample)
+        profile['weights'].append(weight)
+        profile['endValue'] += weight
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'pi5-sensor-profiling',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': sorted(profiles.values(), key=lambda profile: -profile['endValue'])
+    }
+
+
+def top_functions(stacks: Counter, limit: int = 10, inclusive: bool = False) -> List[Tuple[str, int]]:
+    """Funktionen nach Eigen- (Blatt) oder Gesamt-Samples (irgendwo im Stack)"""
+    counts: Counter = Counter()
+    for (_, stack), count in stacks.items():
+        if not stack:
+            continue
+        if inclusive:
+            for frame in set(stack):
+                if frame[1].endswith(_ENTRY_FILES):
+                    continue
+                counts[f"{os.path.basename(frame[1])}:{frame[0]}"] += count
+        else:
+            counts[f"{os.path.basename(stack[-1][1])}:{stack[-1][0]}"] += count
+    return counts.most_common(limit)
+
+
+class CycleProfiler:
+    """Profiliert N Messzyklen - Start per --profile oder SIGUSR1, danach läuft der Daemon normal weiter"""
+
+    def __init__(self, name: str = 'daemon', cycles: int = 10, interval: float = 0.005,
+                 output_dir: str = '/tmp', output_format: str = 'speedscope', trace_malloc: bool = True,
+                 top: int = 10):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unbekanntes Profil-Format: {output_format} ({', '.join(FORMATS)})")
+        self.name = name
+        self.cycles = cycles
+        self.interval = interval
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.trace_malloc = trace_malloc
+        self.top = top
+        self.sampler: Optional[StackSampler] = None
+        self.allocations: List[Dict] = []
+        self.cycles_done = 0
+        self.last_output: Optional[str] = None
+        self._requested = False
+        self._started_tracemalloc = False
+
+    @property
+    def active(self) -> bool:
+        return self.sampler is not None
+
+    def request(self, *_):
+        """Profiling ab dem nächsten Zyklus (auch als Signal-Handler nutzbar)"""
+        self._requested = True
+
+    def install_signal(self, signum: Optional[int] = None) -> bool:
+        """SIGUSR1 → request() (nur im Haupt-Thread, nicht unter Windows)"""
+        signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signum, self.request)
+        return True
+
+    def start(self):
+        if self.active:
+            return
+        self._requested = False
+        self.cycles_done = 0
+        self.allocations = []
+        if self.trace_malloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.sampler = StackSampler(self.interval)
+        self.sampler.start()
+        logger.info(f"🔬 Profiling gestartet: {self.cycles} Zyklen, Sampling alle {self.interval * 1000:g}ms")
+
+    @contextmanager
+    def cycle(self):
+        """Arbeitsteil eines Zyklus - nur hier wird gesampelt"""
+        if self._requested:
+            self.start()
+        sampler = self.sampler
+        if sampler is None:
+            yield
+            return
+        before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if before is not None:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        sampler.sampling.set()
+        try:
+            yield
+        finally:
+            sampler.sampling.clear()
+            duration = time.perf_counter() - started
+            if before is not None:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                self._record_allocations(before, duration, peak)
+            self.cycles_done += 1
+            if self.cycles_done >= self.cycles:
+                self.stop()
+
+    def _record_allocations(self, before: tracemalloc.Snapshot, duration: float, peak: int):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+        diff = after.compare_to(before.filter_traces(ignore), 'lineno')
+        self.allocations.append({
+            'cycle': self.cycles_done + 1,
+            'duration_ms': round(duration * 1000, 3),
+            'peak_bytes': peak,
+            'top': [{'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     'size_diff': stat.size_diff, 'count_diff': stat.count_diff, 'size': stat.size}
+                    for stat in diff[:self.top]]
+        })
+
+    def stop(self) -> Optional[str]:
+        """Sampling beenden und Profil schreiben - liefert den Pfad der Profil-Datei"""
+        sampler = self.sampler
+        if sampler is None:
+            return None
+        self.sampler = None
+        sampler.stop()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        try:
+            self.last_output = self.write(sampler)
+        except OSError as e:
+            logger.warning(f"⚠️ Profil konnte nicht gespeichert werden: {e}")
+            return None
+        return self.last_output
+
+    def write(self, sampler: StackSampler) -> str:
+        stem = os.path.join(self.output_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        path = stem + FORMATS[self.output_format]
+        with open(path, 'w', encoding='utf-8') as f:
+            if self.output_format == 'speedscope':
+                json.dump(speedscope_document(sampler.stacks, sampler.interval, self.name), f)
+            else:
+                f.write('\n'.join(collapsed_stacks(sampler.stacks)) + '\n')
+        if self.allocations:
+            with open(stem + '.alloc.json', 'w', encoding='utf-8') as f:
+                json.dump({'name': self.name, 'cycles': self.allocations}, f, indent=2)
+
+        logger.info(f"🔬 Profil gespeichert: {path} ({sampler.samples} Samples, {self.cycles_done} Zyklen)")
+        total = sum(sampler.stacks.values()) or 1
+        for function, count in top_functions(sampler.stacks, 5, inclusive=True):
+            logger.info(f"   {count / total * 100:5.1f}% gesamt  {function}")
+        for function, count in top_functions(sampler.stacks, 5):
+            logger.info(f"   {count / total * 100:5.1f}% eigen   {function}")
+        return path
+
+
+# Prozessweiter Profiler - ohne --profile/SIGUSR1 kostet cycle() nur einen Flag-Test
+PROFILER = CycleProfiler()
+
+
+def parse_profile_argument(argv: List[str]) -> Tuple[List[str], Optional[int]]:
+    """--profile bzw. --profile=N aus argv entfernen → (restliche Argumente, Zyklen oder None)"""
+    remaining = []
+    cycles = None
+    for arg in argv:
+        if arg == '--profile':
+            cycles = 0
+        elif arg.startswith('--profile='):
+            cycles = int(arg.split('=', 1)[1])
+        else:
+            remaining.append(arg)
+    return remaining, cycles
+
+
+def setup_profiling(name: str, argv: Optional[List[str]] = None, config_path: str = 'config.ini') -> CycleProfiler:
+    """PROFILER aus [performance] einstellen, SIGUSR1 installieren und --profile aus sys.argv entfernen"""
+    if argv is None:
+        argv = sys.argv
+    remaining, cycles = parse_profile_argument(argv)
+    argv[:] = remaining
+
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    PROFILER.name = name
+    PROFILER.cycles = cycles or config.getint('performance', 'profile_cycles', fallback=10)
+    PROFILER.interval = config.getfloat('performance', 'profile_interval', fallback=0.005)
+    PROFILER.output_dir = config.get('performance', 'profile_dir', fallback='/tmp').strip() or '/tmp'
+    PROFILER.output_format = config.get('performance', 'profile_format', fallback='speedscope').strip()
+    if PROFILER.output_format not in FORMATS:
+        logger.warning(f"⚠️ Unbekanntes Profil-Format {PROFILER.output_format} - nutze speedscope")
+        PROFILER.output_format = 'speedscope'
+    PROFILER.trace_malloc = config.getboolean('performance', 'profile_tracemalloc', fallback=True)
+    PROFILER.top = config.getint('performance', 'profile_top', fallback=10)
+
+    if PROFILER.install_signal():
+        logger.debug(f"🔬 Profiling per kill -USR1 {os.getpid()}")
+    if cycles is not None:
+        PROFILER.request()
+    atexit.register(PROFILER.stop)  # Einzelmessung oder Ctrl+C: bisherige Zyklen trotzdem schreiben
+    return PROFILER
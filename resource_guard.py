@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Ressourcen-Wächter für den Dauerbetrieb unter systemd
+Zählt für den eigenen Prozess RSS, offene File-Deskriptoren, Threads und GPIO-Handles
+(/dev/gpiochip*, gpio-line Handles) und warnt, wenn ein Zähler über das Beobachtungsfenster
+anhaltend steigt - Lecks fallen so nach Stunden statt nach Monaten auf.
+
+Config (config.ini):
+    [performance]
+    resource_guard = true
+    resource_guard_interval = 300
+    resource_guard_window = 48
+"""
+
+import configparser
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('rss_mb', 'open_fds', 'threads', 'gpio_handles')
+
+# Anstieg über das Fenster, ab dem gewarnt wird
+DEFAULT_LIMITS = {'rss_mb': 20.0, 'open_fds': 8, 'threads': 4, 'gpio_handles': 1}
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _proc_rss_mb() -> Optional[float]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def _proc_threads() -> int:
+    # Native Threads (lgpio Callbacks, C-Bibliotheken) zählen mit
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return threading.active_count()
+
+
+def _proc_fds() -> Dict[str, int]:
+    try:
+        fds = os.listdir('/proc/self/fd')
+    except OSError:
+        return {'open_fds': 0, 'gpio_handles': 0}
+    gpio = 0
+    for fd in fds:
+        try:
+            target = os.readlink(f'/proc/self/fd/{fd}')
+        except OSError:
+            continue
+        if target.startswith('/dev/gpiochip') or target.startswith('anon_inode:gpio'):
+            gpio += 1
+    return {'open_fds': len(fds), 'gpio_handles': gpio}
+
+
+def resource_usage() -> Dict[str, float]:
+    """Aktuelle Zähler des eigenen Prozesses"""
+    usage = {'rss_mb': _proc_rss_mb() or 0.0, 'threads': _proc_threads()}
+    usage.update(_proc_fds())
+    return usage
+
+
+class ResourceGuard:
+    """Beobachtet die Ressourcen-Zähler und warnt bei anhaltendem Anstieg
+
+    Anstieg = Median des letzten Fenster-Viertels minus Median des ersten Viertels; gewarnt wird
+    erst, wenn zusätzlich das Minimum am Ende über dem Maximum am Anfang liegt (Trend statt Rauschen).
+    Pro Zähler eine Warnung, eine weitere erst nach nochmal demselben Anstieg.
+    """
+
+    def __init__(self, interval: float = 300.0, window: int = 48, limits: Optional[Dict[str, float]] = None,
+                 sampler: Callable[[], Dict[str, float]] = resource_usage, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.window = window
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.sampler = sampler
+        self.clock = clock
+        self.samples: deque = deque(maxlen=window)
+        self.warnings = 0
+        self._warned: Dict[str, float] = {}
+        self._last_sample: Optional[float] = None
+
+    def growth(self) -> Dict[str, float]:
+        """Anstieg pro Zähler über das Fenster (leer, solange zu wenige Samples vorliegen)"""
+        samples = list(self.samples)
+        if len(samples) < max(4, self.window // 2):
+            return {}
+        quarter = max(1, len(samples) // 4)
+        head, tail = samples[:quarter], samples[-quarter:]
+        growth = {}
+        for counter in COUNTERS:
+            rising = min(s[counter] for s in tail) > max(s[counter] for s in head)
+            delta = statistics.median(s[counter] for s in tail) - statistics.median(s[counter] for s in head)
+            growth[counter] = delta if rising else min(delta, 0.0)
+        return growth
+
+    def check(self, force: bool = False) -> List[str]:
+        """Zähler abtasten (höchstens alle interval Sekunden) - liefert neu gewarnte Zähler"""
+        now = self.clock()
+        if not force and self._last_sample is not None and now - self._last_sample < self.interval:
+            return []
+        self._last_sample = now
+        self.samples.append(self.sampler())
+
+        warned = []
+        for counter, delta in self.growth().items():
+            limit = self.limits[counter]
+            if delta >= limit and delta >= self._warned.get(counter, 0.0) + limit:
+                self._warned[counter] = delta
+                self.warnings += 1
+                warned.append(counter)
+                first, last = self.samples[0][counter], self.samples[-1][counter]
+                logger.warning(f"⚠️ Ressourcen-Anstieg {counter}: +{delta:g} über {len(self.samples)} Messungen "
+                               f"({first:g} → {last:g}) - mögliches Leck")
+            elif delta < limit / 2:
+                self._warned.pop(counter, None)
+        return warned
+
+    def status(self) -> Dict:
+        return {
+            'latest': dict(self.samples[-1]) if self.samples else {},
+            'growth': self.growth(),
+            'samples': len(self.samples),
+            'warnings': self.warnings
+        }
+
+
+def guard_from_config(config: configparser.ConfigParser) -> Optional[ResourceGuard]:
+    """ResourceGuard aus [performance] resource_guard* - None wenn abgeschaltet"""
+    if not config.getboolean('performance', 'resource_guard', fallback=True):
+        return None
+    return ResourceGuard(
+        interval=config.getfloat('performance', 'resource_guard_interval', fallback=300.0),
+        window=config.getint('performance', 'resource_guard_window', fallback=48),
+        limits={counter: config.getfloat('performance', f'resource_guard_{counter}', fallback=limit)
+                for counter, limit in DEFAULT_LIMITS.items()}
+    )
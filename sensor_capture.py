@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Aufzeichnung und Wiedergabe von Sensor-Rohdaten
+Zum Nachstellen von DHT22-Aussetzern oder CRC-Stürmen wird exakt das aufgezeichnet,
+was der Bus geliefert hat:
+- DS18B20: rohe w1_slave Zeilen jeder einzelnen Lesung (inkl. Retries)
+- DHT22: jeder Leseversuch (Wert oder Fehlermeldung)
+- Zeitpunkt jedes Messzyklus
+
+Capture-Datei: gzip-komprimierte JSON-Zeilen (Kopfzeile + ein Objekt pro Ereignis).
+Bei der Wiedergabe liefern ReplayW1Backend und ReplayDHT22 die aufgezeichneten Daten
+zyklusweise an den unveränderten Erfassungscode - in Echtzeit oder N-fach schneller.
+
+Beispiele:
+    python sensor_monitor.py record winter.capture.gz 30
+    python sensor_monitor.py replay winter.capture.gz 100
+"""
+
+import gzip
+import json
+import logging
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional
+
+from w1_backend import W1Backend
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_FORMAT = 'pi5-sensor-capture'
+CAPTURE_VERSION = 1
+
+
+class CaptureWriter:
+    """Schreibt Rohdaten-Ereignisse thread-sicher in eine Capture-Datei"""
+
+    def __init__(self, path: str, sensor_ids: List[str], dht22: bool = False, clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.clock = clock
+        self._start = clock()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self.cycles = 0
+        self.events = 0
+        self._write({'format': CAPTURE_FORMAT, 'version': CAPTURE_VERSION, 'started': time.time(),
+                     'host': socket.gethostname(), 'sensors': list(sensor_ids), 'dht22': dht22})
+        logger.info(f"⏺️ Aufzeichnung gestartet: {path} ({len(sensor_ids)} DS18B20{', DHT22' if dht22 else ''})")
+
+    def _offset(self) -> float:
+        return round(self.clock() - self._start, 3)
+
+    def _write(self, record: Dict):
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self.events += 1
+
+    def begin_cycle(self):
+        """Neuen Messzyklus markieren - der vorherige wird auf die Platte geschrieben"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+        self.cycles += 1
+        self._write({'k': 'cycle', 't': self._offset()})
+
+    def w1_read(self, sensor_id: str, lines: List[str]):
+        self._write({'k': 'w1', 't': self._offset(), 'id': sensor_id, 'raw': ''.join(lines)})
+
+    def w1_bulk(self):
+        self._write({'k': 'bulk', 't': self._offset()})
+
+    def dht(self, field: str, value: Optional[float] = None, error: Optional[BaseException] = None):
+        record = {'k': 'dht', 't': self._offset(), 'f': field}
+        if error is not None:
+            record['err'] = str(error)
+            record['type'] = type(error).__name__
+        else:
+            record['v'] = value
+        self._write(record)
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        logger.info(f"⏹️ Aufzeichnung beendet: {self.path} ({self.cycles} Zyklen, {self.events} Ereignisse)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingW1Backend(W1Backend):
+    """Reicht alle Zugriffe an das echte Backend weiter und zeichnet jede Lesung auf"""
+
+    def __init__(self, inner: W1Backend, writer: CaptureWriter):
+        self.inner = inner
+        self.writer = writer
+        self.name = f'recording:{inner.name}'
+        self.base_dir = getattr(inner, 'base_dir', None)
+
+    def available(self) -> bool:
+        return self.inner.available()
+
+    def discover(self) -> List[str]:
+        return self.inner.discover()
+
+    def device_folder(self, sensor_id: str) -> str:
+        return self.inner.device_folder(sensor_id)
+
+    def read(self, sensor_id: str) -> List[str]:
+        lines = self.inner.read(sensor_id)
+        self.writer.w1_read(sensor_id, lines)
+        return lines
+
+    def supports_bulk_conversion(self) -> bool:
+        return self.inner.supports_bulk_conversion()
+
+    def bulk_convert(self):
+        self.inner.bulk_convert()
+        self.writer.w1_bulk()
+
+    def close(self):
+        self.inner.close()
+
+
+class RecordingDHT22:
+    """Hülle um adafruit_dht.DHT22: zeichnet jeden Zugriff auf temperature/humidity auf"""
+
+    def __init__(self, inner, writer: CaptureWriter):
+        self.inner = inner
+        self.writer = writer
+
+    def _read(self, field: str):
+        try:
+            value = getattr(self.inner, field)
+        except Exception as e:
+            self.writer.dht(field, error=e)
+            raise
+        self.writer.dht(field, value)
+        return value
+
+    @property
+    def temperature(self):
+        return self._read('temperature')
+
+    @property
+    def humidity(self):
+        return self._read('humidity')
+
+    def exit(self):
+        if hasattr(self.inner, 'exit'):
+            self.inner.exit()
+
+
+def iter_capture(path: str) -> Iterator[Dict]:
+    """Alle Einträge einer Capture-Datei (Kopfzeile zuerst) - abgeschnittene Dateien enden sauber"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f"⚠️ Unvollständige Zeile in {path} - Aufzeichnung wurde abgebrochen")
+                        return
+    except (EOFError, zlib.error):
+        logger.warning(f"⚠️ Capture {path} endet unvollständig - Wiedergabe bis zum letzten vollständigen Zyklus")
+
+
+def read_header(path: str) -> Dict:
+    header = next(iter_capture(path), None)
+    if not header or header.get('format') != CAPTURE_FORMAT:
+        raise ValueError(f"Keine Sensor-Capture-Datei: {path}")
+    if header.get('version', 0) > CAPTURE_VERSION:
+        raise ValueError(f"Capture-Version {header['version']} wird nicht unterstützt")
+    return header
+
+
+def iter_cycles(path: str) -> Iterator[Dict]:
+    """Zyklen: {'t': Offset, 'w1': {sensor_id: [roh, ...]}, 'dht': {field: [Versuch, ...]}, 'bulk': n}"""
+    entries = iter_capture(path)
+    next(entries, None)
+    cycle = None
+    for entry in entries:
+        kind = entry.get('k')
+        if kind == 'cycle':
+            if cycle is not None:
+                yield cycle
+            cycle = {'t': entry['t'], 'w1': {}, 'dht': {}, 'bulk': 0}
+        elif cycle is None:
+            continue
+        elif kind == 'w1':
+            cycle['w1'].setdefault(entry['id'], []).append(entry['raw'])
+        elif kind == 'dht':
+            cycle['dht'].setdefault(entry['f'], []).append(entry)
+        elif kind == 'bulk':
+            cycle['bulk'] += 1
+    if cycle is not None:
+        yield cycle
+
+
+class ReplayW1Backend(W1Backend):
+    """Liefert die aufgezeichneten w1_slave Inhalte des aktuellen Zyklus in Originalreihenfolge
+
+    Fragt der Code mehr Lesungen ab als aufgezeichnet (z.B. geänderte Retry-Logik),
+    wird die letzte Lesung des Sensors wiederholt.
+    """
+
+    name = 'replay'
+
+    def __init__(self, sensor_ids: List[str]):
+        self.sensor_ids = list(sensor_ids)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, deque] = {}
+        self._last: Dict[str, str] = {}
+        self.stats = {'reads': 0, 'repeated': 0}
+
+    def load_cycle(self, reads: Dict[str, List[str]]):
+        with self._lock:
+            self._pending = {sensor_id: deque(raw) for sensor_id, raw in reads.items()}
+            self._last = {sensor_id: raw[-1] for sensor_id, raw in reads.items() if raw}
+
+    def discover(self) -> List[str]:
+        return list(self.sensor_ids)
+
+    def read(self, sensor_id: str) -> List[str]:
+        with self._lock:
+            self.stats['reads'] += 1
+            pending = self._pending.get(sensor_id)
+            if pending:
+                raw = pending.popleft()
+            else:
+                self.stats['repeated'] += 1
+                raw = self._last.get(sensor_id, '')
+        return raw.splitlines(keepends=True)
+
+    def supports_bulk_conversion(self) -> bool:
+        return True
+
+
+class ReplayDHT22:
+    """Stand-in für adafruit_dht.DHT22: aufgezeichnete Werte und Fehler des aktuellen Zyklus"""
+
+    def __init__(self):
+        self._pending: Dict[str, deque] = {}
+        self._last: Dict[str, Dict] = {}
+
+    def load_cycle(self, attempts: Dict[str, List[Dict]]):
+        self._pending = {field: deque(entries) for field, entries in attempts.items()}
+        self._last.update({field: entries[-1] for field, entries in attempts.items() if entries})
+
+    def _read(self, field: str):
+        pending = self._pending.get(field)
+        entry = pending.popleft() if pending else self._last.get(field)
+        if entry is None:
+            raise RuntimeError('DHT sensor not found, check wiring')
+        if 'err' in entry:
+            raise (RuntimeError if entry.get('type') == 'RuntimeError' else Exception)(entry['err'])
+        return entry['v']
+
+    @property
+    def temperature(self):
+        return self._read('temperature')
+
+    @property
+    def humidity(self):
+        return self._read('humidity')
+
+
+class CaptureReplay:
+    """Spielt eine Capture-Datei zyklusweise ab - speed=1 Echtzeit, speed=N N-fach, speed=0 ohne Pausen"""
+
+    def __init__(self, path: str, speed: float = 1.0, sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.speed = speed
+        self.sleep = sleep
+        self.clock = clock
+        self.header = read_header(path)
+        self.backend = ReplayW1Backend(self.header['sensors'])
+        self.dht = ReplayDHT22() if self.header.get('dht22') else None
+        self.cycles = 0
+
+    def __iter__(self) -> Iterator[float]:
+        """Lädt jeden Zyklus in Backend/DHT22 und liefert seinen ursprünglichen Zeitstempel (Epoch)"""
+        start = self.clock()
+        for cycle in iter_cycles(self.path):
+            if self.speed > 0:
+                delay = start + cycle['t'] / self.speed - self.clock()
+                if delay > 0:
+                    self.sleep(delay)
+            self.backend.load_cycle(cycle['w1'])
+            if self.dht is not None:
+                self.dht.load_cycle(cycle['dht'])
+            self.cycles += 1
+            yield self.header['started'] + cycle['t']
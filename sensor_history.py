@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Sensor-Verlauf für das Pi 5 Web Dashboard
+In-Process Ringpuffer je Sensor (NumPy) mit serverseitigem LTTB-Downsampling -
+Trend-Charts ohne InfluxDB/Grafana-Abfrage
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RELATIVE_TIME = re.compile(r'^-(\d+(?:\.\d+)?)([smhd])$')
+TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def lttb_downsample(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets - liefert die Indizes der ausgewählten Punkte"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket-Grenzen und Bucket-Mittelwerte vektorisiert; erster und letzter Punkt bleiben fest
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # Für Bucket i ist der Mittelwert von Bucket i+1 der dritte Eckpunkt, für den letzten der Endpunkt
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        # Doppelte Dreiecksfläche (a, Kandidat, Mittelwert nächster Bucket)
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def parse_time(value: Optional[str], default: float, now: Optional[float] = None) -> float:
+    """Zeitangabe als Unix-Zeit: Sekunden/Millisekunden, ISO 8601 oder relativ ("-7d", "-6h")"""
+    if value is None or value == '':
+        return default
+    value = value.strip()
+    match = RELATIVE_TIME.match(value)
+    if match:
+        return (time.time() if now is None else now) - float(match.group(1)) * TIME_UNITS[match.group(2)]
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            raise ValueError(f'Ungültige Zeitangabe: {value}')
+    # Millisekunden (z.B. aus JavaScript Date.now())
+    return number / 1000.0 if number > 1e11 else number
+
+
+class SensorSeries:
+    """Ringpuffer fester Größe für einen Sensor"""
+
+    __slots__ = ('timestamps', 'values', 'head', 'size', 'label', 'unit')
+
+    def __init__(self, capacity: int, label: str = '', unit: str = ''):
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.head = 0
+        self.size = 0
+        self.label = label
+        self.unit = unit
+
+    @property
+    def capacity(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        return float(self.timestamps[self.head - 1]) if self.size else None
+
+    def append(self, timestamp: float, value: float):
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Zeitlich sortierte Kopie des Puffers"""
+        if self.size < self.capacity:
+            return self.timestamps[:self.size].copy(), self.values[:self.size].copy()
+        return (np.concatenate((self.timestamps[self.head:], self.timestamps[:self.head])),
+                np.concatenate((self.values[self.head:], self.values[:self.head])))
+
+
+class SensorHistory:
+    """Verlauf aller Sensoren - wird als Snapshot-Listener gefüttert"""
+
+    def __init__(self, retention_hours: float = 168.0, resolution: float = 10.0,
+                 clock=time.time):
+        self.retention = retention_hours * 3600
+        self.resolution = resolution
+        self.capacity = max(1, int(self.retention / max(resolution, 0.001)))
+        self.clock = clock
+        self._series: Dict[str, SensorSeries] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sensor: str, value: float, timestamp: Optional[float] = None,
+               label: str = '', unit: str = '') -> bool:
+        """Messwert übernehmen - höchstens ein Punkt pro Auflösungsintervall"""
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            series = self._series.get(sensor)
+            if series is None:
+                series = self._series[sensor] = SensorSeries(self.capacity, label, unit)
+            last = series.last_timestamp
+            if last is not None and timestamp - last < self.resolution:
+                return False
+            series.label = label or series.label
+            series.unit = unit or series.unit
+            series.append(timestamp, float(value))
+            return True
+
+    def on_snapshot(self, snapshot):
+        """Snapshot-Listener: alle gültigen Werte des Snapshots übernehmen"""
+        now = self.clock()
+        for sensor, reading in snapshot.data.items():
+            if reading and reading.get('value') is not None:
+                self.record(sensor, reading['value'], now,
+                            reading.get('label', ''), reading.get('unit', ''))
+
+    def sensors(self) -> Dict[str, Dict[str, Any]]:
+        """Verfügbare Sensoren mit Anzahl und Zeitraum der Punkte"""
+        with self._lock:
+            result = {}
+            for sensor, series in self._series.items():
+                timestamps, _ = series.ordered()
+                result[sensor] = {
+                    'label': series.label,
+                    'unit': series.unit,
+                    'points': series.size,
+                    'from': float(timestamps[0]) if series.size else None,
+                    'to': float(timestamps[-1]) if series.size else None
+                }
+            return result
+
+    def query(self, sensor: str, start: Optional[float] = None, end: Optional[float] = None,
+              points: int = 500) -> Dict[str, Any]:
+        """Verlauf eines Sensors im Zeitraum, per LTTB auf höchstens points Punkte reduziert"""
+        end = self.clock() if end is None else end
+        start = end - 86400 if start is None else start
+        with self._lock:
+            series = self._series.get(sensor)
+            if series is None:
+                raise KeyError(sensor)
+            timestamps, values = series.ordered()
+            label, unit = series.label, series.unit
+
+        lo = np.searchsorted(timestamps, start, side='left')
+        hi = np.searchsorted(timestamps, end, side='right')
+        timestamps, values = timestamps[lo:hi], values[lo:hi]
+        selected = lttb_downsample(timestamps, values, points)
+
+        return {
+            'sensor': sensor,
+            'label': label,
+            'unit': unit,
+            'from': start,
+            'to': end,
+            'raw_points': int(len(timestamps)),
+            'points': int(len(selected)),
+            # [Zeitstempel in ms, Wert] - direkt für Chart-Bibliotheken
+            'data': np.column_stack((np.round(timestamps[selected] * 1000), values[selected])).tolist()
+        }
+
+    def save(self, path: str):
+        """Verlauf als .npz sichern (atomar über temporäre Datei)"""
+        with self._lock:
+            arrays = {}
+            meta = []
+            for i, (sensor, series) in enumerate(self._series.items()):
+                timestamps, values = series.ordered()
+                arrays[f't{i}'] = timestamps
+                arrays[f'v{i}'] = values
+                meta.append((sensor, series.label, series.unit))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(meta, dtype=str).reshape(-1, 3), **arrays)
+        os.replace(tmp_path, path)
+        logger.info(f"💾 Sensor-Verlauf gespeichert: {len(meta)} Sensoren → {path}")
+
+    def load(self, path: str) -> bool:
+        """Gesicherten Verlauf laden - Punkte außerhalb der Aufbewahrung werden verworfen"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as archive:
+                cutoff = self.clock() - self.retention
+                with self._lock:
+                    for i, (sensor, label, unit) in enumerate(archive['meta']):
+                        timestamps, values = archive[f't{i}'], archive[f'v{i}']
+                        keep = timestamps >= cutoff
+                        timestamps, values = timestamps[keep][-self.capacity:], values[keep][-self.capacity:]
+                        series = SensorSeries(self.capacity, str(label), str(unit))
+                        count = len(timestamps)
+                        series.timestamps[:count] = timestamps
+                        series.values[:count] = values
+                        series.size = count
+                        series.head = count % self.capacity
+                        self._series[str(sensor)] = series
+            logger.info(f"📈 Sensor-Verlauf geladen: {len(self._series)} Sensoren aus {path}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Sensor-Verlauf konnte nicht geladen werden: {e}")
+            return False
@@ -6,21 +6,22 @@ Schreibt Sensor-Daten in InfluxDB Docker Container
 
 import logging
 import time
+import importlib.util
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import json
 import configparser
 
-# InfluxDB Client Import
-try:
-    from influxdb_client import InfluxDBClient, Point
-    from influxdb_client.client.write_api import SYNCHRONOUS
-    INFLUXDB_AVAILABLE = True
-    logging.info("✅ InfluxDB Client verfügbar")
-except ImportError as e:
-    logging.warning(f"⚠️  InfluxDB Client nicht verfügbar: {e}")
-    logging.info("💡 Installiere mit: pip install influxdb-client")
-    INFLUXDB_AVAILABLE = False
+from heating_circuits import HeatingCircuitMetrics, HeatPumpCycleDetector
+from log_sink import CYCLE_SUMMARY, wrap_handlers
+from mqtt_commands import SamplingSchedule, schedule_path
+from pipeline_tracing import TRACER, configure_tracer, dump_configured, stage
+from profiling import PROFILER, setup_profiling
+from resource_guard import guard_from_config
+from w1_backend import backend_from_config
+
+# InfluxDB Client wird erst beim Verbinden geladen (Import dauert auf dem Pi mehrere 100ms)
+INFLUXDB_AVAILABLE = importlib.util.find_spec('influxdb_client') is not None
 
 # Sensor Monitor Import
 try:
@@ -38,17 +39,26 @@ except ImportError as e:
     logging.warning(f"⚠️  Individualized Sensors nicht verfügbar: {e}")
     INDIVIDUALIZED_SENSORS_AVAILABLE = False
 
-# Logging konfigurieren
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('/home/pi/sensor-monitor-pi5/influxdb.log')
-    ]
-)
+LOG_FILE = '/home/pi/sensor-monitor-pi5/influxdb.log'
+
 logger = logging.getLogger(__name__)
 
+def setup_logging(log_file: str = LOG_FILE, config_path: str = "config.ini"):
+    """Logging für den Kommandozeilen-Betrieb: Konsole + Logdatei ([monitoring] log_mode)"""
+    handlers = [logging.StreamHandler()]
+    try:
+        handlers.append(logging.FileHandler(log_file))
+    except OSError as e:
+        print(f"⚠️  Logdatei {log_file} nicht verfügbar: {e}")
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=wrap_handlers(handlers, config),
+        force=True
+    )
+
 class Pi5InfluxDBIntegration:
     """InfluxDB Integration für Pi 5 Sensor-Daten mit individuellen Namen"""
     
@@ -81,6 +91,11 @@ class Pi5InfluxDBIntegration:
             except Exception as e:
                 logger.warning(f"⚠️  Individualisierte Sensor-Namen nicht verfügbar: {e}")
         
+        # Heizkreise (Vorlauf/Rücklauf-Paare) - Kennwerte werden pro Zyklus hier berechnet
+        self.circuit_metrics = HeatingCircuitMetrics.from_config(self.config)
+        # Verdichter-Takte (Starts, Laufzeiten, Takten) laufend mitzählen
+        self.heat_pump = HeatPumpCycleDetector.from_config(self.config)
+        
         self.client = None
         self.write_api = None
         self.connected = False
@@ -100,6 +115,9 @@ class Pi5InfluxDBIntegration:
             return False
         
         try:
+            from influxdb_client import InfluxDBClient
+            from influxdb_client.client.write_api import SYNCHRONOUS
+            
             self.client = InfluxDBClient(
                 url=self.url,
                 token=self.token if self.token else None,
@@ -135,6 +153,8 @@ class Pi5InfluxDBIntegration:
                 return False
         
         try:
+            from influxdb_client import Point
+            
             points = []
             timestamp = datetime.utcnow()
             
@@ -144,23 +164,24 @@ class Pi5InfluxDBIntegration:
                     individualized_data = self.sensor_manager.get_individualized_sensor_data()
                     
                     # Alle individualisierten Sensor-Daten verarbeiten
-                    for sensor_name, data in individualized_data.items():
-                        if data['value'] is not None:
-                            measurement = "temperature" if data['measurement'] == "temperature" else "humidity"
-                            field_name = f"{data['measurement']}_{data['unit']}"
-                            
-                            point = Point(measurement) \
-                                .tag("sensor_type", data['sensor_type']) \
-                                .tag("sensor_name", sensor_name) \
-                                .tag("sensor_id", data['sensor_id']) \
-                                .tag("location", "heizungsanlage") \
-                                .tag("unit", data['unit']) \
-                                .tag("status", data['status']) \
-                                .field(field_name, float(data['value'])) \
-                                .time(timestamp)
-                            points.append(point)
-                            
-                    logger.info(f"📊 Verwende individualisierte Sensor-Namen ({len(points)} Punkte)")
+                    with stage('serialize'):
+                        for sensor_name, data in individualized_data.items():
+                            if data['value'] is not None:
+                                measurement = "temperature" if data['measurement'] == "temperature" else "humidity"
+                                field_name = f"{data['measurement']}_{data['unit']}"
+                                
+                                point = Point(measurement) \
+                                    .tag("sensor_type", data['sensor_type']) \
+                                    .tag("sensor_name", sensor_name) \
+                                    .tag("sensor_id", data['sensor_id']) \
+                                    .tag("location", "heizungsanlage") \
+                                    .tag("unit", data['unit']) \
+                                    .tag("status", data['status']) \
+                                    .field(field_name, float(data['value'])) \
+                                    .time(timestamp)
+                                points.append(point)
+                    
+                    logger.info("📊 Verwende individualisierte Sensor-Namen (%d Punkte)", len(points))
                     
                 except Exception as e:
                     logger.warning(f"⚠️  Fehler bei individualisierten Sensoren: {e}")
@@ -170,56 +191,66 @@ class Pi5InfluxDBIntegration:
             
             # Fallback oder wenn individualisierte Sensoren nicht verfügbar
             if not points:
-                # DS18B20 Temperaturdaten (Standard-Namen)
-                for sensor_name, temperature in ds18b20_temps.items():
-                    if temperature is not None:
+                with stage('serialize'):
+                    # DS18B20 Temperaturdaten (Standard-Namen)
+                    for sensor_name, temperature in ds18b20_temps.items():
+                        if temperature is not None:
+                            point = Point("temperature") \
+                                .tag("sensor_type", "DS18B20") \
+                                .tag("sensor_name", sensor_name) \
+                                .tag("location", "pi5_system") \
+                                .tag("unit", "celsius") \
+                                .field("temperature_celsius", float(temperature)) \
+                                .time(timestamp)
+                            points.append(point)
+                    
+                    # DHT22 Temperaturdaten
+                    if dht22_temp is not None:
                         point = Point("temperature") \
-                            .tag("sensor_type", "DS18B20") \
-                            .tag("sensor_name", sensor_name) \
+                            .tag("sensor_type", "DHT22") \
+                            .tag("sensor_name", "DHT22_1") \
                             .tag("location", "pi5_system") \
                             .tag("unit", "celsius") \
-                            .field("temperature_celsius", float(temperature)) \
+                            .field("temperature_celsius", float(dht22_temp)) \
+                            .time(timestamp)
+                        points.append(point)
+                    
+                    # DHT22 Luftfeuchtigkeitsdaten
+                    if dht22_humidity is not None:
+                        point = Point("humidity") \
+                            .tag("sensor_type", "DHT22") \
+                            .tag("sensor_name", "DHT22_1") \
+                            .tag("location", "pi5_system") \
+                            .tag("unit", "percent") \
+                            .field("humidity_percent", float(dht22_humidity)) \
                             .time(timestamp)
                         points.append(point)
                 
-                # DHT22 Temperaturdaten
-                if dht22_temp is not None:
-                    point = Point("temperature") \
-                        .tag("sensor_type", "DHT22") \
-                        .tag("sensor_name", "DHT22_1") \
-                        .tag("location", "pi5_system") \
-                        .tag("unit", "celsius") \
-                        .field("temperature_celsius", float(dht22_temp)) \
-                        .time(timestamp)
-                    points.append(point)
+                logger.info("📊 Verwende Standard-Sensor-Namen (%d Punkte)", len(points))
+            
+            with stage('serialize'):
+                # Heizkreis-Kennwerte als eigene Felder (Grafana braucht keine joins)
+                points.extend(self.circuit_points(ds18b20_temps, timestamp))
+                points.extend(self.heat_pump_points(ds18b20_temps, timestamp))
                 
-                # DHT22 Luftfeuchtigkeitsdaten
-                if dht22_humidity is not None:
-                    point = Point("humidity") \
-                        .tag("sensor_type", "DHT22") \
-                        .tag("sensor_name", "DHT22_1") \
-                        .tag("location", "pi5_system") \
-                        .tag("unit", "percent") \
-                        .field("humidity_percent", float(dht22_humidity)) \
-                        .time(timestamp)
-                    points.append(point)
+                # System-Metadaten
+                system_point = Point("system_info") \
+                    .tag("device", "raspberry_pi_5") \
+                    .tag("location", "pi5_system") \
+                    .field("sensor_count", len(ds18b20_temps)) \
+                    .field("dht22_available", dht22_temp is not None) \
+                    .field("timestamp_unix", int(timestamp.timestamp())) \
+                    .time(timestamp)
+                points.append(system_point)
                 
-                logger.info(f"📊 Verwende Standard-Sensor-Namen ({len(points)} Punkte)")
-            
-            # System-Metadaten
-            system_point = Point("system_info") \
-                .tag("device", "raspberry_pi_5") \
-                .tag("location", "pi5_system") \
-                .field("sensor_count", len(ds18b20_temps)) \
-                .field("dht22_available", dht22_temp is not None) \
-                .field("timestamp_unix", int(timestamp.timestamp())) \
-                .time(timestamp)
-            points.append(system_point)
+                # Line Protocol hier erzeugen, damit influx_write nur den Schreibzugriff misst
+                records = [point.to_line_protocol() for point in points]
             
             # Alle Punkte schreiben
             if points:
-                self.write_api.write(bucket=self.bucket, record=points)
-                logger.info(f"✅ {len(points)} Datenpunkte in InfluxDB geschrieben")
+                with stage('influx_write'):
+                    self.write_api.write(bucket=self.bucket, record=records)
+                logger.info("✅ %d Datenpunkte in InfluxDB geschrieben", len(points))
                 return True
             else:
                 logger.warning("⚠️  Keine Daten zum Schreiben verfügbar")
@@ -230,6 +261,42 @@ class Pi5InfluxDBIntegration:
             self.connected = False  # Reconnect beim nächsten Versuch
             return False
     
+    def circuit_points(self, ds18b20_temps: Dict[str, Optional[float]], timestamp: datetime) -> List:
+        """Measurement heating_circuit: ΔT, gleitende Mittel und Änderungsraten pro Kreis"""
+        from influxdb_client import Point
+        
+        labels = {circuit.name: circuit.label for circuit in self.circuit_metrics.circuits}
+        points = []
+        for circuit, fields in self.circuit_metrics.update(ds18b20_temps).items():
+            point = Point("heating_circuit") \
+                .tag("circuit", circuit) \
+                .tag("name", labels[circuit]) \
+                .tag("location", "heizungsanlage") \
+                .time(timestamp)
+            for field, value in fields.items():
+                point.field(field, value)
+            points.append(point)
+        return points
+    
+    def heat_pump_points(self, ds18b20_temps: Dict[str, Optional[float]], timestamp: datetime) -> List:
+        """Measurement heat_pump: Zustand, Starts/h und Laufzeiten aus dem Takt-Detektor"""
+        from influxdb_client import Point
+        
+        if self.heat_pump is None:
+            return []
+        for event in self.heat_pump.update_data(ds18b20_temps):
+            if event == 'short_cycling':
+                logger.warning("⚠️ Wärmepumpe taktet (Short-Cycling)")
+        if self.heat_pump.since is None:
+            return []  # Noch kein Vorlauf/Rücklauf-Paar gesehen
+        point = Point("heat_pump") \
+            .tag("circuit", self.heat_pump.name) \
+            .tag("location", "heizungsanlage") \
+            .time(timestamp)
+        for field, value in self.heat_pump.counters().items():
+            point.field(field, value)
+        return [point]
+    
     def test_connection(self) -> bool:
         """InfluxDB Verbindung testen"""
         if not self.connected:
@@ -286,18 +353,27 @@ class Pi5SensorInfluxDBLogger:
         if not SENSOR_MONITOR_AVAILABLE:
             raise ImportError("Sensor Monitor nicht verfügbar")
         
-        # Sensor Monitor initialisieren
+        # InfluxDB Integration
+        if influx_config is None:
+            influx_config = {}
+        
+        self.influx_db = Pi5InfluxDBIntegration(**influx_config)
+        
+        # Sensor Monitor initialisieren - 1-Wire Backend aus [hardware] w1_backend
         self.sensor_monitor = Pi5SensorMonitor(
             high_performance=True,
             error_recovery=True,
-            use_parallel_reading=True
+            use_parallel_reading=True,
+            backend=backend_from_config(self.influx_db.config),
+            bulk_conversion=self.influx_db.config.getboolean('performance', 'bulk_conversion', fallback=False),
+            dht_cache_seconds=self.influx_db.config.getfloat('performance', 'dht22_cache_seconds', fallback=0.0)
         )
         
-        # InfluxDB Integration
-        if influx_config is None:
-            influx_config = {}
+        # Stufen-Zeitmessung pro Zyklus ([performance] tracing)
+        configure_tracer(self.influx_db.config)
         
-        self.influx_db = Pi5InfluxDBIntegration(**influx_config)
+        # Warnung bei anhaltend steigendem RSS/FDs/Threads/GPIO-Handles ([performance] resource_guard)
+        self.resource_guard = guard_from_config(self.influx_db.config)
         
         # Statistiken
         self.total_readings = 0
@@ -314,12 +390,12 @@ class Pi5SensorInfluxDBLogger:
                 logger.error("❌ Hardware-Check fehlgeschlagen")
                 return False
             
-            # Sensor-Daten lesen
-            logger.info("📊 Lese Sensor-Daten...")
-            ds_temps, dht_temp, dht_humidity = self.sensor_monitor.parallel_reading()
-            
-            # In InfluxDB schreiben
-            success = self.influx_db.write_sensor_data(ds_temps, dht_temp, dht_humidity)
+            # Sensor-Daten lesen und in InfluxDB schreiben - ein Trace pro Zyklus
+            start_time = time.perf_counter()
+            with TRACER.cycle('influx'), PROFILER.cycle():
+                logger.info("📊 Lese Sensor-Daten...")
+                ds_temps, dht_temp, dht_humidity = self.sensor_monitor.parallel_reading()
+                success = self.influx_db.write_sensor_data(ds_temps, dht_temp, dht_humidity)
             
             self.total_readings += 1
             if success:
@@ -327,8 +403,17 @@ class Pi5SensorInfluxDBLogger:
             else:
                 self.failed_writes += 1
             
+            # Eine Zeile pro Zyklus - im summary-Logmodus die einzige geschriebene INFO-Zeile
+            valid = sum(1 for temp in ds_temps.values() if temp is not None)
+            logger.info(
+                "📊 Zyklus #%d: DS18B20 %d/%d, DHT22 %s, InfluxDB %s, %.0fms",
+                self.total_readings, valid, len(ds_temps), '✅' if dht_temp is not None else '❌',
+                '✅' if success else '❌', (time.perf_counter() - start_time) * 1000,
+                extra=CYCLE_SUMMARY
+            )
+            
             # Statistiken loggen
-            logger.info(f"📈 Statistiken: {self.successful_writes}/{self.total_readings} erfolgreich")
+            logger.info("📈 Statistiken: %d/%d erfolgreich", self.successful_writes, self.total_readings)
             
             return success
             
@@ -338,31 +423,40 @@ class Pi5SensorInfluxDBLogger:
             return False
     
     def continuous_monitoring_to_influx(self, interval: int = 30):
-        """Kontinuierliche Überwachung mit InfluxDB Logging"""
+        """Kontinuierliche Überwachung mit InfluxDB Logging
+        
+        interval gilt, solange die MQTT Bridge per {prefix}/cmd nichts anderes vorgibt
+        ([mqtt] schedule_file) - read_now löst sofort eine Messung aus.
+        """
         logger.info(f"🔄 Starte kontinuierliche InfluxDB Überwachung (Intervall: {interval}s)")
+        schedule = SamplingSchedule(schedule_path(self.influx_db.config), interval)
         
         try:
             reading_count = 0
             while True:
+                started = time.time()
                 reading_count += 1
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                logger.info(f"\n⏰ InfluxDB Messung #{reading_count} um {timestamp}")
+                logger.info("\n⏰ InfluxDB Messung #%d um %s", reading_count, datetime.now().replace(microsecond=0))
                 
                 # Sensor-Daten lesen und speichern
                 success = self.single_reading_to_influx()
+                if self.resource_guard:
+                    self.resource_guard.check()
                 
                 if success:
-                    logger.info(f"✅ Daten erfolgreich in InfluxDB gespeichert")
+                    logger.info("✅ Daten erfolgreich in InfluxDB gespeichert")
                 else:
-                    logger.warning(f"⚠️  Daten konnten nicht gespeichert werden")
+                    logger.warning("⚠️  Daten konnten nicht gespeichert werden")
                 
                 # Erfolgsrate berechnen
                 if self.total_readings > 0:
                     success_rate = (self.successful_writes / self.total_readings) * 100
-                    logger.info(f"📊 Erfolgsrate: {success_rate:.1f}% ({self.successful_writes}/{self.total_readings})")
+                    logger.info("📊 Erfolgsrate: %.1f%% (%d/%d)", success_rate,
+                                self.successful_writes, self.total_readings)
                 
-                logger.info(f"⏳ Warte {interval} Sekunden...")
-                time.sleep(interval)
+                logger.info("⏳ Nächste Messung in %g Sekunden...", schedule.interval())
+                if schedule.wait(started):
+                    logger.info("📥 read_now: sofortige Messung")
                 
         except KeyboardInterrupt:
             logger.info(f"\n👋 InfluxDB Überwachung beendet nach {reading_count} Messungen")
@@ -370,12 +464,19 @@ class Pi5SensorInfluxDBLogger:
         except Exception as e:
             logger.error(f"❌ Fehler in kontinuierlicher Überwachung: {e}")
         finally:
+            dump_configured(self.influx_db.config)
+            self.sensor_monitor.close()
             self.influx_db.close()
 
 def main():
     """Hauptfunktion für InfluxDB Integration"""
     import sys
     
+    setup_logging()
+    
+    # --profile[=N] entfernen, SIGUSR1 für Profiling installieren
+    setup_profiling('sensor_influxdb')
+    
     print("🗄️  Pi 5 Sensor-Monitor → InfluxDB Integration")
     print("=" * 60)
     
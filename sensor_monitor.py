@@ -3,75 +3,204 @@
 Sensor-Monitor für 6x DS18B20 + 1x DHT22
 Speziell optimiert für Raspberry Pi 5
 High-Performance Temperatur- und Feuchtigkeitsüberwachung
+
+Modi: single, continuous [s], parallel, record <datei> [s], replay <datei> [tempo]
+Option: --profile[=N] profiliert N Zyklen (siehe profiling.py)
 """
 
-import os
 import time
-import glob
+import bisect
+import configparser
 import logging
 import threading
+import importlib.util
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Logging konfigurieren
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from log_sink import CYCLE_SUMMARY, wrap_handlers
+from pipeline_tracing import stage
+from profiling import PROFILER, setup_profiling
+from resource_guard import ResourceGuard
+from sensor_capture import CaptureReplay, CaptureWriter, RecordingDHT22, RecordingW1Backend
+from w1_backend import SYSFS_BASE_DIR, SysfsW1Backend, W1Backend, is_power_on_reset
+
 logger = logging.getLogger(__name__)
 
-# Pi 5 GPIO-Bibliotheken mit Priorität für lgpio
-try:
-    import lgpio
-    PI5_LGPIO_AVAILABLE = True
-    logger.info("✅ Pi 5 lgpio erfolgreich geladen")
-except ImportError:
-    PI5_LGPIO_AVAILABLE = False
-    logger.warning("⚠️  lgpio nicht verfügbar - verwende Fallback")
+# GPIO- und DHT22-Bibliotheken werden erst bei Bedarf geladen - der Import dieses
+# Moduls greift weder auf Hardware zu noch lädt er CircuitPython/gpiozero
+PI5_LGPIO_AVAILABLE = importlib.util.find_spec('lgpio') is not None
+GPIOZERO_AVAILABLE = importlib.util.find_spec('gpiozero') is not None
 
-# DHT22 Import mit Pi 5 Optimierungen
-try:
-    import board
-    import adafruit_dht
-    DHT22_AVAILABLE = True
-    logger.info("✅ DHT22 CircuitPython für Pi 5 geladen")
-except ImportError as e:
-    logger.warning(f"⚠️  DHT22 nicht verfügbar: {e}")
-    DHT22_AVAILABLE = False
+_dht_driver = None
+_gpio_factory_configured = False
 
-# Zusätzliche Pi 5 GPIO-Bibliotheken
-try:
-    import gpiozero
-    from gpiozero import Device
-    from gpiozero.pins.lgpio import LGPIOFactory
-    
-    if PI5_LGPIO_AVAILABLE:
-        # Pi 5 optimierte GPIO-Factory setzen
+def load_dht_driver():
+    """DHT22 CircuitPython-Treiber laden - (board, adafruit_dht) oder None"""
+    global _dht_driver
+    if _dht_driver is None:
+        try:
+            import board
+            import adafruit_dht
+            _dht_driver = (board, adafruit_dht)
+            logger.info("✅ DHT22 CircuitPython für Pi 5 geladen")
+        except ImportError as e:
+            logger.warning(f"⚠️  DHT22 nicht verfügbar: {e}")
+            _dht_driver = False
+    return _dht_driver or None
+
+def configure_gpio_factory() -> bool:
+    """gpiozero auf die Pi 5 LGPIOFactory umstellen (einmalig, belegt den GPIO-Chip)"""
+    global _gpio_factory_configured
+    if _gpio_factory_configured:
+        return True
+    if not (PI5_LGPIO_AVAILABLE and GPIOZERO_AVAILABLE):
+        logger.warning("⚠️  gpiozero/lgpio nicht verfügbar - LGPIOFactory nicht aktiviert")
+        return False
+    try:
+        from gpiozero import Device
+        from gpiozero.pins.lgpio import LGPIOFactory
         Device.pin_factory = LGPIOFactory()
+        _gpio_factory_configured = True
         logger.info("✅ Pi 5 LGPIOFactory aktiviert")
-    GPIOZERO_AVAILABLE = True
-except ImportError:
-    GPIOZERO_AVAILABLE = False
-    logger.warning("⚠️  gpiozero nicht verfügbar")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️  LGPIOFactory konnte nicht aktiviert werden: {e}")
+        return False
+
+class SensorReadStats:
+    """Pro-Sensor Lesestatistik mit festen Latenz-Buckets (für /metrics und get_performance_stats)
+    
+    Jeder Lese-Thread schreibt ohne Lock in seinen eigenen Shard, snapshot() führt die
+    Shards zusammen. Shards beendeter Executor-Threads werden dabei eingefaltet.
+    """
+    
+    # Obergrenzen der Latenz-Buckets in Sekunden (DS18B20 Konvertierung ~750ms)
+    BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+    
+    # Ergebnis einer Lesung → Zähler
+    OUTCOMES = {
+        'ok': 'successes',
+        'crc': 'crc_failures',
+        'timeout': 'timeouts',
+        'power_on_reset': 'power_on_resets',
+        'error': 'errors'
+    }
+    
+    def __init__(self):
+        self._lock = threading.Lock()  # nur für die Shard-Verwaltung
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[str, Dict]]] = []
+        self._retired: Dict[str, Dict] = {}
+    
+    def _new_entry(self) -> Dict:
+        entry = {'buckets': [0] * (len(self.BUCKETS) + 1), 'count': 0, 'sum': 0.0,
+                 'last_error': None, 'last_error_time': None}
+        entry.update((counter, 0) for counter in self.OUTCOMES.values())
+        return entry
+    
+    def _shard(self) -> Dict[str, Dict]:
+        sensors = getattr(self._local, 'sensors', None)
+        if sensors is None:
+            sensors = self._local.sensors = {}
+            with self._lock:
+                self._fold_finished()
+                self._shards.append((threading.current_thread(), sensors))
+        return sensors
+    
+    def _merge(self, target: Dict[str, Dict], source: Dict[str, Dict]):
+        for sensor_id, entry in list(source.items()):
+            merged = target.get(sensor_id)
+            if merged is None:
+                merged = target[sensor_id] = self._new_entry()
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], entry['buckets'])]
+            merged['count'] += entry['count']
+            merged['sum'] += entry['sum']
+            for counter in self.OUTCOMES.values():
+                merged[counter] += entry[counter]
+            if entry['last_error_time'] is not None and (
+                    merged['last_error_time'] is None or entry['last_error_time'] > merged['last_error_time']):
+                merged['last_error'] = entry['last_error']
+                merged['last_error_time'] = entry['last_error_time']
+    
+    def _fold_finished(self):
+        # Die Threads des dauerhaften Lese-Pools leben so lange wie der Manager, ihre Shards
+        # bleiben aktiv. Nur beendete Threads (Pool nach close() neu angelegt, fremde
+        # Aufrufer-Threads) werden in _retired übernommen - erst nach ihrem Ende, nie vorher
+        alive = []
+        for thread, sensors in self._shards:
+            if thread.is_alive():
+                alive.append((thread, sensors))
+            else:
+                self._merge(self._retired, sensors)
+        self._shards = alive
+    
+    def record(self, sensor_id: str, seconds: float, crc_failure: bool = False,
+               outcome: str = 'ok', reason: Optional[str] = None):
+        """Lesedauer und Ergebnis ('ok', 'crc', 'timeout', 'power_on_reset', 'error') erfassen"""
+        if crc_failure:
+            outcome = 'crc'
+        sensors = self._shard()
+        entry = sensors.get(sensor_id)
+        if entry is None:
+            entry = sensors[sensor_id] = self._new_entry()
+        entry['buckets'][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        entry['count'] += 1
+        entry['sum'] += seconds
+        entry[self.OUTCOMES[outcome]] += 1
+        if outcome != 'ok':
+            entry['last_error'] = reason or outcome
+            entry['last_error_time'] = time.time()
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """Zusammengeführte Kopie aller Sensor-Statistiken"""
+        merged: Dict[str, Dict] = {}
+        with self._lock:
+            self._fold_finished()
+            self._merge(merged, self._retired)
+            for _, sensors in self._shards:
+                self._merge(merged, sensors)
+        return merged
+    
+    @classmethod
+    def percentile(cls, buckets: List[int], q: float) -> Optional[float]:
+        """Perzentil (Sekunden) aus Bucket-Zählern, linear innerhalb des Buckets"""
+        total = sum(buckets)
+        if not total:
+            return None
+        rank = q / 100.0 * total
+        cumulative = 0
+        lower = 0.0
+        for i, count in enumerate(buckets):
+            upper = cls.BUCKETS[i] if i < len(cls.BUCKETS) else cls.BUCKETS[-1]
+            if count and cumulative + count >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return lower
 
 class Pi5DS18B20Manager:
-    """Pi 5 optimierter Manager für DS18B20 Temperatursensoren"""
+    """Pi 5 optimierter Manager für DS18B20 Temperatursensoren (Bus-Zugriff über ein W1Backend)"""
     
-    def __init__(self, high_performance: bool = True):
-        self.base_dir = '/sys/bus/w1/devices/'
+    def __init__(self, high_performance: bool = True, backend: Optional[W1Backend] = None,
+                 bulk_conversion: bool = False):
+        self.backend = backend or SysfsW1Backend()
+        self.bulk_conversion = bulk_conversion
+        self.base_dir = getattr(self.backend, 'base_dir', SYSFS_BASE_DIR)
         self.device_folders = []
         self.sensor_ids = []
         self.high_performance = high_performance
-        self.read_stats = {'total_readings': 0, 'failed_readings': 0, 'avg_read_time': 0}
+        self.retry_pauses = True  # Replay: Retries ohne Wartezeit
+        self.sensor_stats = SensorReadStats()
+        self._executor: Optional[ThreadPoolExecutor] = None  # bleibt über alle Zyklen bestehen
         self._discover_sensors()
     
     def _discover_sensors(self):
         """Findet alle angeschlossenen DS18B20 Sensoren mit Pi 5 Optimierungen"""
         try:
             # Alle 28-* Geräte finden (DS18B20 Familie)
-            self.device_folders = glob.glob(self.base_dir + '28-*')
-            self.sensor_ids = [folder.split('/')[-1] for folder in self.device_folders]
+            self.sensor_ids = self.backend.discover()
+            self.device_folders = [self.backend.device_folder(sensor_id) for sensor_id in self.sensor_ids]
             
             logger.info(f"🔍 Pi 5: {len(self.sensor_ids)} DS18B20 Sensoren gefunden:")
             for i, sensor_id in enumerate(self.sensor_ids, 1):
@@ -100,50 +229,57 @@ class Pi5DS18B20Manager:
     def read_temp_single(self, device_folder: str, sensor_id: str) -> Tuple[str, Optional[float]]:
         """Liest Temperatur von einem DS18B20 Sensor (Pi 5 Thread-safe)"""
         start_time = time.time()
-        device_file = device_folder + '/w1_slave'
         
         try:
-            lines = self.read_temp_raw(device_file)
+            lines = self.backend.read(sensor_id)
             
             if not lines:
+                self.sensor_stats.record(sensor_id, time.time() - start_time, outcome='timeout',
+                                         reason='keine Antwort vom Sensor')
                 return sensor_id, None
                 
-            # Pi 5: Retry-Logic für bessere Stabilität
+            # Pi 5: Retry-Logic für bessere Stabilität (CRC-Fehler und 85 °C Power-On-Reset)
             retry_count = 0
             max_retries = 3 if self.high_performance else 1
             
-            while lines[0].strip()[-3:] != 'YES' and retry_count < max_retries:
-                time.sleep(0.1)  # Pi 5: Reduzierte Wartezeit
-                lines = self.read_temp_raw(device_file)
+            while (lines[0].strip()[-3:] != 'YES' or is_power_on_reset(lines)) and retry_count < max_retries:
+                if self.retry_pauses:
+                    time.sleep(0.1)  # Pi 5: Reduzierte Wartezeit
+                lines = self.backend.read(sensor_id)
                 retry_count += 1
                 if not lines:
+                    self.sensor_stats.record(sensor_id, time.time() - start_time, outcome='timeout',
+                                             reason=f'keine Antwort nach {retry_count} Versuchen')
                     return sensor_id, None
             
             if lines[0].strip()[-3:] != 'YES':
                 logger.warning(f"⚠️  Pi 5: Sensor {sensor_id} CRC-Fehler nach {retry_count} Versuchen")
+                self.sensor_stats.record(sensor_id, time.time() - start_time, outcome='crc',
+                                         reason=f'CRC-Fehler nach {retry_count} Versuchen')
+                return sensor_id, None
+            
+            if is_power_on_reset(lines):
+                logger.warning(f"⚠️  Pi 5: Sensor {sensor_id} liefert 85 °C Reset-Wert nach {retry_count} Versuchen")
+                self.sensor_stats.record(sensor_id, time.time() - start_time, outcome='power_on_reset',
+                                         reason=f'85 °C Reset-Wert nach {retry_count} Versuchen')
                 return sensor_id, None
             
             # Temperatur extrahieren
-            equals_pos = lines[1].find('t=')
-            if equals_pos != -1:
-                temp_string = lines[1][equals_pos+2:]
-                temp_c = float(temp_string) / 1000.0
-                
+            with stage('parse'):
+                equals_pos = lines[1].find('t=')
+                temp_c = float(lines[1][equals_pos+2:]) / 1000.0 if equals_pos != -1 else None
+            if temp_c is not None:
                 # Pi 5 Performance-Statistiken
-                read_time = (time.time() - start_time) * 1000  # ms
-                self.read_stats['total_readings'] += 1
-                self.read_stats['avg_read_time'] = (
-                    (self.read_stats['avg_read_time'] * (self.read_stats['total_readings'] - 1) + read_time) /
-                    self.read_stats['total_readings']
-                )
-                
+                self.sensor_stats.record(sensor_id, time.time() - start_time)
                 return sensor_id, temp_c
             
+            self.sensor_stats.record(sensor_id, time.time() - start_time, outcome='error',
+                                     reason='kein t= Wert in w1_slave')
             return sensor_id, None
             
         except Exception as e:
             logger.error(f"❌ Pi 5 Sensor {sensor_id} Fehler: {e}")
-            self.read_stats['failed_readings'] += 1
+            self.sensor_stats.record(sensor_id, time.time() - start_time, outcome='error', reason=str(e))
             return sensor_id, None
     
     def get_all_temperatures(self) -> Dict[str, float]:
@@ -153,6 +289,13 @@ class Pi5DS18B20Manager:
         if not self.device_folders:
             return temperatures
         
+        # Eine gemeinsame Konvertierung (~750ms) statt einer pro Sensor
+        if self.bulk_conversion and self.backend.supports_bulk_conversion():
+            try:
+                self.backend.bulk_convert()
+            except Exception as e:
+                logger.warning(f"⚠️  Pi 5 Bulk-Konvertierung fehlgeschlagen: {e}")
+        
         if self.high_performance and len(self.device_folders) > 2:
             # Pi 5 Parallel-Reading für bessere Performance
             return self._parallel_temperature_reading()
@@ -165,29 +308,33 @@ class Pi5DS18B20Manager:
         temperatures = {}
         logger.debug("⚡ Pi 5 Parallel-Reading gestartet...")
         
-        with ThreadPoolExecutor(max_workers=min(6, len(self.device_folders))) as executor:
-            # Alle Sensoren parallel starten
-            future_to_sensor = {
-                executor.submit(self.read_temp_single, folder, self.sensor_ids[i]): (i+1, self.sensor_ids[i])
-                for i, folder in enumerate(self.device_folders)
-            }
-            
-            # Ergebnisse sammeln
-            for future in as_completed(future_to_sensor):
-                sensor_num, sensor_id = future_to_sensor[future]
-                try:
-                    returned_id, temp = future.result(timeout=2.0)  # Pi 5: 2s Timeout
-                    
-                    if temp is not None:
-                        temperatures[f"DS18B20_{sensor_num}"] = temp
-                        logger.info(f"🌡️  Pi 5 Sensor {sensor_num} ({sensor_id}): {temp:.2f}°C")
-                    else:
-                        logger.warning(f"⚠️  Pi 5 Sensor {sensor_num} ({sensor_id}): Lesefehler")
-                        temperatures[f"DS18B20_{sensor_num}"] = None
-                        
-                except Exception as e:
-                    logger.error(f"❌ Pi 5 Parallel-Reading Fehler Sensor {sensor_num}: {e}")
+        # Ein Pool für die gesamte Laufzeit - ein neuer Pool pro Zyklus kostet Threads und Speicher
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=min(6, len(self.device_folders)),
+                                                thread_name_prefix='ds18b20')
+        
+        # Alle Sensoren parallel starten
+        future_to_sensor = {
+            self._executor.submit(self.read_temp_single, folder, self.sensor_ids[i]): (i+1, self.sensor_ids[i])
+            for i, folder in enumerate(self.device_folders)
+        }
+        
+        # Ergebnisse sammeln
+        for future in as_completed(future_to_sensor):
+            sensor_num, sensor_id = future_to_sensor[future]
+            try:
+                returned_id, temp = future.result(timeout=2.0)  # Pi 5: 2s Timeout
+                
+                if temp is not None:
+                    temperatures[f"DS18B20_{sensor_num}"] = temp
+                    logger.info("🌡️  Pi 5 Sensor %d (%s): %.2f°C", sensor_num, sensor_id, temp)
+                else:
+                    logger.warning(f"⚠️  Pi 5 Sensor {sensor_num} ({sensor_id}): Lesefehler")
                     temperatures[f"DS18B20_{sensor_num}"] = None
+                    
+            except Exception as e:
+                logger.error(f"❌ Pi 5 Parallel-Reading Fehler Sensor {sensor_num}: {e}")
+                temperatures[f"DS18B20_{sensor_num}"] = None
         
         return temperatures
     
@@ -201,21 +348,54 @@ class Pi5DS18B20Manager:
             
             if temp is not None:
                 temperatures[f"DS18B20_{i}"] = temp
-                logger.info(f"🌡️  Pi 5 Sensor {i} ({sensor_id}): {temp:.2f}°C")
+                logger.info("🌡️  Pi 5 Sensor %d (%s): %.2f°C", i, sensor_id, temp)
             else:
                 logger.warning(f"⚠️  Pi 5 Sensor {i} ({sensor_id}): Lesefehler")
                 temperatures[f"DS18B20_{i}"] = None
         
         return temperatures
     
-    def get_performance_stats(self) -> Dict[str, float]:
-        """Pi 5 Performance-Statistiken"""
+    def close(self):
+        """Lese-Threads beenden (ein späterer Zyklus legt den Pool neu an)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def get_performance_stats(self) -> Dict:
+        """Pi 5 Performance-Statistiken - gesamt und pro Sensor (Perzentile in ms)"""
+        snapshot = self.sensor_stats.snapshot()
+        names = {sensor_id: f"DS18B20_{i}" for i, sensor_id in enumerate(self.sensor_ids, 1)}
+        percentile = self.sensor_stats.percentile
+        
+        sensors = {}
+        for sensor_id, entry in sorted(snapshot.items()):
+            p50, p95, p99 = (percentile(entry['buckets'], q) for q in (50, 95, 99))
+            sensors[sensor_id] = {
+                'name': names.get(sensor_id, sensor_id),
+                'readings': entry['count'],
+                'success_rate': entry['successes'] / max(1, entry['count']) * 100,
+                'avg_read_time': entry['sum'] / max(1, entry['count']) * 1000,
+                'p50_ms': p50 * 1000 if p50 is not None else None,
+                'p95_ms': p95 * 1000 if p95 is not None else None,
+                'p99_ms': p99 * 1000 if p99 is not None else None,
+                'crc_failures': entry['crc_failures'],
+                'timeouts': entry['timeouts'],
+                'power_on_resets': entry['power_on_resets'],
+                'errors': entry['errors'],
+                'last_error': entry['last_error'],
+                'last_error_time': entry['last_error_time']
+            }
+        
+        total = sum(entry['count'] for entry in snapshot.values())
+        successes = sum(entry['successes'] for entry in snapshot.values())
         return {
-            'total_readings': self.read_stats['total_readings'],
-            'failed_readings': self.read_stats['failed_readings'],
-            'success_rate': ((self.read_stats['total_readings'] - self.read_stats['failed_readings']) / 
-                           max(1, self.read_stats['total_readings'])) * 100,
-            'avg_read_time': self.read_stats['avg_read_time']
+            'total_readings': total,
+            'failed_readings': total - successes,
+            'success_rate': successes / max(1, total) * 100,
+            'avg_read_time': sum(entry['sum'] for entry in snapshot.values()) / max(1, total) * 1000,
+            'crc_failures': sum(entry['crc_failures'] for entry in snapshot.values()),
+            'timeouts': sum(entry['timeouts'] for entry in snapshot.values()),
+            'sensors': sensors
         }
 
 class Pi5DHT22Sensor:
@@ -224,12 +404,16 @@ class Pi5DHT22Sensor:
     def __init__(self, pin: int = 18, use_pi5_optimizations: bool = True):
         self.pin = pin
         self.sensor = None
-        self.available = DHT22_AVAILABLE
+        driver = load_dht_driver()
+        self.available = driver is not None
         self.use_pi5_optimizations = use_pi5_optimizations
         self.read_attempts = 0
         self.successful_reads = 0
+        self.retry_pauses = True  # Replay: Retries ohne Wartezeit
+        self._last_good = None  # (monotonic, temperature, humidity)
         
         if self.available:
+            board, adafruit_dht = driver
             try:
                 # Pi 5 GPIO Pin konfigurieren
                 gpio_pin = getattr(board, f'D{pin}')
@@ -260,18 +444,21 @@ class Pi5DHT22Sensor:
                 
                 if temperature is not None and humidity is not None:
                     self.successful_reads += 1
-                    logger.info(f"🌡️  Pi 5 DHT22: {temperature:.1f}°C, 💧 {humidity:.1f}%")
+                    self._last_good = (time.monotonic(), temperature, humidity)
+                    logger.info("🌡️  Pi 5 DHT22: %.1f°C, 💧 %.1f%%", temperature, humidity)
                     return temperature, humidity
                 else:
                     if attempt < max_retries - 1:
                         logger.debug(f"🔄 Pi 5 DHT22 Retry {attempt + 1}/{max_retries}")
-                        time.sleep(0.5)  # Pi 5: Kurze Wartezeit zwischen Versuchen
+                        if self.retry_pauses:
+                            time.sleep(0.5)  # Pi 5: Kurze Wartezeit zwischen Versuchen
                     
             except RuntimeError as e:
                 # DHT22 kann zeitweise Lesefehler haben - normal bei Pi 5
                 if attempt < max_retries - 1:
                     logger.debug(f"🔄 Pi 5 DHT22 RuntimeError Retry {attempt + 1}: {e}")
-                    time.sleep(1.0)
+                    if self.retry_pauses:
+                        time.sleep(1.0)
                 else:
                     logger.warning(f"⚠️  Pi 5 DHT22 Lesefehler nach {max_retries} Versuchen: {e}")
                     
@@ -281,6 +468,29 @@ class Pi5DHT22Sensor:
         
         return None, None
     
+    def read_cached(self, max_age: float = 30.0, min_interval: float = 2.0) -> Tuple[Optional[float], Optional[float]]:
+        """Nicht-blockierend: ein Leseversuch ohne Retry-Pausen, bei Fehler letzter Wert bis max_age
+        
+        Innerhalb von min_interval (DHT22: höchstens alle 2s) wird der Bus gar nicht angefasst.
+        """
+        last = self._last_good
+        if last is not None and time.monotonic() - last[0] < min_interval:
+            return last[1], last[2]
+        temperature, humidity = self.read_data(max_retries=1)
+        if temperature is None and last is not None and time.monotonic() - last[0] < max_age:
+            return last[1], last[2]
+        return temperature, humidity
+    
+    def close(self):
+        """DHT22 freigeben (GPIO-Handle und Hintergrund-Prozess des Treibers)"""
+        if self.sensor is not None and hasattr(self.sensor, 'exit'):
+            try:
+                self.sensor.exit()
+            except Exception as e:
+                logger.debug(f"DHT22 exit(): {e}")
+        self.sensor = None
+        self.available = False
+    
     def get_success_rate(self) -> float:
         """DHT22 Erfolgsrate für Pi 5"""
         if self.read_attempts == 0:
@@ -290,8 +500,10 @@ class Pi5DHT22Sensor:
 class Pi5SensorMonitor:
     """Pi 5 optimierte Hauptklasse für Sensor-Überwachung"""
     
-    def __init__(self, high_performance: bool = True, error_recovery: bool = True, use_parallel_reading: bool = True):
+    def __init__(self, high_performance: bool = True, error_recovery: bool = True, use_parallel_reading: bool = True,
+                 backend: Optional[W1Backend] = None, bulk_conversion: bool = False, dht_cache_seconds: float = 0.0):
         self.high_performance = high_performance
+        self.dht_cache_seconds = dht_cache_seconds
         self.error_recovery = error_recovery
         self.use_parallel_reading = use_parallel_reading
         
@@ -300,8 +512,38 @@ class Pi5SensorMonitor:
         logger.info(f"   🔄 Error-Recovery: {error_recovery}")
         logger.info(f"   🔀 Parallel-Reading: {use_parallel_reading}")
         
-        self.ds18b20_manager = Pi5DS18B20Manager(high_performance=high_performance)
+        self.ds18b20_manager = Pi5DS18B20Manager(high_performance=high_performance, backend=backend,
+                                                 bulk_conversion=bulk_conversion)
         self.dht22_sensor = Pi5DHT22Sensor(pin=18, use_pi5_optimizations=True)
+        self.capture = None
+        
+    def start_recording(self, path: str) -> CaptureWriter:
+        """Rohdaten aller folgenden Messzyklen in eine Capture-Datei schreiben"""
+        self.stop_recording()
+        manager = self.ds18b20_manager
+        self.capture = CaptureWriter(path, manager.sensor_ids, dht22=self.dht22_sensor.sensor is not None)
+        manager.backend = RecordingW1Backend(manager.backend, self.capture)
+        if self.dht22_sensor.sensor is not None:
+            self.dht22_sensor.sensor = RecordingDHT22(self.dht22_sensor.sensor, self.capture)
+        return self.capture
+    
+    def stop_recording(self):
+        """Aufzeichnung beenden und die echten Sensor-Zugriffe wiederherstellen"""
+        if self.capture is None:
+            return
+        manager = self.ds18b20_manager
+        if isinstance(manager.backend, RecordingW1Backend):
+            manager.backend = manager.backend.inner
+        if isinstance(self.dht22_sensor.sensor, RecordingDHT22):
+            self.dht22_sensor.sensor = self.dht22_sensor.sensor.inner
+        self.capture.close()
+        self.capture = None
+        
+    def close(self):
+        """Aufzeichnung beenden, Lese-Threads und DHT22 freigeben"""
+        self.stop_recording()
+        self.ds18b20_manager.close()
+        self.dht22_sensor.close()
         
     def check_hardware(self) -> bool:
         """Prüft Hardware-Verfügbarkeit mit Pi 5 spezifischen Tests"""
@@ -319,7 +561,7 @@ class Pi5SensorMonitor:
             pass
         
         # 1-Wire Interface prüfen
-        if not os.path.exists('/sys/bus/w1/devices/'):
+        if not self.ds18b20_manager.backend.available():
             logger.error("❌ 1-Wire Interface nicht aktiviert!")
             logger.info("💡 Pi 5 Lösung: sudo nano /boot/firmware/config.txt")
             logger.info("💡 Zeile hinzufügen: dtoverlay=w1-gpio,gpiopin=4")
@@ -365,43 +607,56 @@ class Pi5SensorMonitor:
         """Einmalige Messung aller Sensoren mit Pi 5 Optimierungen"""
         logger.info("📊 Pi 5 Einmalige Sensor-Messung...")
         start_time = time.time()
-        
-        # DS18B20 Temperaturen
-        ds_temps = self.ds18b20_manager.get_all_temperatures()
-        
-        # DHT22 Daten
-        dht_temp, dht_humidity = self.dht22_sensor.read_data()
+        if self.capture is not None:
+            self.capture.begin_cycle()
+        
+        # DS18B20 Temperaturen - Wandzeit der Bus-Erfassung (parallele Lesungen teilen sich den Bus)
+        with stage('bus_read'):
+            ds_temps = self.ds18b20_manager.get_all_temperatures()
+        
+        # DHT22 Daten - eigene Stufe, damit bus_read nur den 1-Wire Bus misst;
+        # mit Cache blockieren Retry-Pausen den Zyklus nicht
+        with stage('dht_read'):
+            if self.dht_cache_seconds > 0:
+                dht_temp, dht_humidity = self.dht22_sensor.read_cached(max_age=self.dht_cache_seconds)
+            else:
+                dht_temp, dht_humidity = self.dht22_sensor.read_data()
         
         total_time = (time.time() - start_time) * 1000  # ms
         
-        # Pi 5 Messergebnisse
+        # Pi 5 Messergebnisse - %-Argumente: im summary-Logmodus wird nur bei Bedarf formatiert
         logger.info("📋 Pi 5 Messergebnisse:")
         logger.info("-" * 50)
         
         for sensor, temp in ds_temps.items():
             if temp is not None:
-                logger.info(f"{sensor:12}: {temp:6.2f}°C")
+                logger.info("%-12s: %6.2f°C", sensor, temp)
             else:
-                logger.info(f"{sensor:12}: FEHLER")
+                logger.info("%-12s: FEHLER", sensor)
         
         if dht_temp is not None and dht_humidity is not None:
-            logger.info(f"{'DHT22 Temp':12}: {dht_temp:6.1f}°C")
-            logger.info(f"{'DHT22 Hum':12}: {dht_humidity:6.1f}%")
+            logger.info("%-12s: %6.1f°C", 'DHT22 Temp', dht_temp)
+            logger.info("%-12s: %6.1f%%", 'DHT22 Hum', dht_humidity)
         else:
-            logger.info(f"{'DHT22':12}: FEHLER")
+            logger.info("%-12s: FEHLER", 'DHT22')
         
         logger.info("-" * 50)
-        logger.info(f"⚡ Pi 5 Gesamt-Lesezeit: {total_time:.1f}ms")
+        logger.info("⚡ Pi 5 Gesamt-Lesezeit: %.1fms", total_time)
         
         # Pi 5 Performance-Statistiken
         if self.high_performance:
             stats = self.ds18b20_manager.get_performance_stats()
-            logger.info(f"📊 Pi 5 DS18B20 Stats:")
-            logger.info(f"   Erfolgsrate: {stats['success_rate']:.1f}%")
-            logger.info(f"   Ø Lesezeit: {stats['avg_read_time']:.1f}ms")
+            logger.info("📊 Pi 5 DS18B20 Stats:")
+            logger.info("   Erfolgsrate: %.1f%%", stats['success_rate'])
+            logger.info("   Ø Lesezeit: %.1fms", stats['avg_read_time'])
+            measured = [sensor for sensor in stats['sensors'].values() if sensor['p95_ms'] is not None]
+            if measured:
+                slowest = max(measured, key=lambda sensor: sensor['p95_ms'])
+                logger.info("   Langsamster Sensor: %s (p95 %.0fms, Erfolgsrate %.1f%%)",
+                            slowest['name'], slowest['p95_ms'], slowest['success_rate'])
             
             dht_success = self.dht22_sensor.get_success_rate()
-            logger.info(f"📊 Pi 5 DHT22 Erfolgsrate: {dht_success:.1f}%")
+            logger.info("📊 Pi 5 DHT22 Erfolgsrate: %.1f%%", dht_success)
         
         return ds_temps, dht_temp, dht_humidity
     
@@ -417,24 +672,33 @@ class Pi5SensorMonitor:
         """Kontinuierliche Überwachung mit Pi 5 Optimierungen"""
         logger.info(f"🔄 Pi 5 Kontinuierliche Überwachung startet (Intervall: {interval}s)")
         logger.info("Drücke Ctrl+C zum Beenden")
+        guard = ResourceGuard()
         
         try:
             reading_count = 0
             while True:
                 reading_count += 1
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                logger.info(f"\n⏰ Pi 5 Messung #{reading_count} um {timestamp}")
+                logger.info("\n⏰ Pi 5 Messung #%d um %s", reading_count, datetime.now().replace(microsecond=0))
                 
-                if self.use_parallel_reading:
-                    self.parallel_reading()
-                else:
-                    self.single_reading()
+                start_time = time.perf_counter()
+                with PROFILER.cycle():
+                    if self.use_parallel_reading:
+                        ds_temps, dht_temp, _ = self.parallel_reading()
+                    else:
+                        ds_temps, dht_temp, _ = self.single_reading()
+                guard.check()
                 
-                logger.info(f"⏳ Pi 5 wartet {interval} Sekunden...")
+                # Eine Zeile pro Zyklus - im summary-Logmodus die einzige geschriebene INFO-Zeile
+                logger.info("📊 Zyklus #%d: DS18B20 %d/%d, DHT22 %s, %.0fms",
+                            reading_count, sum(1 for temp in ds_temps.values() if temp is not None),
+                            len(ds_temps), '✅' if dht_temp is not None else '❌',
+                            (time.perf_counter() - start_time) * 1000, extra=CYCLE_SUMMARY)
+                
+                logger.info("⏳ Pi 5 wartet %s Sekunden...", interval)
                 time.sleep(interval)
                 
         except KeyboardInterrupt:
-            logger.info(f"\n👋 Pi 5 Überwachung beendet nach {reading_count} Messungen")
+            logger.info("\n👋 Pi 5 Überwachung beendet nach %d Messungen", reading_count)
     
     def get_performance_stats(self) -> Dict[str, any]:
         """Pi 5 Gesamt-Performance-Statistiken"""
@@ -452,72 +716,135 @@ class Pi5SensorMonitor:
             }
         }
 
+def setup_logging(config_path: str = "config.ini"):
+    """Logging für den Kommandozeilen-Betrieb: Konsole ([monitoring] log_mode)"""
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=wrap_handlers([logging.StreamHandler()], config),
+        force=True
+    )
+
+def replay_capture(path: str, speed: float = 1.0, on_cycle: Optional[Callable] = None,
+                   **monitor_options) -> int:
+    """Capture-Datei durch die unveränderte Erfassung spielen
+    
+    on_cycle(timestamp, ds_temps, dht_temp, dht_humidity) erhält jeden Zyklus mit dem
+    ursprünglichen Zeitstempel - z.B. für Regel-Engine, Anomalie-Erkennung oder Writer.
+    """
+    replay = CaptureReplay(path, speed=speed)
+    monitor = Pi5SensorMonitor(backend=replay.backend, **monitor_options)
+    monitor.ds18b20_manager.retry_pauses = False
+    monitor.dht22_sensor.retry_pauses = False
+    if replay.dht is not None:
+        monitor.dht22_sensor.sensor = replay.dht
+        monitor.dht22_sensor.available = True
+    
+    logger.info(f"▶️ Wiedergabe: {path} ({len(replay.header['sensors'])} DS18B20, "
+                f"{'Echtzeit' if speed == 1 else f'{speed:g}x' if speed > 0 else 'ohne Pausen'})")
+    for timestamp in replay:
+        with PROFILER.cycle():
+            ds_temps, dht_temp, dht_humidity = monitor.single_reading()
+        if on_cycle is not None:
+            on_cycle(timestamp, ds_temps, dht_temp, dht_humidity)
+    monitor.close()
+    logger.info(f"⏹️ Wiedergabe beendet: {replay.cycles} Zyklen, "
+                f"{replay.backend.stats['repeated']} wiederholte Lesungen")
+    return replay.cycles
+
 def main():
     """Hauptfunktion für Pi 5 mit Command-Line Parameter Support"""
     import sys
     
+    setup_logging()
+    
     print("🌡️  Raspberry Pi 5 Sensor-Monitor")
     print("6x DS18B20 + 1x DHT22 (Pi 5 optimiert)")
     print("=" * 55)
     
+    # --profile[=N] entfernen, SIGUSR1 für Profiling installieren
+    setup_profiling('sensor_monitor')
+    
+    # Wiedergabe braucht keine Hardware: replay <datei> [tempo]
+    if len(sys.argv) > 2 and sys.argv[1].lower() == "replay":
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+        replay_capture(sys.argv[2], speed=speed)
+        return 0
+    
     monitor = Pi5SensorMonitor(
         high_performance=True,
         error_recovery=True,
         use_parallel_reading=True
     )
     
-    # Hardware-Check
-    if not monitor.check_hardware():
-        logger.error("❌ Pi 5 Hardware-Check fehlgeschlagen!")
-        return 1
-    
-    # Command-Line Parameter prüfen
-    if len(sys.argv) > 1:
-        mode = sys.argv[1].lower()
-        if mode == "single":
-            logger.info("🎯 Command-Line Modus: Einmalige Messung")
-            monitor.single_reading()
-            return 0
-        elif mode == "continuous":
-            interval = int(sys.argv[2]) if len(sys.argv) > 2 else 30
-            logger.info(f"🔄 Command-Line Modus: Kontinuierliche Überwachung ({interval}s)")
-            monitor.continuous_monitoring(interval)
-            return 0
-        elif mode == "parallel":
-            logger.info("⚡ Command-Line Modus: High-Performance Parallel-Reading")
-            monitor.parallel_reading()
-            return 0
-    
-    # Interaktiver Modus wenn keine Parameter
-    print("\nPi 5 Optionen:")
-    print("1. Einmalige Messung")
-    print("2. Kontinuierliche Überwachung (30s) - empfohlen für Pi 5")
-    print("3. Kontinuierliche Überwachung (60s)")
-    print("4. Kontinuierliche Überwachung (300s)")
-    print("5. Pi 5 High-Performance Parallel-Reading")
-    
     try:
-        choice = input("\nWahl (1-5): ").strip()
-        
-        if choice == "1":
-            monitor.single_reading()
-        elif choice == "2":
-            monitor.continuous_monitoring(30)
-        elif choice == "3":
-            monitor.continuous_monitoring(60)
-        elif choice == "4":
-            monitor.continuous_monitoring(300)
-        elif choice == "5":
-            logger.info("⚡ Pi 5 High-Performance Modus aktiviert")
-            monitor.parallel_reading()
-        else:
-            logger.error("❌ Ungültige Auswahl")
+        # Hardware-Check
+        if not monitor.check_hardware():
+            logger.error("❌ Pi 5 Hardware-Check fehlgeschlagen!")
             return 1
+        
+        # Command-Line Parameter prüfen
+        if len(sys.argv) > 1:
+            mode = sys.argv[1].lower()
+            if mode == "single":
+                logger.info("🎯 Command-Line Modus: Einmalige Messung")
+                with PROFILER.cycle():
+                    monitor.single_reading()
+                return 0
+            elif mode == "continuous":
+                interval = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+                logger.info(f"🔄 Command-Line Modus: Kontinuierliche Überwachung ({interval}s)")
+                monitor.continuous_monitoring(interval)
+                return 0
+            elif mode == "record" and len(sys.argv) > 2:
+                interval = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+                logger.info(f"⏺️ Command-Line Modus: Aufzeichnung nach {sys.argv[2]} ({interval}s)")
+                monitor.start_recording(sys.argv[2])
+                try:
+                    monitor.continuous_monitoring(interval)
+                finally:
+                    monitor.stop_recording()
+                return 0
+            elif mode == "parallel":
+                logger.info("⚡ Command-Line Modus: High-Performance Parallel-Reading")
+                with PROFILER.cycle():
+                    monitor.parallel_reading()
+                return 0
+        
+        # Interaktiver Modus wenn keine Parameter
+        print("\nPi 5 Optionen:")
+        print("1. Einmalige Messung")
+        print("2. Kontinuierliche Überwachung (30s) - empfohlen für Pi 5")
+        print("3. Kontinuierliche Überwachung (60s)")
+        print("4. Kontinuierliche Überwachung (300s)")
+        print("5. Pi 5 High-Performance Parallel-Reading")
+        
+        try:
+            choice = input("\nWahl (1-5): ").strip()
             
-    except KeyboardInterrupt:
-        logger.info("\n👋 Pi 5 Programm beendet")
-    
-    return 0
+            if choice == "1":
+                monitor.single_reading()
+            elif choice == "2":
+                monitor.continuous_monitoring(30)
+            elif choice == "3":
+                monitor.continuous_monitoring(60)
+            elif choice == "4":
+                monitor.continuous_monitoring(300)
+            elif choice == "5":
+                logger.info("⚡ Pi 5 High-Performance Modus aktiviert")
+                monitor.parallel_reading()
+            else:
+                logger.error("❌ Ungültige Auswahl")
+                return 1
+        
+        except KeyboardInterrupt:
+            logger.info("\n👋 Pi 5 Programm beendet")
+        
+        return 0
+    finally:
+        monitor.close()
 
 if __name__ == "__main__":
     exit(main())
@@ -17,6 +17,7 @@ class MinimalSensorMonitor:
     def __init__(self):
         self.config = configparser.ConfigParser()
         self.config.read('config.ini')
+        self.dht = None  # DHT22 Objekt einmal anlegen - jedes neue belegt GPIO und einen Hintergrund-Prozess
         self.setup_influxdb()
         self.sensor_labels = dict(self.config.items('labels'))
         
@@ -56,11 +57,13 @@ class MinimalSensorMonitor:
     def read_dht22(self):
         """DHT22 lesen - mit mehreren Versuchen für Robustheit"""
         try:
-            import adafruit_dht
-            import board
-            
-            # GPIO 18 verwenden
-            dht = adafruit_dht.DHT22(board.D18)
+            if self.dht is None:
+                import adafruit_dht
+                import board
+                
+                # GPIO 18 verwenden
+                self.dht = adafruit_dht.DHT22(board.D18)
+            dht = self.dht
             
             # Mehrere Versuche da DHT22 manchmal unzuverlässig ist
             for attempt in range(3):
@@ -85,6 +88,16 @@ class MinimalSensorMonitor:
             print(f"   ❌ DHT22 Import/Board Fehler: {e}")
             return self.read_dht22_lgpio()
             
+    def close(self):
+        """DHT22 und InfluxDB Verbindung freigeben"""
+        if self.dht is not None:
+            try:
+                self.dht.exit()
+            except Exception:
+                pass
+            self.dht = None
+        self.influx_client.close()
+            
     def read_dht22_lgpio(self):
         """DHT22 mit lgpio lesen (Fallback)"""
         try:
@@ -198,6 +211,7 @@ class MinimalSensorMonitor:
                 
             except KeyboardInterrupt:
                 print("\n🛑 Monitoring gestoppt")
+                self.close()
                 break
             except Exception as e:
                 print(f"   ❌ Fehler: {e}")
@@ -217,5 +231,6 @@ if __name__ == "__main__":
             for measurement in measurements:
                 tags = measurement._tags
                 print(f"   • {tags.get('label', 'Unbekannt')} ({tags.get('sensor', 'N/A')})")
+        monitor.close()
     else:
         monitor.monitor_continuous()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Regel-Engine für Sensor-Schwellwerte
+Grenzen pro Sensor (low/high, Änderungsrate, Ausfall) werden einmalig aus der
+Config in NumPy-Arrays übersetzt und pro Zyklus in einem vektorisierten Durchlauf
+mit Hysterese ausgewertet
+"""
+
+import configparser
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Spalten der Alarm-Matrix
+RULES = ('low', 'high', 'rate', 'offline')
+LOW, HIGH, RATE, OFFLINE = range(len(RULES))
+
+# Zustände des Staleness-Trackers
+STATES = ('online', 'stale', 'offline')
+STATE_ONLINE, STATE_STALE, STATE_OFFLINE = range(len(STATES))
+
+KIND_TEMPERATURE = 'temperature'
+KIND_HUMIDITY = 'humidity'
+
+
+def sensor_kind(sensor: str) -> str:
+    """Messgröße aus dem Sensornamen (DHT22_humidity → humidity, sonst temperature)"""
+    return KIND_HUMIDITY if sensor.lower().endswith('humidity') else KIND_TEMPERATURE
+
+
+def expected_sensors(config: configparser.ConfigParser) -> List[str]:
+    """Erwartete Sensoren laut [labels] (ds18b20_3 → DS18B20_3, dht22 → DHT22_temp/DHT22_humidity)"""
+    if not config.has_section('labels'):
+        return []
+    sensors = []
+    for key in config.options('labels'):
+        if key == 'dht22':
+            sensors += ['DHT22_temp', 'DHT22_humidity']
+        elif key.startswith('ds18b20_'):
+            sensors.append(key.upper())
+    return sensors
+
+
+class RuleEvaluation:
+    """Ergebnis eines Zyklus: aktive Alarme und Zustandswechsel"""
+
+    __slots__ = ('sensors', 'values', 'rates', 'active', 'raised', 'cleared', 'rules', 'events')
+
+    def __init__(self, sensors: List[str], values: np.ndarray, rates: np.ndarray,
+                 active: np.ndarray, raised: np.ndarray, cleared: np.ndarray,
+                 rules: Tuple[str, ...] = RULES, events: Optional[List[Tuple[str, str, float]]] = None):
+        self.rules = rules
+        self.events = events or []
+        self.sensors = sensors
+        self.values = values
+        self.rates = rates
+        self.active = active
+        self.raised = raised
+        self.cleared = cleared
+
+    def _pairs(self, mask: np.ndarray) -> List[Tuple[str, str]]:
+        rows, cols = np.nonzero(mask)
+        return [(self.sensors[r], self.rules[c]) for r, c in zip(rows, cols)]
+
+    def active_alarms(self) -> List[Tuple[str, str]]:
+        return self._pairs(self.active)
+
+    def raised_alarms(self) -> List[Tuple[str, str]]:
+        return self._pairs(self.raised)
+
+    def cleared_alarms(self) -> List[Tuple[str, str]]:
+        return self._pairs(self.cleared)
+
+
+class SensorStalenessTracker:
+    """Letzter gültiger Messzeitpunkt (monotonic) pro Sensor - Zustände online → stale → offline
+    
+    Sensoren ohne jeden Messwert zählen ab ihrer ersten Prüfung. update() liefert nur
+    Zustandswechsel als Ereignisse ('stale', 'offline', 'recovered'), keine Wiederholungen.
+    now ist die Erfassungszeit der Messung: eine Messung, die nicht neuer als die zuletzt
+    eingetragene ist (derselbe Snapshot erneut), ändert nichts; Alter gelten zu dieser Zeit.
+    """
+
+    def __init__(self, stale_after: float = 30.0, offline_after: float = 120.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_stale = stale_after
+        self.default_offline = offline_after
+        self.clock = clock
+        self.sensors: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.stale_after = np.empty(0)
+        self.offline_after = np.empty(0)
+        self.last_good = np.empty(0)       # NaN = noch nie ein Messwert
+        self.since = np.empty(0)           # Bezugszeit für Sensoren ohne Messwert
+        self.state = np.zeros(0, dtype=np.int8)
+        self.last_update: Optional[float] = None   # Erfassungszeit der zuletzt eingetragenen Messung
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser, **kwargs) -> 'SensorStalenessTracker':
+        return cls(stale_after=config.getfloat('alerts', 'sensor_stale_timeout', fallback=30.0),
+                   offline_after=config.getfloat('alerts', 'sensor_offline_timeout', fallback=120.0), **kwargs)
+
+    def add_sensors(self, sensors: Iterable[str], stale_after: Optional[Iterable[float]] = None,
+                    offline_after: Optional[Iterable[float]] = None) -> int:
+        """Sensoren aufnehmen (optional mit eigenen Zeitgrenzen)"""
+        new = [s for s in dict.fromkeys(sensors) if s not in self.index]
+        if not new:
+            return 0
+        stale = np.full(len(new), self.default_stale) if stale_after is None else np.asarray(stale_after, float)
+        offline = (np.full(len(new), self.default_offline) if offline_after is None
+                   else np.asarray(offline_after, float))
+        with self._lock:
+            for sensor in new:
+                self.index[sensor] = len(self.sensors)
+                self.sensors.append(sensor)
+            self.stale_after = np.concatenate((self.stale_after, stale))
+            self.offline_after = np.concatenate((self.offline_after, offline))
+            self.last_good = np.concatenate((self.last_good, np.full(len(new), np.nan)))
+            self.since = np.concatenate((self.since, np.full(len(new), np.nan)))
+            self.state = np.concatenate((self.state, np.zeros(len(new), dtype=np.int8)))
+        return len(new)
+
+    def _ages(self, now: float) -> np.ndarray:
+        return now - np.where(np.isnan(self.last_good), self.since, self.last_good)
+
+    def update(self, valid: np.ndarray, now: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """Gültige Messwerte eintragen, Zustände prüfen - Ereignisse (sensor, event, seconds)"""
+        now = self.clock() if now is None else now
+        valid = np.asarray(valid, dtype=bool)
+        with self._lock:
+            if self.last_update is not None and now <= self.last_update:
+                return []
+            self.last_update = now
+            self.since = np.where(np.isnan(self.since), now, self.since)
+            down_for = self._ages(now)
+            self.last_good = np.where(valid, now, self.last_good)
+            age = self._ages(now)
+            with np.errstate(invalid='ignore'):
+                state = np.where(age > self.offline_after, STATE_OFFLINE,
+                                 np.where(age > self.stale_after, STATE_STALE, STATE_ONLINE)).astype(np.int8)
+            changed = np.nonzero(state != self.state)[0]
+            events = []
+            for i in changed:
+                if state[i] == STATE_ONLINE:
+                    events.append((self.sensors[i], 'recovered', float(down_for[i])))
+                else:
+                    events.append((self.sensors[i], STATES[state[i]], float(age[i])))
+            self.state = state
+        return events
+
+    def update_data(self, sensor_data: Dict[str, Optional[float]],
+                    now: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """Zyklus aus einem Sensor-Dict (None = kein Messwert)"""
+        self.add_sensors(sensor_data)
+        valid = np.zeros(len(self.sensors), dtype=bool)
+        for sensor, value in sensor_data.items():
+            if value is not None:
+                valid[self.index[sensor]] = True
+        return self.update(valid, now)
+
+    def sensors_in(self, state: int) -> List[str]:
+        with self._lock:
+            return [self.sensors[i] for i in np.nonzero(self.state == state)[0]]
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Zustand aller Sensoren für Dashboard und /metrics - Alter zur letzten Erfassung"""
+        with self._lock:
+            if now is None:
+                now = self.last_update if self.last_update is not None else self.clock()
+            ages = self._ages(now)
+            return {sensor: {'state': STATES[self.state[i]],
+                             'age': None if np.isnan(ages[i]) else round(float(ages[i]), 1),
+                             'ever_seen': not np.isnan(self.last_good[i])}
+                    for sensor, i in self.index.items()}
+
+
+class SensorRulesEngine:
+    """Vektorisierte Schwellwert-Prüfung mit Hysterese für beliebig viele Sensoren"""
+
+    def __init__(self, config: Optional[configparser.ConfigParser] = None,
+                 sensors: Iterable[str] = (), kinds: Optional[Dict[str, str]] = None):
+        self.config = config or configparser.ConfigParser()
+        self.kinds = dict(kinds or {})
+        self.sensors: List[str] = []
+        self.index: Dict[str, int] = {}
+
+        self.low = np.empty(0)
+        self.high = np.empty(0)
+        self.rate_limit = np.empty(0)
+        self.hysteresis = np.empty(0)
+        self.rate_hysteresis = np.empty(0)
+
+        self.active = np.zeros((0, len(RULES)), dtype=bool)
+        self.last_value = np.empty(0)
+        self.last_time = np.empty(0)
+        # Ausfall-Erkennung über den letzten gültigen Messzeitpunkt
+        self.staleness = SensorStalenessTracker.from_config(self.config)
+
+        self.add_sensors(sensors)
+
+    # ------------------------------------------------------------------
+    # Kompilieren
+    # ------------------------------------------------------------------
+    def _option(self, section: str, key: str, fallback: float) -> float:
+        """Zahl aus der Config - leer/0 bei der Rate bedeutet 'aus'"""
+        value = self.config.get(section, key, fallback=None)
+        if value is None or str(value).strip() == '':
+            return fallback
+        return float(str(value).strip().strip('"'))
+
+    def _compile(self, sensor: str) -> Tuple[float, ...]:
+        """Grenzen eines Sensors: [rules] <sensor>_* vor den Standardwerten aus [alerts]/[rules]"""
+        kind = self.kinds.get(sensor) or sensor_kind(sensor)
+        key = sensor.lower()
+        if kind == KIND_HUMIDITY:
+            low = self._option('alerts', 'humidity_low', 30.0)
+            high = self._option('alerts', 'humidity_high', 80.0)
+        else:
+            low = self._option('alerts', 'temperature_low', 10.0)
+            high = self._option('alerts', 'temperature_high', 30.0)
+        rate = self._option('rules', 'rate_limit', 0.0)
+        stale = self._option('alerts', 'sensor_stale_timeout', 30.0)
+        offline = self._option('alerts', 'sensor_offline_timeout', 120.0)
+        hysteresis = self._option('rules', 'hysteresis', 0.5)
+        rate_hysteresis = self._option('rules', 'rate_hysteresis', 0.5)
+
+        low = self._option('rules', f'{key}_low', low)
+        high = self._option('rules', f'{key}_high', high)
+        rate = self._option('rules', f'{key}_rate', rate)
+        stale = self._option('rules', f'{key}_stale', stale)
+        offline = self._option('rules', f'{key}_offline', offline)
+        hysteresis = self._option('rules', f'{key}_hysteresis', hysteresis)
+
+        # NaN deaktiviert eine Regel - Vergleiche mit NaN sind immer False
+        rate = rate if rate > 0 else np.nan
+        stale = stale if stale > 0 else np.nan
+        offline = offline if offline > 0 else np.nan
+        return low, high, rate, hysteresis, rate_hysteresis, stale, offline
+
+    def add_sensors(self, sensors: Iterable[str]) -> int:
+        """Neue Sensoren aufnehmen und deren Grenzen kompilieren"""
+        new = [s for s in dict.fromkeys(sensors) if s not in self.index]
+        if not new:
+            return 0
+        compiled = np.array([self._compile(s) for s in new], dtype=np.float64).reshape(len(new), 7)
+        for sensor in new:
+            self.index[sensor] = len(self.sensors)
+            self.sensors.append(sensor)
+
+        self.low = np.concatenate((self.low, compiled[:, 0]))
+        self.high = np.concatenate((self.high, compiled[:, 1]))
+        self.rate_limit = np.concatenate((self.rate_limit, compiled[:, 2]))
+        self.hysteresis = np.concatenate((self.hysteresis, compiled[:, 3]))
+        self.rate_hysteresis = np.concatenate((self.rate_hysteresis, compiled[:, 4]))
+        self.staleness.add_sensors(new, compiled[:, 5], compiled[:, 6])
+
+        self.active = np.vstack((self.active, np.zeros((len(new), len(RULES)), dtype=bool)))
+        self.last_value = np.concatenate((self.last_value, np.full(len(new), np.nan)))
+        self.last_time = np.concatenate((self.last_time, np.full(len(new), np.nan)))
+        logger.debug(f"📐 Regeln für {len(new)} Sensoren kompiliert ({len(self.sensors)} gesamt)")
+        return len(new)
+
+    def limits(self, sensor: str) -> Dict[str, Optional[float]]:
+        """Kompilierte Grenzen eines Sensors (None = Regel aus)"""
+        i = self.index[sensor]
+        j = self.staleness.index[sensor]
+        as_float = lambda v: None if np.isnan(v) else float(v)
+        return {'low': as_float(self.low[i]), 'high': as_float(self.high[i]),
+                'rate': as_float(self.rate_limit[i]), 'stale': as_float(self.staleness.stale_after[j]),
+                'offline': as_float(self.staleness.offline_after[j]), 'hysteresis': float(self.hysteresis[i])}
+
+    # ------------------------------------------------------------------
+    # Auswerten
+    # ------------------------------------------------------------------
+    def vectorize(self, sensor_data: Dict[str, Optional[float]]) -> np.ndarray:
+        """Messwerte eines Zyklus in Sensor-Reihenfolge (fehlend/None → NaN)"""
+        self.add_sensors(sensor_data)
+        values = np.full(len(self.sensors), np.nan)
+        for sensor, value in sensor_data.items():
+            if value is not None:
+                values[self.index[sensor]] = value
+        return values
+
+    def evaluate(self, values: np.ndarray, now: Optional[float] = None) -> RuleEvaluation:
+        """Einen Zyklus auswerten - values in Sensor-Reihenfolge, NaN = kein Messwert"""
+        now = time.monotonic() if now is None else now
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        previous = self.active.copy()
+        active = self.active
+
+        # Änderungsrate pro Minute gegenüber dem letzten gültigen Wert
+        with np.errstate(invalid='ignore', divide='ignore'):
+            elapsed = now - self.last_time
+            rates = np.where(valid & (elapsed > 0), (values - self.last_value) / elapsed * 60.0, np.nan)
+            abs_rates = np.abs(rates)
+
+            # Hysterese: Alarm startet jenseits der Grenze, endet erst mit Abstand zur Grenze
+            low_on = values < self.low
+            low_off = values > self.low + self.hysteresis
+            high_on = values > self.high
+            high_off = values < self.high - self.hysteresis
+            rate_on = abs_rates > self.rate_limit
+            rate_off = abs_rates < self.rate_limit - self.rate_hysteresis
+
+        active[:, LOW] = np.where(valid, np.where(active[:, LOW], ~low_off, low_on), active[:, LOW])
+        active[:, HIGH] = np.where(valid, np.where(active[:, HIGH], ~high_off, high_on), active[:, HIGH])
+        has_rate = ~np.isnan(rates)
+        active[:, RATE] = np.where(has_rate, np.where(active[:, RATE], ~rate_off, rate_on), active[:, RATE])
+
+        # Gültige Werte übernehmen, Ausfall aus dem Staleness-Tracker (gleiche Sensor-Reihenfolge)
+        self.last_value = np.where(valid, values, self.last_value)
+        self.last_time = np.where(valid, now, self.last_time)
+        events = self.staleness.update(valid, now)
+        active[:, OFFLINE] = self.staleness.state == STATE_OFFLINE
+
+        return RuleEvaluation(self.sensors, values, rates, active.copy(),
+                              active & ~previous, previous & ~active, events=events)
+
+    def evaluate_data(self, sensor_data: Dict[str, Optional[float]],
+                      now: Optional[float] = None) -> RuleEvaluation:
+        """Einen Zyklus aus einem Sensor-Dict auswerten"""
+        return self.evaluate(self.vectorize(sensor_data), now)
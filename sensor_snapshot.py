@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Sensor-Snapshot-Cache für Pi 5 Sensor Monitor
+Ein Hintergrund-Thread erfasst die Sensoren, alle Leser teilen sich den Snapshot
+Gleichzeitige Anfragen schließen sich einer laufenden Erfassung an
+Während einer Erfassung bekommen Leser den bisherigen Snapshot (stale-while-revalidate)
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Anzahl der letzten Erfassungen, deren längste die effektive TTL bestimmt
+DURATION_WINDOW = 10
+
+
+class SensorSnapshot:
+    """Unveränderlicher Stand einer Sensor-Erfassung"""
+
+    __slots__ = ('data', 'timestamp', 'monotonic', 'duration_ms', 'sequence')
+
+    def __init__(self, data: Dict[str, Any], monotonic: float, duration_ms: float, sequence: int):
+        self.data = data
+        self.timestamp = datetime.now().isoformat()
+        self.monotonic = monotonic
+        self.duration_ms = duration_ms
+        self.sequence = sequence
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Alter des Snapshots in Sekunden"""
+        return (time.monotonic() if now is None else now) - self.monotonic
+
+
+EMPTY_SNAPSHOT = SensorSnapshot({}, float('-inf'), 0.0, 0)
+
+
+class SensorSnapshotCache:
+    """Gemeinsamer Sensor-Snapshot mit TTL und Request-Coalescing"""
+
+    def __init__(self, acquire: Callable[[], Dict[str, Any]], ttl: float = 5.0,
+                 refresh_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, autostart: bool = True):
+        self.acquire = acquire
+        self.autostart = autostart
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval if refresh_interval is not None else ttl
+        self.clock = clock
+
+        self._snapshot: Optional[SensorSnapshot] = None
+        self._cond = threading.Condition()
+        self._refreshing = False
+        self._generation = 0
+        # Dauer der letzten Erfassungen (Sekunden) - das Maximum bestimmt die effektive TTL im
+        # Hintergrundbetrieb; ein einzelner langsamer Durchlauf (z.B. Bus-Timeout) fällt wieder heraus
+        self._durations = deque(maxlen=DURATION_WINDOW)
+        self._listeners: List[Callable[[SensorSnapshot], None]] = []
+
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        self.stats = {'refreshes': 0, 'joined': 0, 'errors': 0, 'hits': 0, 'stale_hits': 0, 'overruns': 0}
+
+    # ------------------------------------------------------------------
+    # Hintergrund-Erfassung
+    # ------------------------------------------------------------------
+    def start(self):
+        """Startet den Erfassungs-Thread (idempotent)"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._acquisition_loop,
+                                            name='sensor-snapshot', daemon=True)
+            self._thread.start()
+        logger.info(f"📸 Sensor-Snapshot-Erfassung gestartet (alle {self.refresh_interval}s, TTL {self.ttl}s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stoppt den Erfassungs-Thread"""
+        self.autostart = False
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _acquisition_loop(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._stop_event.wait(self.refresh_interval)
+
+    # ------------------------------------------------------------------
+    # Lesen
+    # ------------------------------------------------------------------
+    @property
+    def effective_ttl(self) -> float:
+        """TTL - bei laufender Hintergrund-Erfassung mindestens Intervall + längste der letzten Erfassungen
+
+        Sonst liefe der Snapshot kurz vor jedem Durchlauf ab und Anfragen würden selbst den Bus lesen.
+        """
+        if not self.running:
+            return self.ttl
+        with self._cond:
+            recent = max(self._durations, default=0.0)
+        return max(self.ttl, self.refresh_interval + recent)
+
+    def get(self) -> SensorSnapshot:
+        """Aktueller Snapshot - frisch aus dem Cache oder per (gemeinsamer) Erfassung"""
+        if self.autostart and not self.running:
+            self.start()
+        ttl = self.effective_ttl
+        with self._cond:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age(self.clock()) < ttl:
+                self.stats['hits'] += 1
+                return snapshot
+            if snapshot is not None and self._refreshing:
+                # Erfassung läuft bereits - bisherigen Stand liefern statt zu warten
+                self.stats['stale_hits'] += 1
+                return snapshot
+        return self.refresh()
+
+    def peek(self) -> SensorSnapshot:
+        """Letzter Snapshot ohne Erfassung auszulösen"""
+        with self._cond:
+            return self._snapshot or EMPTY_SNAPSHOT
+
+    def refresh(self) -> SensorSnapshot:
+        """Erfassung ausführen - läuft bereits eine, wird auf deren Ergebnis gewartet"""
+        with self._cond:
+            if self._refreshing:
+                self.stats['joined'] += 1
+                generation = self._generation
+                while self._refreshing and self._generation == generation:
+                    self._cond.wait()
+                return self._snapshot or EMPTY_SNAPSHOT
+            self._refreshing = True
+            sequence = self._generation + 1
+
+        snapshot = None
+        try:
+            start = self.clock()
+            data = self.acquire()
+            end = self.clock()
+            snapshot = SensorSnapshot(data, end, (end - start) * 1000, sequence)
+        except Exception as e:
+            logger.error(f"❌ Sensor-Snapshot Erfassung fehlgeschlagen: {e}")
+
+        with self._cond:
+            if snapshot is not None:
+                self._snapshot = snapshot
+                self._durations.append(snapshot.duration_ms / 1000)
+                self.stats['refreshes'] += 1
+                # Erfassung länger als das Intervall → Zyklus überzogen
+                if snapshot.duration_ms > self.refresh_interval * 1000:
+                    self.stats['overruns'] += 1
+            else:
+                self.stats['errors'] += 1
+            self._refreshing = False
+            self._generation += 1
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+            current = self._snapshot or EMPTY_SNAPSHOT
+
+        if snapshot is not None:
+            for listener in listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    logger.error(f"❌ Snapshot-Listener Fehler: {e}")
+
+        return current
+
+    def add_listener(self, callback: Callable[[SensorSnapshot], None]):
+        """Callback nach jeder erfolgreichen Erfassung"""
+        with self._cond:
+            self._listeners.append(callback)
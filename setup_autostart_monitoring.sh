@@ -49,6 +49,7 @@ User=pi
 Group=pi
 WorkingDirectory=$HOME/sensor-monitor-pi5
 Environment=PATH=$HOME/sensor-monitor-pi5/venv/bin:/usr/local/bin:/usr/bin:/bin
+# 30s = Standard-Intervall - die MQTT Bridge ändert es per {prefix}/cmd ([mqtt] schedule_file)
 ExecStart=$HOME/sensor-monitor-pi5/venv/bin/python sensor_influxdb.py continuous 30
 Restart=always
 RestartSec=10
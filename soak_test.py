@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Dauertest (Soak) für Pi 5 Sensor Monitor
+Fährt sehr viele beschleunigte Erfassungszyklen über den simulierten 1-Wire Bus und einen
+simulierten DHT22 (keine Konvertierungszeit, keine Retry-Pausen) durch den unveränderten
+Erfassungscode und beobachtet dabei RSS, offene File-Deskriptoren, Threads und GPIO-Handles.
+Steigt ein Zähler nach der Aufwärmphase an, endet der Test mit Exit-Code 1.
+
+Beispiele:
+    python soak_test.py                      # 1.000.000 Zyklen
+    python soak_test.py --cycles 50000 --sensors 16 --json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+from bench_acquisition import SimulatedDHT22
+from pipeline_tracing import TRACER
+from resource_guard import COUNTERS, ResourceGuard, resource_usage
+from sensor_monitor import Pi5SensorMonitor
+from w1_backend import SimulatedW1Backend
+
+# Erlaubter Anstieg nach der Aufwärmphase - strenger als im Betrieb (resource_guard)
+SOAK_LIMITS = {'rss_mb': 8.0, 'open_fds': 2, 'threads': 2, 'gpio_handles': 1}
+
+
+def build_monitor(sensors: int = 8, seed: int = 1) -> Pi5SensorMonitor:
+    """Monitor mit simuliertem Bus (gelegentliche CRC-Fehler, 85 °C Resets) und simuliertem DHT22"""
+    backend = SimulatedW1Backend(sensors=sensors, conversion_time=0, crc_error_rate=0.01,
+                                 power_on_reset_rate=0.001, seed=seed)
+    monitor = Pi5SensorMonitor(backend=backend, dht_cache_seconds=0)
+    monitor.ds18b20_manager.retry_pauses = False
+    monitor.dht22_sensor.sensor = SimulatedDHT22(failure_rate=0.2, read_time=0, seed=seed)
+    monitor.dht22_sensor.available = True
+    monitor.dht22_sensor.retry_pauses = False
+    return monitor
+
+
+def run_soak(cycles: int = 1_000_000, sensors: int = 8, sample_every: Optional[int] = None,
+             warmup: float = 0.1, limits: Optional[Dict[str, float]] = None, seed: int = 1,
+             workload: Optional[Callable[[int], None]] = None,
+             sampler: Callable[[], Dict[str, float]] = resource_usage,
+             progress: Optional[Callable[[int, Dict[str, float]], None]] = None) -> Dict:
+    """Zyklen fahren und Ressourcen-Anstieg nach der Aufwärmphase bewerten
+
+    workload(cycle) läuft zusätzlich in jedem Zyklus (z.B. um den Test selbst zu prüfen).
+    """
+    sample_every = sample_every or max(1, cycles // 500)
+    total_samples = cycles // sample_every
+    warmup_samples = int(total_samples * warmup)
+    guard = ResourceGuard(interval=0, window=max(4, total_samples - warmup_samples),
+                          limits=dict(SOAK_LIMITS, **(limits or {})), sampler=sampler)
+    monitor = build_monitor(sensors, seed)
+    start_usage = sampler()
+    baseline = None
+
+    started = time.perf_counter()
+    try:
+        for cycle in range(1, cycles + 1):
+            with TRACER.cycle('soak'):
+                monitor.single_reading()
+            if workload is not None:
+                workload(cycle)
+            if cycle % sample_every == 0:
+                sample_index = cycle // sample_every
+                if sample_index > warmup_samples:
+                    guard.check(force=True)
+                    if baseline is None:
+                        baseline = guard.samples[-1]
+                if progress is not None:
+                    progress(cycle, sampler())
+    finally:
+        monitor.close()
+    seconds = time.perf_counter() - started
+
+    growth = guard.growth()
+    end_usage = dict(guard.samples[-1]) if guard.samples else sampler()
+    failed = sorted(counter for counter in COUNTERS if growth.get(counter, 0.0) >= guard.limits[counter])
+    return {
+        'cycles': cycles,
+        'sensors': sensors,
+        'seconds': round(seconds, 2),
+        'cycles_per_s': round(cycles / seconds, 1) if seconds else None,
+        'samples': len(guard.samples),
+        'start': start_usage,
+        'baseline': baseline or start_usage,
+        'end': end_usage,
+        'growth': growth,
+        'limits': guard.limits,
+        'failed': failed,
+        'passed': not failed,
+        'read_stats': {key: value for key, value in monitor.ds18b20_manager.get_performance_stats().items()
+                       if key != 'sensors'},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dauertest: beschleunigte Erfassungszyklen, Ressourcen-Anstieg')
+    parser.add_argument('--cycles', type=int, default=1_000_000, help='Anzahl Zyklen')
+    parser.add_argument('--sensors', type=int, default=8, help='Simulierte DS18B20')
+    parser.add_argument('--sample-every', type=int, help='Ressourcen alle N Zyklen messen (Standard: 500 Messungen)')
+    parser.add_argument('--warmup', type=float, default=0.1, help='Aufwärmphase (Anteil der Zyklen)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    def progress(cycle, usage):
+        if not args.json and cycle % max(1, args.cycles // 20) < (args.sample_every or max(1, args.cycles // 500)):
+            print(f"   {cycle:>9} Zyklen  RSS {usage['rss_mb']:6.1f} MB  FDs {usage['open_fds']:4}  "
+                  f"Threads {usage['threads']:3}  GPIO {usage['gpio_handles']}", flush=True)
+
+    if not args.json:
+        print(f"🔁 Dauertest: {args.cycles} Zyklen, {args.sensors} DS18B20 + DHT22 (simuliert)")
+    result = run_soak(args.cycles, args.sensors, args.sample_every, args.warmup, seed=args.seed, progress=progress)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0 if result['passed'] else 1
+
+    print(f"⏱️ {result['cycles']} Zyklen in {result['seconds']:.0f}s ({result['cycles_per_s']:.0f}/s)")
+    for counter in COUNTERS:
+        delta = result['growth'].get(counter, 0.0)
+        mark = '❌' if counter in result['failed'] else '✅'
+        print(f"   {mark} {counter:<13} {result['baseline'][counter]:>8.1f} → {result['end'][counter]:>8.1f} "
+              f"(Anstieg {delta:+.1f}, erlaubt {result['limits'][counter]:g})")
+    if result['failed']:
+        print(f"❌ Ressourcen-Anstieg: {', '.join(result['failed'])}")
+    else:
+        print("✅ Kein Ressourcen-Anstieg")
+    return 0 if result['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
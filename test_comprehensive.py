@@ -122,6 +122,22 @@ class TestPi5DHT22Sensor:
             assert temp == 22.5
             assert humidity == 55.0
 
+    def test_dht22_cached_read_skips_retry_pauses(self):
+        """read_cached: ein Versuch ohne Pausen, bei Fehler der letzte gültige Wert"""
+        from sensor_monitor import Pi5DHT22Sensor
+
+        sensor = Pi5DHT22Sensor(pin=18)
+        sensor.available = True
+        sensor.sensor = Mock(temperature=21.0, humidity=50.0)
+        assert sensor.read_cached() == (21.0, 50.0)
+
+        type(sensor.sensor).temperature = property(Mock(side_effect=RuntimeError('Checksum')))
+        sensor._last_good = (time.monotonic() - 5, 21.0, 50.0)
+        start = time.perf_counter()
+        assert sensor.read_cached(max_age=30) == (21.0, 50.0)
+        assert time.perf_counter() - start < 0.5
+        assert sensor.read_cached(max_age=1) == (None, None)
+
 class TestPi5SensorMonitor:
     """Tests für Hauptklasse"""
     
@@ -244,6 +260,1950 @@ class TestSystemIntegration:
         assert 'influxdb-client' in req_text
         assert 'adafruit-circuitpython-dht' in req_text
 
+class FakeMqttClient:
+    """Minimaler paho-Ersatz für Queue-Tests"""
+
+    def __init__(self, connected=True):
+        self.connected = connected
+        self.published = []
+        self._mid = 0
+
+    def is_connected(self):
+        return self.connected
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        if not self.connected:
+            return Mock(rc=4, mid=0)
+        self._mid += 1
+        self.published.append((topic, payload, qos, retain, self._mid))
+        return Mock(rc=0, mid=self._mid)
+
+class LocalMqttBroker:
+    """Minimaler MQTT 3.1.1 Broker auf localhost: CONNACK, PUBACK (QoS 1), SUBACK, PINGRESP"""
+
+    def __init__(self):
+        import socket
+        import threading
+        self.server = socket.socket()
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(4)
+        self.server.settimeout(0.05)
+        self.port = self.server.getsockname()[1]
+        self.published = []
+        self.connections = []
+        self.closed = threading.Event()
+        self.acceptor = threading.Thread(target=self._accept, daemon=True)
+        self.acceptor.start()
+
+    def _accept(self):
+        import socket
+        import threading
+        while not self.closed.is_set():
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.settimeout(None)
+            self.connections.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _read(conn, n):
+        data = b''
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        try:
+            while True:
+                header = self._read(conn, 1)[0]
+                length, shift = 0, 0
+                while True:
+                    byte = self._read(conn, 1)[0]
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                body = self._read(conn, length)
+                kind = header >> 4
+                if kind == 1:  # CONNECT
+                    conn.sendall(bytes([0x20, 2, 0, 0]))
+                elif kind == 3:  # PUBLISH
+                    topic_len = int.from_bytes(body[:2], 'big')
+                    self.published.append(body[2:2 + topic_len].decode())
+                    if (header >> 1) & 3:
+                        conn.sendall(bytes([0x40, 2]) + body[2 + topic_len:4 + topic_len])
+                elif kind == 8:  # SUBSCRIBE
+                    conn.sendall(bytes([0x90, 3]) + body[:2] + bytes([1]))
+                elif kind == 12:  # PINGREQ
+                    conn.sendall(bytes([0xD0, 0]))
+                elif kind == 14:  # DISCONNECT
+                    return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def close(self):
+        self.closed.set()
+        self.acceptor.join(timeout=1.0)
+        self.server.close()
+        for conn in self.connections:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+class TestMqttOfflineQueue:
+    """Tests für die MQTT Offline-Queue"""
+
+    def test_coalesces_per_topic_while_offline(self, tmp_path):
+        """Nur der neueste Wert pro Topic bleibt erhalten"""
+        from mqtt_queue import MqttOfflineQueue
+
+        queue = MqttOfflineQueue(str(tmp_path / 'q.db'))
+        client = FakeMqttClient(connected=False)
+
+        for value in (20.0, 21.0, 22.0):
+            queue.put('pi5/ds18b20_1/state', f'{{"temperature": {value}}}')
+        queue.put('pi5/ds18b20_2/state', '{"temperature": 40.0}')
+
+        assert queue.flush(client) == 0
+        assert queue.depth() == 2
+
+        client.connected = True
+        assert queue.flush(client) == 2
+        assert client.published[0][1] == '{"temperature": 22.0}'
+
+    def test_inflight_window_and_ack(self, tmp_path):
+        """In-Flight-Fenster begrenzt Sendungen, Acks geben es frei"""
+        from mqtt_queue import MqttOfflineQueue
+
+        queue = MqttOfflineQueue(str(tmp_path / 'q.db'), max_inflight=2, qos=1)
+        client = FakeMqttClient()
+        for i in range(5):
+            queue.put(f'pi5/sensor_{i}/state', str(i))
+
+        assert queue.flush(client) == 2
+        assert queue.flush(client) == 0
+        assert all(msg[2] == 1 for msg in client.published)
+
+        queue.ack(client.published[0][4])
+        assert queue.flush(client) == 1
+        assert queue.depth() == 4
+
+    def test_newer_value_survives_ack_of_older(self, tmp_path):
+        """Ack für einen alten Wert löscht keinen neueren"""
+        from mqtt_queue import MqttOfflineQueue
+
+        queue = MqttOfflineQueue(str(tmp_path / 'q.db'))
+        client = FakeMqttClient()
+        queue.put('pi5/ds18b20_1/state', 'alt')
+        queue.flush(client)
+        queue.put('pi5/ds18b20_1/state', 'neu')
+        queue.ack(client.published[0][4])
+
+        assert queue.depth() == 1
+        assert queue.stats['delivered'] == 0 and queue.stats['superseded'] == 1
+        queue.flush(client)
+        assert client.published[-1][1] == 'neu'
+        queue.ack(client.published[-1][4])
+        assert queue.depth() == 0
+        assert queue.stats['delivered'] == 1 and queue.stats['superseded'] == 1
+
+    def test_persists_across_restart_and_bounds_size(self, tmp_path):
+        """Queue überlebt Neustarts und verwirft älteste Topics bei Überlauf"""
+        from mqtt_queue import MqttOfflineQueue
+
+        path = str(tmp_path / 'q.db')
+        queue = MqttOfflineQueue(path, max_messages=3)
+        for i in range(5):
+            queue.put(f'pi5/sensor_{i}/state', str(i))
+        queue.close()
+
+        restored = MqttOfflineQueue(path, max_messages=3)
+        assert restored.pending_topics() == ['pi5/sensor_2/state', 'pi5/sensor_3/state', 'pi5/sensor_4/state']
+
+    def test_depth_readable_via_bridge_queue_path(self, tmp_path):
+        """Dashboard findet die Queue der Bridge über [mqtt] queue_file bzw. deren Standard"""
+        import configparser
+        from mqtt_queue import MqttOfflineQueue, queue_depth, queue_path
+
+        config = configparser.ConfigParser()
+        assert queue_path(config) == 'mqtt_queue.db'
+        config.read_string(f"[mqtt]\nqueue_file = {tmp_path / 'bridge.db'}\n")
+        queue = MqttOfflineQueue(queue_path(config))
+        queue.put('pi5/a/state', '1')
+        queue.put('pi5/b/state', '2')
+        assert queue_depth(queue_path(config)) == 2
+        queue.close()
+        assert queue_depth(str(tmp_path / 'fehlt.db')) is None
+
+    def test_no_deadlock_with_real_paho_loop(self, tmp_path):
+        """QoS 1 über einen echten paho Netzwerk-Thread: on_publish → ack/flush während flush() sendet"""
+        import threading
+        mqtt = pytest.importorskip('paho.mqtt.client')
+        from mqtt_queue import MqttOfflineQueue
+
+        broker = LocalMqttBroker()
+        queue = MqttOfflineQueue(str(tmp_path / 'q.db'), max_inflight=20, qos=1)
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
+        client.max_inflight_messages_set(20)
+        # Wie Pi5MqttBridge.on_mqtt_publish: Bestätigung austragen und Fenster nachfüllen
+        client.on_publish = lambda c, userdata, mid: queue.ack(mid) and queue.flush(c)
+        client.connect('127.0.0.1', broker.port, 60)
+        client.loop_start()
+        worker = None
+        try:
+            deadline = time.time() + 5
+            while not client.is_connected() and time.time() < deadline:
+                time.sleep(0.01)
+            assert client.is_connected()
+
+            def cycles():
+                for cycle in range(50):
+                    for i in range(40):
+                        queue.put(f'pi5/sensor_{i}/state', f'{{"temperature": {cycle}.{i}}}')
+                    queue.flush(client)
+
+            worker = threading.Thread(target=cycles, daemon=True)
+            worker.start()
+            worker.join(timeout=20)
+            assert not worker.is_alive(), "flush() blockiert gegen paho on_publish"
+
+            deadline = time.time() + 10
+            while queue.depth() and time.time() < deadline:
+                queue.flush(client)
+                time.sleep(0.01)
+            assert queue.depth() == 0 and queue.inflight() == 0
+            assert {f'pi5/sensor_{i}/state' for i in range(40)} <= set(broker.published)
+        finally:
+            if worker is None or not worker.is_alive():  # blockierter Netzwerk-Thread: nicht joinen
+                client.disconnect()
+                client.loop_stop()
+                queue.close()
+            broker.close()
+
+class FakeClock:
+    """Steuerbare monotone Uhr"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class TestMqttCommands:
+    """Tests für Command-Topic und Bridge-Zeitplan"""
+
+    def test_temporary_interval_reverts(self):
+        """set_interval mit duration fällt automatisch auf Standard zurück"""
+        import json
+        from mqtt_commands import BridgeScheduler, MqttCommandHandler
+
+        clock = FakeClock()
+        scheduler = BridgeScheduler(interval=60, clock=clock)
+        handler = MqttCommandHandler(scheduler)
+
+        reply = handler.handle(json.dumps({'command': 'set_interval', 'interval': 2,
+                                           'duration': 3600, 'id': 'x'}).encode())
+        assert reply['ok'] and reply['id'] == 'x'
+        assert scheduler.interval == 2
+
+        clock.now += 3601
+        assert scheduler.interval == 60
+
+    def test_sensor_interval_controls_due_sensors(self):
+        """Sensor-Override macht nur diesen Sensor häufiger fällig"""
+        import json
+        from mqtt_commands import BridgeScheduler, MqttCommandHandler
+
+        clock = FakeClock()
+        scheduler = BridgeScheduler(interval=60, clock=clock)
+        handler = MqttCommandHandler(scheduler, known_sensors=['a', 'b'])
+        handler.handle(json.dumps({'command': 'set_sensor_interval', 'sensor': 'a', 'interval': 5}).encode())
+
+        scheduler.mark_published(['a', 'b'])
+        clock.now += 5
+        assert scheduler.due_sensors(['a', 'b']) == ['a']
+        assert scheduler.seconds_until_due(['a', 'b']) == 0
+
+    def test_read_now_wakes_scheduler(self):
+        """read_now wird verzögert beantwortet und weckt die Schleife"""
+        from mqtt_commands import BridgeScheduler, MqttCommandHandler
+
+        scheduler = BridgeScheduler(interval=60)
+        handler = MqttCommandHandler(scheduler)
+
+        assert handler.handle(b'read_now') is None
+        assert scheduler.wait(5) is True
+        [(sensors, reply_id, requested_at)] = scheduler.pop_read_requests()
+        assert sensors is None and reply_id is None and requested_at <= time.time()
+
+    def test_invalid_commands_are_rejected(self):
+        """Ungültige Befehle liefern eine Fehlerantwort statt Exception"""
+        import json
+        from mqtt_commands import BridgeScheduler, MqttCommandHandler
+
+        handler = MqttCommandHandler(BridgeScheduler(interval=60), known_sensors=['a'])
+
+        assert handler.handle(b'reboot')['ok'] is False
+        assert handler.handle(b'{kaputt')['ok'] is False
+        assert handler.handle(json.dumps({'command': 'set_interval', 'interval': 0}).encode())['ok'] is False
+        assert handler.handle(json.dumps({'command': 'set_sensor_interval', 'sensor': 'x',
+                                          'interval': 5}).encode())['ok'] is False
+
+    def test_malformed_payloads_never_raise(self):
+        """Kein UTF-8, Listen/Objekte als Sensor-ID, unendliche Dauer: Fehlerantwort statt Exception"""
+        import json
+        from mqtt_commands import BridgeScheduler, MqttCommandHandler
+
+        scheduler = BridgeScheduler(interval=60)
+        handler = MqttCommandHandler(scheduler, known_sensors=['a'])
+        payloads = [
+            b'\xff\xfe\x00read_now',
+            json.dumps({'command': 'set_sensor_interval', 'sensor': ['a'], 'interval': 5}).encode(),
+            json.dumps({'command': 'set_sensor_interval', 'sensor': {'a': 1}, 'interval': 5}).encode(),
+            json.dumps({'command': 'read_now', 'sensors': [['a']]}).encode(),
+            json.dumps({'command': 'read_now', 'sensors': 5}).encode(),
+            json.dumps({'command': 'set_interval', 'interval': 5, 'duration': 'inf'}).encode(),
+            json.dumps({'command': 'set_interval', 'interval': 5, 'duration': 'nan'}).encode(),
+            json.dumps({'command': 'set_interval', 'interval': 5, 'duration': 10 ** 9}).encode(),
+            json.dumps({'command': 'set_interval', 'interval': 'nan'}).encode(),
+            json.dumps({'command': ['status']}).encode(),
+        ]
+        for payload in payloads:
+            reply = handler.handle(payload)
+            assert reply is not None and reply['ok'] is False, payload
+        assert scheduler.interval == 60 and scheduler.pop_read_requests() == []
+
+    def test_schedule_file_drives_logger_sampling(self, tmp_path):
+        """Befehle an die Bridge ändern das Abtast-Intervall des Loggers; read_now weckt ihn"""
+        import json
+        from mqtt_commands import BridgeScheduler, MqttCommandHandler, SamplingSchedule
+
+        path = str(tmp_path / 'schedule.json')
+        scheduler = BridgeScheduler(interval=30, state_file=path)
+        handler = MqttCommandHandler(scheduler, known_sensors=['a'])
+        offset = [0.0]
+        schedule = SamplingSchedule(path, 30, clock=lambda: time.time() + offset[0])
+        assert schedule.interval() == 30 and schedule.read_requested() is False
+
+        handler.handle(json.dumps({'command': 'set_interval', 'interval': 2, 'duration': 3600}).encode())
+        assert schedule.interval() == 2
+        offset[0] = 3601
+        assert schedule.interval() == 30
+        handler.handle(json.dumps({'command': 'set_interval', 'interval': 60}).encode())
+        handler.handle(json.dumps({'command': 'set_sensor_interval', 'sensor': 'a', 'interval': 5}).encode())
+        assert schedule.interval() == 5
+        handler.handle(json.dumps({'command': 'set_sensor_interval', 'sensor': 'a', 'interval': None}).encode())
+        assert schedule.interval() == 60
+
+        assert handler.handle(b'read_now') is None
+        assert schedule.read_requested() is True and schedule.read_requested() is False
+        BridgeScheduler(interval=30, state_file=path)   # Bridge-Neustart: keine Messung auslösen
+        assert schedule.read_requested() is False and schedule.interval() == 30
+
+    def test_logger_wait_follows_interval_and_read_now(self, tmp_path):
+        """wait() schläft bis zum Intervall-Ende, read_now beendet das Warten sofort"""
+        from mqtt_commands import BridgeScheduler, SamplingSchedule
+
+        path = str(tmp_path / 'schedule.json')
+        scheduler = BridgeScheduler(interval=30, state_file=path)
+        clock = FakeClock(1000.0)
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock.now += seconds
+            if len(sleeps) == 3 and request:
+                scheduler.request_read()
+
+        request = False
+        schedule = SamplingSchedule(path, 10, poll=4, clock=clock, sleep=sleep)
+        assert schedule.wait(1000.0) is False and sleeps == [4, 4, 2]
+
+        request, sleeps[:] = True, []
+        assert schedule.wait(clock.now) is True and len(sleeps) == 3
+
+    def test_bridge_answers_read_now_after_fresh_reading(self):
+        """read_now wartet auf die neue Messung des Loggers, spätestens read_timeout"""
+        from mqtt_bridge import Pi5MqttBridge
+        from mqtt_commands import BridgeScheduler
+
+        bridge = Pi5MqttBridge.__new__(Pi5MqttBridge)
+        bridge.sensor_labels = {'a': 'Vorlauf'}
+        bridge.scheduler = BridgeScheduler(interval=30)
+        bridge.pending_reads, bridge.read_timeout = [], 15.0
+        bridge.outbox, bridge.publish_reply = MagicMock(), MagicMock()
+        bridge.outbox.depth.return_value = 0
+        bridge.scheduler.mark_published(['a'])
+        requested = time.time()
+        bridge.reading_times = {'a': requested - 20}
+        bridge.run_once = MagicMock(return_value={'a': {'temperature': 40.0}})
+
+        bridge.scheduler.request_read(['a'], 'r1')
+        bridge.run_scheduled_cycle()
+        assert bridge.publish_reply.call_count == 0 and len(bridge.pending_reads) == 1
+
+        bridge.reading_times['a'] = time.time()   # Logger hat gemessen
+        bridge.run_scheduled_cycle()
+        reply = bridge.publish_reply.call_args[0][0]
+        assert reply['id'] == 'r1' and reply['ok'] and reply['result']['a']['age'] < 5
+        assert bridge.pending_reads == []
+
+        bridge.scheduler.request_read(['a'], 'r2')
+        bridge.read_timeout = 0
+        bridge.reading_times['a'] = requested - 20
+        bridge.run_scheduled_cycle()
+        assert bridge.publish_reply.call_args[0][0]['id'] == 'r2' and bridge.pending_reads == []
+
+class TestSensorSnapshotCache:
+    """Tests für den gemeinsamen Sensor-Snapshot"""
+
+    def test_concurrent_requests_share_one_acquisition(self):
+        """Gleichzeitige Anfragen lösen nur eine Bus-Erfassung aus"""
+        import threading
+        from sensor_snapshot import SensorSnapshotCache
+
+        calls = []
+        release = threading.Event()
+
+        def slow_acquire():
+            calls.append(1)
+            release.wait(2)
+            return {'DS18B20_1': {'value': 21.0}}
+
+        cache = SensorSnapshotCache(slow_acquire, ttl=60, autostart=False)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert len(calls) == 1
+        assert len(results) == 8
+        assert all(r.data == {'DS18B20_1': {'value': 21.0}} for r in results)
+        assert cache.stats['joined'] == 7
+
+    def test_ttl_hit_and_expiry(self):
+        """Innerhalb der TTL wird nicht neu erfasst"""
+        from sensor_snapshot import SensorSnapshotCache
+
+        clock = FakeClock()
+        counter = iter(range(100))
+        cache = SensorSnapshotCache(lambda: {'n': next(counter)}, ttl=5, clock=clock, autostart=False)
+
+        assert cache.get().data == {'n': 0}
+        clock.now += 4
+        assert cache.get().data == {'n': 0}
+        clock.now += 2
+        assert cache.get().data == {'n': 1}
+
+    def test_failed_acquisition_keeps_last_snapshot(self):
+        """Erfassungsfehler liefern den letzten gültigen Snapshot"""
+        from sensor_snapshot import SensorSnapshotCache
+
+        values = [{'n': 1}]
+
+        def acquire():
+            if not values:
+                raise OSError('1-Wire Bus weg')
+            return values.pop()
+
+        listener_calls = []
+        cache = SensorSnapshotCache(acquire, ttl=0, autostart=False)
+        cache.add_listener(listener_calls.append)
+
+        assert cache.refresh().data == {'n': 1}
+        assert cache.refresh().data == {'n': 1}
+        assert cache.stats['errors'] == 1
+        assert len(listener_calls) == 1
+
+    def test_stale_while_refreshing_and_effective_ttl(self):
+        """Während einer Erfassung kommt der alte Snapshot sofort; im Hintergrundbetrieb TTL ≥ Intervall + Erfassung"""
+        import threading
+        from sensor_snapshot import SensorSnapshotCache
+
+        clock = FakeClock()
+        release = threading.Event()
+        values = iter(range(100))
+
+        def acquire():
+            value = next(values)
+            if value:
+                release.wait(2)
+            clock.now += 0.5  # Erfassung dauert 0,5s
+            return {'n': value}
+
+        cache = SensorSnapshotCache(acquire, ttl=5, refresh_interval=5, clock=clock, autostart=False)
+        assert cache.get().data == {'n': 0}
+        clock.now += 6
+        sweep = threading.Thread(target=cache.refresh)
+        sweep.start()
+        while not cache._refreshing:
+            time.sleep(0.001)
+        start = time.perf_counter()
+        assert cache.get().data == {'n': 0}
+        assert time.perf_counter() - start < 0.5 and cache.stats['stale_hits'] == 1
+        release.set()
+        sweep.join()
+        assert cache.get().data == {'n': 1}
+
+        with patch.object(SensorSnapshotCache, 'running', True):
+            assert cache.effective_ttl == 5.5
+            clock.now += 5.2  # Snapshot älter als snapshot_ttl, nächster Durchlauf noch nicht fertig
+            assert cache.get().data == {'n': 1}
+        assert cache.stats['refreshes'] == 2
+
+    def test_slow_sweep_raises_ttl_only_temporarily(self):
+        """Ein langsamer Durchlauf (Bus-Timeout) hebt die effektive TTL nur für die letzten Erfassungen"""
+        from sensor_snapshot import DURATION_WINDOW, SensorSnapshotCache
+
+        clock = FakeClock()
+        durations = iter([30.0] + [0.5] * DURATION_WINDOW)
+
+        def acquire():
+            clock.now += next(durations)
+            return {}
+
+        cache = SensorSnapshotCache(acquire, ttl=5, refresh_interval=5, clock=clock, autostart=False)
+        with patch.object(SensorSnapshotCache, 'running', True):
+            cache.refresh()
+            assert cache.effective_ttl == 35.0
+            for _ in range(DURATION_WINDOW - 1):
+                cache.refresh()
+            assert cache.effective_ttl == 35.0
+            cache.refresh()
+            assert cache.effective_ttl == 5.5
+
+class TestSystemMetricsSampler:
+    """Tests für den System-Sampler"""
+
+    def test_health_check_does_not_block(self):
+        """check_system_health liest vorberechnete Werte statt 1s zu warten"""
+        from advanced_monitoring import AlertManager, SystemHealthMonitor, SystemMetricsSampler
+
+        sampler = SystemMetricsSampler(interval=60)
+        monitor = SystemHealthMonitor(AlertManager('nicht_vorhanden.ini'), sampler=sampler)
+        sampler.sample()
+
+        start = time.perf_counter()
+        health = monitor.check_system_health()
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+
+        assert elapsed < 0.5
+        assert 0 <= health['cpu_usage'] <= 100
+        assert 0 <= health['memory_usage'] <= 100
+
+    def test_nearest_rank_on_exact_ranks(self):
+        """Nearest-Rank: ist q/100*n ganzzahlig, ist genau dieser Rang das Perzentil"""
+        from advanced_monitoring import SystemMetricsSampler
+
+        values = [float(v) for v in range(1, 11)]
+        assert SystemMetricsSampler._percentile(values, 50) == 5.0
+        assert SystemMetricsSampler._percentile(values, 90) == 9.0
+        assert SystemMetricsSampler._percentile(values, 95) == 10.0
+        assert SystemMetricsSampler._percentile([float(v) for v in range(1, 21)], 95) == 19.0
+        assert SystemMetricsSampler._percentile([float(v) for v in range(1, 101)], 99) == 99.0
+        assert SystemMetricsSampler._percentile([7.0], 1) == 7.0
+
+    def test_percentiles_per_window(self):
+        """Perzentile berücksichtigen nur Messpunkte im Zeitfenster"""
+        from advanced_monitoring import SystemMetricsSampler
+
+        clock = FakeClock()
+        sampler = SystemMetricsSampler(interval=5, clock=clock)
+        with patch('psutil.cpu_percent', side_effect=[float(v) for v in range(1, 181)]):
+            for _ in range(180):
+                sampler.sample()
+                clock.now += 5
+
+        summary = sampler.summary()
+        assert summary['1m']['cpu_usage']['p50'] >= 169
+        assert summary['15m']['cpu_usage']['max'] == 180
+        assert summary['15m']['cpu_usage']['p50'] == 90
+
+class TestMetricsExporter:
+    """Tests für den /metrics Collector"""
+
+    def test_metrics_rendered_from_snapshot_only(self):
+        """Scrape liefert Sensorwerte, Latenzen und CRC-Fehler ohne neue Erfassung"""
+        pytest.importorskip('prometheus_client')
+        from sensor_monitor import SensorReadStats
+        from sensor_snapshot import SensorSnapshotCache
+        from metrics_exporter import SnapshotMetricsCollector, create_registry, render_metrics
+
+        calls = []
+
+        def acquire():
+            calls.append(1)
+            return {'DS18B20_1': {'label': 'VL WP', 'value': 45.5, 'unit': '°C', 'type': 'temperature'},
+                    'DHT22_humidity': {'label': 'Luftfeuchtigkeit', 'value': 55.0, 'unit': '%', 'type': 'humidity'}}
+
+        cache = SensorSnapshotCache(acquire, autostart=False)
+        cache.refresh()
+
+        monitor = Mock()
+        monitor.ds18b20_manager.sensor_ids = ['28-0000000001']
+        monitor.ds18b20_manager.sensor_stats = SensorReadStats()
+        monitor.ds18b20_manager.sensor_stats.record('28-0000000001', 0.8)
+        monitor.ds18b20_manager.sensor_stats.record('28-0000000001', 1.2, crc_failure=True)
+        monitor.dht22_sensor.get_success_rate.return_value = 75.0
+
+        registry = create_registry(SnapshotMetricsCollector(
+            cache, sensor_monitor=monitor, queue_depths={'mqtt_outbox': lambda: 3}))
+        body, _ = render_metrics(registry)
+        text = body.decode()
+
+        assert len(calls) == 1
+        assert 'pi5_sensor_temperature_celsius{label="VL WP",sensor="DS18B20_1"} 45.5' in text
+        assert 'pi5_sensor_humidity_percent{label="Luftfeuchtigkeit",sensor="DHT22_humidity"} 55.0' in text
+        assert 'pi5_sensor_read_latency_seconds_count{sensor="DS18B20_1",sensor_id="28-0000000001"} 2.0' in text
+        assert 'pi5_sensor_crc_failures_total{sensor="DS18B20_1",sensor_id="28-0000000001"} 1.0' in text
+        assert 'pi5_dht22_success_ratio 0.75' in text
+        assert 'pi5_writer_queue_depth{queue="mqtt_outbox"} 3.0' in text
+
+    def test_scrape_reads_under_owner_locks(self):
+        """Takt-Zähler und Ausfall-Zustände werden unter dem Lock des Besitzers gelesen"""
+        import threading
+        from heating_circuits import HeatPumpCycleDetector
+        from sensor_rules import STATE_OFFLINE, SensorStalenessTracker
+
+        detector = HeatPumpCycleDetector('ds18b20_3', 'ds18b20_1')
+        detector.update(45.0, 40.0, 0.0)
+        tracker = SensorStalenessTracker()
+        tracker.update_data({'DS18B20_1': 20.0}, now=0.0)
+
+        for owner, read in ((detector, lambda: detector.counters(10.0)),
+                            (tracker, lambda: tracker.snapshot()),
+                            (tracker, lambda: tracker.sensors_in(STATE_OFFLINE))):
+            done = threading.Event()
+            with owner._lock:
+                reader = threading.Thread(target=lambda: (read(), done.set()))
+                reader.start()
+                assert not done.wait(0.05)   # Schreiber hält den Lock - Leser wartet
+            assert done.wait(2)
+            reader.join()
+
+class TestSnapshotBroadcaster:
+    """Tests für Delta-Updates an WebSocket-Clients"""
+
+    def _snapshot(self, data):
+        from sensor_snapshot import SensorSnapshot
+        return SensorSnapshot(data, time.monotonic(), 1.0, 1)
+
+    def test_delta_contains_only_changed_fields(self):
+        """Nur geänderte Werte werden kompakt übertragen"""
+        from dashboard_broadcast import compute_sensor_delta
+
+        old = {'DS18B20_1': {'label': 'VL WP', 'value': 45.0, 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
+               'DS18B20_2': {'label': 'RL WP', 'value': 38.0, 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
+               'DS18B20_3': {'label': 'VL UG', 'value': 30.0, 'unit': '°C', 'type': 'temperature', 'status': 'ok'}}
+        new = dict(old)
+        new['DS18B20_1'] = dict(old['DS18B20_1'], value=45.5)
+        new['DS18B20_2'] = dict(old['DS18B20_2'], label='RL Wärmepumpe')
+        del new['DS18B20_3']
+
+        changed, removed = compute_sensor_delta(old, new)
+        assert changed['DS18B20_1'] == {'value': 45.5}
+        assert changed['DS18B20_2'] == new['DS18B20_2']
+        assert removed == ['DS18B20_3']
+
+    def test_single_emit_per_cycle_to_live_room(self):
+        """Ein Emit pro Zyklus an den Raum - unabhängig von der Client-Anzahl"""
+        from dashboard_broadcast import SnapshotBroadcaster
+
+        emitted = []
+        broadcaster = SnapshotBroadcaster(lambda event, data, to=None: emitted.append((event, data, to)))
+        data = {'DS18B20_1': {'label': 'VL WP', 'value': 45.0, 'unit': '°C', 'type': 'temperature', 'status': 'ok'}}
+
+        broadcaster.on_snapshot(self._snapshot(data))
+        assert emitted == []
+
+        for sid in ('a', 'b', 'c'):
+            broadcaster.subscribe(sid)
+        broadcaster.on_snapshot(self._snapshot(data))
+        assert emitted == []
+
+        broadcaster.on_snapshot(self._snapshot({'DS18B20_1': dict(data['DS18B20_1'], value=46.0)}))
+        assert len(emitted) == 1
+        event, frame, room = emitted[0]
+        assert (event, room) == ('sensor_delta', 'live')
+        assert frame['seq'] == 2 and frame['changed'] == {'DS18B20_1': {'value': 46.0}}
+        assert broadcaster.full_frame()['sensors']['DS18B20_1']['value'] == 46.0
+
+    def test_unsubscribe_is_per_client(self):
+        """Stop eines Clients beendet nicht die Updates der anderen"""
+        from dashboard_broadcast import SnapshotBroadcaster
+
+        broadcaster = SnapshotBroadcaster(lambda *args, **kwargs: None)
+        broadcaster.subscribe('a')
+        broadcaster.subscribe('b')
+        assert broadcaster.unsubscribe('a') == 1
+        assert broadcaster.is_subscribed('b')
+
+class TestSensorHistory:
+    """Tests für Verlauf und LTTB-Downsampling"""
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        """LTTB behält Start, Ende und markante Ausschläge"""
+        import numpy as np
+        from sensor_history import lttb_downsample
+
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[500] = 10.0
+        selected = lttb_downsample(x, y, 50)
+
+        assert len(selected) == 50
+        assert selected[0] == 0 and selected[-1] == 999
+        assert 500 in selected
+        assert np.all(np.diff(selected) > 0)
+        assert len(lttb_downsample(x[:10], y[:10], 50)) == 10
+
+    def test_ring_buffer_query_window(self):
+        """Ringpuffer überschreibt alte Werte, Abfrage liefert nur den Zeitraum"""
+        from sensor_history import SensorHistory
+
+        history = SensorHistory(retention_hours=1, resolution=60, clock=lambda: 10000.0)
+        for i in range(100):
+            history.record('DS18B20_1', float(i), timestamp=i * 60.0, label='VL WP', unit='°C')
+        assert not history.record('DS18B20_1', 1.0, timestamp=99 * 60.0 + 10)
+
+        result = history.query('DS18B20_1', start=0, end=99 * 60.0, points=500)
+        assert result['raw_points'] == 60
+        assert result['data'][0] == [40 * 60000.0, 40.0]
+        assert result['data'][-1] == [99 * 60000.0, 99.0]
+
+        window = history.query('DS18B20_1', start=90 * 60.0, end=95 * 60.0, points=3)
+        assert window['raw_points'] == 6 and window['points'] == 3
+        with pytest.raises(KeyError):
+            history.query('DS18B20_9')
+
+    def test_parse_time_formats(self):
+        """Zeitangaben: Sekunden, Millisekunden, ISO 8601 und relativ"""
+        from sensor_history import parse_time
+
+        assert parse_time(None, 5.0) == 5.0
+        assert parse_time('1700000000', 0) == 1700000000
+        assert parse_time('1700000000000', 0) == 1700000000
+        assert parse_time('-2h', 0, now=10000.0) == 2800.0
+        assert parse_time('2024-01-01T00:00:00Z', 0) == 1704067200
+        with pytest.raises(ValueError):
+            parse_time('gestern', 0)
+
+class TestDashboardServer:
+    """Tests für den Server-Betrieb des Dashboards"""
+
+    def test_json_gzip_compression(self):
+        """JSON-Antworten werden nur komprimiert, wenn groß genug und vom Client akzeptiert"""
+        import gzip
+        import json
+        from flask import Flask, jsonify
+        from dashboard_server import install_json_compression
+
+        app = Flask(__name__)
+        install_json_compression(app, min_size=100)
+        app.add_url_rule('/large', 'large', lambda: jsonify({f'DS18B20_{i}': 20.5 for i in range(50)}))
+        app.add_url_rule('/small', 'small', lambda: jsonify({'status': 'ok'}))
+        client = app.test_client()
+
+        response = client.get('/large', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data))['DS18B20_1'] == 20.5
+
+        assert 'Content-Encoding' not in client.get('/large').headers
+        assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+
+    def test_async_mode_resolution(self):
+        """Nicht installierte Async-Modi fallen auf threading zurück"""
+        from dashboard_server import resolve_async_mode
+
+        assert resolve_async_mode('threading') == 'threading'
+        with patch('importlib.util.find_spec', return_value=None):
+            assert resolve_async_mode('auto') == 'threading'
+            assert resolve_async_mode('eventlet') == 'threading'
+        with patch('importlib.util.find_spec', side_effect=lambda name: object() if name == 'gevent' else None):
+            assert resolve_async_mode('auto') == 'gevent'
+            assert resolve_async_mode('unbekannt') == 'gevent'
+
+    def test_gunicorn_single_worker(self):
+        """gunicorn.conf.py: immer 1 Worker (eine Sensor-Erfassung), gevent ohne gevent-websocket → gevent"""
+        import runpy
+
+        server = {'host': '0.0.0.0', 'port': 5000, 'keepalive': 5, 'async_mode': 'gevent',
+                  'workers': 4, 'message_queue': 'redis://localhost:6379/0'}
+        with patch('dashboard_server.read_server_config', return_value=server), \
+             patch('dashboard_server.resolve_async_mode', return_value='gevent'), \
+             patch('importlib.util.find_spec', return_value=None):
+            conf = runpy.run_path(str(project_root / 'gunicorn.conf.py'))
+        assert conf['workers'] == 1
+        assert conf['worker_class'] == 'gevent'
+
+    def test_worker_exit_closes_dashboard(self):
+        """worker_exit stoppt die Erfassung, sichert den Verlauf und stellt offene Alerts zu"""
+        import runpy
+        import web_dashboard
+
+        dashboard = web_dashboard.WebDashboardService.__new__(web_dashboard.WebDashboardService)
+        dashboard.snapshot, dashboard.history = MagicMock(), MagicMock()
+        dashboard.history_file = 'history.json'
+        dashboard.advanced_monitoring = MagicMock()
+        conf = runpy.run_path(str(project_root / 'gunicorn.conf.py'))
+        with patch('web_dashboard.get_dashboard', return_value=dashboard):
+            conf['worker_exit'](None, None)
+
+        dashboard.snapshot.stop.assert_called_once()
+        dashboard.history.save.assert_called_once_with('history.json')
+        dashboard.advanced_monitoring.alert_manager.close.assert_called_once()
+
+class TestImportSideEffects:
+    """Tests für Imports ohne Hardware-Zugriff und Seiteneffekte"""
+
+    def test_sensor_modules_import_lazily(self, tmp_path):
+        """sensor_monitor/sensor_influxdb laden keine Treiber und legen keine Dateien an"""
+        import json
+        import subprocess
+
+        probe = ("import json, sys, sensor_monitor, sensor_influxdb; "
+                 "print(json.dumps(sorted(m for m in ('influxdb_client', 'adafruit_dht', 'board', "
+                 "'gpiozero', 'flask') if m in sys.modules)))")
+        result = subprocess.run([sys.executable, '-c', probe], cwd=tmp_path, capture_output=True,
+                                text=True, timeout=60,
+                                env=dict(os.environ, PYTHONPATH=str(project_root)))
+
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+        assert list(tmp_path.iterdir()) == []
+
+    def test_web_dashboard_import_is_lazy(self, tmp_path, monkeypatch):
+        """Import erzeugt weder Service noch templates/ - Seite kommt aus dem Speicher"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delitem(sys.modules, 'web_dashboard', raising=False)
+        import web_dashboard
+
+        assert web_dashboard._dashboard is None
+        response = web_dashboard.app.test_client().get('/')
+        assert response.status_code == 200
+        assert b'Pi 5 Sensor Monitor' in response.data
+        assert web_dashboard._dashboard is None
+        assert not (tmp_path / 'templates').exists()
+
+class TestSensorRulesEngine:
+    """Tests für die vektorisierte Regel-Engine"""
+
+    def _config(self, text):
+        import configparser
+        config = configparser.ConfigParser(inline_comment_prefixes=('#',))
+        config.read_string(text)
+        return config
+
+    def test_per_sensor_limits_override_defaults(self):
+        """Grenzen pro Sensor, Luftfeuchtigkeit wird nicht als Temperatur geprüft"""
+        from sensor_rules import SensorRulesEngine
+
+        config = self._config("""
+[alerts]
+temperature_high = 30.0         # Celsius
+humidity_high = 80.0
+[rules]
+ds18b20_3_high = 60.0
+ds18b20_3_rate = 0
+""")
+        engine = SensorRulesEngine(config)
+        result = engine.evaluate_data({'DS18B20_3': 58.0, 'DS18B20_4': 35.0, 'DHT22_humidity': 75.0}, now=0)
+
+        assert result.active_alarms() == [('DS18B20_4', 'high')]
+        assert engine.limits('DS18B20_3')['high'] == 60.0
+        assert engine.limits('DS18B20_3')['rate'] is None
+        assert engine.limits('DHT22_humidity')['high'] == 80.0
+
+    def test_hysteresis_prevents_flapping(self):
+        """Alarm startet über der Grenze und endet erst unterhalb der Hysterese"""
+        from sensor_rules import SensorRulesEngine
+
+        engine = SensorRulesEngine(self._config("[rules]\nhysteresis = 0.5\nds18b20_3_high = 60\n"))
+        raised, cleared = [], []
+        for now, value in enumerate([59.0, 60.5, 59.8, 60.2, 59.7, 59.4, 60.1]):
+            result = engine.evaluate_data({'DS18B20_3': value}, now=now * 30.0)
+            raised += result.raised_alarms()
+            cleared += result.cleared_alarms()
+
+        assert raised == [('DS18B20_3', 'high'), ('DS18B20_3', 'high')]
+        assert cleared == [('DS18B20_3', 'high')]
+
+    def test_rate_and_staleness(self):
+        """Sprünge über der Änderungsrate und veraltete Sensoren werden erkannt"""
+        from sensor_rules import SensorRulesEngine
+
+        engine = SensorRulesEngine(self._config(
+            "[alerts]\nsensor_offline_timeout = 60\n[rules]\nrate_limit = 5\n"))
+        engine.evaluate_data({'DS18B20_1': 40.0, 'DS18B20_2': 40.0}, now=0)
+        result = engine.evaluate_data({'DS18B20_1': 85.0, 'DS18B20_2': None}, now=30)
+        assert result.raised_alarms() == [('DS18B20_1', 'rate')]
+        assert result.rates[0] == pytest.approx(90.0)
+
+        result = engine.evaluate_data({'DS18B20_1': 85.0}, now=90)
+        assert ('DS18B20_2', 'offline') in result.raised_alarms()
+        assert ('DS18B20_1', 'rate') in result.cleared_alarms()
+
+    def test_alert_manager_reads_inline_comments(self, tmp_path):
+        """config.ini mit Kommentaren hinter Werten lässt sich laden"""
+        from advanced_monitoring import AlertManager, SensorHealthMonitor
+
+        config_file = tmp_path / 'config.ini'
+        config_file.write_text('[alerts]\nalert_cooldown = 120            # seconds\n'
+                               '[labels]\nds18b20_3 = "VL WP"\n', encoding='utf-8')
+        manager = AlertManager(str(config_file))
+        assert manager.cooldown_period == 120
+
+        health = SensorHealthMonitor(manager).check_sensor_health({'DS18B20_3': 45.0, 'DS18B20_4': None}, now=0)
+        assert health['active_sensors'] == 1
+        assert health['failed_sensors'] == ['DS18B20_4']
+        assert health['temperature_alerts'] == ['VL WP (DS18B20_3): 45.0°C (max 30°C)']
+
+    def test_dashboard_evaluates_once_per_snapshot(self, tmp_path):
+        """Regeln laufen pro Snapshot mit dessen Messzeit - /api/system wertet nichts aus"""
+        pytest.importorskip('flask_socketio')
+        from advanced_monitoring import AdvancedMonitoringService
+        from sensor_rules import SensorStalenessTracker
+        from sensor_snapshot import SensorSnapshot
+        from web_dashboard import WebDashboardService
+
+        config_file = tmp_path / 'config.ini'
+        config_file.write_text('[alerts]\ntemperature_high = 60\n[rules]\nrate_limit = 2\n', encoding='utf-8')
+        dashboard = WebDashboardService.__new__(WebDashboardService)
+        prometheus = patch('advanced_monitoring.PROMETHEUS_AVAILABLE', False)  # Gauges sind global registriert
+        prometheus.start()
+        dashboard.advanced_monitoring = AdvancedMonitoringService(str(config_file), start_exporter=False)
+        dashboard.staleness = SensorStalenessTracker()
+        dashboard.last_update = None
+        dashboard.monitoring_results = None
+        engine = dashboard.advanced_monitoring.sensor_monitor.rules
+        try:
+            for monotonic, value in ((100.0, 45.0), (105.0, 45.1)):
+                dashboard.on_snapshot_monitoring(SensorSnapshot(
+                    {'DS18B20_3': {'value': value}}, monotonic, 1.0, 1))
+                for _ in range(20):
+                    status = dashboard.get_system_status()
+                assert status['active_sensors'] == 1
+        finally:
+            dashboard.advanced_monitoring.system_monitor.sampler.stop()
+            prometheus.stop()
+
+        assert engine.last_time[engine.index['DS18B20_3']] == 105.0
+        assert not engine.active.any()
+        assert not any(alert.startswith('temperature_rate') for alert in
+                       dashboard.advanced_monitoring.alert_manager.alert_history)
+
+class TestStreamingAnomalyDetector:
+    """Tests für die inkrementelle Anomalie-Erkennung"""
+
+    def _series(self):
+        import numpy as np
+        rng = np.random.default_rng(0)
+        times = np.arange(3000) * 5.0
+        values = 45 + 5 * np.sin(times / 1800) + rng.normal(0, 0.2, 3000)
+        values[1000] += 8           # Ausreißer
+        values[2000:] += 6          # Sprung
+        values[2200:2990] = values[2200]  # hängender Sensor
+        values[1500] = np.nan       # fehlender Messwert
+        return times, values
+
+    def test_detects_spike_shift_and_flatline(self):
+        """Ausreißer, Sprung und hängender Sensor werden erkannt"""
+        import numpy as np
+        from advanced_monitoring import StreamingAnomalyDetector
+
+        times, values = self._series()
+        flags = StreamingAnomalyDetector().detect_batch('DS18B20_3', times, values)
+        spike, shift, flat = (np.nonzero(flags[:, j])[0] for j in range(3))
+
+        assert 1000 in spike and 2000 in spike
+        assert len(spike) < 10
+        assert shift.min() >= 2000
+        assert flat.min() == 2200 + 720 and flat.max() == 2989
+
+    def test_batch_matches_stream(self):
+        """Tageweises Replay liefert dieselben Ergebnisse wie der Live-Betrieb"""
+        import numpy as np
+        from advanced_monitoring import StreamingAnomalyDetector
+
+        times, values = self._series()
+        stream = StreamingAnomalyDetector(sensors=['DS18B20_3'])
+        batch = StreamingAnomalyDetector()
+        live = np.array([stream.update(np.array([v]), t).active[0] if not np.isnan(v) else [False] * 3
+                         for t, v in zip(times, values)])
+        replay = np.vstack([batch.detect_batch('DS18B20_3', times[i:i + 700], values[i:i + 700])
+                            for i in range(0, len(values), 700)])
+
+        assert (live == replay).all()
+        assert batch.mean[0] == pytest.approx(stream.mean[0])
+        assert batch.var[0] == pytest.approx(stream.var[0])
+
+    def test_repeated_snapshot_counts_once(self):
+        """Derselbe Snapshot mehrfach (gleicher Zeitstempel) verkürzt weder Warm-up noch Varianz"""
+        import configparser
+        from advanced_monitoring import StreamingAnomalyDetector
+
+        config = configparser.ConfigParser()
+        config.read_string("[anomaly]\nwarmup_samples = 5\n")
+        detector = StreamingAnomalyDetector(config)
+        for i in range(4):
+            for _ in range(50):
+                detector.update_data({'DS18B20_1': 40.0 + 0.5 * (i % 2)}, now=i * 5.0)
+        assert detector.count[0] == 4
+        variance = detector.var[0]
+        detector.update_data({'DS18B20_1': 40.5}, now=15.0)
+        detector.update_data({'DS18B20_1': 40.5}, now=10.0)
+        assert detector.count[0] == 4 and detector.var[0] == variance
+
+        result = detector.update_data({'DS18B20_1': 41.0}, now=20.0)
+        assert detector.count[0] == 5 and not result.raised_alarms()
+
+    def test_anomalies_feed_alert_manager(self):
+        """Anomalien laufen als Alerts über den AlertManager"""
+        import configparser
+        from advanced_monitoring import SensorHealthMonitor
+
+        config = configparser.ConfigParser()
+        config.read_string("[alerts]\ntemperature_high = 90\n[anomaly]\nwarmup_samples = 5\n")
+        alert_manager = Mock(config=config)
+        monitor = SensorHealthMonitor(alert_manager)
+        for i in range(10):
+            monitor.check_sensor_health({'DS18B20_1': 40.0 + 0.1 * (i % 2)}, now=i * 5.0)
+        health = monitor.check_sensor_health({'DS18B20_1': 55.0}, now=50.0)
+
+        assert health['anomalies'] and 'Ausreißer' in health['anomalies'][0]
+        alert_manager.send_alert.assert_called_once()
+        assert alert_manager.send_alert.call_args[0][0] == 'anomaly_spike_DS18B20_1'
+
+class TestAlertDispatcher:
+    """Tests für den asynchronen E-Mail Versand"""
+
+    def _dispatcher(self, server, **kwargs):
+        from alert_dispatcher import AlertDispatcher
+        return AlertDispatcher('127.0.0.1', server.port, 'pi5', 'secret', ['admin@localhost', 'ops@localhost'],
+                               use_tls=False, **kwargs)
+
+    def test_alert_storm_single_session_digest(self):
+        """100 Alerts blockieren nicht und gehen als Digest über eine Sitzung raus"""
+        from bench_alerts import LocalSMTPServer, storm
+
+        with LocalSMTPServer(handshake_delay=0.05) as server:
+            dispatcher = self._dispatcher(server, digest_window=0.5)
+            start = time.perf_counter()
+            for alert in storm(100):
+                assert dispatcher.submit(*alert)
+            blocked = time.perf_counter() - start
+            assert dispatcher.flush(timeout=10, force=False)
+            dispatcher.stop()
+
+            assert blocked < 0.1, f"submit blockiert: {blocked:.3f}s"
+            assert server.connections == 1 and server.logins == ['pi5']
+            assert dispatcher.stats['delivered'] == 100
+            assert len(server.messages) <= 2
+            assert server.messages[0]['to'] == ['admin@localhost', 'ops@localhost']
+            body = b''.join(m['data'] for m in server.messages).decode('utf-8', 'replace')
+            assert 'Alerts' in body
+            assert max(dispatcher.latencies) < 5
+
+    def test_session_reused_and_reconnected(self):
+        """Folgende Alerts nutzen die Sitzung weiter, nach Abbruch wird neu verbunden"""
+        import socket
+        from bench_alerts import LocalSMTPServer
+
+        with LocalSMTPServer() as server:
+            dispatcher = self._dispatcher(server, digest_window=0)
+            dispatcher.submit('pump_failure', 'Umwälzpumpe steht', 'critical')
+            assert dispatcher.flush(timeout=5)
+            dispatcher.submit('sensor_offline_DS18B20_3', 'offline', 'high')
+            assert dispatcher.flush(timeout=5)
+            assert server.connections == 1 and len(server.messages) == 2
+
+            dispatcher._smtp.sock.shutdown(socket.SHUT_RDWR)  # Verbindung getrennt
+            dispatcher.submit('sensor_offline_DS18B20_4', 'offline', 'high')
+            assert dispatcher.flush(timeout=5)
+            dispatcher.stop()
+            assert server.connections == 2 and len(server.messages) == 3
+            assert dispatcher.stats['failed'] == 0
+
+    def test_alert_manager_queues_email(self, tmp_path):
+        """AlertManager reiht E-Mails nur ein statt im Zyklus zu senden"""
+        from advanced_monitoring import AlertManager
+
+        config_file = tmp_path / 'config.ini'
+        config_file.write_text('[alerts]\nsmtp_enabled = true\nrecipients = admin@localhost\n'
+                               'digest_window = 30         # seconds\n', encoding='utf-8')
+        manager = AlertManager(str(config_file))
+        assert manager.dispatcher.digest_window == 30
+        manager.dispatcher = Mock()
+
+        manager.send_alert('temperature_high_DS18B20_3', 'zu heiß', 'medium')
+        manager.send_alert('sensor_offline_DS18B20_3', 'offline', 'high')
+        manager.dispatcher.submit.assert_called_once_with('sensor_offline_DS18B20_3', 'offline', 'high')
+
+class TestSensorStalenessTracker:
+    """Tests für die Ausfall-Erkennung pro Sensor"""
+
+    def test_state_transitions_emitted_once(self):
+        """online → stale → offline → recovered, jeweils genau ein Ereignis"""
+        from sensor_rules import SensorStalenessTracker
+
+        tracker = SensorStalenessTracker(stale_after=30, offline_after=120)
+        events = []
+        for now, value in [(0, 20.0), (10, 20.1), (40, None), (100, None), (130, None),
+                           (200, None), (400, None), (410, 20.3), (420, 20.2)]:
+            events += tracker.update_data({'DS18B20_3': value}, now=now)
+
+        assert events == [('DS18B20_3', 'stale', 90.0), ('DS18B20_3', 'offline', 190.0),
+                          ('DS18B20_3', 'recovered', 400.0)]
+        assert tracker.snapshot(now=425)['DS18B20_3'] == {'state': 'online', 'age': 5.0, 'ever_seen': True}
+
+    def test_never_reported_sensor_goes_offline(self):
+        """Sensor ohne jeden Messwert wird ab der ersten Prüfung gezählt"""
+        from sensor_rules import SensorStalenessTracker
+
+        tracker = SensorStalenessTracker(stale_after=30, offline_after=60)
+        tracker.add_sensors(['DS18B20_7', 'DS18B20_8'])
+        tracker.update_data({'DS18B20_7': 40.0}, now=1000)
+        events = tracker.update_data({'DS18B20_7': 40.0}, now=1070)
+
+        assert events == [('DS18B20_8', 'offline', 70.0)]
+        assert tracker.snapshot(now=1070)['DS18B20_8']['ever_seen'] is False
+
+    def test_same_snapshot_is_not_fed_twice(self):
+        """Erneut gelieferter Snapshot (gleiche Erfassungszeit) zählt nicht, Alter gilt zur Erfassung"""
+        from sensor_rules import SensorStalenessTracker
+
+        clock = FakeClock(0)
+        tracker = SensorStalenessTracker(stale_after=30, offline_after=120, clock=clock)
+        tracker.update_data({'DS18B20_3': 20.0}, now=0)
+        tracker.update_data({'DS18B20_3': None}, now=40)
+        for _ in range(10):
+            assert tracker.update_data({'DS18B20_3': 20.5}, now=40) == []   # gleicher Snapshot
+        assert tracker.update_data({'DS18B20_3': 20.5}, now=35) == []       # älterer Snapshot
+        assert tracker.sensors_in(2) == [] and tracker.snapshot()['DS18B20_3']['state'] == 'stale'
+
+        clock.now = 500  # Anfrage lange nach der letzten Erfassung
+        assert tracker.snapshot()['DS18B20_3']['age'] == 40.0
+        assert tracker.update_data({'DS18B20_3': 21.0}, now=45) == [('DS18B20_3', 'recovered', 45.0)]
+
+    def test_monitor_alerts_offline_once_and_exports_metrics(self):
+        """SensorHealthMonitor meldet Ausfall und Rückkehr einmal, /metrics zeigt den Zustand"""
+        import configparser
+        from advanced_monitoring import SensorHealthMonitor
+
+        config = configparser.ConfigParser()
+        config.read_string('[alerts]\ntemperature_high = 90\nsensor_stale_timeout = 10\nsensor_offline_timeout = 30\n'
+                           '[labels]\nds18b20_1 = "RL WP"\nds18b20_2 = "VL UG"\n[anomaly]\nenabled = false\n')
+        alert_manager = Mock(config=config)
+        monitor = SensorHealthMonitor(alert_manager)
+        for now in range(0, 300, 5):
+            health = monitor.check_sensor_health({'DS18B20_1': 40.0}, now=now)
+        monitor.check_sensor_health({'DS18B20_1': 40.0, 'DS18B20_2': 35.0}, now=300)
+
+        alert_types = [c[0][0] for c in alert_manager.send_alert.call_args_list]
+        assert alert_types == ['sensor_offline_DS18B20_2', 'sensor_recovered_DS18B20_2']
+        assert health['offline_sensors'] == ['DS18B20_2']
+
+        pytest.importorskip('prometheus_client')
+        from sensor_snapshot import SensorSnapshotCache
+        from metrics_exporter import SnapshotMetricsCollector, create_registry, render_metrics
+        monitor.staleness.update_data({'DS18B20_1': 40.0})
+        cache = SensorSnapshotCache(lambda: {}, autostart=False)
+        body, _ = render_metrics(create_registry(SnapshotMetricsCollector(cache, staleness=monitor.staleness)))
+        text = body.decode()
+        assert 'pi5_sensor_state{sensor="DS18B20_1",state="online"} 1.0' in text
+        assert 'pi5_sensor_last_seen_age_seconds{sensor="DS18B20_2"}' in text
+
+class TestHeatingCircuits:
+    """Tests für abgeleitete Heizkreis-Kennwerte"""
+
+    def test_circuits_from_config_and_labels(self):
+        """Paare aus [circuits] oder aus VL/RL bzw. Vorlauf/Rücklauf-Labels"""
+        import configparser
+        from heating_circuits import load_circuits, circuits_from_labels
+
+        config = configparser.ConfigParser()
+        config.read_string('[circuits]\nwp = ds18b20_3, ds18b20_1, Wärmepumpe\nrolling_window = 120\n')
+        (wp,) = load_circuits(config)
+        assert (wp.name, wp.flow, wp.ret, wp.label) == ('wp', 'ds18b20_3', 'ds18b20_1', 'Wärmepumpe')
+
+        circuits = circuits_from_labels({'ds18b20_1': '"RL WP"', 'ds18b20_3': '"VL WP"', 'dht22': 'Heizraum',
+                                         '28-01': 'HK1 Vorlauf', '28-02': 'HK1 Rücklauf', '28-03': 'HK2 Vorlauf'})
+        assert sorted((c.name, c.flow, c.ret) for c in circuits) == [
+            ('hk1', '28-01', '28-02'), ('wp', 'ds18b20_3', 'ds18b20_1')]
+
+    def test_spread_rolling_mean_and_rate(self):
+        """ΔT, zeitbasiertes gleitendes Mittel und Rate in K/min pro Zyklus"""
+        from heating_circuits import HeatingCircuit, HeatingCircuitMetrics
+
+        metrics = HeatingCircuitMetrics([HeatingCircuit('wp', 'ds18b20_3', 'ds18b20_1')], rolling_window=60)
+        first = metrics.update({'DS18B20_3': 40.0, 'DS18B20_1': 35.0}, now=0)
+        metrics.update({'DS18B20_3': 42.0, 'DS18B20_1': 35.0}, now=30)
+        third = metrics.update({'DS18B20_3': 44.0, 'DS18B20_1': 36.0}, now=60)
+
+        assert first['wp']['delta_t'] == 5.0 and 'flow_rate' not in first['wp']
+        assert third['wp']['delta_t'] == 8.0
+        assert third['wp']['delta_t_mean'] == 7.5   # Wert bei t=0 liegt außerhalb von 60s
+        assert third['wp']['flow_rate'] == 4.0      # +2 K in 30 s
+        assert third['wp']['return_rate'] == 2.0
+        assert metrics.update({'DS18B20_3': 44.0, 'DS18B20_1': None}, now=90) == {}
+
+    def test_circuit_points_written_as_fields(self):
+        """InfluxDB bekommt ein eigenes Measurement mit vorberechneten Feldern"""
+        pytest.importorskip('influxdb_client')
+        from datetime import datetime
+        from sensor_influxdb import Pi5InfluxDBIntegration
+
+        with patch.object(Pi5InfluxDBIntegration, 'connect', return_value=False):
+            integration = Pi5InfluxDBIntegration()
+        (point,) = [p for p in integration.circuit_points({'DS18B20_3': 45.0, 'DS18B20_1': 38.5},
+                                                          datetime(2024, 1, 1)) if 'circuit=wp' in p.to_line_protocol()]
+        line = point.to_line_protocol()
+        assert line.startswith('heating_circuit,circuit=wp,location=heizungsanlage,name=')
+        assert 'delta_t=6.5' in line and 'delta_t_mean=6.5' in line
+
+class TestHeatPumpCycleDetector:
+    """Tests für die Takt-Erkennung der Wärmepumpe"""
+
+    @staticmethod
+    def _run(detector, now, minutes, flow, ret):
+        """Konstante Werte im 5s-Raster einspielen - liefert (Ende, Ereignisse)"""
+        events = []
+        for _ in range(int(minutes * 12)):
+            events += [(now, event) for event in detector.update(flow, ret, now)]
+            now += 5
+        return now, events
+
+    def test_cycles_counters_and_short_cycling(self):
+        """Start/Stopp mit Hysterese, Laufzeit-Zähler und Takten ab dem 4. Start pro Stunde"""
+        from heating_circuits import HeatPumpCycleDetector
+
+        detector = HeatPumpCycleDetector('ds18b20_3', 'ds18b20_1')
+        now, events = self._run(detector, 0, 30, 45.0, 40.0)
+        now, more = self._run(detector, now, 30, 38.0, 37.8)
+        events += more
+        assert events == [(0, 'start'), (1800, 'stop')]
+        for _ in range(4):
+            now, more = self._run(detector, now, 5, 45.0, 40.0)
+            events += more
+            now, more = self._run(detector, now, 5, 38.0, 37.8)
+            events += more
+
+        assert 'short_cycling' in [event for _, event in events]
+        counters = detector.counters(now)
+        assert counters['starts_total'] == 5 and counters['starts_last_hour'] == 4
+        assert counters['short_cycling'] is True and counters['running'] is False
+        assert counters['runtime_total_s'] == 3000.0 and counters['mean_runtime_s'] == 600.0
+        assert counters['last_runtime_s'] == 300.0
+
+        # Nach einer Stunde Ruhe ist das Takten vorbei
+        now, more = self._run(detector, now, 61, 38.0, 37.8)
+        assert [event for _, event in more] == ['short_cycling_cleared']
+
+    def test_slope_stops_before_spread_collapses_and_dwell_holds(self):
+        """Fallender Vorlauf beendet den Lauf; min_dwell unterdrückt Flattern an der Grenze"""
+        from heating_circuits import HeatPumpCycleDetector
+
+        detector = HeatPumpCycleDetector('ds18b20_3', 'ds18b20_1', min_dwell=60, slope_window=15)
+        now, events = self._run(detector, 0, 10, 45.0, 40.0)
+        assert events == [(0, 'start')]
+        # Verdichter aus: Vorlauf fällt 3 K/min, Spreizung noch über off_delta
+        flow = 45.0
+        stop = None
+        while stop is None:
+            flow -= 0.25
+            if 'stop' in detector.update(flow, 40.0, now):
+                stop = now
+            now += 5
+        assert flow - 40.0 > detector.off_delta
+
+        # Spreizung springt um die Grenzen: innerhalb von min_dwell kein neuer Start
+        for step in range(6):
+            assert detector.update(45.0 if step % 2 else 38.0, 37.8, stop + 5 + step * 5) == []
+
+    def test_same_snapshot_is_not_fed_twice(self):
+        """Derselbe Snapshot (gleiche Erfassungszeit) erneut: keine Starts, Steigung unverändert"""
+        from heating_circuits import HeatPumpCycleDetector
+
+        detector = HeatPumpCycleDetector('ds18b20_3', 'ds18b20_1', min_dwell=0)
+        now, events = self._run(detector, 0, 10, 45.0, 40.0)
+        assert events == [(0, 'start')]
+        assert detector.update(38.0, 37.8, now) == ['stop']
+        slope = detector.slope
+        for step in range(10):
+            assert detector.update(45.0 if step % 2 else 38.0, 37.8, now) == []
+        assert detector.update(45.0, 40.0, now - 5) == []   # älterer Wert
+        assert detector.slope == slope and detector.starts_total == 1 and detector.runs_completed == 1
+
+    def test_health_monitor_alerts_and_metrics(self):
+        """SensorHealthMonitor meldet Takten einmal, /metrics exportiert die Zähler"""
+        import configparser
+        from advanced_monitoring import SensorHealthMonitor
+
+        config = configparser.ConfigParser()
+        config.read_string('[alerts]\ntemperature_high = 90\n[anomaly]\nenabled = false\n'
+                           '[circuits]\nwp = ds18b20_3, ds18b20_1\n[heat_pump]\nmax_starts_per_hour = 2\n')
+        alert_manager = Mock(config=config)
+        monitor = SensorHealthMonitor(alert_manager)
+        now = 0
+        for _ in range(3):
+            for flow in (45.0, 38.0):
+                for _ in range(60):
+                    health = monitor.check_sensor_health({'DS18B20_3': flow, 'DS18B20_1': 37.8}, now=now)
+                    now += 5
+
+        alerts = [c[0][0] for c in alert_manager.send_alert.call_args_list]
+        assert alerts == ['heat_pump_short_cycling']
+        assert health['heat_pump']['starts_last_hour'] == 3
+
+        pytest.importorskip('prometheus_client')
+        from sensor_snapshot import SensorSnapshotCache
+        from metrics_exporter import SnapshotMetricsCollector, create_registry, render_metrics
+        cache = SensorSnapshotCache(lambda: {}, autostart=False)
+        body, _ = render_metrics(create_registry(SnapshotMetricsCollector(cache, heat_pump=monitor.heat_pump)))
+        text = body.decode()
+        assert 'pi5_heat_pump_starts_total{circuit="wp"} 3.0' in text
+        assert 'pi5_heat_pump_short_cycling{circuit="wp"} 1.0' in text
+
+class TestW1Backends:
+    """Tests für die 1-Wire Backends (Hardware-frei)"""
+
+    def test_w1_slave_text_matches_kernel_format(self):
+        """Scratchpad mit Dallas-CRC, YES/NO-Zeile und t= in Milligrad"""
+        from w1_backend import crc8, w1_slave_text
+
+        assert crc8(bytes.fromhex('72014b467fff0e10')) == 0x57
+        ok, value = w1_slave_text(21125).splitlines()
+        assert ok.startswith('52 01 4b 46 7f ff 0c 10') and ok.endswith('YES')
+        assert value.endswith('t=21125')
+        assert w1_slave_text(-500, crc_ok=False).splitlines()[0].endswith('NO')
+
+    def test_fake_tree_reads_through_manager(self):
+        """Echte Datei-Zugriffe: Lesen, CRC-Fehler und verschwundenes Gerät"""
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import FakeTreeW1Backend
+
+        with FakeTreeW1Backend(sensors=2) as fake:
+            manager = Pi5DS18B20Manager(high_performance=False, backend=fake)
+            assert sorted(manager.sensor_ids) == ['28-000000000001', '28-000000000002']
+            fake.set_reading('28-000000000001', 21125)
+            assert manager.read_temp_single('', '28-000000000001') == ('28-000000000001', 21.125)
+
+            fake.set_reading('28-000000000001', 21125, crc_ok=False)
+            assert manager.read_temp_single('', '28-000000000001')[1] is None
+            assert manager.sensor_stats.snapshot()['28-000000000001']['crc_failures'] == 1
+
+            fake.remove_device('28-000000000002')
+            assert manager.read_temp_single('', '28-000000000002')[1] is None
+
+    def test_simulator_faults_and_shared_bus(self):
+        """85 °C Reset wird verworfen, Ausfälle liefern None, der Bus konvertiert seriell"""
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import SimulatedW1Backend
+
+        sim = SimulatedW1Backend(sensors=4, conversion_time=0.02, seed=1)
+        manager = Pi5DS18B20Manager(backend=sim)
+        sim.set_temperature('28-000000000001', 42.3)
+
+        start = time.perf_counter()
+        temperatures = manager.get_all_temperatures()
+        assert time.perf_counter() - start >= 4 * 0.02
+        assert temperatures['DS18B20_1'] == 42.312  # 1/16 °C Auflösung
+        assert all(value is not None for value in temperatures.values())
+
+        sim.conversion_time = 0
+        sim.power_on_reset_rate = 1.0
+        assert manager.read_temp_single('', '28-000000000001')[1] is None
+        sim.power_on_reset_rate = 0.0
+        sim.remove_device('28-000000000004')
+        assert manager.read_temp_single('', '28-000000000004')[1] is None
+        assert '28-000000000004' not in sim.discover()
+        assert sim.stats['power_on_resets'] == 4 and sim.stats['missing'] == 1
+
+    def test_simulated_faults_log_debug_only(self, caplog):
+        """Gewollte Simulator-Fehler landen in stats, nicht als ERROR im Log"""
+        import logging
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import SimulatedW1Backend
+
+        sim = SimulatedW1Backend(sensors=4, conversion_time=0, dropout_rate=0.5, crc_error_rate=0.5, seed=3)
+        manager = Pi5DS18B20Manager(backend=sim)
+        with caplog.at_level(logging.DEBUG):
+            for _ in range(5):
+                manager.get_all_temperatures()
+
+        assert sim.stats['dropouts'] > 0 and sim.stats['crc_errors'] > 0
+        assert sim.stats['missing'] == sim.stats['dropouts']
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+        assert [r for r in caplog.records if r.name == 'w1_backend' and r.levelno == logging.DEBUG]
+
+    def test_bulk_conversion_converts_once_per_cycle(self):
+        """therm_bulk_read: eine Konvertierung für alle Sensoren, auch im sysfs-Baum"""
+        import os
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import BULK_READ_FILE, FakeTreeW1Backend, SimulatedW1Backend
+
+        sim = SimulatedW1Backend(sensors=6, conversion_time=0, seed=1)
+        manager = Pi5DS18B20Manager(backend=sim, bulk_conversion=True)
+        temperatures = manager.get_all_temperatures()
+        assert len(temperatures) == 6 and sim.stats['conversions'] == 1
+
+        with FakeTreeW1Backend(sensors=1) as fake:
+            assert not fake.supports_bulk_conversion()
+            os.makedirs(os.path.dirname(fake.base_dir + BULK_READ_FILE))
+            open(fake.base_dir + BULK_READ_FILE, 'w').close()
+            Pi5DS18B20Manager(backend=fake, bulk_conversion=True).get_all_temperatures()
+            with open(fake.base_dir + BULK_READ_FILE) as f:
+                assert f.read() == 'trigger\n'
+
+class TestHeatingScenario:
+    """Tests für den Szenario-Generator (thermisches Modell)"""
+
+    def _config(self):
+        import configparser
+        config = configparser.ConfigParser()
+        config.read_string("[circuits]\nwp = ds18b20_3, ds18b20_1, Wärmepumpe\nug = ds18b20_2, ds18b20_4\n")
+        return config
+
+    def test_seeded_and_any_sensor_count(self):
+        """Gleicher Seed = gleiche Daten, unabhängig vom Leseintervall; 64 Sensoren ohne Config"""
+        from heating_scenario import HeatingScenario
+
+        first = HeatingScenario.from_config(self._config(), sensors=8, seed=7)
+        second = HeatingScenario.from_config(self._config(), sensors=8, seed=7)
+        list(first.run(3600, 30))
+        list(second.run(3600, 600))
+        assert first.buffer == second.buffer and first.starts == second.starts
+
+        large = HeatingScenario(sensors=64, seed=1)
+        values = large.run(600, 60).__next__()[1]
+        assert len([key for key in values if key.startswith('DS18B20')]) == 64
+        assert all(v is not None for v in values.values())
+        assert len(large.circuits) == 31 and large.outdoor_sensor is None
+
+    def test_cycle_detector_sees_scenario_starts(self):
+        """Takt-Erkennung zählt die Starts des Modells; injiziertes Takten wird erkannt"""
+        from heating_circuits import HeatPumpCycleDetector
+        from heating_scenario import HeatingScenario
+
+        scenario = HeatingScenario.from_config(self._config(), sensors=4)
+        detector = HeatPumpCycleDetector.from_config(self._config())
+        for timestamp, values in scenario.run(8 * 3600, 30):
+            detector.update_data(values, timestamp)
+        assert scenario.starts >= 4
+        assert detector.starts_total == scenario.starts
+
+        scenario = HeatingScenario.from_config(self._config(), sensors=4)
+        scenario.add_fault('short_cycling', start=0, duration=4 * 3600)
+        detector = HeatPumpCycleDetector.from_config(self._config())
+        events = []
+        for timestamp, values in scenario.run(4 * 3600, 30):
+            events += detector.update_data(values, timestamp)
+        assert 'short_cycling' in events
+
+    def test_injected_sensor_faults(self):
+        """Ausfall, 85 °C Reset und eingefrorener Wert an den Messwerten"""
+        from heating_scenario import HeatingScenario
+
+        scenario = HeatingScenario.from_config(self._config(), sensors=4)
+        scenario.add_fault('dropout', 'ds18b20_2', start=60, duration=120)
+        scenario.add_fault('power_on_reset', 'ds18b20_4', start=60, duration=60)
+        scenario.add_fault('stuck', 'dht22_humidity', start=0, duration=3600)
+        readings = [values for _, values in scenario.run(600, 30)]
+        assert readings[1]['DS18B20_2'] is None and readings[4]['DS18B20_2'] is None
+        assert readings[5]['DS18B20_2'] is not None
+        assert readings[1]['DS18B20_4'] == 85.0
+        assert len({values['DHT22_humidity'] for values in readings}) == 1
+
+class TestSensorCapture:
+    """Tests für Aufzeichnung und Wiedergabe von Rohdaten"""
+
+    def _record(self, path, cycles=4):
+        from bench_acquisition import SimulatedDHT22
+        from sensor_monitor import Pi5SensorMonitor
+        from w1_backend import SimulatedW1Backend
+
+        monitor = Pi5SensorMonitor(backend=SimulatedW1Backend(sensors=3, conversion_time=0, crc_error_rate=0.3, seed=3))
+        monitor.dht22_sensor.sensor = SimulatedDHT22(failure_rate=0.4, read_time=0, seed=2)
+        monitor.dht22_sensor.available = True
+        monitor.dht22_sensor.retry_pauses = monitor.ds18b20_manager.retry_pauses = False
+        monitor.start_recording(path)
+        results = [monitor.single_reading() for _ in range(cycles)]
+        monitor.stop_recording()
+        assert monitor.ds18b20_manager.backend.name == 'simulated'
+        return results
+
+    def test_replay_reproduces_recorded_cycles(self, tmp_path):
+        """CRC-Fehler und DHT22-Aussetzer werden exakt nachgestellt"""
+        from sensor_monitor import replay_capture
+
+        path = str(tmp_path / 'winter.capture.gz')
+        recorded = self._record(path)
+        replayed = []
+        assert replay_capture(path, speed=0, on_cycle=lambda t, *result: replayed.append(result)) == 4
+        assert replayed == recorded
+
+    def test_replay_pacing_and_truncated_file(self, tmp_path):
+        """N-fache Geschwindigkeit teilt die Pausen, abgeschnittene Dateien enden sauber"""
+        import gzip
+        from sensor_capture import CaptureReplay, CaptureWriter, iter_cycles
+
+        clock = FakeClock()
+        path = str(tmp_path / 'paced.capture.gz')
+        with CaptureWriter(path, ['28-000000000001'], clock=clock) as writer:
+            for _ in range(3):
+                writer.begin_cycle()
+                writer.w1_read('28-000000000001', ['a : crc=00 YES\n', 'b t=21000\n'])
+                clock.now += 30
+
+        sleeps = []
+        replay = CaptureReplay(path, speed=10, sleep=sleeps.append, clock=lambda: 0.0)
+        assert list(replay) == [replay.header['started'] + t for t in (0, 30, 60)]
+        assert sleeps == [3.0, 6.0]
+        assert replay.backend.read('28-000000000001')[1] == 'b t=21000\n'
+
+        with open(path, 'rb') as f:
+            data = gzip.decompress(f.read())
+        with open(path, 'wb') as f:
+            f.write(gzip.compress(data)[:-12])
+        assert len(list(iter_cycles(path))) >= 2
+
+class TestPipelineStandins:
+    """Tests für die lokalen InfluxDB- und MQTT-Stand-ins des Lasttests"""
+
+    def test_line_protocol_parsing(self):
+        """Escapes, Strings, Integer und Bool wie im Client-Format"""
+        from pipeline_loadtest import parse_line_protocol
+
+        points = parse_line_protocol(
+            'temperature,sensor_name=DS18B20_1,location=VL\\ WP value=21.5,ok=t,count=3i,note="a b" 1700000000000000000\n')
+        assert points == [('temperature', {'sensor_name': 'DS18B20_1', 'location': 'VL WP'},
+                           {'value': 21.5, 'ok': True, 'count': 3, 'note': 'a b'}, 1700000000000000000)]
+
+    def test_bridge_reads_written_points(self, tmp_path):
+        """Integration schreibt, Bridge liest den letzten Wert über die Label-Zuordnung"""
+        pytest.importorskip('influxdb_client')
+        from mqtt_bridge import Pi5MqttBridge
+        from pipeline_loadtest import LocalInfluxDB, topic_matches, write_config
+        from sensor_influxdb import Pi5InfluxDBIntegration
+
+        assert topic_matches('pi5/+/state', 'pi5/ds18b20_1/state')
+        assert topic_matches('pi5/#', 'pi5/a/b') and not topic_matches('pi5/+', 'pi5/a/b')
+
+        config_path = str(tmp_path / 'config.ini')
+        with LocalInfluxDB() as influx:
+            write_config(config_path, 2, 1883, str(tmp_path / 'queue.db'), 'test')
+            integration = Pi5InfluxDBIntegration(port=influx.port, host='127.0.0.1', config_path=config_path)
+            integration.sensor_manager = None
+            assert integration.write_sensor_data({'DS18B20_1': 21.5, 'DS18B20_2': 35.0}, None, None)
+
+            bridge = Pi5MqttBridge(config_path)
+            bridge.influx_url = influx.url
+            assert bridge.setup_influxdb()
+            data = bridge.get_latest_sensor_data()
+            assert data['ds18b20_1'] == {'temperature': 21.5}
+            assert data['ds18b20_2'] == {'temperature': 35.0}
+            bridge.influx_client.close()
+            bridge.outbox.close()
+            integration.close()
+
+class TestPipelineTracing:
+    """Tests für die Stufen-Zeitmessung pro Zyklus"""
+
+    def test_parallel_reads_attach_to_cycle(self):
+        """Parse-Stufen aus den Worker-Threads landen im aktiven Zyklus"""
+        from pipeline_tracing import TRACER, stage
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import SimulatedW1Backend
+
+        manager = Pi5DS18B20Manager(backend=SimulatedW1Backend(sensors=4, conversion_time=0, seed=1))
+        TRACER.reset()
+        try:
+            with TRACER.cycle('test') as trace:
+                with stage('bus_read'):
+                    manager.get_all_temperatures()
+            assert trace.counts == {'parse': 4, 'bus_read': 1}
+            assert trace.stages['parse'] <= trace.stages['bus_read'] <= trace.total
+            assert TRACER.histograms()['cycles']['test']['count'] == 1
+            with stage('parse'):
+                pass  # ohne aktiven Zyklus keine Messung
+            assert TRACER.histograms()['stages']['parse']['count'] == 1
+        finally:
+            TRACER.reset()
+
+    def test_dht22_has_its_own_stage(self):
+        """single_reading: 1-Wire Bus unter bus_read, DHT22 getrennt unter dht_read - je einmal pro Zyklus"""
+        from bench_acquisition import SimulatedDHT22
+        from pipeline_tracing import TRACER
+        from sensor_monitor import Pi5SensorMonitor
+        from w1_backend import SimulatedW1Backend
+
+        monitor = Pi5SensorMonitor(backend=SimulatedW1Backend(sensors=3, conversion_time=0, seed=1))
+        monitor.dht22_sensor.sensor = SimulatedDHT22(failure_rate=0, read_time=0.05, seed=2)
+        monitor.dht22_sensor.available = True
+        TRACER.reset()
+        try:
+            with TRACER.cycle('test') as trace:
+                monitor.single_reading()
+            assert trace.counts['bus_read'] == 1 and trace.counts['dht_read'] == 1
+            assert trace.stages['dht_read'] >= 0.05 > trace.stages['bus_read']
+        finally:
+            TRACER.reset()
+            monitor.close()
+
+    def test_slowest_kept_and_exported(self, tmp_path):
+        """Nur die N langsamsten Zyklen bleiben, Histogramme gehen nach /metrics"""
+        import json
+        from pipeline_tracing import PipelineTracer
+
+        tracer = PipelineTracer(keep_slowest=3)
+        for seconds in (0.004, 0.001, 0.005, 0.002, 0.003):
+            trace = tracer.begin('influx')
+            trace.add('influx_write', seconds)
+            trace.started -= seconds
+            tracer.finish()
+        assert [t['stages_ms']['influx_write'] for t in tracer.slowest()] == [5.0, 4.0, 3.0]
+        tracer.dump_slowest(str(tmp_path / 'traces.json'), limit=2)
+        with open(tmp_path / 'traces.json') as f:
+            assert len(json.load(f)['slowest']) == 2
+
+        pytest.importorskip('prometheus_client')
+        from sensor_snapshot import SensorSnapshotCache
+        from metrics_exporter import SnapshotMetricsCollector, create_registry, render_metrics
+        cache = SensorSnapshotCache(lambda: {}, autostart=False)
+        body, _ = render_metrics(create_registry(SnapshotMetricsCollector(cache, tracer=tracer)))
+        text = body.decode()
+        assert 'pi5_stage_duration_seconds_count{stage="influx_write"} 5.0' in text
+        assert 'pi5_stage_duration_seconds_bucket{le="0.005",stage="influx_write"} 5.0' in text
+        assert 'pi5_trace_cycle_duration_seconds_count{cycle="influx"} 5.0' in text
+
+class TestSensorReadStats:
+    """Tests für die Pro-Sensor Lesestatistik (Thread-Shards)"""
+
+    def test_concurrent_records_merge_exactly(self):
+        """Viele kurzlebige Threads: keine verlorenen Zählungen, beendete Shards werden eingefaltet"""
+        import threading
+        from sensor_monitor import SensorReadStats
+
+        stats = SensorReadStats()
+
+        def worker(n):
+            for i in range(500):
+                stats.record(f'28-{n % 3}', 0.02, outcome='timeout' if i % 50 == 0 else 'ok')
+
+        for _ in range(4):
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats.snapshot()
+
+        snapshot = stats.snapshot()
+        assert sum(entry['count'] for entry in snapshot.values()) == 4 * 6 * 500
+        assert snapshot['28-0']['timeouts'] == 4 * 2 * 10
+        assert snapshot['28-0']['buckets'][1] == snapshot['28-0']['count']
+        assert len(stats._shards) <= 1
+
+    def test_persistent_pool_and_recreated_pool_after_close(self):
+        """Dauerhafter Pool: Shards bleiben aktiv; nach close() werden die alten Shards eingefaltet"""
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import SimulatedW1Backend
+
+        sim = SimulatedW1Backend(sensors=4, conversion_time=0, seed=1)
+        manager = Pi5DS18B20Manager(backend=sim, high_performance=True)
+        for _ in range(5):
+            manager.get_all_temperatures()
+        stats = manager.sensor_stats
+        pool_shards = len(stats._shards)
+        assert 0 < pool_shards <= 4
+
+        manager.close()
+        for _ in range(5):
+            manager.get_all_temperatures()
+        manager.close()
+
+        snapshot = stats.snapshot()
+        assert sum(entry['count'] for entry in snapshot.values()) == 10 * 4
+        assert stats._shards == [] and sum(entry['count'] for entry in stats._retired.values()) == 40
+
+    def test_outcomes_and_percentiles_per_sensor(self):
+        """CRC-Fehler zählen als Fehlschlag, langsame Sensoren fallen im p95 auf"""
+        from sensor_monitor import Pi5DS18B20Manager, SensorReadStats
+        from w1_backend import SimulatedW1Backend
+
+        assert SensorReadStats.percentile([0] * 11, 50) is None
+        assert SensorReadStats.percentile([10] + [0] * 10, 50) == pytest.approx(0.005)
+
+        sim = SimulatedW1Backend(sensors=3, conversion_time=0, seed=1)
+        manager = Pi5DS18B20Manager(backend=sim, high_performance=False)
+        for _ in range(4):
+            manager.get_all_temperatures()
+        sim.crc_error_rate = 1.0
+        manager.read_temp_single('', '28-000000000002')
+        sim.crc_error_rate = 0.0
+        for _ in range(20):
+            manager.sensor_stats.record('28-000000000003', 0.9)
+
+        stats = manager.get_performance_stats()
+        assert stats['total_readings'] == 33 and stats['failed_readings'] == 1
+        assert stats['crc_failures'] == 1
+        sensor = stats['sensors']['28-000000000002']
+        assert sensor['name'] == 'DS18B20_2' and sensor['success_rate'] == 80.0
+        assert sensor['last_error'] == 'CRC-Fehler nach 1 Versuchen'
+        slow = stats['sensors']['28-000000000003']
+        assert slow['p95_ms'] > 750 > stats['sensors']['28-000000000001']['p95_ms']
+
+class TestProfiling:
+    """Tests für den eingebauten Profiling-Modus"""
+
+    @staticmethod
+    def busy(seconds):
+        import json
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            json.dumps({'value': 21.5})
+
+    def test_profile_argument_and_collapsed_output(self, tmp_path):
+        """--profile=N wird aus argv entfernt, nach N Zyklen liegen Stacks und Allokationen vor"""
+        import json
+        import signal
+        from profiling import PROFILER, setup_profiling
+
+        config_path = tmp_path / 'config.ini'
+        config_path.write_text(f"[performance]\nprofile_format = collapsed\nprofile_dir = {tmp_path}\n"
+                               f"profile_interval = 0.001\n")
+        argv = ['mqtt_bridge.py', 'test', '--profile=2']
+        previous = signal.getsignal(signal.SIGUSR1)
+        try:
+            setup_profiling('test', argv, str(config_path))
+            assert argv == ['mqtt_bridge.py', 'test'] and PROFILER.cycles == 2
+            for _ in range(3):
+                with PROFILER.cycle():
+                    self.busy(0.05)
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+            PROFILER._requested = False
+
+        assert not PROFILER.active and PROFILER.cycles_done == 2
+        with open(PROFILER.last_output) as f:
+            lines = f.read().splitlines()
+        assert PROFILER.last_output.endswith('.folded')
+        assert any(line.startswith('MainThread;') and 'TestProfiling.busy' in line for line in lines)
+        with open(PROFILER.last_output.replace('.folded', '.alloc.json')) as f:
+            cycles = json.load(f)['cycles']
+        assert [cycle['cycle'] for cycle in cycles] == [1, 2]
+
+    def test_sigusr1_starts_speedscope_profile(self, tmp_path):
+        """SIGUSR1 startet das Profiling am nächsten Zyklus, Worker-Threads werden zusammengefasst"""
+        import json
+        import os
+        import signal
+        from concurrent.futures import ThreadPoolExecutor
+        from profiling import CycleProfiler
+
+        profiler = CycleProfiler('test', cycles=1, interval=0.001, output_dir=str(tmp_path), trace_malloc=False)
+        previous = signal.getsignal(signal.SIGUSR1)
+        try:
+            assert profiler.install_signal()
+            with profiler.cycle():
+                pass
+            assert not profiler.active
+            os.kill(os.getpid(), signal.SIGUSR1)
+            with profiler.cycle():
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    list(executor.map(self.busy, [0.05, 0.05]))
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+
+        with open(profiler.last_output) as f:
+            document = json.load(f)
+        names = [profile['name'] for profile in document['profiles']]
+        assert sorted(names) == ['MainThread', 'ThreadPoolExecutor']
+        frames = document['shared']['frames']
+        workers = document['profiles'][names.index('ThreadPoolExecutor')]
+        assert any(frames[i]['name'] == 'TestProfiling.busy' for sample in workers['samples'] for i in sample)
+
+class TestResourceGuard:
+    """Tests für den Ressourcen-Wächter und die Leck-Korrekturen"""
+
+    def test_warns_once_on_sustained_growth(self, caplog):
+        """Rauschen bleibt still, steigende FDs warnen einmal, erst weiterer Anstieg warnt erneut"""
+        from resource_guard import ResourceGuard
+
+        usage = {'rss_mb': 50.0, 'open_fds': 10, 'threads': 5, 'gpio_handles': 1}
+        clock = FakeClock(0)
+        guard = ResourceGuard(interval=60, window=8, sampler=lambda: dict(usage), clock=clock)
+        warned = []
+        for i in range(8):
+            usage['rss_mb'] = 50.0 + (3 if i % 2 else -3)
+            warned += guard.check()
+            assert guard.check() == []  # innerhalb des Intervalls keine Abtastung
+            clock.now += 60
+        assert warned == [] and len(guard.samples) == 8
+
+        for i in range(8):
+            usage['open_fds'] += 2
+            warned += guard.check()
+            clock.now += 60
+        assert warned == ['open_fds'] and guard.warnings == 1
+        assert 'mögliches Leck' in caplog.text
+
+        for i in range(8):
+            usage['open_fds'] += 4
+            warned += guard.check()
+            clock.now += 60
+        assert warned == ['open_fds', 'open_fds']
+
+    def test_reader_pool_and_dht_released(self):
+        """Ein Lese-Pool über alle Zyklen, close() beendet ihn; Minimal-Monitor legt DHT22 einmal an"""
+        import sys
+        import threading
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import SimulatedW1Backend
+
+        manager = Pi5DS18B20Manager(backend=SimulatedW1Backend(sensors=4, conversion_time=0, seed=1))
+        readers = lambda: [t for t in threading.enumerate() if t.name.startswith('ds18b20')]
+        for _ in range(20):
+            manager.get_all_temperatures()
+        assert 0 < len(readers()) <= 4
+        manager.close()
+        assert readers() == []
+
+        pytest.importorskip('influxdb_client')
+        from sensor_monitor_minimal import MinimalSensorMonitor
+        adafruit_dht = Mock()
+        adafruit_dht.DHT22.return_value.temperature = 21.0
+        adafruit_dht.DHT22.return_value.humidity = 50.0
+        with patch.dict(sys.modules, {'adafruit_dht': adafruit_dht, 'board': Mock()}):
+            monitor = MinimalSensorMonitor.__new__(MinimalSensorMonitor)
+            monitor.dht = None
+            monitor.influx_client = Mock()
+            assert monitor.read_dht22() == (21.0, 50.0)
+            assert monitor.read_dht22() == (21.0, 50.0)
+            monitor.close()
+        assert adafruit_dht.DHT22.call_count == 1
+        adafruit_dht.DHT22.return_value.exit.assert_called_once()
+
+class TestLogSink:
+    """Tests für das gebündelte Logging (summary/batched)"""
+
+    def _sink(self, **kwargs):
+        import io
+        import logging
+        from log_sink import BatchingLogSink
+
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        sink = BatchingLogSink([target], flush_interval=3600, **kwargs)
+        sink.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        logger = logging.getLogger('test_log_sink')
+        logger.handlers, logger.propagate = [sink], False
+        logger.setLevel(logging.INFO)
+        return sink, logger, stream
+
+    def test_summary_buffers_details_until_error(self):
+        """Details bleiben im Ringpuffer, Zusammenfassungen werden gebündelt, Fehler schreiben die Details mit"""
+        from log_sink import CYCLE_SUMMARY
+
+        sink, logger, stream = self._sink(buffer_size=3)
+        try:
+            for i in range(5):
+                logger.info("Sensor %d: %.1f°C", i, 20.0 + i)
+            logger.info("Zyklus #1", extra=CYCLE_SUMMARY)
+            assert stream.getvalue() == ''  # noch nichts geschrieben
+            assert sink.stats['buffered'] == 5 and len(sink.details) == 3
+
+            sink.flush()
+            assert stream.getvalue() == 'INFO Zyklus #1\n'
+
+            logger.error("Bus-Fehler")  # Fehler schreibt der Hintergrund-Thread sofort
+            deadline = time.time() + 2
+            while 'Bus-Fehler' not in stream.getvalue() and time.time() < deadline:
+                time.sleep(0.01)
+            lines = stream.getvalue().splitlines()
+            assert lines[1:] == ['INFO Sensor 2: 22.0°C', 'INFO Sensor 3: 23.0°C',
+                                 'INFO Sensor 4: 24.0°C', 'ERROR Bus-Fehler']
+            assert sink.details == type(sink.details)(maxlen=3)
+        finally:
+            sink.close()
+        assert not sink._thread.is_alive()
+
+    def test_wrap_handlers_modes_and_signal(self, monkeypatch):
+        """log_mode wählt den Sink; SIGUSR2 schreibt den Ringpuffer; keine globalen Logging-Flags"""
+        import configparser
+        import logging
+        import signal
+        from log_sink import BatchingLogSink, find_sink, wrap_handlers
+
+        srcfile = logging._srcfile
+        monkeypatch.setattr(signal, 'signal', Mock())
+        config = configparser.ConfigParser()
+        handler = logging.NullHandler()
+        assert wrap_handlers([handler], config) == [handler]
+
+        config.read_string("[monitoring]\nlog_mode = summary\nlog_buffer_size = 7\n")
+        wrapped = wrap_handlers([handler], config)
+        try:
+            assert isinstance(wrapped[0], BatchingLogSink) and wrapped[0].details.maxlen == 7
+            assert wrapped[0].targets == [handler]
+            assert logging._srcfile == srcfile and logging.logThreads
+            if hasattr(signal, 'SIGUSR2'):
+                signal.signal.assert_called_once_with(signal.SIGUSR2, wrapped[0]._on_signal)
+            root = logging.getLogger('test_wrap')
+            root.handlers = wrapped
+            assert find_sink(root) is wrapped[0]
+        finally:
+            wrapped[0].close()
+
+        sink, logger, stream = self._sink()
+        try:
+            logger.info("Detail")
+            sink._on_signal(signal.SIGINT, None)
+            deadline = time.time() + 2
+            while not stream.getvalue() and time.time() < deadline:
+                time.sleep(0.01)
+            assert stream.getvalue() == 'INFO Detail\n'
+        finally:
+            sink.close()
+
+    def test_sensor_monitor_loop_writes_cycle_summary(self, caplog):
+        """sensor_monitor continuous: genau eine Zusammenfassung pro Zyklus (summary-Modus)"""
+        import logging
+        from sensor_monitor import Pi5SensorMonitor
+        from w1_backend import SimulatedW1Backend
+
+        monitor = Pi5SensorMonitor(backend=SimulatedW1Backend(sensors=3, conversion_time=0, seed=1))
+        monitor.dht22_sensor.available = False
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                raise KeyboardInterrupt
+
+        with caplog.at_level(logging.INFO, logger='sensor_monitor'), patch('sensor_monitor.time.sleep', sleep):
+            monitor.continuous_monitoring(5)
+        monitor.close()
+
+        summaries = [r.getMessage() for r in caplog.records if getattr(r, 'cycle_summary', False)]
+        assert len(summaries) == 2 and summaries[0].startswith('📊 Zyklus #1: DS18B20 3/3, DHT22 ❌')
+
 # Performance Tests
 class TestPerformance:
     """Performance Tests"""
@@ -268,6 +2228,159 @@ class TestPerformance:
             
             # Sollte unter 500ms für alle Sensoren sein
             assert read_time < 500, f"Lesezeit zu hoch: {read_time}ms"
+    
+    @pytest.mark.performance
+    def test_rules_engine_scales(self):
+        """Regel-Engine: 500 Sensoren x 200 Zyklen aus aufgezeichneten Daten"""
+        import numpy as np
+        from sensor_rules import SensorRulesEngine
+        
+        engine = SensorRulesEngine(sensors=[f'DS18B20_{i}' for i in range(500)])
+        replay = 20 + np.random.default_rng(1).normal(0, 8, (200, 500))
+        
+        start_time = time.time()
+        for cycle, values in enumerate(replay):
+            engine.evaluate(values, now=cycle * 5.0)
+        cycle_time = (time.time() - start_time) * 1000 / len(replay)  # ms
+        
+        assert cycle_time < 5, f"Auswertung zu langsam: {cycle_time:.2f}ms pro Zyklus"
+    
+    @pytest.mark.performance
+    def test_acquisition_cycle_latency(self):
+        """Echte Erfassungszyklen über den simulierten Bus: Bulk-Konvertierung schlägt Einzel-Lesungen"""
+        from bench_acquisition import ds18b20_cycle, measure
+        
+        sequential = measure(ds18b20_cycle('sequential', 8, 0.005, seed=1), cycles=5)
+        bulk = measure(ds18b20_cycle('bulk', 8, 0.005, seed=1), cycles=5)
+        
+        assert sequential['p50_ms'] >= 8 * 5
+        assert bulk['p99_ms'] < sequential['p50_ms'] / 2, f"Bulk-Zyklus zu langsam: {bulk}"
+        assert bulk['retained_bytes_per_cycle'] < 64 * 1024
+
+    @pytest.mark.performance
+    def test_pipeline_end_to_end(self):
+        """Sensor → InfluxDB → MQTT → Abonnent: Rate wird gehalten, Werte kommen an"""
+        pytest.importorskip('influxdb_client')
+        from pipeline_loadtest import run_pipeline
+
+        result = run_pipeline(sensors=8, rate=200, duration=2.5, bridge_interval=0.5)
+
+        assert result['influxdb']['points_written'] >= 0.9 * result['source']['points']
+        assert result['mqtt']['messages'] > 0 and result['mqtt']['p99_ms'] is not None
+        assert result['queues']['writer_growth_points_per_s'] < 50
+
+    @pytest.mark.performance
+    def test_tracing_overhead(self):
+        """Tracing kostet weniger als 1 % eines simulierten 8-Sensor-Zyklus"""
+        from pipeline_tracing import TRACER
+        from sensor_monitor import Pi5DS18B20Manager
+        from w1_backend import SimulatedW1Backend
+
+        manager = Pi5DS18B20Manager(backend=SimulatedW1Backend(sensors=8, conversion_time=0.005, seed=1),
+                                    bulk_conversion=True)
+
+        def run(enabled, cycles=20):
+            TRACER.enabled = enabled
+            start = time.perf_counter()
+            for _ in range(cycles):
+                with TRACER.cycle('bench'):
+                    with TRACER.stage('bus_read'):
+                        manager.get_all_temperatures()
+            return (time.perf_counter() - start) / cycles
+
+        try:
+            cycle_time = run(False)
+            with_tracing = run(True)
+            # Reine Tracing-Kosten eines Zyklus mit 20 Stufen
+            start = time.perf_counter()
+            for _ in range(1000):
+                with TRACER.cycle('bench'):
+                    for _ in range(20):
+                        with TRACER.stage('parse'):
+                            pass
+            per_cycle = (time.perf_counter() - start) / 1000
+        finally:
+            TRACER.enabled = True
+            TRACER.reset()
+        assert with_tracing < cycle_time * 1.2
+        assert per_cycle < cycle_time * 0.01, f"Tracing zu teuer: {per_cycle * 1e6:.1f}µs pro Zyklus"
+
+    @pytest.mark.performance
+    def test_soak_resources_flat(self, tmp_path):
+        """Beschleunigte Zyklen ohne Ressourcen-Anstieg - ein eingebautes FD-Leck wird erkannt"""
+        from soak_test import run_soak
+
+        result = run_soak(cycles=3000, sensors=8, sample_every=50)
+        assert result['passed'], f"Ressourcen-Anstieg: {result['failed']} {result['growth']}"
+        assert result['read_stats']['total_readings'] == 3000 * 8
+
+        leaked = []
+
+        def leak(cycle):
+            if cycle % 25 == 0:
+                leaked.append(open(tmp_path / f'leak-{cycle}', 'w'))
+
+        try:
+            result = run_soak(cycles=1000, sensors=2, sample_every=25, workload=leak)
+        finally:
+            for f in leaked:
+                f.close()
+        assert result['failed'] == ['open_fds']
+
+    @pytest.mark.performance
+    def test_summary_logging_io_reduction(self):
+        """summary-Modus: Formatierung, write()-Aufrufe und Bytes unter 10 % des detailed-Modus"""
+        import io
+        import logging
+        import sensor_monitor
+        from log_sink import CYCLE_SUMMARY, BatchingLogSink
+        from soak_test import build_monitor
+
+        class CountingStream(io.StringIO):
+            writes = 0
+
+            def write(self, text):
+                self.writes += 1
+                return super().write(text)
+
+        class CountingFormatter(logging.Formatter):
+            calls = 0
+
+            def format(self, record):
+                self.calls += 1
+                return super().format(record)
+
+        def run(mode, cycles=200):
+            stream, formatter = CountingStream(), CountingFormatter('%(asctime)s - %(levelname)s - %(message)s')
+            handler = logging.StreamHandler(stream)
+            if mode == 'detailed':
+                handler.setFormatter(formatter)
+            else:
+                handler = BatchingLogSink([handler], summary=True, flush_interval=3600)
+                handler.setFormatter(formatter)
+            monitor = build_monitor(sensors=8)
+            logger = sensor_monitor.logger
+            saved = (logger.handlers, logger.propagate, logger.level)
+            logger.handlers, logger.propagate = [handler], False
+            logger.setLevel(logging.INFO)
+            try:
+                for cycle in range(cycles):
+                    ds_temps, _, _ = monitor.single_reading()
+                    logger.info("📊 Zyklus #%d: %d Sensoren", cycle, len(ds_temps), extra=CYCLE_SUMMARY)
+                    if cycle % 50 == 49:
+                        handler.flush()
+            finally:
+                logger.handlers, logger.propagate = saved[:2]
+                logger.setLevel(saved[2])
+                monitor.close()
+                handler.close()
+            return formatter.calls, stream.writes, len(stream.getvalue().encode())
+
+        detailed = run('detailed')
+        summary = run('summary')
+        print(f"\nLogging detailed: {detailed}, summary: {summary} (Formatierungen, write(), Bytes)")
+        for full, reduced in zip(detailed, summary):
+            assert reduced < full * 0.1
 
 if __name__ == "__main__":
     # Tests ausführen
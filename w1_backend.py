@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+1-Wire Backends für DS18B20 Sensoren
+Der Pi5DS18B20Manager liest nicht mehr direkt aus /sys/bus/w1/devices, sondern über
+ein Backend:
+- SysfsW1Backend: echte Hardware (w1-gpio Kernel-Treiber)
+- FakeTreeW1Backend: gleiche Dateistruktur in einem Temp-Verzeichnis (Tests)
+- SimulatedW1Backend: In-Memory Simulator mit Konvertierungszeit, CRC-Fehlern ("NO"),
+  85 °C Power-On-Reset Werten und verschwindenden Geräten - 8 bis 500 Sensoren ohne Hardware
+
+Config (config.ini):
+    [hardware]
+    w1_backend = sysfs          # sysfs, fake oder simulated
+"""
+
+import configparser
+import glob
+import logging
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYSFS_BASE_DIR = '/sys/bus/w1/devices/'
+# Kernel >= 5.10: eine Konvertierung für alle Sensoren am Bus ("trigger")
+BULK_READ_FILE = 'w1_bus_master1/therm_bulk_read'
+BACKENDS = ('sysfs', 'fake', 'simulated')
+
+# Rohwert nach Power-On-Reset: Sensor hat noch nicht konvertiert
+POWER_ON_RESET_MILLI = 85000
+
+
+def crc8(data: bytes) -> int:
+    """Dallas/Maxim CRC-8 (wie im DS18B20 Scratchpad)"""
+    crc = 0
+    for byte in data:
+        for _ in range(8):
+            mix = (crc ^ byte) & 0x01
+            crc >>= 1
+            if mix:
+                crc ^= 0x8C
+            byte >>= 1
+    return crc
+
+
+def w1_slave_text(milli_celsius: int, crc_ok: bool = True) -> str:
+    """Inhalt einer w1_slave Datei wie vom Kernel-Treiber (Scratchpad, CRC, t=)"""
+    raw = int(round(milli_celsius * 16 / 1000)) & 0xFFFF
+    scratchpad = bytes([raw & 0xFF, raw >> 8, 0x4B, 0x46, 0x7F, 0xFF, 0x0C, 0x10])
+    crc = crc8(scratchpad)
+    if not crc_ok:
+        crc ^= 0x5A
+    data = ' '.join(f'{b:02x}' for b in scratchpad + bytes([crc]))
+    return f"{data} : crc={crc:02x} {'YES' if crc_ok else 'NO'}\n{data} t={milli_celsius}\n"
+
+
+def is_power_on_reset(lines: List[str]) -> bool:
+    """85.000 °C ohne Konvertierung - kein gültiger Messwert"""
+    return len(lines) > 1 and lines[1].strip().endswith(f't={POWER_ON_RESET_MILLI}')
+
+
+class W1Backend:
+    """Schnittstelle: Geräte finden und w1_slave Zeilen lesen"""
+
+    name = 'base'
+
+    def available(self) -> bool:
+        """Ist der Bus vorhanden (z.B. 1-Wire Overlay aktiviert)?"""
+        return True
+
+    def discover(self) -> List[str]:
+        """IDs aller DS18B20 (Familie 28-*)"""
+        raise NotImplementedError
+
+    def device_folder(self, sensor_id: str) -> str:
+        """Geräte-Pfad (für Logs und Abwärtskompatibilität)"""
+        return sensor_id
+
+    def read(self, sensor_id: str) -> List[str]:
+        """w1_slave Zeilen eines Sensors - [] wenn nicht lesbar"""
+        raise NotImplementedError
+
+    def supports_bulk_conversion(self) -> bool:
+        return False
+
+    def bulk_convert(self):
+        """Alle Sensoren gleichzeitig konvertieren - folgende Lesungen warten nicht erneut"""
+
+    def close(self):
+        pass
+
+
+class SysfsW1Backend(W1Backend):
+    """Echte Hardware über das w1-gpio sysfs Interface"""
+
+    name = 'sysfs'
+
+    def __init__(self, base_dir: str = SYSFS_BASE_DIR):
+        self.base_dir = os.path.join(base_dir, '')
+
+    def available(self) -> bool:
+        return os.path.exists(self.base_dir)
+
+    def discover(self) -> List[str]:
+        return [folder.split('/')[-1] for folder in glob.glob(self.base_dir + '28-*')]
+
+    def device_folder(self, sensor_id: str) -> str:
+        return self.base_dir + sensor_id
+
+    def read(self, sensor_id: str) -> List[str]:
+        device_file = self.device_folder(sensor_id) + '/w1_slave'
+        try:
+            with open(device_file, 'r') as f:
+                return f.readlines()
+        except Exception as e:
+            logger.error(f"❌ Pi 5 Lesefehler {device_file}: {e}")
+            return []
+
+    def supports_bulk_conversion(self) -> bool:
+        return os.path.exists(self.base_dir + BULK_READ_FILE)
+
+    def bulk_convert(self):
+        with open(self.base_dir + BULK_READ_FILE, 'w') as f:
+            f.write('trigger\n')
+
+
+class FakeTreeW1Backend(SysfsW1Backend):
+    """sysfs-Struktur in einem Temp-Verzeichnis - echte Datei-Zugriffe ohne Hardware"""
+
+    name = 'fake'
+
+    def __init__(self, base_dir: Optional[str] = None, sensors: int = 0):
+        self._owns_dir = base_dir is None
+        super().__init__(base_dir or tempfile.mkdtemp(prefix='w1-fake-'))
+        os.makedirs(self.base_dir, exist_ok=True)
+        for i in range(sensors):
+            self.add_device(simulated_sensor_id(i), 20000 + 500 * i)
+
+    def add_device(self, sensor_id: str, milli_celsius: int = 20000, crc_ok: bool = True):
+        os.makedirs(self.device_folder(sensor_id), exist_ok=True)
+        self.set_reading(sensor_id, milli_celsius, crc_ok)
+
+    def set_reading(self, sensor_id: str, milli_celsius: int, crc_ok: bool = True):
+        """w1_slave atomar ersetzen (Leser sehen nie eine halbe Datei)"""
+        path = self.device_folder(sensor_id) + '/w1_slave'
+        with open(path + '.tmp', 'w') as f:
+            f.write(w1_slave_text(milli_celsius, crc_ok))
+        os.replace(path + '.tmp', path)
+
+    def remove_device(self, sensor_id: str):
+        shutil.rmtree(self.device_folder(sensor_id), ignore_errors=True)
+
+    def close(self):
+        if self._owns_dir:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def simulated_sensor_id(index: int) -> str:
+    return f'28-{index + 1:012x}'
+
+
+class SimulatedW1Backend(W1Backend):
+    """In-Memory 1-Wire Bus mit Konvertierungszeit, CRC-Fehlern, 85 °C Resets und Ausfällen
+
+    Temperaturen kommen aus `source(sensor_id, t)` (Standard: langsame Schwingung um
+    20-41 °C plus Rauschen) und werden wie beim DS18B20 auf 1/16 °C gerundet.
+    Mit shared_bus konvertiert - wie beim Kernel-Treiber - immer nur ein Sensor gleichzeitig.
+    """
+
+    name = 'simulated'
+
+    def __init__(self, sensors: int = 8, conversion_time: float = 0.75, crc_error_rate: float = 0.0,
+                 power_on_reset_rate: float = 0.0, dropout_rate: float = 0.0, shared_bus: bool = True,
+                 seed: Optional[int] = None, source: Optional[Callable[[str, float], float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.sensor_ids = [simulated_sensor_id(i) for i in range(sensors)]
+        self.conversion_time = conversion_time
+        self.crc_error_rate = crc_error_rate
+        self.power_on_reset_rate = power_on_reset_rate
+        self.dropout_rate = dropout_rate
+        self.source = source or self._default_source
+        self.clock = clock
+        self.random = random.Random(seed)
+        self._bus = threading.Lock() if shared_bus else None
+        self._lock = threading.Lock()
+        self._missing = set()
+        self._converted = set()
+        self._overrides: Dict[str, float] = {}
+        # missing: alle Lesefehler ohne Gerät, dropouts: davon die zufälligen Wackelkontakte
+        self.stats = {'reads': 0, 'conversions': 0, 'crc_errors': 0, 'power_on_resets': 0, 'missing': 0,
+                      'dropouts': 0}
+
+    @staticmethod
+    def _default_source(sensor_id: str, t: float) -> float:
+        index = int(sensor_id[3:], 16) - 1
+        return 20.0 + (index % 8) * 3.0 + 2.0 * math.sin(2 * math.pi * t / 5400 + index)
+
+    # ------------------------------------------------------------------
+    # Steuerung für Tests und Benchmarks
+    # ------------------------------------------------------------------
+    def set_temperature(self, sensor_id: str, celsius: Optional[float]):
+        """Festen Wert vorgeben (None: wieder aus source)"""
+        with self._lock:
+            if celsius is None:
+                self._overrides.pop(sensor_id, None)
+            else:
+                self._overrides[sensor_id] = celsius
+
+    def remove_device(self, sensor_id: str):
+        with self._lock:
+            self._missing.add(sensor_id)
+
+    def restore_device(self, sensor_id: str):
+        with self._lock:
+            self._missing.discard(sensor_id)
+
+    # ------------------------------------------------------------------
+    # W1Backend
+    # ------------------------------------------------------------------
+    def discover(self) -> List[str]:
+        with self._lock:
+            return [s for s in self.sensor_ids if s not in self._missing]
+
+    def device_folder(self, sensor_id: str) -> str:
+        return f'sim://{sensor_id}'
+
+    def _convert(self):
+        if self._bus is not None:
+            with self._bus:
+                self._sleep()
+        else:
+            self._sleep()
+
+    def _sleep(self):
+        with self._lock:
+            self.stats['conversions'] += 1
+        if self.conversion_time > 0:
+            time.sleep(self.conversion_time)
+
+    def supports_bulk_conversion(self) -> bool:
+        return True
+
+    def bulk_convert(self):
+        self._convert()
+        with self._lock:
+            self._converted = set(self.sensor_ids) - self._missing
+
+    def read(self, sensor_id: str) -> List[str]:
+        # Nach bulk_convert liegt das Ergebnis schon im Scratchpad
+        with self._lock:
+            converted = sensor_id in self._converted
+            self._converted.discard(sensor_id)
+        if not converted:
+            self._convert()
+
+        with self._lock:
+            self.stats['reads'] += 1
+            # Gerät verschwindet vom Bus (Wackelkontakt) - zufällig oder dauerhaft.
+            # Simulierte Fehler sind gewollt: nur DEBUG, gezählt wird in stats
+            removed = sensor_id not in self.sensor_ids or sensor_id in self._missing
+            if removed or self.random.random() < self.dropout_rate:
+                self.stats['missing'] += 1
+                self.stats['dropouts'] += not removed
+                logger.debug("🔌 Simuliert: %s/w1_slave nicht gefunden", self.device_folder(sensor_id))
+                return []
+            crc_ok = self.random.random() >= self.crc_error_rate
+            power_on_reset = self.random.random() < self.power_on_reset_rate
+            override = self._overrides.get(sensor_id)
+            noise = self.random.gauss(0.0, 0.05)
+            self.stats['crc_errors'] += not crc_ok
+            self.stats['power_on_resets'] += power_on_reset
+
+        if not crc_ok:
+            logger.debug("🔌 Simuliert: CRC-Fehler bei %s", sensor_id)
+        if power_on_reset:
+            logger.debug("🔌 Simuliert: Power-On-Reset (85 °C) bei %s", sensor_id)
+            milli = POWER_ON_RESET_MILLI
+        else:
+            celsius = override if override is not None else self.source(sensor_id, self.clock()) + noise
+            milli = int(round(celsius * 16) * 1000 / 16)  # 12 Bit: 1/16 °C
+        return w1_slave_text(milli, crc_ok).splitlines(keepends=True)
+
+
+def create_backend(kind: str = 'sysfs', **options) -> W1Backend:
+    """Backend nach Name ('sysfs', 'fake', 'simulated')"""
+    if kind == 'sysfs':
+        return SysfsW1Backend(**options)
+    if kind == 'fake':
+        return FakeTreeW1Backend(**options)
+    if kind == 'simulated':
+        return SimulatedW1Backend(**options)
+    raise ValueError(f"Unbekanntes 1-Wire Backend: {kind} (erlaubt: {', '.join(BACKENDS)})")
+
+
+def backend_from_config(config: configparser.ConfigParser) -> W1Backend:
+    """Backend aus [hardware] w1_backend (Standard: echte Hardware)"""
+    kind = config.get('hardware', 'w1_backend', fallback='sysfs').strip().strip('"')
+    if kind == 'simulated':
+        backend = SimulatedW1Backend(
+            sensors=config.getint('hardware', 'ds18b20_count', fallback=8),
+            conversion_time=config.getfloat('hardware', 'w1_conversion_time', fallback=0.75),
+            crc_error_rate=config.getfloat('hardware', 'w1_crc_error_rate', fallback=0.0),
+            power_on_reset_rate=config.getfloat('hardware', 'w1_power_on_reset_rate', fallback=0.0),
+            dropout_rate=config.getfloat('hardware', 'w1_dropout_rate', fallback=0.0))
+    elif kind == 'fake':
+        # Vorhandenen Baum nutzen - sonst einen neuen mit ds18b20_count Sensoren anlegen
+        base_dir = config.get('hardware', 'w1_base_dir', fallback='').strip().strip('"') or None
+        backend = FakeTreeW1Backend(base_dir, sensors=0 if base_dir else
+                                    config.getint('hardware', 'ds18b20_count', fallback=8))
+    else:
+        backend = create_backend(kind, base_dir=config.get('hardware', 'w1_base_dir',
+                                                            fallback=SYSFS_BASE_DIR).strip().strip('"'))
+    if kind != 'sysfs':
+        logger.info(f"🧪 1-Wire Backend: {kind} ({backend.device_folder('')})")
+    return backend
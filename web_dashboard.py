@@ -4,8 +4,18 @@ Web Dashboard für Pi 5 Sensor Monitor
 Minimales Flask-Interface für Live-Daten und System-Status
 """
 
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+from dashboard_server import (read_server_config, resolve_async_mode, monkey_patch,
+                              offload_blocking, install_json_compression, run_server)
+
+# Async-Modus vor allen weiteren Imports festlegen - eventlet/gevent müssen
+# die Standardbibliothek patchen, bevor Flask und threading geladen werden
+SERVER_CONFIG = read_server_config('config.ini')
+ASYNC_MODE = resolve_async_mode(SERVER_CONFIG['async_mode'])
+if __name__ == '__main__':
+    monkey_patch(ASYNC_MODE)
+
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 import time
 import threading
@@ -13,6 +23,17 @@ from datetime import datetime
 import logging
 import configparser
 
+from sensor_snapshot import SensorSnapshotCache
+from metrics_exporter import SnapshotMetricsCollector, create_registry, render_metrics
+from mqtt_queue import queue_depth, queue_path
+from dashboard_broadcast import SnapshotBroadcaster, LIVE_ROOM
+from sensor_history import SensorHistory, parse_time
+from heating_circuits import HeatPumpCycleDetector
+from heating_scenario import HeatingScenario
+from pipeline_tracing import TRACER, configure_tracer, stage
+from w1_backend import backend_from_config
+from sensor_rules import SensorStalenessTracker, expected_sensors, STATE_OFFLINE, STATE_STALE
+
 # Projekt-Imports
 try:
     from sensor_monitor import Pi5SensorMonitor
@@ -23,12 +44,9 @@ except ImportError:
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'pi5-sensor-secret-key-2024'
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-# Globale Variablen
-current_sensor_data = {}
-monitoring_active = False
-monitoring_thread = None
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    message_queue=SERVER_CONFIG['message_queue'])
+install_json_compression(app, SERVER_CONFIG['gzip_min_size'], SERVER_CONFIG['gzip_level'])
 
 logger = logging.getLogger(__name__)
 
@@ -36,84 +54,210 @@ class WebDashboardService:
     """Web Dashboard Service für Pi 5 Sensor Monitor"""
     
     def __init__(self):
-        self.config = configparser.ConfigParser()
+        self.config = configparser.ConfigParser(inline_comment_prefixes=('#',))
         self.config.read('config.ini')
         
+        self.sensor_monitor = None
+        self.advanced_monitoring = None
+        # Demo-Betrieb: Daten aus dem Heizungs-Szenario statt von der Hardware
+        self.demo_mode = self.config.getboolean('dashboard', 'demo_mode', fallback=False)
+        self.demo_speed = self.config.getfloat('scenario', 'speed', fallback=60.0)
+        self.scenario = None
+        if SENSOR_AVAILABLE and not self.demo_mode:
+            self.sensor_monitor = Pi5SensorMonitor(
+                backend=backend_from_config(self.config),
+                bulk_conversion=self.config.getboolean('performance', 'bulk_conversion', fallback=False),
+                dht_cache_seconds=self.config.getfloat('performance', 'dht22_cache_seconds', fallback=0.0))
         if SENSOR_AVAILABLE:
-            self.sensor_monitor = Pi5SensorMonitor()
-            self.advanced_monitoring = AdvancedMonitoringService()
+            # Kein eigener Exporter auf Port 8000 - System-Metriken laufen über /metrics
+            self.advanced_monitoring = AdvancedMonitoringService(start_exporter=False)
         
         self.last_update = None
         self.system_stats = {}
+        
+        # Ein gemeinsamer Snapshot für alle Clients - die Busse werden nur vom
+        # Hintergrund-Thread gelesen, egal wie viele Dashboards offen sind
+        self.snapshot = SensorSnapshotCache(
+            offload_blocking(self.get_sensor_data, ASYNC_MODE),
+            ttl=self.config.getfloat('dashboard', 'snapshot_ttl', fallback=5.0),
+            refresh_interval=self.config.getfloat('dashboard', 'refresh_interval', fallback=5.0)
+        )
+        
+        # Verlauf für /api/history - In-Process Ringpuffer statt InfluxDB-Abfrage
+        self.history = SensorHistory(
+            retention_hours=self.config.getfloat('dashboard', 'history_retention_hours', fallback=168.0),
+            resolution=self.config.getfloat('dashboard', 'history_resolution', fallback=10.0)
+        )
+        self.history_file = self.config.get('dashboard', 'history_file', fallback='')
+        if self.history_file:
+            self.history.load(self.history_file)
+        self.snapshot.add_listener(self.history.on_snapshot)
+        
+        # Ausfall-Erkennung pro Sensor (online/stale/offline) - vor dem Broadcaster,
+        # damit system_update bereits den neuen Zustand enthält
+        self.staleness = SensorStalenessTracker.from_config(self.config)
+        if SENSOR_AVAILABLE:
+            self.staleness.add_sensors(expected_sensors(self.config))
+        self.snapshot.add_listener(self.on_snapshot_staleness)
+        
+        # Verdichter-Takte der Wärmepumpe für /metrics - laufend aus dem Snapshot. Mit Advanced
+        # Monitoring dessen Detektor, den der Monitoring-Zyklus bereits einmal pro Snapshot füttert
+        if self.advanced_monitoring is not None:
+            self.heat_pump = self.advanced_monitoring.sensor_monitor.heat_pump
+        else:
+            self.heat_pump = HeatPumpCycleDetector.from_config(self.config)
+            if self.heat_pump is not None:
+                self.snapshot.add_listener(self.on_snapshot_heat_pump)
+        
+        # Regeln, Anomalien, Ausfall- und Takt-Erkennung einmal pro neuem Snapshot mit dessen
+        # Messzeit - /api/system und system_update liefern nur das letzte Ergebnis
+        self.monitoring_results = None
+        if self.advanced_monitoring is not None:
+            self.snapshot.add_listener(self.on_snapshot_monitoring)
+        
+        # Ein Broadcaster für alle Clients - getrieben von der Snapshot-Erfassung
+        self.broadcaster = SnapshotBroadcaster(
+            socketio.emit,
+            system_status=self.get_system_status,
+            system_interval=self.config.getfloat('dashboard', 'system_interval', fallback=15.0)
+        )
+        self.snapshot.add_listener(self.broadcaster.on_snapshot)
+        
+        # Stufen-Zeitmessung: Zyklus beginnt mit der Erfassung, endet nach dem letzten Listener
+        configure_tracer(self.config)
+        self.snapshot.add_listener(self.on_snapshot_trace)
+        
+        # Prometheus /metrics (Scrape-Job pi5-sensors) - nur aus Snapshot und Zählern
+        # Ohne eigene Angabe dieselbe Datei wie die Bridge ([mqtt] queue_file) - fehlt sie, kein Wert
+        mqtt_queue_file = (self.config.get('dashboard', 'mqtt_queue_file', fallback='').strip()
+                           or queue_path(self.config))
+        queue_depths = {'mqtt_outbox': lambda: queue_depth(mqtt_queue_file)}
+        self.metrics_registry = create_registry(SnapshotMetricsCollector(
+            self.snapshot,
+            sensor_monitor=self.sensor_monitor,
+            system_sampler=self.advanced_monitoring.system_monitor.sampler if self.advanced_monitoring else None,
+            queue_depths=queue_depths,
+            staleness=self.staleness,
+            heat_pump=self.heat_pump,
+            tracer=TRACER
+        ))
+    
+    def on_snapshot_staleness(self, snapshot):
+        """Snapshot-Listener: letzte gültige Messzeit pro Sensor eintragen"""
+        values = {sensor: (reading or {}).get('value') for sensor, reading in snapshot.data.items()}
+        for sensor, event, seconds in self.staleness.update_data(values, snapshot.monotonic):
+            logger.info(f"📡 Sensor {sensor}: {event} ({seconds:.0f}s)")
+    
+    def on_snapshot_heat_pump(self, snapshot):
+        """Snapshot-Listener: Vorlauf/Rücklauf in den Takt-Detektor"""
+        values = {sensor: (reading or {}).get('value') for sensor, reading in snapshot.data.items()}
+        for event in self.heat_pump.update_data(values, snapshot.monotonic):
+            logger.info(f"♨️ Wärmepumpe: {event}")
+    
+    def on_snapshot_monitoring(self, snapshot):
+        """Snapshot-Listener: Monitoring-Zyklus für genau diese Messung"""
+        values = {sensor: reading['value'] for sensor, reading in snapshot.data.items()
+                  if reading and 'value' in reading}
+        self.monitoring_results = self.advanced_monitoring.run_monitoring_cycle(values, now=snapshot.monotonic)
+    
+    def on_snapshot_trace(self, snapshot):
+        """Snapshot-Listener (zuletzt registriert): Trace des Zyklus abschließen"""
+        TRACER.finish()
+    
+    def close(self):
+        """Beim Beenden des Servers: Erfassung stoppen, Verlauf sichern, offene E-Mail Alerts zustellen"""
+        self.snapshot.stop()
+        if self.history_file:
+            self.history.save(self.history_file)
+        if self.advanced_monitoring is not None:
+            self.advanced_monitoring.alert_manager.close()
+    
+    def sensor_states(self):
+        """Zustand aller Sensoren (online/stale/offline) für Dashboard und API"""
+        return self.staleness.snapshot()
     
     def get_sensor_data(self):
-        """Holt aktuelle Sensor-Daten"""
-        if not SENSOR_AVAILABLE:
+        """Holt aktuelle Sensor-Daten (Hardware-Lesung - nur über self.snapshot aufrufen)"""
+        TRACER.begin('dashboard')
+        if not SENSOR_AVAILABLE or self.demo_mode:
             return self._get_mock_data()
         
         try:
             ds_temps, dht_temp, dht_humidity = self.sensor_monitor.single_reading()
-            
-            # Formatiere Daten für Web-Interface
-            formatted_data = {}
-            
-            # DS18B20 Sensoren
-            for sensor_name, temp in ds_temps.items():
-                if temp is not None:
-                    label = self.config.get('labels', sensor_name.lower(), fallback=sensor_name)
-                    formatted_data[sensor_name] = {
-                        'label': label,
-                        'value': round(temp, 1),
-                        'unit': '°C',
-                        'type': 'temperature',
-                        'status': 'ok' if 10 <= temp <= 30 else 'warning'
-                    }
-            
-            # DHT22 Sensor
-            if dht_temp is not None:
-                formatted_data['DHT22_temp'] = {
-                    'label': 'Raumtemperatur',
-                    'value': round(dht_temp, 1),
-                    'unit': '°C',
-                    'type': 'temperature',
-                    'status': 'ok' if 18 <= dht_temp <= 25 else 'warning'
-                }
-            
-            if dht_humidity is not None:
-                formatted_data['DHT22_humidity'] = {
-                    'label': 'Luftfeuchtigkeit',
-                    'value': round(dht_humidity, 1),
-                    'unit': '%',
-                    'type': 'humidity',
-                    'status': 'ok' if 30 <= dht_humidity <= 70 else 'warning'
-                }
-            
             self.last_update = datetime.now().isoformat()
-            return formatted_data
+            return self._format_sensor_data(ds_temps, dht_temp, dht_humidity)
             
         except Exception as e:
             logger.error(f"Sensor-Daten Fehler: {e}")
             return {}
     
+    def _format_sensor_data(self, ds_temps, dht_temp, dht_humidity):
+        """Formatiere Daten für Web-Interface"""
+        with stage('label'):
+            return self._label_sensor_data(ds_temps, dht_temp, dht_humidity)
+    
+    def _label_sensor_data(self, ds_temps, dht_temp, dht_humidity):
+        formatted_data = {}
+        
+        # DS18B20 Sensoren
+        for sensor_name, temp in ds_temps.items():
+            if temp is not None:
+                label = self.config.get('labels', sensor_name.lower(), fallback=sensor_name).strip('"')
+                formatted_data[sensor_name] = {
+                    'label': label,
+                    'value': round(temp, 1),
+                    'unit': '°C',
+                    'type': 'temperature',
+                    'status': 'ok' if 10 <= temp <= 30 else 'warning'
+                }
+        
+        # DHT22 Sensor
+        if dht_temp is not None:
+            formatted_data['DHT22_temp'] = {
+                'label': 'Raumtemperatur',
+                'value': round(dht_temp, 1),
+                'unit': '°C',
+                'type': 'temperature',
+                'status': 'ok' if 18 <= dht_temp <= 25 else 'warning'
+            }
+        
+        if dht_humidity is not None:
+            formatted_data['DHT22_humidity'] = {
+                'label': 'Luftfeuchtigkeit',
+                'value': round(dht_humidity, 1),
+                'unit': '%',
+                'type': 'humidity',
+                'status': 'ok' if 30 <= dht_humidity <= 70 else 'warning'
+            }
+        
+        return formatted_data
+    
     def get_system_status(self):
         """Holt System-Status"""
         if not SENSOR_AVAILABLE:
             return self._get_mock_system_status()
         
         try:
-            # Advanced Monitoring verwenden
-            mock_sensor_data = {k: v['value'] for k, v in current_sensor_data.items() 
-                              if v and 'value' in v}
-            
-            monitoring_results = self.advanced_monitoring.run_monitoring_cycle(mock_sensor_data)
+            # Ergebnis des letzten Snapshots (on_snapshot_monitoring) - Anfragen werten nichts aus
+            monitoring_results = self.monitoring_results
+            if monitoring_results is not None:
+                system = monitoring_results['system_health']
+                sensors = monitoring_results['sensor_health']
+            else:
+                # Noch keine Messung - System-Werte direkt aus dem Sampler
+                system = self.advanced_monitoring.system_monitor.sampler.latest()
+                sensors = {'active_sensors': 0, 'total_sensors': 0}
             
             return {
-                'cpu_usage': monitoring_results['system_health']['cpu_usage'],
-                'memory_usage': monitoring_results['system_health']['memory_usage'],
-                'disk_usage': monitoring_results['system_health']['disk_usage'],
-                'cpu_temperature': monitoring_results['system_health'].get('cpu_temperature'),
-                'active_sensors': monitoring_results['sensor_health']['active_sensors'],
-                'total_sensors': monitoring_results['sensor_health']['total_sensors'],
+                'cpu_usage': system['cpu_usage'],
+                'memory_usage': system['memory_usage'],
+                'disk_usage': system['disk_usage'],
+                'cpu_temperature': system.get('cpu_temperature'),
+                'active_sensors': sensors['active_sensors'],
+                'total_sensors': sensors['total_sensors'],
+                'percentiles': self.advanced_monitoring.system_monitor.sampler.summary(),
+                'stale_sensors': self.staleness.sensors_in(STATE_STALE),
+                'offline_sensors': self.staleness.sensors_in(STATE_OFFLINE),
                 'last_update': self.last_update
             }
         except Exception as e:
@@ -121,18 +265,13 @@ class WebDashboardService:
             return self._get_mock_system_status()
     
     def _get_mock_data(self):
-        """Mock-Daten für Tests ohne Hardware"""
-        import random
-        return {
-            'DS18B20_1': {'label': 'Vorlauf', 'value': round(random.uniform(20, 25), 1), 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
-            'DS18B20_2': {'label': 'Rücklauf', 'value': round(random.uniform(18, 22), 1), 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
-            'DS18B20_3': {'label': 'Warmwasser', 'value': round(random.uniform(45, 55), 1), 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
-            'DS18B20_4': {'label': 'Außentemperatur', 'value': round(random.uniform(-5, 15), 1), 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
-            'DS18B20_5': {'label': 'Heizraum', 'value': round(random.uniform(15, 20), 1), 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
-            'DS18B20_6': {'label': 'Puffer oben', 'value': round(random.uniform(40, 50), 1), 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
-            'DHT22_temp': {'label': 'Raumtemperatur', 'value': round(random.uniform(19, 23), 1), 'unit': '°C', 'type': 'temperature', 'status': 'ok'},
-            'DHT22_humidity': {'label': 'Luftfeuchtigkeit', 'value': round(random.uniform(40, 60), 1), 'unit': '%', 'type': 'humidity', 'status': 'ok'}
-        }
+        """Mock-Daten ohne Hardware - aus dem thermischen Heizungs-Szenario (Takte, Fehler, Tagesgang)"""
+        if self.scenario is None:
+            self.scenario = HeatingScenario.from_config(self.config)
+        values = self.scenario.sample(speed=self.demo_speed)
+        ds_temps = {sensor: value for sensor, value in values.items() if sensor.startswith('DS18B20')}
+        self.last_update = datetime.now().isoformat()
+        return self._format_sensor_data(ds_temps, values.get('DHT22_temp'), values.get('DHT22_humidity'))
     
     def _get_mock_system_status(self):
         """Mock System-Status"""
@@ -144,29 +283,81 @@ class WebDashboardService:
             'cpu_temperature': round(random.uniform(45, 55), 1),
             'active_sensors': 7,
             'total_sensors': 7,
+            'stale_sensors': self.staleness.sensors_in(STATE_STALE),
+            'offline_sensors': self.staleness.sensors_in(STATE_OFFLINE),
             'last_update': datetime.now().isoformat()
         }
 
-# Dashboard Service initialisieren
-dashboard = WebDashboardService()
+# Dashboard Service - wird erst beim ersten Zugriff erzeugt, damit ein Import
+# weder Hardware-Erkennung noch DHT22/GPIO-Zugriff auslöst
+_dashboard = None
+_dashboard_lock = threading.Lock()
+
+def get_dashboard() -> WebDashboardService:
+    """Dashboard Service (lazy, einmalig pro Prozess)"""
+    global _dashboard
+    if _dashboard is None:
+        with _dashboard_lock:
+            if _dashboard is None:
+                _dashboard = WebDashboardService()
+    return _dashboard
 
 # Routes
 @app.route('/')
 def index():
-    """Haupt-Dashboard"""
-    return render_template('dashboard.html')
+    """Haupt-Dashboard (Template aus dem Speicher)"""
+    return Response(html_template, mimetype='text/html')
 
 @app.route('/api/sensors')
 def api_sensors():
-    """API: Aktuelle Sensor-Daten"""
-    global current_sensor_data
-    current_sensor_data = dashboard.get_sensor_data()
-    return jsonify(current_sensor_data)
+    """API: Aktuelle Sensor-Daten (aus dem gemeinsamen Snapshot)"""
+    return jsonify(get_dashboard().snapshot.get().data)
+
+@app.route('/api/sensors/status')
+def api_sensor_status():
+    """API: Zustand pro Sensor (online/stale/offline, Sekunden seit letztem Messwert)"""
+    return jsonify(get_dashboard().sensor_states())
 
 @app.route('/api/system')
 def api_system():
     """API: System-Status"""
-    return jsonify(dashboard.get_system_status())
+    return jsonify(get_dashboard().get_system_status())
+
+@app.route('/api/history')
+def api_history():
+    """API: Sensor-Verlauf (LTTB-reduziert) - ?sensor=…&from=…&to=…&points=N"""
+    history = get_dashboard().history
+    sensor = request.args.get('sensor')
+    if not sensor:
+        return jsonify({'sensors': history.sensors()})
+    
+    try:
+        end = parse_time(request.args.get('to'), time.time())
+        start = parse_time(request.args.get('from'), end - 86400)
+        points = min(max(int(request.args.get('points', 500)), 3), 5000)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return jsonify(history.query(sensor, start, end, points))
+    except KeyError:
+        return jsonify({'error': f'Unbekannter Sensor: {sensor}',
+                        'sensors': sorted(history.sensors())}), 404
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus Metrics (aus dem Snapshot - keine Hardware-Lesung)"""
+    body, content_type = render_metrics(get_dashboard().metrics_registry)
+    return Response(body, content_type=content_type)
+
+@app.route('/api/traces')
+def api_traces():
+    """API: Langsamste Erfassungszyklen mit Stufen-Aufschlüsselung - ?limit=N"""
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({'error': 'limit muss eine Zahl sein'}), 400
+    return jsonify({'summary': TRACER.summary(), 'slowest': TRACER.slowest(limit)})
 
 @app.route('/api/health')
 def api_health():
@@ -180,52 +371,36 @@ def api_health():
 # WebSocket Events
 @socketio.on('connect')
 def handle_connect():
-    """Client verbunden"""
+    """Client verbunden - vollständiger Stand als Basis für spätere Deltas"""
     emit('status', {'message': 'Verbunden mit Pi 5 Sensor Monitor'})
+    emit('sensor_snapshot', get_dashboard().broadcaster.full_frame())
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Client getrennt"""
-    print('Client disconnected')
+    get_dashboard().broadcaster.unsubscribe(request.sid)
+    leave_room(LIVE_ROOM)
 
 @socketio.on('start_monitoring')
 def handle_start_monitoring():
-    """Live-Monitoring starten"""
-    global monitoring_active, monitoring_thread
-    
-    if not monitoring_active:
-        monitoring_active = True
-        monitoring_thread = threading.Thread(target=live_monitoring_worker)
-        monitoring_thread.daemon = True
-        monitoring_thread.start()
-        emit('monitoring_status', {'active': True})
+    """Live-Monitoring für diesen Client starten"""
+    join_room(LIVE_ROOM)
+    count = get_dashboard().broadcaster.subscribe(request.sid)
+    logger.info(f"Live-Monitoring: {count} Abonnenten")
+    emit('sensor_snapshot', get_dashboard().broadcaster.full_frame())
+    emit('monitoring_status', {'active': True})
 
 @socketio.on('stop_monitoring')
 def handle_stop_monitoring():
-    """Live-Monitoring stoppen"""
-    global monitoring_active
-    monitoring_active = False
+    """Live-Monitoring für diesen Client stoppen - andere Clients laufen weiter"""
+    leave_room(LIVE_ROOM)
+    get_dashboard().broadcaster.unsubscribe(request.sid)
     emit('monitoring_status', {'active': False})
 
-def live_monitoring_worker():
-    """Worker für Live-Monitoring"""
-    global monitoring_active, current_sensor_data
-    
-    while monitoring_active:
-        try:
-            # Sensor-Daten aktualisieren
-            current_sensor_data = dashboard.get_sensor_data()
-            system_status = dashboard.get_system_status()
-            
-            # An alle Clients senden
-            socketio.emit('sensor_update', current_sensor_data)
-            socketio.emit('system_update', system_status)
-            
-            time.sleep(5)  # 5 Sekunden Intervall
-            
-        except Exception as e:
-            logger.error(f"Live-Monitoring Fehler: {e}")
-            time.sleep(10)
+@socketio.on('request_snapshot')
+def handle_request_snapshot():
+    """Resync nach verpasstem Delta-Frame"""
+    emit('sensor_snapshot', get_dashboard().broadcaster.full_frame())
 
 # HTML Template (minimal)
 html_template = '''
@@ -290,6 +465,7 @@ html_template = '''
                 </div>
             </div>
             <p>Aktive Sensoren: <span id="activeSensors">-</span></p>
+            <p>Offline: <span id="offlineSensors">-</span></p>
             <p>Letzte Aktualisierung: <span id="lastUpdate">-</span></p>
         </div>
         
@@ -301,14 +477,37 @@ html_template = '''
     <script>
         const socket = io();
         let monitoringActive = false;
+        let sensorState = {};
+        let lastSeq = null;
         
         socket.on('connect', function() {
             console.log('Verbunden mit Server');
             refreshData();
         });
         
-        socket.on('sensor_update', function(data) {
-            updateSensorDisplay(data);
+        socket.on('sensor_snapshot', function(frame) {
+            lastSeq = frame.seq;
+            if (frame.seq > 0) {
+                updateSensorDisplay(frame.sensors);
+            }
+        });
+        
+        socket.on('sensor_delta', function(frame) {
+            // Lücke in der Sequenz → vollständigen Stand anfordern
+            if (lastSeq === null || frame.seq !== lastSeq + 1) {
+                socket.emit('request_snapshot');
+                return;
+            }
+            lastSeq = frame.seq;
+            Object.entries(frame.changed).forEach(([key, change]) => {
+                sensorState[key] = Object.assign({}, sensorState[key], change);
+                renderSensorCard(key, sensorState[key]);
+            });
+            (frame.removed || []).forEach(key => {
+                delete sensorState[key];
+                const card = document.getElementById('sensor-' + key);
+                if (card) card.remove();
+            });
         });
         
         socket.on('system_update', function(data) {
@@ -339,23 +538,32 @@ html_template = '''
         }
         
         function updateSensorDisplay(sensors) {
-            const container = document.getElementById('sensorCards');
-            container.innerHTML = '';
-            
-            Object.entries(sensors).forEach(([key, sensor]) => {
-                if (sensor && sensor.value !== null) {
-                    const card = document.createElement('div');
-                    card.className = 'card';
-                    card.innerHTML = `
-                        <h4>${sensor.label}</h4>
-                        <div class="sensor-value ${sensor.status}">
-                            ${sensor.value} ${sensor.unit}
-                        </div>
-                        <small>Sensor: ${key}</small>
-                    `;
-                    container.appendChild(card);
-                }
-            });
+            sensorState = Object.assign({}, sensors);
+            document.getElementById('sensorCards').innerHTML = '';
+            Object.entries(sensorState).forEach(([key, sensor]) => renderSensorCard(key, sensor));
+        }
+        
+        function renderSensorCard(key, sensor) {
+            let card = document.getElementById('sensor-' + key);
+            if (!sensor || sensor.value === null) {
+                if (card) card.remove();
+                return;
+            }
+            if (!card) {
+                card = document.createElement('div');
+                card.className = 'card';
+                card.id = 'sensor-' + key;
+                card.innerHTML = `
+                    <h4></h4>
+                    <div class="sensor-value"></div>
+                    <small>Sensor: ${key}</small>
+                `;
+                document.getElementById('sensorCards').appendChild(card);
+            }
+            card.querySelector('h4').textContent = sensor.label;
+            const value = card.querySelector('.sensor-value');
+            value.className = 'sensor-value ' + sensor.status;
+            value.textContent = sensor.value + ' ' + sensor.unit;
         }
         
         function updateSystemDisplay(system) {
@@ -366,6 +574,9 @@ html_template = '''
                 system.cpu_temperature ? system.cpu_temperature + '°C' : '-';
             document.getElementById('activeSensors').textContent = 
                 system.active_sensors + '/' + system.total_sensors;
+            const offline = (system.offline_sensors || []).concat(
+                (system.stale_sensors || []).map(key => key + ' (verzögert)'));
+            document.getElementById('offlineSensors').textContent = offline.length ? offline.join(', ') : '-';
             document.getElementById('lastUpdate').textContent = 
                 new Date(system.last_update).toLocaleString();
         }
@@ -382,20 +593,20 @@ html_template = '''
 </html>
 '''
 
-# Template-Verzeichnis erstellen und HTML speichern
-import os
-template_dir = 'templates'
-if not os.path.exists(template_dir):
-    os.makedirs(template_dir)
-
-with open(os.path.join(template_dir, 'dashboard.html'), 'w', encoding='utf-8') as f:
-    f.write(html_template)
-
 if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     print("🌐 Pi 5 Sensor Monitor Web Dashboard")
     print("===================================")
     print("Starte Web-Server...")
-    print("URL: http://localhost:5000")
+    print(f"URL: http://localhost:{SERVER_CONFIG['port']} ({ASYNC_MODE})")
     print("Drücke Ctrl+C zum Beenden")
     
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False)
+    dashboard = get_dashboard()
+    dashboard.snapshot.start()
+    try:
+        run_server(app, socketio, SERVER_CONFIG, ASYNC_MODE)
+    finally:
+        dashboard.close()